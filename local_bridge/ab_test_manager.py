@@ -9,12 +9,18 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from collections import defaultdict
 import json
+import math
 import statistics
 from scipy import stats
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_, or_, case
 
-from models.database import Preset, Photo, LearningData, ABTest, ABTestAssignment, get_session
+from models.database import (
+    Preset, Photo, LearningData, ABTest, ABTestAssignment, ABTestVariantStats, get_session
+)
+
+
+VARIANTS = ('A', 'B')
 
 
 class ABTestManager:
@@ -35,6 +41,7 @@ class ABTestManager:
         self.db = db_session or get_session()
         self.min_samples_per_variant = 30  # 各バリアントの最小サンプル数
         self.significance_level = 0.05  # 有意水準（α = 0.05）
+        self.sequential_mixture_variance = 0.01  # 逐次検定の混合分布の分散（承認率差 ±10% 程度を想定）
     
     # ========== A/B Test Creation and Management ==========
     
@@ -85,6 +92,7 @@ class ABTestManager:
             status='active',
             start_date=datetime.utcnow()
         )
+        ab_test.variant_stats = [self._new_variant_stats(variant) for variant in VARIANTS]
         
         self.db.add(ab_test)
         self.db.commit()
@@ -197,23 +205,9 @@ class ABTestManager:
         
         # バリアントを決定（指定されていない場合は均等割り当て）
         if variant is None:
-            # 現在の割り当て数を取得
-            count_a = self.db.query(func.count(ABTestAssignment.id)).filter(
-                and_(
-                    ABTestAssignment.test_id == test_id,
-                    ABTestAssignment.variant == 'A'
-                )
-            ).scalar() or 0
-            
-            count_b = self.db.query(func.count(ABTestAssignment.id)).filter(
-                and_(
-                    ABTestAssignment.test_id == test_id,
-                    ABTestAssignment.variant == 'B'
-                )
-            ).scalar() or 0
-            
-            # 少ない方に割り当て
-            variant = 'A' if count_a <= count_b else 'B'
+            # 現在の割り当て数（集計テーブル）から少ない方に割り当て
+            variant_stats = self._load_variant_stats(test_id)
+            variant = 'A' if variant_stats['A'].assignments <= variant_stats['B'].assignments else 'B'
         
         # プリセットIDを決定
         preset_id = ab_test.preset_a_id if variant == 'A' else ab_test.preset_b_id
@@ -228,11 +222,106 @@ class ABTestManager:
         )
         
         self.db.add(assignment)
+        self._update_variant_stats(test_id, variant, {'assignments': 1})
         self.db.commit()
         self.db.refresh(assignment)
         
         return assignment
     
+    def assign_photos_to_variants(
+        self,
+        test_id: int,
+        photo_ids: List[int]
+    ) -> Dict[int, str]:
+        """
+        複数の写真をA/Bテストのバリアントに一括で割り当てる
+        
+        1トランザクションで割り当てを作成します。既存の割り当てはそのまま維持し、
+        新規の写真は割り当て数の少ない方から交互に割り当てます。
+        
+        Args:
+            test_id: A/BテストID
+            photo_ids: 写真IDのリスト
+        
+        Returns:
+            Dict[int, str]: 写真ID -> バリアント
+        """
+        ab_test = self.get_ab_test(test_id)
+        if not ab_test:
+            raise ValueError(f"A/B test with ID {test_id} not found")
+        
+        if ab_test.status != 'active':
+            raise ValueError(f"A/B test is not active (status: {ab_test.status})")
+        
+        photo_ids = list(dict.fromkeys(photo_ids))
+        
+        # 既存の割り当てを取得（SQLiteの変数上限を考慮して分割）
+        variants: Dict[int, str] = {}
+        for start in range(0, len(photo_ids), 500):
+            chunk = photo_ids[start:start + 500]
+            variants.update(
+                self.db.query(ABTestAssignment.photo_id, ABTestAssignment.variant).filter(
+                    and_(
+                        ABTestAssignment.test_id == test_id,
+                        ABTestAssignment.photo_id.in_(chunk)
+                    )
+                ).all()
+            )
+        
+        variant_stats = self._load_variant_stats(test_id)
+        counts = {variant: variant_stats[variant].assignments for variant in VARIANTS}
+        preset_ids = {'A': ab_test.preset_a_id, 'B': ab_test.preset_b_id}
+        added = {variant: 0 for variant in VARIANTS}
+        now = datetime.utcnow()
+        
+        new_assignments = []
+        for photo_id in photo_ids:
+            if photo_id in variants:
+                continue
+            variant = 'A' if counts['A'] <= counts['B'] else 'B'
+            counts[variant] += 1
+            added[variant] += 1
+            variants[photo_id] = variant
+            new_assignments.append({
+                'test_id': test_id,
+                'photo_id': photo_id,
+                'variant': variant,
+                'preset_id': preset_ids[variant],
+                'assigned_at': now
+            })
+        
+        if new_assignments:
+            self.db.bulk_insert_mappings(ABTestAssignment, new_assignments)
+            for variant in VARIANTS:
+                self._update_variant_stats(test_id, variant, {'assignments': added[variant]})
+            self.db.commit()
+        
+        return {photo_id: variants[photo_id] for photo_id in photo_ids}
+    
+    def assign_session_to_variants(self, test_id: int, session_id: int) -> Dict[int, str]:
+        """
+        セッションの写真をA/Bテストのバリアントに一括で割り当てる
+        
+        テストにコンテキストタグが設定されている場合は、そのタグの写真のみを対象にします。
+        
+        Args:
+            test_id: A/BテストID
+            session_id: セッションID
+        
+        Returns:
+            Dict[int, str]: 写真ID -> バリアント
+        """
+        ab_test = self.get_ab_test(test_id)
+        if not ab_test:
+            raise ValueError(f"A/B test with ID {test_id} not found")
+        
+        query = self.db.query(Photo.id).filter(Photo.session_id == session_id)
+        if ab_test.context_tag:
+            query = query.filter(Photo.context_tag == ab_test.context_tag)
+        
+        photo_ids = [photo_id for photo_id, in query.order_by(Photo.id).all()]
+        return self.assign_photos_to_variants(test_id, photo_ids)
+    
     def record_result(
         self,
         test_id: int,
@@ -259,11 +348,172 @@ class ABTestManager:
         if not assignment:
             raise ValueError(f"No assignment found for test {test_id}, photo {photo_id}")
         
+        # 集計値の差分（再記録の場合は以前の結果を差し引く）
+        deltas = self._result_deltas(approved, processing_time, 1)
+        if assignment.result_recorded_at is not None:
+            previous = self._result_deltas(assignment.approved, assignment.processing_time, -1)
+            for column, delta in previous.items():
+                deltas[column] += delta
+        
         assignment.approved = approved
         assignment.processing_time = processing_time
         assignment.result_recorded_at = datetime.utcnow()
         
+        self._update_variant_stats(test_id, assignment.variant, deltas)
+        self._record_likelihood_ratio(self._load_variant_stats(test_id))
+        self.db.commit()
+    
+    # ========== Variant Statistics ==========
+    
+    def _new_variant_stats(self, variant: str) -> 'ABTestVariantStats':
+        """空のバリアント集計を作成する"""
+        return ABTestVariantStats(
+            variant=variant,
+            assignments=0,
+            results=0,
+            approvals=0,
+            time_count=0,
+            time_sum=0.0,
+            time_sumsq=0.0,
+            sequential_max_ratio=1.0
+        )
+    
+    def _result_deltas(
+        self,
+        approved: Optional[bool],
+        processing_time: Optional[float],
+        sign: int
+    ) -> Dict[str, float]:
+        """
+        1件の結果が集計値に与える差分を計算する
+        
+        処理時間は従来どおり0またはNoneの場合は集計しない。
+        """
+        has_time = bool(processing_time)
+        return {
+            'results': sign,
+            'approvals': sign if approved else 0,
+            'time_count': sign if has_time else 0,
+            'time_sum': sign * processing_time if has_time else 0.0,
+            'time_sumsq': sign * processing_time * processing_time if has_time else 0.0
+        }
+    
+    def _update_variant_stats(self, test_id: int, variant: str, deltas: Dict[str, float]) -> None:
+        """
+        バリアント集計をSQLの加算で更新する（呼び出し元のトランザクション内で実行）
+        
+        Args:
+            test_id: A/BテストID
+            variant: バリアント
+            deltas: 列名 -> 加算値
+        """
+        values = {
+            getattr(ABTestVariantStats, column): getattr(ABTestVariantStats, column) + delta
+            for column, delta in deltas.items()
+            if delta
+        }
+        if not values:
+            return
+        
+        self.db.query(ABTestVariantStats).filter(
+            and_(
+                ABTestVariantStats.test_id == test_id,
+                ABTestVariantStats.variant == variant
+            )
+        ).update(values, synchronize_session=False)
+    
+    def _load_variant_stats(self, test_id: int) -> Dict[str, 'ABTestVariantStats']:
+        """
+        バリアント集計を取得する
+        
+        集計行がない場合（集計テーブル導入前に作成されたテスト）は割り当てから再構築します。
+        
+        Args:
+            test_id: A/BテストID
+        
+        Returns:
+            Dict[str, ABTestVariantStats]: バリアント -> 集計
+        """
+        rows = self.db.query(ABTestVariantStats).filter(
+            ABTestVariantStats.test_id == test_id
+        ).populate_existing().all()
+        
+        variant_stats = {row.variant: row for row in rows}
+        if len(variant_stats) < len(VARIANTS):
+            variant_stats = self.rebuild_variant_stats(test_id)
+        
+        return variant_stats
+    
+    def rebuild_variant_stats(self, test_id: int) -> Dict[str, 'ABTestVariantStats']:
+        """
+        割り当てテーブルからバリアント集計を再構築する
+        
+        Args:
+            test_id: A/BテストID
+        
+        Returns:
+            Dict[str, ABTestVariantStats]: バリアント -> 集計
+        """
+        has_result = ABTestAssignment.result_recorded_at.isnot(None)
+        has_time = and_(
+            has_result,
+            ABTestAssignment.processing_time.isnot(None),
+            ABTestAssignment.processing_time != 0
+        )
+        time = ABTestAssignment.processing_time
+        
+        rows = self.db.query(
+            ABTestAssignment.variant,
+            func.count(ABTestAssignment.id),
+            func.count(ABTestAssignment.result_recorded_at),
+            func.sum(case((and_(has_result, ABTestAssignment.approved.is_(True)), 1), else_=0)),
+            func.sum(case((has_time, 1), else_=0)),
+            func.sum(case((has_time, time), else_=0.0)),
+            func.sum(case((has_time, time * time), else_=0.0))
+        ).filter(
+            ABTestAssignment.test_id == test_id
+        ).group_by(
+            ABTestAssignment.variant
+        ).all()
+        aggregates = {row[0]: row[1:] for row in rows}
+        
+        variant_stats = {}
+        for variant in VARIANTS:
+            row = self.db.get(ABTestVariantStats, (test_id, variant))
+            if row is None:
+                row = self._new_variant_stats(variant)
+                row.test_id = test_id
+                self.db.add(row)
+            
+            values = aggregates.get(variant, (0, 0, 0, 0, 0.0, 0.0))
+            row.assignments, row.results, row.approvals, row.time_count = (int(v or 0) for v in values[:4])
+            row.time_sum, row.time_sumsq = (float(v or 0.0) for v in values[4:])
+            variant_stats[variant] = row
+        
+        # 過去の尤度比の推移は再構築できないため、現在の値から記録を再開する
+        self._record_likelihood_ratio(variant_stats)
         self.db.commit()
+        return variant_stats
+    
+    def _time_moments(self, row: 'ABTestVariantStats') -> Tuple[Optional[float], float]:
+        """
+        処理時間の平均と標本標準偏差を十分統計量から計算する
+        
+        Returns:
+            Tuple[Optional[float], float]: (平均, 標準偏差)
+        """
+        if not row.time_count:
+            return None, 0.0
+        
+        mean = row.time_sum / row.time_count
+        if row.time_count < 2:
+            return mean, 0.0
+        
+        variance = (row.time_sumsq - row.time_count * mean * mean) / (row.time_count - 1)
+        # 桁落ちによる誤差は分散0として扱う
+        if variance <= 1e-12 * max(mean * mean, 1.0):
+            variance = 0.0
+        return mean, math.sqrt(variance)
     
     # ========== Effectiveness Measurement ==========
     
@@ -281,45 +531,41 @@ class ABTestManager:
         if not ab_test:
             raise ValueError(f"A/B test with ID {test_id} not found")
         
-        # 各バリアントの結果を取得
-        assignments_a = self.db.query(ABTestAssignment).filter(
-            and_(
-                ABTestAssignment.test_id == test_id,
-                ABTestAssignment.variant == 'A',
-                ABTestAssignment.result_recorded_at.isnot(None)
-            )
-        ).all()
+        return self._effectiveness_from_stats(ab_test, self._load_variant_stats(test_id))
+    
+    def _effectiveness_from_stats(self, ab_test: 'ABTest', variant_stats: Dict[str, 'ABTestVariantStats']) -> Dict:
+        """
+        バリアント集計から効果測定結果を計算する
         
-        assignments_b = self.db.query(ABTestAssignment).filter(
-            and_(
-                ABTestAssignment.test_id == test_id,
-                ABTestAssignment.variant == 'B',
-                ABTestAssignment.result_recorded_at.isnot(None)
-            )
-        ).all()
+        Args:
+            ab_test: A/Bテスト
+            variant_stats: バリアント -> 集計
+        
+        Returns:
+            Dict: 効果測定結果
+        """
+        stats_a = variant_stats['A']
+        stats_b = variant_stats['B']
         
         # サンプル数チェック
-        if len(assignments_a) < self.min_samples_per_variant or \
-           len(assignments_b) < self.min_samples_per_variant:
+        if stats_a.results < self.min_samples_per_variant or \
+           stats_b.results < self.min_samples_per_variant:
             return {
                 'status': 'insufficient_data',
-                'test_id': test_id,
+                'test_id': ab_test.id,
                 'test_name': ab_test.name,
-                'samples_a': len(assignments_a),
-                'samples_b': len(assignments_b),
+                'samples_a': stats_a.results,
+                'samples_b': stats_b.results,
                 'min_required': self.min_samples_per_variant
             }
         
         # 承認率を計算
-        approval_rate_a = sum(1 for a in assignments_a if a.approved) / len(assignments_a)
-        approval_rate_b = sum(1 for a in assignments_b if a.approved) / len(assignments_b)
+        approval_rate_a = stats_a.approvals / stats_a.results
+        approval_rate_b = stats_b.approvals / stats_b.results
         
         # 処理時間を計算
-        times_a = [a.processing_time for a in assignments_a if a.processing_time]
-        times_b = [a.processing_time for a in assignments_b if a.processing_time]
-        
-        avg_time_a = statistics.mean(times_a) if times_a else None
-        avg_time_b = statistics.mean(times_b) if times_b else None
+        avg_time_a, _ = self._time_moments(stats_a)
+        avg_time_b, _ = self._time_moments(stats_b)
         
         # 相対的な改善率を計算
         approval_improvement = ((approval_rate_b - approval_rate_a) / approval_rate_a * 100) if approval_rate_a > 0 else 0
@@ -330,17 +576,17 @@ class ABTestManager:
         
         return {
             'status': 'success',
-            'test_id': test_id,
+            'test_id': ab_test.id,
             'test_name': ab_test.name,
             'variant_a': {
                 'preset_id': ab_test.preset_a_id,
-                'samples': len(assignments_a),
+                'samples': stats_a.results,
                 'approval_rate': approval_rate_a,
                 'avg_processing_time': avg_time_a
             },
             'variant_b': {
                 'preset_id': ab_test.preset_b_id,
-                'samples': len(assignments_b),
+                'samples': stats_b.results,
                 'approval_rate': approval_rate_b,
                 'avg_processing_time': avg_time_b
             },
@@ -357,6 +603,7 @@ class ABTestManager:
         統計的有意性を検定する (Requirement 10.5)
         
         二項検定（承認率）とt検定（処理時間）を実行します。
+        いずれもバリアント集計（十分統計量）から計算するため、割り当て数に依存しません。
         
         Args:
             test_id: A/BテストID
@@ -369,42 +616,29 @@ class ABTestManager:
             raise ValueError(f"A/B test with ID {test_id} not found")
         
         # 効果測定を実行
-        effectiveness = self.measure_effectiveness(test_id)
+        variant_stats = self._load_variant_stats(test_id)
+        effectiveness = self._effectiveness_from_stats(ab_test, variant_stats)
         
         if effectiveness['status'] != 'success':
             return effectiveness
         
-        # 各バリアントのデータを取得
-        assignments_a = self.db.query(ABTestAssignment).filter(
-            and_(
-                ABTestAssignment.test_id == test_id,
-                ABTestAssignment.variant == 'A',
-                ABTestAssignment.result_recorded_at.isnot(None)
-            )
-        ).all()
-        
-        assignments_b = self.db.query(ABTestAssignment).filter(
-            and_(
-                ABTestAssignment.test_id == test_id,
-                ABTestAssignment.variant == 'B',
-                ABTestAssignment.result_recorded_at.isnot(None)
-            )
-        ).all()
+        stats_a = variant_stats['A']
+        stats_b = variant_stats['B']
         
         # 承認率の統計検定（カイ二乗検定）
-        approvals_a = sum(1 for a in assignments_a if a.approved)
-        approvals_b = sum(1 for a in assignments_b if a.approved)
+        approvals_a = stats_a.approvals
+        approvals_b = stats_b.approvals
         
         # 2x2分割表を作成
         contingency_table = [
-            [approvals_a, len(assignments_a) - approvals_a],
-            [approvals_b, len(assignments_b) - approvals_b]
+            [approvals_a, stats_a.results - approvals_a],
+            [approvals_b, stats_b.results - approvals_b]
         ]
         
         # Check if contingency table is valid (no zero expected frequencies)
         # If all approved or all rejected in both groups, skip chi-squared test
-        if approvals_a == 0 or approvals_a == len(assignments_a) or \
-           approvals_b == 0 or approvals_b == len(assignments_b):
+        if approvals_a == 0 or approvals_a == stats_a.results or \
+           approvals_b == 0 or approvals_b == stats_b.results:
             # Use Fisher's exact test for small samples or extreme cases
             from scipy.stats import fisher_exact
             _, p_value_approval = fisher_exact(contingency_table)
@@ -413,14 +647,16 @@ class ABTestManager:
             chi2, p_value_approval, dof, expected = stats.chi2_contingency(contingency_table)
         
         # 処理時間のt検定
-        times_a = [a.processing_time for a in assignments_a if a.processing_time]
-        times_b = [a.processing_time for a in assignments_b if a.processing_time]
-        
         p_value_time = None
         t_statistic = None
         
-        if len(times_a) >= 2 and len(times_b) >= 2:
-            t_statistic, p_value_time = stats.ttest_ind(times_a, times_b)
+        if stats_a.time_count >= 2 and stats_b.time_count >= 2:
+            mean_a, std_a = self._time_moments(stats_a)
+            mean_b, std_b = self._time_moments(stats_b)
+            t_statistic, p_value_time = stats.ttest_ind_from_stats(
+                mean_a, std_a, stats_a.time_count,
+                mean_b, std_b, stats_b.time_count
+            )
         
         # 有意性の判定
         approval_significant = p_value_approval < self.significance_level
@@ -452,6 +688,7 @@ class ABTestManager:
                 'interpretation': 'Significant difference' if time_significant else 'No significant difference'
             } if p_value_time else None,
             'winner': winner,
+            'sequential_test': self._sequential_test(stats_a, stats_b),
             'recommendation': self._generate_recommendation(
                 winner,
                 effectiveness,
@@ -460,6 +697,87 @@ class ABTestManager:
             )
         }
     
+    def _sequential_test(self, stats_a: 'ABTestVariantStats', stats_b: 'ABTestVariantStats') -> Dict:
+        """
+        承認率の逐次検定（mixture SPRT）を行う
+        
+        正規近似した承認率の差に N(0, τ²) の混合分布を置いた尤度比を使います。
+        結果の記録ごとに尤度比の最大値をバリアント集計に保持しているため、
+        一度 1/α を超えた判定はその後のデータで取り消されず、第1種の過誤率は α 以下に保たれます。
+        
+        Args:
+            stats_a: バリアントAの集計
+            stats_b: バリアントBの集計
+        
+        Returns:
+            Dict: 現在と最大の尤度比、常に有効なp値、早期終了の可否と勝者
+        """
+        threshold = 1.0 / self.significance_level
+        likelihood_ratio, difference = self._likelihood_ratio(stats_a, stats_b)
+        
+        max_ratios = {
+            'A': stats_a.sequential_max_ratio or 1.0,
+            'B': stats_b.sequential_max_ratio or 1.0
+        }
+        leader = 'B' if difference > 0 else 'A'
+        max_ratios[leader] = max(max_ratios[leader], likelihood_ratio)
+        max_ratio = max(max_ratios.values())
+        
+        can_stop = max_ratio >= threshold
+        return {
+            'likelihood_ratio': likelihood_ratio,
+            'max_likelihood_ratio': max_ratio,
+            'p_value': min(1.0, 1.0 / max_ratio),
+            'threshold': threshold,
+            'can_stop_early': can_stop,
+            'winner': max(max_ratios, key=max_ratios.get) if can_stop else None
+        }
+    
+    def _record_likelihood_ratio(self, variant_stats: Dict[str, 'ABTestVariantStats']) -> None:
+        """
+        現在の尤度比を優勢なバリアントの最大値に反映する（呼び出し元のトランザクション内で実行）
+        
+        Args:
+            variant_stats: バリアント -> 集計
+        """
+        likelihood_ratio, difference = self._likelihood_ratio(variant_stats['A'], variant_stats['B'])
+        leader = variant_stats['B' if difference > 0 else 'A']
+        if likelihood_ratio > (leader.sequential_max_ratio or 1.0):
+            leader.sequential_max_ratio = likelihood_ratio
+    
+    def _likelihood_ratio(
+        self,
+        stats_a: 'ABTestVariantStats',
+        stats_b: 'ABTestVariantStats'
+    ) -> Tuple[float, float]:
+        """
+        承認率の差に対する mixture SPRT の尤度比を計算する
+        
+        Returns:
+            Tuple[float, float]: (尤度比, 承認率の差 B - A)
+        """
+        likelihood_ratio = 1.0
+        difference = 0.0
+        
+        if stats_a.results and stats_b.results:
+            rate_a = stats_a.approvals / stats_a.results
+            rate_b = stats_b.approvals / stats_b.results
+            difference = rate_b - rate_a
+            variance = (
+                rate_a * (1 - rate_a) / stats_a.results +
+                rate_b * (1 - rate_b) / stats_b.results
+            )
+            
+            if variance > 0:
+                tau2 = self.sequential_mixture_variance
+                log_ratio = (
+                    0.5 * math.log(variance / (variance + tau2)) +
+                    difference * difference * tau2 / (2 * variance * (variance + tau2))
+                )
+                likelihood_ratio = math.exp(min(log_ratio, 700.0))
+        
+        return likelihood_ratio, difference
+    
     def _generate_recommendation(
         self,
         winner: Optional[str],
@@ -662,17 +980,10 @@ class ABTestManager:
         if not ab_test:
             raise ValueError(f"A/B test with ID {test_id} not found")
         
-        # 割り当て数を取得
-        total_assignments = self.db.query(func.count(ABTestAssignment.id)).filter(
-            ABTestAssignment.test_id == test_id
-        ).scalar() or 0
-        
-        completed_assignments = self.db.query(func.count(ABTestAssignment.id)).filter(
-            and_(
-                ABTestAssignment.test_id == test_id,
-                ABTestAssignment.result_recorded_at.isnot(None)
-            )
-        ).scalar() or 0
+        # 割り当て数と結果数を集計テーブルから取得
+        variant_stats = self._load_variant_stats(test_id)
+        total_assignments = sum(row.assignments for row in variant_stats.values())
+        completed_assignments = sum(row.results for row in variant_stats.values())
         
         # 経過日数を計算
         if ab_test.start_date:
@@ -693,5 +1004,6 @@ class ABTestManager:
             'progress_percent': min(progress_percent, 100),
             'elapsed_days': elapsed_days,
             'duration_days': ab_test.duration_days,
-            'ready_for_analysis': completed_assignments >= self.min_samples_per_variant * 2
+            'ready_for_analysis': completed_assignments >= self.min_samples_per_variant * 2,
+            'sequential_test': self._sequential_test(variant_stats['A'], variant_stats['B'])
         }
@@ -16,7 +16,7 @@ from pathlib import Path
 import json
 
 from image_quality_evaluator import ImageQualityEvaluator
-from exif_analyzer import EXIFAnalyzer
+from exif_analyzer import EXIFAnalyzer, get_exif_analyzer
 from context_engine import ContextEngine
 from ollama_client import OllamaClient
 
@@ -57,7 +57,7 @@ class AISelector:
             quantization_bits: Quantization bits - 4 or 8 (default: 8)
         """
         self.quality_evaluator = quality_evaluator or ImageQualityEvaluator()
-        self.exif_analyzer = exif_analyzer or EXIFAnalyzer()
+        self.exif_analyzer = exif_analyzer or get_exif_analyzer()
         self.context_engine = context_engine or ContextEngine()
         
         # Initialize Ollama client with quantization settings
@@ -541,7 +541,7 @@ TAGS: [推奨タグをカンマ区切りで5つまで]
         if 'camera' in exif_data:
             camera = exif_data['camera']
             if camera.get('make'):
-                tags.append(camera['make'].lower().replace(' ', '_'))
+                tags.append(str(camera['make']).lower().replace(' ', '_'))
         
         # Add LLM-suggested tags if available
         if llm_evaluation and 'suggested_tags' in llm_evaluation:
@@ -0,0 +1,79 @@
+"""Add normalized learning adjustments table
+
+Revision ID: 004
+Revises: 003
+Create Date: 2025-11-10
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import json
+
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create learning_adjustments table and backfill it from learning_data"""
+    
+    # Create learning_adjustments table
+    op.create_table(
+        'learning_adjustments',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('learning_id', sa.Integer(), nullable=False),
+        sa.Column('param', sa.String(100), nullable=False),
+        sa.Column('value', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['learning_id'], ['learning_data.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    
+    # Create indexes
+    op.create_index('idx_learning_adjustments_learning', 'learning_adjustments', ['learning_id'])
+    op.create_index('idx_learning_data_timestamp', 'learning_data', ['timestamp'])
+    op.create_index('idx_learning_data_preset', 'learning_data', ['original_preset', 'timestamp'])
+    
+    # Backfill from the JSON column
+    connection = op.get_bind()
+    rows = connection.execute(sa.text(
+        "SELECT id, parameter_adjustments FROM learning_data "
+        "WHERE parameter_adjustments IS NOT NULL"
+    )).fetchall()
+    
+    adjustments_table = sa.table(
+        'learning_adjustments',
+        sa.column('learning_id', sa.Integer),
+        sa.column('param', sa.String),
+        sa.column('value', sa.Float)
+    )
+    
+    batch = []
+    for learning_id, adjustments_json in rows:
+        try:
+            adjustments = json.loads(adjustments_json)
+        except ValueError:
+            continue
+        for param, value in adjustments.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                batch.append({'learning_id': learning_id, 'param': param, 'value': float(value)})
+        if len(batch) >= 5000:
+            op.bulk_insert(adjustments_table, batch)
+            batch = []
+    
+    if batch:
+        op.bulk_insert(adjustments_table, batch)
+
+
+def downgrade():
+    """Drop learning_adjustments table"""
+    
+    # Drop indexes
+    op.drop_index('idx_learning_data_preset', table_name='learning_data')
+    op.drop_index('idx_learning_data_timestamp', table_name='learning_data')
+    op.drop_index('idx_learning_adjustments_learning', table_name='learning_adjustments')
+    
+    # Drop tables
+    op.drop_table('learning_adjustments')
@@ -0,0 +1,69 @@
+"""Add A/B test variant statistics table
+
+Revision ID: 005
+Revises: 004
+Create Date: 2025-11-10
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create ab_test_variant_stats table and backfill it from assignments"""
+    
+    # Create ab_test_variant_stats table
+    op.create_table(
+        'ab_test_variant_stats',
+        sa.Column('test_id', sa.Integer(), nullable=False),
+        sa.Column('variant', sa.String(1), nullable=False),
+        sa.Column('assignments', sa.Integer(), nullable=False, default=0),
+        sa.Column('results', sa.Integer(), nullable=False, default=0),
+        sa.Column('approvals', sa.Integer(), nullable=False, default=0),
+        sa.Column('time_count', sa.Integer(), nullable=False, default=0),
+        sa.Column('time_sum', sa.Float(), nullable=False, default=0.0),
+        sa.Column('time_sumsq', sa.Float(), nullable=False, default=0.0),
+        sa.Column('sequential_max_ratio', sa.Float(), nullable=False, default=1.0),
+        sa.CheckConstraint("variant IN ('A', 'B')", name='ck_ab_test_variant_stats_variant'),
+        sa.ForeignKeyConstraint(['test_id'], ['ab_tests.id'], ),
+        sa.PrimaryKeyConstraint('test_id', 'variant')
+    )
+    
+    # Create indexes
+    op.create_index('idx_ab_test_assignments_test_photo', 'ab_test_assignments', ['test_id', 'photo_id'])
+    
+    # Backfill from existing assignments
+    op.execute("""
+        INSERT INTO ab_test_variant_stats
+            (test_id, variant, assignments, results, approvals, time_count, time_sum, time_sumsq,
+             sequential_max_ratio)
+        SELECT
+            test_id,
+            variant,
+            COUNT(*),
+            COUNT(result_recorded_at),
+            SUM(CASE WHEN result_recorded_at IS NOT NULL AND approved THEN 1 ELSE 0 END),
+            SUM(CASE WHEN result_recorded_at IS NOT NULL AND processing_time != 0 THEN 1 ELSE 0 END),
+            COALESCE(SUM(CASE WHEN result_recorded_at IS NOT NULL THEN processing_time END), 0.0),
+            COALESCE(SUM(CASE WHEN result_recorded_at IS NOT NULL THEN processing_time * processing_time END), 0.0),
+            1.0
+        FROM ab_test_assignments
+        GROUP BY test_id, variant
+    """)
+
+
+def downgrade():
+    """Drop ab_test_variant_stats table"""
+    
+    # Drop indexes
+    op.drop_index('idx_ab_test_assignments_test_photo', table_name='ab_test_assignments')
+    
+    # Drop tables
+    op.drop_table('ab_test_variant_stats')
@@ -0,0 +1,69 @@
+"""Add preset context tags association table
+
+Revision ID: 006
+Revises: 005
+Create Date: 2025-11-10
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import json
+
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create preset_context_tags table and backfill it from presets"""
+    
+    # Create preset_context_tags table
+    op.create_table(
+        'preset_context_tags',
+        sa.Column('preset_id', sa.Integer(), nullable=False),
+        sa.Column('tag', sa.String(100), nullable=False),
+        sa.ForeignKeyConstraint(['preset_id'], ['presets.id'], ),
+        sa.PrimaryKeyConstraint('preset_id', 'tag')
+    )
+    
+    # Create indexes
+    op.create_index('idx_preset_context_tags_tag', 'preset_context_tags', ['tag'])
+    
+    # Backfill from the JSON column
+    connection = op.get_bind()
+    rows = connection.execute(sa.text(
+        "SELECT id, context_tags FROM presets WHERE context_tags IS NOT NULL"
+    )).fetchall()
+    
+    tags_table = sa.table(
+        'preset_context_tags',
+        sa.column('preset_id', sa.Integer),
+        sa.column('tag', sa.String)
+    )
+    
+    batch = []
+    for preset_id, tags_json in rows:
+        try:
+            tags = json.loads(tags_json)
+        except ValueError:
+            continue
+        if not isinstance(tags, list):
+            continue
+        for tag in dict.fromkeys(tags):
+            batch.append({'preset_id': preset_id, 'tag': tag})
+    
+    if batch:
+        op.bulk_insert(tags_table, batch)
+
+
+def downgrade():
+    """Drop preset_context_tags table"""
+    
+    # Drop indexes
+    op.drop_index('idx_preset_context_tags_tag', table_name='preset_context_tags')
+    
+    # Drop tables
+    op.drop_table('preset_context_tags')
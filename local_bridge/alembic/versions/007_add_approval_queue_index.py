@@ -0,0 +1,34 @@
+"""Add composite index for the approval queue
+
+Revision ID: 007
+Revises: 006
+Create Date: 2025-11-10
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create idx_photos_approval_queue"""
+    
+    # Covers the approval queue filter (status, approved), its sort (ai_score)
+    # and the columns read when seeding the in-memory queue index
+    op.create_index(
+        'idx_photos_approval_queue',
+        'photos',
+        ['status', 'approved', 'ai_score', 'session_id']
+    )
+
+
+def downgrade():
+    """Drop idx_photos_approval_queue"""
+    
+    op.drop_index('idx_photos_approval_queue', table_name='photos')
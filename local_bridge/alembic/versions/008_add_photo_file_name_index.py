@@ -0,0 +1,34 @@
+"""Add index on photo file name and size
+
+Revision ID: 008
+Revises: 007
+Create Date: 2025-11-11
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create idx_photos_file_name"""
+    
+    # Used by the import duplicate check (name and size) and the bulk
+    # catch-up lookup of already imported files by name
+    op.create_index(
+        'idx_photos_file_name',
+        'photos',
+        ['file_name', 'file_size']
+    )
+
+
+def downgrade():
+    """Drop idx_photos_file_name"""
+    
+    op.drop_index('idx_photos_file_name', table_name='photos')
@@ -329,6 +329,31 @@ def get_rate_limit_info():
         return jsonify({"error": f"Failed to get rate limit info: {e}"}), 500
 
 
+# ============================================================================
+# AUTH CACHE STATISTICS ENDPOINT
+# ============================================================================
+
+@auth_api_bp.route("/cache", methods=["GET"])
+@jwt_required
+def get_auth_cache_stats():
+    """
+    Get authentication cache statistics (requires JWT)
+    
+    Returns:
+        Token cache hits/misses/evictions and API key counters
+    """
+    try:
+        auth_manager = get_auth_manager()
+        
+        return jsonify({
+            "cache": auth_manager.get_auth_cache_stats()
+        }), 200
+        
+    except Exception as e:
+        logging_system.log_error("Failed to get auth cache stats", exception=e)
+        return jsonify({"error": f"Failed to get auth cache stats: {e}"}), 500
+
+
 # ============================================================================
 # SECURITY INFO ENDPOINT
 # ============================================================================
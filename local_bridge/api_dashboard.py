@@ -10,6 +10,7 @@ from datetime import datetime, timedelta
 from models.database import get_session, Session, Photo, Statistic, Job
 from sqlalchemy import func, desc
 from logging_system import get_logging_system
+from approval_queue import get_approval_queue_service
 
 dashboard_bp = Blueprint('dashboard', __name__)
 logging_system = get_logging_system()
@@ -472,6 +473,8 @@ def approve_photo(photo_id: int):
             photo.approved_at = datetime.utcnow()
             db_session.commit()
             
+            get_approval_queue_service().remove(photo_id, session_id=photo.session_id)
+            
             logging_system.log("INFO", "Photo approved", photo_id=photo_id)
             
             return jsonify({
@@ -516,6 +519,8 @@ def reject_photo(photo_id: int):
             photo.rejection_reason = reason
             db_session.commit()
             
+            get_approval_queue_service().remove(photo_id, session_id=photo.session_id)
+            
             logging_system.log("INFO", "Photo rejected", photo_id=photo_id, reason=reason)
             
             return jsonify({
@@ -22,6 +22,8 @@ import pathlib
 import io
 from PIL import Image
 import websocket_events
+from approval_queue import get_approval_queue_service
+from bulk_review import parse_review_decisions, apply_bulk_review
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 logging_system = get_logging_system()
@@ -823,25 +825,16 @@ def get_approval_queue():
         
         db_session = get_session()
         try:
-            # Get photos that are completed but not yet approved or rejected
-            query = db_session.query(Photo).filter(
-                Photo.status == 'completed',
-                Photo.approved == False
+            # Page and count come from the in-memory index (AI score descending,
+            # best photos first); only the page itself is loaded from the database
+            queue_service = get_approval_queue_service()
+            photo_ids, total_count = queue_service.get_page(
+                offset=offset,
+                limit=limit,
+                session_id=session_id or None,
+                min_score=min_score or None
             )
-            
-            if session_id:
-                query = query.filter(Photo.session_id == session_id)
-            if min_score:
-                query = query.filter(Photo.ai_score >= min_score)
-            
-            # Order by AI score descending (best photos first)
-            query = query.order_by(Photo.ai_score.desc())
-            
-            # Get total count
-            total_count = query.count()
-            
-            # Apply pagination
-            photos = query.offset(offset).limit(limit).all()
+            photos = queue_service.fetch_photos(db_session, photo_ids)
             
             photos_data = [photo.to_dict() for photo in photos]
             
@@ -911,12 +904,8 @@ def approve_photo(photo_id: int):
                 session_id=photo.session_id
             )
             
-            # Update approval queue count
-            approval_queue_count = db_session.query(func.count(Photo.id)).filter(
-                Photo.status == 'completed',
-                Photo.approved == False
-            ).scalar()
-            websocket_events.broadcast_approval_queue_updated(queue_count=approval_queue_count)
+            # Update approval queue (pushes the delta to clients)
+            get_approval_queue_service().remove(photo_id, session_id=photo.session_id)
             
             response_data = {
                 "message": "Photo approved successfully",
@@ -929,7 +918,7 @@ def approve_photo(photo_id: int):
                     from auto_export_engine import get_auto_export_engine
                     export_engine = get_auto_export_engine()
                     if export_engine:
-                        export_engine.trigger_export(photo_id)
+                        export_engine.trigger_auto_export(photo_id, db_session)
                         response_data['export_triggered'] = True
                 except Exception as export_error:
                     logging_system.log_error("Failed to trigger auto-export", exception=export_error)
@@ -993,12 +982,8 @@ def reject_photo(photo_id: int):
                 reason=reason
             )
             
-            # Update approval queue count
-            approval_queue_count = db_session.query(func.count(Photo.id)).filter(
-                Photo.status == 'completed',
-                Photo.approved == False
-            ).scalar()
-            websocket_events.broadcast_approval_queue_updated(queue_count=approval_queue_count)
+            # Update approval queue (pushes the delta to clients)
+            get_approval_queue_service().remove(photo_id, session_id=photo.session_id)
             
             return jsonify({
                 "message": "Photo rejected successfully",
@@ -1013,6 +998,58 @@ def reject_photo(photo_id: int):
         return jsonify({"error": f"Failed to reject photo: {e}"}), 500
 
 
+@api_bp.route("/approval/bulk", methods=["POST"])
+def bulk_review_photos():
+    """
+    Approve and/or reject many photos in one request
+    
+    All decisions are written in one transaction; auto-export jobs, the
+    WebSocket event and the notification are created once for the batch.
+    
+    Request body:
+    - decisions: List of {"photo_id", "decision": "approve"|"reject", "reason"} (optional)
+    - approve: List of photo IDs to approve (optional)
+    - reject: List of photo IDs to reject (optional)
+    - reason: Default rejection reason (optional)
+    - auto_export: Whether to trigger auto-export for approved photos (optional, default: false)
+    
+    Returns:
+        Approved, rejected and not found photo IDs and the number of export jobs
+    """
+    try:
+        data = request.get_json() or {}
+        
+        try:
+            decisions = parse_review_decisions(data)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        db_session = get_session()
+        try:
+            result = apply_bulk_review(
+                db_session,
+                decisions,
+                auto_export=bool(data.get('auto_export', False))
+            )
+            
+            logging_system.log("INFO", "Bulk review applied",
+                             approved=len(result['approved']),
+                             rejected=len(result['rejected']),
+                             not_found=len(result['not_found']))
+            
+            return jsonify({
+                "message": "Bulk review applied successfully",
+                **result
+            }), 200
+            
+        finally:
+            db_session.close()
+            
+    except Exception as e:
+        logging_system.log_error("Failed to apply bulk review", exception=e)
+        return jsonify({"error": f"Failed to apply bulk review: {e}"}), 500
+
+
 @api_bp.route("/approval/<int:photo_id>/modify", methods=["POST"])
 def modify_photo_preset(photo_id: int):
     """
@@ -1054,12 +1091,16 @@ def modify_photo_preset(photo_id: int):
                 photo_id=photo_id,
                 action='modified',
                 original_preset=original_preset,
-                final_preset=new_preset,
-                parameter_adjustments=str(adjustments) if adjustments else None
+                final_preset=new_preset
             )
+            if adjustments:
+                learning_entry.set_parameter_adjustments(adjustments)
             db_session.add(learning_entry)
             db_session.commit()
             
+            # Re-queued photos leave the approval queue
+            get_approval_queue_service().remove(photo_id, session_id=photo.session_id)
+            
             logging_system.log("INFO", "Photo preset modified", 
                              photo_id=photo_id, 
                              original_preset=original_preset,
@@ -1417,10 +1458,7 @@ def get_system_status():
             ).scalar()
             
             # Count photos in approval queue
-            approval_queue_count = db_session.query(func.count(Photo.id)).filter(
-                Photo.status == 'completed',
-                Photo.approved == False
-            ).scalar()
+            approval_queue_count = get_approval_queue_service().count()
             
             # Get resource usage
             import psutil
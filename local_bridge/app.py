@@ -1,4 +1,5 @@
 import uuid
+import atexit
 import json
 import pathlib
 import logging
@@ -16,7 +17,7 @@ from models.database import init_db, get_session
 from websocket_fallback import init_websocket_fallback, get_websocket_fallback
 from progress_reporter import init_progress_reporter, get_progress_reporter, ProcessingStage
 from export_preset_manager import ExportPresetManager, ExportPreset
-from auto_export_engine import AutoExportEngine
+from auto_export_engine import AutoExportEngine, get_auto_export_engine
 from websocket_server import init_websocket_server, get_websocket_server, EventType
 from websocket_events import (
     broadcast_photo_imported, broadcast_photo_analyzed, broadcast_photo_selected,
@@ -58,6 +59,10 @@ except Exception as e:
 log_level = system_config.get('system', {}).get('log_level', 'INFO')
 logging_system = get_logging_system(log_level=log_level)
 
+# Keep log I/O (formatting, writes, rotation) off request threads
+if system_config.get('system', {}).get('async_logging', True):
+    logging_system.enable_async()
+
 # Configure Flask app logger to use structured logging
 log_file = pathlib.Path(__file__).parent / "local_bridge.log"
 handler = RotatingFileHandler(log_file, maxBytes=1024 * 1024, backupCount=3)
@@ -78,9 +83,15 @@ init_db(f'sqlite:///{db_path}')
 logging_system.log("INFO", "Database initialized", db_path=str(db_path))
 
 # --- Progress Reporter Initialization ---
-# Initialize progress reporter with WebSocket server
-progress_reporter = init_progress_reporter(websocket_fallback)
-logging_system.log("INFO", "Progress reporter initialized")
+# Initialize progress reporter with both WebSocket transports; progress ticks
+# are coalesced per job and sent once per frame
+progress_frame_ms = system_config.get('ui', {}).get('progress_frame_interval_ms', 150)
+progress_reporter = init_progress_reporter(
+    [websocket_fallback, websocket_server],
+    frame_interval=progress_frame_ms / 1000.0 if progress_frame_ms else None
+)
+logging_system.log("INFO", "Progress reporter initialized",
+                   frame_interval_ms=progress_frame_ms)
 
 # --- File Import Processor Setup ---
 file_import_processor = None
@@ -118,11 +129,21 @@ logging_system.log("INFO", "Export preset manager initialized",
                   preset_count=export_preset_manager.get_preset_count())
 
 # --- Auto Export Engine Setup ---
-auto_export_engine = AutoExportEngine(preset_manager=export_preset_manager)
-logging_system.log("INFO", "Auto export engine initialized")
+EXPORT_QUEUE_PATH = str(pathlib.Path(__file__).parent / "data" / "export_queue.db")
+auto_export_engine = get_auto_export_engine(preset_manager=export_preset_manager,
+                                            queue_path=EXPORT_QUEUE_PATH)
+logging_system.log("INFO", "Auto export engine initialized",
+                  pending_exports=len(auto_export_engine.export_queue))
 
 # --- Hot Folder Watcher Setup ---
 hot_folder_watcher = None
+HOT_FOLDER_STATE_PATH = str(pathlib.Path(__file__).parent / "data" / "hot_folder_state.json")
+
+def find_imported_files(files):
+    """Bulk lookup of already imported files for the hot folder catch-up scan"""
+    if file_import_processor is None:
+        return set()
+    return file_import_processor.find_imported_files(files)
 
 def on_new_file_detected(file_path: str):
     """
@@ -130,20 +151,23 @@ def on_new_file_detected(file_path: str):
     
     Called when a new image file is detected in monitored folders.
     Automatically imports the file to the database.
+    
+    Returns:
+        True if the file was imported; False leaves it for the next catch-up scan
     """
     logging_system.log("INFO", "New file detected by hot folder watcher", 
                       file_path=file_path)
     
     if file_import_processor is None:
         logging_system.log_error("File import processor not initialized")
-        return
+        return False
     
     # Check if auto-import is enabled
     auto_import = system_config.get('processing', {}).get('auto_import', True)
     
     if not auto_import:
         logging_system.log("INFO", "Auto-import disabled, skipping file", file_path=file_path)
-        return
+        return False
     
     try:
         # Determine session name from folder structure
@@ -196,6 +220,8 @@ def on_new_file_detected(file_path: str):
                 status=session.status
             )
             
+            return True
+            
         finally:
             db_session.close()
             
@@ -213,6 +239,8 @@ def on_new_file_detected(file_path: str):
         logging_system.log_error("Unexpected error during file import", 
                                 file_path=file_path, exception=e)
         app.logger.error(f"Unexpected error importing {file_path}: {e}", exc_info=True)
+    
+    return False
 
 def initialize_hot_folder_watcher():
     """Initialize hot folder watcher from configuration"""
@@ -228,7 +256,9 @@ def initialize_hot_folder_watcher():
         hot_folder_watcher = HotFolderWatcher(
             folders=hot_folders,
             callback=on_new_file_detected,
-            write_complete_delay=2.0
+            write_complete_delay=2.0,
+            state_path=HOT_FOLDER_STATE_PATH,
+            known_files_fn=find_imported_files
         )
         hot_folder_watcher.start()
         logging_system.log("INFO", "Hot folder watcher started", 
@@ -513,6 +543,10 @@ def get_logs():
     - category: Log category (main, performance, errors) - default: main
     - lines: Number of lines to return - default: 100
     - level: Filter by log level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+    - since: Only entries at or after this ISO timestamp
+    - until: Only entries at or before this ISO timestamp
+    
+    Rotated log files are searched when the current file has too few matches.
     """
     logging_system.log("DEBUG", "Received request to /logs endpoint")
     
@@ -520,6 +554,8 @@ def get_logs():
         category = request.args.get('category', 'main')
         lines = int(request.args.get('lines', 100))
         level_filter = request.args.get('level')
+        since = request.args.get('since')
+        until = request.args.get('until')
         
         # Validate category
         if category not in ['main', 'performance', 'errors']:
@@ -534,11 +570,14 @@ def get_logs():
         log_entries = logging_system.read_logs(
             category=category,
             lines=lines,
-            level_filter=level_filter
+            level_filter=level_filter,
+            since=since,
+            until=until
         )
         
         logging_system.log("INFO", f"Retrieved {len(log_entries)} log entries",
-                          category=category, lines=lines, level_filter=level_filter)
+                          category=category, lines=lines, level_filter=level_filter,
+                          since=since, until=until)
         
         return jsonify({
             "category": category,
@@ -690,6 +729,8 @@ def get_hotfolder_status():
         
         logging_system.log("INFO", "Retrieved hot folder status", **status)
         
+        status["stats"] = hot_folder_watcher.get_stats()
+        
         return jsonify(status), 200
         
     except Exception as e:
@@ -723,7 +764,9 @@ def add_hotfolder():
             hot_folder_watcher = HotFolderWatcher(
                 folders=[],
                 callback=on_new_file_detected,
-                write_complete_delay=2.0
+                write_complete_delay=2.0,
+                state_path=HOT_FOLDER_STATE_PATH,
+                known_files_fn=find_imported_files
             )
         
         # Add folder
@@ -1191,6 +1234,14 @@ from job_queue_manager import get_job_queue_manager
 
 job_queue_manager = get_job_queue_manager()
 
+# Jobs held by the scheduler are only in memory; resubmit those a previous
+# run never dispatched and stop the dispatcher on shutdown
+try:
+    job_queue_manager.restore_pending_jobs()
+except Exception as e:
+    logging_system.log_error("Failed to restore pending jobs", exception=e)
+atexit.register(job_queue_manager.shutdown)
+
 
 @app.route("/queue/submit", methods=["POST"])
 def submit_job_to_queue():
@@ -1363,6 +1414,31 @@ def get_queue_stats():
         return jsonify({"error": f"Failed to get statistics: {e}"}), 500
 
 
+@app.route("/queue/scheduler", methods=["GET"])
+def get_scheduler_stats():
+    """
+    Get local scheduler statistics (held jobs, in-flight window, sessions)
+    
+    Query parameters:
+    - include_jobs: Include held jobs in dispatch order (default: false)
+    - limit: Maximum number of held jobs to return (default: 100)
+    """
+    logging_system.log("DEBUG", "Received request for scheduler statistics")
+    
+    try:
+        stats = job_queue_manager.get_scheduler_stats()
+        
+        if request.args.get("include_jobs", "false").lower() == "true":
+            limit = request.args.get("limit", 100, type=int)
+            stats["jobs"] = job_queue_manager.scheduler.get_queued_jobs(limit=limit)
+        
+        return jsonify(stats), 200
+        
+    except Exception as e:
+        logging_system.log_error("Failed to get scheduler stats", exception=e)
+        return jsonify({"error": f"Failed to get scheduler statistics: {e}"}), 500
+
+
 @app.route("/queue/cancel/<string:task_id>", methods=["POST"])
 def cancel_job(task_id: str):
     """
@@ -2182,6 +2258,24 @@ app.register_blueprint(notifications_bp)
 app.register_blueprint(email_notifications_bp)
 app.register_blueprint(line_notifications_bp)
 
+# --- Notification Outbox ---
+from notification_outbox import get_notification_outbox
+
+# Email/LINE notifications are queued and delivered by a background worker
+# so request handlers never wait on SMTP or LINE Notify
+notification_outbox = get_notification_outbox()
+notification_outbox.start()
+logging_system.log("INFO", "Notification outbox started")
+
+# --- Approval Queue ---
+from approval_queue import get_approval_queue_service
+
+# Approval queue pages and counts are served from an in-memory index;
+# the job scheduler adds photos as their Celery tasks finish and the
+# background resync catches anything completed elsewhere
+approval_queue_service = get_approval_queue_service()
+approval_queue_service.start()
+
 # --- WebSocket Management API Endpoints ---
 
 @app.route("/websocket/clients", methods=["GET"])
@@ -2348,7 +2442,8 @@ def get_websocket_stats():
             'total_clients': len(clients),
             'clients_by_type': client_types,
             'active_channels': list(all_subscriptions),
-            'channel_count': len(all_subscriptions)
+            'channel_count': len(all_subscriptions),
+            'send_queues': ws_server.get_send_queue_metrics()
         }
         
         return jsonify({
@@ -3854,12 +3949,22 @@ def get_export_queue():
     """
     Get export queue status
     
-    Returns queue statistics and pending/processing jobs
+    Returns queue statistics and one page of pending/processing jobs
+    
+    Query parameters:
+    - limit: Jobs per page (optional, default: 100, max: 1000)
+    - offset: Pending jobs to skip (optional, default: 0)
+    - preset: Only list jobs for this preset (optional)
     
     Requirements: 6.1, 6.4
     """
     try:
-        status = auto_export_engine.get_export_queue_status()
+        limit = min(max(int(request.args.get('limit', 100)), 1), 1000)
+        offset = max(int(request.args.get('offset', 0)), 0)
+        preset_name = request.args.get('preset')
+        
+        status = auto_export_engine.get_export_queue_status(limit=limit, offset=offset,
+                                                            preset_name=preset_name)
         
         logging_system.log("DEBUG", "Export queue status retrieved",
                           pending_count=status['pending_count'],
@@ -3870,6 +3975,11 @@ def get_export_queue():
             **status
         }), 200
         
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": f"Invalid parameter: {e}"
+        }), 400
     except Exception as e:
         logging_system.log_error("Failed to get export queue status", exception=e)
         return jsonify({
@@ -3919,9 +4029,29 @@ def get_next_export_job():
     
     Returns the oldest pending export job and its Lightroom configuration
     
+    Query parameters:
+    - count: Claim up to this many jobs at once (optional, max: 500). All
+      claimed jobs share one preset so Lightroom can export them together.
+    - preset: Only claim jobs for this preset (optional, with count)
+    
     Requirements: 6.1, 6.4
     """
     try:
+        if 'count' in request.args:
+            count = min(max(int(request.args['count']), 1), 500)
+            batch = auto_export_engine.claim_export_jobs(count, preset_name=request.args.get('preset'))
+            
+            logging_system.log("INFO", "Export jobs claimed",
+                              preset_name=batch['preset_name'],
+                              job_count=len(batch['jobs']),
+                              failed_count=len(batch['failed_job_ids']))
+            
+            return jsonify({
+                "success": True,
+                "job_count": len(batch['jobs']),
+                **batch
+            }), 200
+        
         job = auto_export_engine.get_next_export_job()
         
         if not job:
@@ -3952,10 +4082,15 @@ def get_next_export_job():
         
         return jsonify({
             "success": True,
-            "job": job.to_dict(),
+            "job": auto_export_engine.get_export_job(job.id).to_dict(),
             "config": config
         }), 200
         
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": f"Invalid parameter: {e}"
+        }), 400
     except Exception as e:
         logging_system.log_error("Failed to get next export job", exception=e)
         return jsonify({
@@ -4188,6 +4323,8 @@ def approve_photo(photo_id: int):
             photo.status = 'completed'
             db_session.commit()
             
+            approval_queue_service.remove(photo_id, session_id=photo.session_id)
+            
             logging_system.log("INFO", "Photo approved",
                               photo_id=photo_id,
                               auto_export=auto_export)
@@ -4259,6 +4396,8 @@ def reject_photo(photo_id: int):
             photo.rejection_reason = reason
             db_session.commit()
             
+            approval_queue_service.remove(photo_id, session_id=photo.session_id)
+            
             logging_system.log("INFO", "Photo rejected",
                               photo_id=photo_id,
                               reason=reason)
@@ -4283,7 +4422,7 @@ def reject_photo(photo_id: int):
 @app.route("/photos/approval/queue", methods=["GET"])
 def get_approval_queue():
     """
-    Get photos pending approval
+    Get photos pending approval, best AI score first
     
     Query parameters:
     - limit: Maximum number of photos to return (optional, default: 50)
@@ -4295,21 +4434,13 @@ def get_approval_queue():
         limit = int(request.args.get('limit', 50))
         offset = int(request.args.get('offset', 0))
         
-        # Get photos from database
+        # Page and count come from the approval queue index (AI score descending)
+        photo_ids, total_count = approval_queue_service.get_page(offset=offset, limit=limit)
+        
+        # Load only the page from the database
         db_session = get_session()
         try:
-            from models.database import Photo
-            
-            # Query photos that are completed but not yet approved
-            photos = db_session.query(Photo).filter(
-                Photo.status == 'completed',
-                Photo.approved == False
-            ).order_by(Photo.import_time.desc()).limit(limit).offset(offset).all()
-            
-            total_count = db_session.query(Photo).filter(
-                Photo.status == 'completed',
-                Photo.approved == False
-            ).count()
+            photos = approval_queue_service.fetch_photos(db_session, photo_ids)
             
             logging_system.log("DEBUG", "Approval queue retrieved",
                               count=len(photos),
@@ -0,0 +1,479 @@
+"""
+Approval Queue Service for Junmai AutoDev
+承認キューサービス
+
+In-memory index of the photos awaiting approval (status 'completed' and
+not approved), ordered by AI score (best first) and photo ID:
+- Page and count queries are answered from the index in O(log n) instead
+  of a filtered, sorted query plus a separate COUNT per poll
+- Approve/reject/re-queue handlers update the index in place and push an
+  'approval_queue_updated' delta to WebSocket clients
+- Photos completed by Celery workers are added when the job scheduler
+  reaps their task
+- The index is seeded from the database (backed by the
+  idx_photos_approval_queue composite index) and resynchronized
+  periodically, which also catches photos completed outside the scheduler
+
+Requirements: 5.1, 5.2, 7.2
+"""
+
+import bisect
+import threading
+import time
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from models.database import Photo, get_engine, get_session
+
+try:
+    from sortedcontainers import SortedList
+    SORTEDCONTAINERS_AVAILABLE = True
+except ImportError:
+    SORTEDCONTAINERS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Index key: (-ai_score, photo_id); photos without a score sort last
+_NO_SCORE = float('inf')
+
+
+def _queue_key(photo_id: int, ai_score: Optional[float]) -> Tuple[float, int]:
+    """Build the sort key of a photo (highest score first, then lowest ID)."""
+    return (-ai_score if ai_score is not None else _NO_SCORE, photo_id)
+
+
+class _SortedKeyList:
+    """
+    Minimal sorted list used when sortedcontainers is not installed.
+    
+    Lookups are O(log n); inserts and removals shift the underlying list.
+    """
+    
+    def __init__(self, iterable=()):
+        self._keys = sorted(iterable)
+    
+    def __len__(self) -> int:
+        return len(self._keys)
+    
+    def add(self, key) -> None:
+        bisect.insort(self._keys, key)
+    
+    def remove(self, key) -> None:
+        index = bisect.bisect_left(self._keys, key)
+        if index < len(self._keys) and self._keys[index] == key:
+            del self._keys[index]
+        else:
+            raise ValueError(f"{key!r} not in list")
+    
+    def bisect_right(self, key) -> int:
+        return bisect.bisect_right(self._keys, key)
+    
+    def islice(self, start: int, stop: int):
+        return iter(self._keys[start:stop])
+
+
+def _sorted_keys(iterable=()):
+    """Create a sorted key container."""
+    if SORTEDCONTAINERS_AVAILABLE:
+        return SortedList(iterable)
+    return _SortedKeyList(iterable)
+
+
+class ApprovalQueueIndex:
+    """
+    Sorted index of queued photos, globally and per session.
+    
+    Not thread-safe; ApprovalQueueService serializes access.
+    """
+    
+    def __init__(self, entries: Optional[Dict[int, Tuple[Optional[int], Optional[float]]]] = None):
+        """
+        Initialize the index.
+        
+        Args:
+            entries: Mapping of photo ID -> (session_id, ai_score)
+        """
+        self.entries: Dict[int, Tuple[Optional[int], Optional[float]]] = dict(entries or {})
+        self._all = _sorted_keys(_queue_key(pid, score) for pid, (_, score) in self.entries.items())
+        self._sessions: Dict[Optional[int], Any] = {}
+        
+        by_session: Dict[Optional[int], List[Tuple[float, int]]] = {}
+        for pid, (session_id, score) in self.entries.items():
+            by_session.setdefault(session_id, []).append(_queue_key(pid, score))
+        for session_id, keys in by_session.items():
+            self._sessions[session_id] = _sorted_keys(keys)
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def __contains__(self, photo_id: int) -> bool:
+        return photo_id in self.entries
+    
+    def add(self, photo_id: int, session_id: Optional[int], ai_score: Optional[float]) -> bool:
+        """
+        Add or update a photo.
+        
+        Returns:
+            True if the index changed
+        """
+        current = self.entries.get(photo_id)
+        if current == (session_id, ai_score):
+            return False
+        if current is not None:
+            self.remove(photo_id)
+        
+        key = _queue_key(photo_id, ai_score)
+        self.entries[photo_id] = (session_id, ai_score)
+        self._all.add(key)
+        if session_id not in self._sessions:
+            self._sessions[session_id] = _sorted_keys()
+        self._sessions[session_id].add(key)
+        return True
+    
+    def remove(self, photo_id: int) -> Optional[Tuple[Optional[int], Optional[float]]]:
+        """
+        Remove a photo.
+        
+        Returns:
+            The removed (session_id, ai_score), or None if it was not queued
+        """
+        entry = self.entries.pop(photo_id, None)
+        if entry is None:
+            return None
+        
+        session_id, ai_score = entry
+        key = _queue_key(photo_id, ai_score)
+        self._all.remove(key)
+        session_keys = self._sessions[session_id]
+        session_keys.remove(key)
+        if not len(session_keys):
+            del self._sessions[session_id]
+        return entry
+    
+    def _keys(self, session_id: Optional[int]):
+        if session_id is None:
+            return self._all
+        return self._sessions.get(session_id)
+    
+    def count(self, session_id: Optional[int] = None, min_score: Optional[float] = None) -> int:
+        """
+        Count queued photos.
+        
+        Args:
+            session_id: Only count photos of this session
+            min_score: Only count photos scored at least this
+        
+        Returns:
+            Number of photos
+        """
+        keys = self._keys(session_id)
+        if keys is None:
+            return 0
+        if min_score is None:
+            return len(keys)
+        return keys.bisect_right((-min_score, _NO_SCORE))
+    
+    def page(
+        self,
+        offset: int,
+        limit: int,
+        session_id: Optional[int] = None,
+        min_score: Optional[float] = None
+    ) -> List[int]:
+        """
+        Get one page of photo IDs, best score first.
+        
+        Args:
+            offset: Number of photos to skip
+            limit: Maximum number of photos
+            session_id: Only include photos of this session
+            min_score: Only include photos scored at least this
+        
+        Returns:
+            List of photo IDs
+        """
+        keys = self._keys(session_id)
+        if keys is None or limit <= 0:
+            return []
+        
+        end = min(offset + limit, self.count(session_id, min_score))
+        if offset >= end:
+            return []
+        return [photo_id for _, photo_id in keys.islice(offset, end)]
+    
+    def position(self, photo_id: int) -> Optional[int]:
+        """Get the zero-based position of a photo in the global order."""
+        entry = self.entries.get(photo_id)
+        if entry is None:
+            return None
+        return self._all.bisect_right(_queue_key(photo_id, entry[1])) - 1
+
+
+class ApprovalQueueService:
+    """
+    Approval queue answered from an in-memory index.
+    
+    The index is keyed by database engine: switching databases (init_db)
+    reseeds it. Reads resync it when older than resync_interval.
+    """
+    
+    def __init__(self, resync_interval: float = 30.0, broadcast: bool = True):
+        """
+        Initialize the service.
+        
+        Args:
+            resync_interval: Seconds before the index is reconciled with the database
+            broadcast: Push 'approval_queue_updated' deltas to WebSocket clients
+        """
+        self.resync_interval = resync_interval
+        self.broadcast = broadcast
+        self._lock = threading.RLock()
+        self._index: Optional[ApprovalQueueIndex] = None
+        self._engine = None
+        self._synced_at = 0.0
+        self._stop_event = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+    
+    @staticmethod
+    def _load_entries() -> Dict[int, Tuple[Optional[int], Optional[float]]]:
+        """Read the queued photos from the database."""
+        db_session = get_session()
+        try:
+            rows = db_session.query(Photo.id, Photo.session_id, Photo.ai_score).filter(
+                Photo.status == 'completed',
+                Photo.approved == False
+            ).all()
+            return {photo_id: (session_id, ai_score) for photo_id, session_id, ai_score in rows}
+        finally:
+            db_session.close()
+    
+    def _ensure_fresh(self) -> ApprovalQueueIndex:
+        """Seed or resync the index if needed (caller holds the lock)."""
+        engine = get_engine()
+        if self._index is None or self._engine is not engine:
+            self._index = ApprovalQueueIndex(self._load_entries())
+            self._engine = engine
+            self._synced_at = time.monotonic()
+            logger.info(f"Approval queue index seeded with {len(self._index)} photos")
+        elif time.monotonic() - self._synced_at > self.resync_interval:
+            self.resync()
+        return self._index
+    
+    def resync(self) -> Dict[str, Any]:
+        """
+        Reconcile the index with the database and push the differences.
+        
+        Returns:
+            Dictionary with 'added' and 'removed' photo IDs
+        """
+        with self._lock:
+            if self._index is None or self._engine is not get_engine():
+                self._index = None
+                self._ensure_fresh()
+                return {'added': [], 'removed': []}
+            
+            entries = self._load_entries()
+            index = self._index
+            removed = [pid for pid in index.entries if pid not in entries]
+            for photo_id in removed:
+                index.remove(photo_id)
+            added = [
+                pid for pid, (session_id, score) in entries.items()
+                if index.add(pid, session_id, score)
+            ]
+            self._synced_at = time.monotonic()
+            
+            if added or removed:
+                logger.info(f"Approval queue resync: {len(added)} added, {len(removed)} removed")
+                self._push(added=added, removed=removed)
+            
+            return {'added': added, 'removed': removed}
+    
+    def add(self, photo_id: int, session_id: Optional[int], ai_score: Optional[float]) -> None:
+        """
+        Add a photo that just became ready for approval.
+        
+        Args:
+            photo_id: Photo ID
+            session_id: Session ID
+            ai_score: AI evaluation score
+        """
+        with self._lock:
+            index = self._ensure_fresh()
+            if index.add(photo_id, session_id, ai_score):
+                self._push(added=[photo_id], session_id=session_id)
+    
+    def remove(self, photo_id: int, session_id: Optional[int] = None) -> None:
+        """
+        Remove a photo that was approved, rejected or re-queued.
+        
+        Args:
+            photo_id: Photo ID
+            session_id: Session ID (used when the photo was not indexed)
+        """
+        self.remove_many([photo_id], session_id)
+    
+    def remove_many(self, photo_ids: List[int], session_id: Optional[int] = None) -> None:
+        """
+        Remove several photos and push one delta.
+        
+        Args:
+            photo_ids: Photo IDs
+            session_id: Session ID of the photos, if they share one
+        """
+        with self._lock:
+            index = self._ensure_fresh()
+            sessions = set()
+            for photo_id in photo_ids:
+                entry = index.remove(photo_id)
+                sessions.add(entry[0] if entry else session_id)
+            
+            single_session = sessions.pop() if len(sessions) == 1 else None
+            self._push(removed=list(photo_ids), session_id=single_session)
+    
+    def count(self, session_id: Optional[int] = None, min_score: Optional[float] = None) -> int:
+        """
+        Count photos awaiting approval.
+        
+        Args:
+            session_id: Only count photos of this session
+            min_score: Only count photos scored at least this
+        
+        Returns:
+            Number of photos
+        """
+        with self._lock:
+            return self._ensure_fresh().count(session_id, min_score)
+    
+    def get_page(
+        self,
+        offset: int = 0,
+        limit: int = 100,
+        session_id: Optional[int] = None,
+        min_score: Optional[float] = None
+    ) -> Tuple[List[int], int]:
+        """
+        Get one page of the queue.
+        
+        Args:
+            offset: Number of photos to skip
+            limit: Maximum number of photos
+            session_id: Only include photos of this session
+            min_score: Only include photos scored at least this
+        
+        Returns:
+            Tuple of (photo IDs best score first, total count)
+        """
+        with self._lock:
+            index = self._ensure_fresh()
+            return (
+                index.page(offset, limit, session_id, min_score),
+                index.count(session_id, min_score)
+            )
+    
+    def fetch_photos(self, db_session, photo_ids: List[int]) -> List[Photo]:
+        """
+        Load photos for a page in queue order.
+        
+        Photos that left the queue in another process are dropped from the
+        result and from the index.
+        
+        Args:
+            db_session: Database session
+            photo_ids: Photo IDs from get_page
+        
+        Returns:
+            List of Photo objects
+        """
+        if not photo_ids:
+            return []
+        
+        photos = db_session.query(Photo).filter(
+            Photo.id.in_(photo_ids),
+            Photo.status == 'completed',
+            Photo.approved == False
+        ).all()
+        by_id = {photo.id: photo for photo in photos}
+        
+        stale = [photo_id for photo_id in photo_ids if photo_id not in by_id]
+        if stale:
+            self.remove_many(stale)
+        
+        return [by_id[photo_id] for photo_id in photo_ids if photo_id in by_id]
+    
+    def _push(
+        self,
+        added: Optional[List[int]] = None,
+        removed: Optional[List[int]] = None,
+        session_id: Optional[int] = None
+    ) -> None:
+        """Broadcast an 'approval_queue_updated' delta (caller holds the lock)."""
+        if not self.broadcast:
+            return
+        
+        index = self._index
+        added_data = []
+        for photo_id in added or []:
+            entry = index.entries.get(photo_id)
+            if entry is not None:
+                added_data.append({
+                    'photo_id': photo_id,
+                    'session_id': entry[0],
+                    'ai_score': entry[1],
+                    'position': index.position(photo_id)
+                })
+        
+        try:
+            import websocket_events
+            websocket_events.broadcast_approval_queue_updated(
+                queue_count=len(index),
+                session_id=session_id,
+                added=added_data,
+                removed=list(removed or [])
+            )
+        except Exception as e:
+            logger.warning(f"Failed to broadcast approval queue update: {e}")
+    
+    def start(self) -> None:
+        """Start a background thread that resyncs the index periodically."""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        
+        self._stop_event.clear()
+        self._worker = threading.Thread(
+            target=self._run, name='approval-queue-resync', daemon=True
+        )
+        self._worker.start()
+    
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the background resync thread."""
+        self._stop_event.set()
+        if self._worker is not None:
+            self._worker.join(timeout)
+            self._worker = None
+    
+    def _run(self) -> None:
+        """Resync loop."""
+        while not self._stop_event.wait(self.resync_interval):
+            try:
+                if self._index is not None:
+                    self.resync()
+            except Exception as e:
+                logger.warning(f"Approval queue resync failed: {e}")
+
+
+# Singleton instance
+_approval_queue_service: Optional[ApprovalQueueService] = None
+
+
+def get_approval_queue_service() -> ApprovalQueueService:
+    """
+    Get singleton approval queue service instance.
+    
+    Returns:
+        ApprovalQueueService instance
+    """
+    global _approval_queue_service
+    if _approval_queue_service is None:
+        _approval_queue_service = ApprovalQueueService()
+    return _approval_queue_service
@@ -15,6 +15,10 @@ import jwt
 import secrets
 import hashlib
 import time
+import atexit
+import threading
+import weakref
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from functools import wraps
 from flask import request, jsonify, g
@@ -22,6 +26,7 @@ from typing import Dict, Optional, Tuple, List
 import json
 import pathlib
 from logging_system import get_logging_system
+from rate_limiter import RateLimiter
 
 logging_system = get_logging_system()
 
@@ -30,8 +35,90 @@ JWT_SECRET_KEY = None  # Will be initialized from config
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_HOURS = 24
 
-# Rate limiting storage (in-memory for simplicity, could use Redis for production)
-rate_limit_storage = {}
+# Authentication cache configuration
+JWT_CACHE_SIZE = 1024                 # Verified tokens kept in memory
+API_KEY_USAGE_FLUSH_SECONDS = 30.0    # Max delay before usage stats are saved
+
+# Managers with unsaved API key usage, flushed at exit
+_managers_with_usage = weakref.WeakSet()
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of verified JWTs
+    
+    Keyed by the SHA256 digest of the token (the token itself is not kept),
+    each entry holds the decoded payload and is valid until the token's exp.
+    """
+    
+    def __init__(self, max_size: int = JWT_CACHE_SIZE):
+        """
+        Initialize token cache
+        
+        Args:
+            max_size: Maximum number of cached tokens
+        """
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def digest(token: str) -> str:
+        """Digest used as cache key"""
+        return hashlib.sha256(token.encode()).hexdigest()
+    
+    def get(self, digest: str, now: float) -> Optional[Dict]:
+        """
+        Get the payload of a verified, unexpired token
+        
+        Args:
+            digest: Token digest
+            now: Current epoch time
+        
+        Returns:
+            Copy of the payload, or None if not cached or expired
+        """
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                expires_at, payload = entry
+                if now < expires_at:
+                    self._entries.move_to_end(digest)
+                    self.hits += 1
+                    return dict(payload)
+                del self._entries[digest]
+            self.misses += 1
+            return None
+    
+    def put(self, digest: str, payload: Dict):
+        """
+        Cache a verified token payload (tokens without exp are not cached)
+        
+        Args:
+            digest: Token digest
+            payload: Decoded payload
+        """
+        expires_at = payload.get('exp')
+        if not isinstance(expires_at, (int, float)):
+            return
+        
+        with self._lock:
+            self._entries[digest] = (expires_at, dict(payload))
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        """Drop all cached tokens"""
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
 
 
 class AuthManager:
@@ -39,13 +126,20 @@ class AuthManager:
     Authentication and security manager
     """
     
-    def __init__(self, secret_key: Optional[str] = None, config_path: Optional[str] = None):
+    def __init__(
+        self,
+        secret_key: Optional[str] = None,
+        config_path: Optional[str] = None,
+        rate_limit_backend: Optional[str] = None
+    ):
         """
         Initialize authentication manager
         
         Args:
             secret_key: JWT secret key (generated if not provided)
             config_path: Path to auth configuration file
+            rate_limit_backend: Rate limit backend URL ('memory', 'sqlite:///path',
+                'redis://host:port/db'; default: RATE_LIMIT_BACKEND environment variable)
         """
         self.config_path = pathlib.Path(config_path) if config_path else pathlib.Path(__file__).parent / "config" / "auth.json"
         self.config_path.parent.mkdir(parents=True, exist_ok=True)
@@ -56,15 +150,22 @@ class AuthManager:
         else:
             self.secret_key = self._load_or_generate_secret_key()
         
-        # Load API keys
+        # Load API keys (indexed by SHA256 of the key)
         self.api_keys = self._load_api_keys()
         
+        # Authentication caches
+        self.token_cache = VerifiedTokenCache()
+        self._usage_dirty = False
+        self._last_usage_save = time.monotonic()
+        self._api_key_stats = {'lookups': 0, 'verified': 0, 'config_writes_deferred': 0}
+        
         # Rate limiting configuration
         self.rate_limits = {
             'default': {'requests': 100, 'window': 60},  # 100 requests per minute
             'auth': {'requests': 10, 'window': 60},      # 10 auth requests per minute
             'upload': {'requests': 20, 'window': 60}     # 20 upload requests per minute
         }
+        self.rate_limiter = RateLimiter(backend=rate_limit_backend)
         
         logging_system.log("INFO", "AuthManager initialized", api_key_count=len(self.api_keys))
     
@@ -161,19 +262,29 @@ class AuthManager:
         """
         Verify JWT token
         
+        The signature is verified on first sight of a token; later requests
+        with the same token are answered from the token cache until it expires.
+        
         Args:
             token: JWT token string
         
         Returns:
             Tuple of (is_valid, payload, error_message)
         """
+        digest = VerifiedTokenCache.digest(token)
+        payload = self.token_cache.get(digest, time.time())
+        if payload is not None:
+            return True, payload, None
+        
         try:
             payload = jwt.decode(token, self.secret_key, algorithms=[JWT_ALGORITHM])
-            return True, payload, None
         except jwt.ExpiredSignatureError:
             return False, None, "Token has expired"
         except jwt.InvalidTokenError as e:
             return False, None, f"Invalid token: {str(e)}"
+        
+        self.token_cache.put(digest, payload)
+        return True, dict(payload), None
     
     def generate_api_key(self, name: str, description: str = "", permissions: List[str] = None) -> str:
         """
@@ -229,23 +340,72 @@ class AuthManager:
         
         # Hash the provided API key
         key_hash = hashlib.sha256(api_key.encode()).hexdigest()
+        self._api_key_stats['lookups'] += 1
         
         # Check if key exists
         if key_hash not in self.api_keys:
             return False, None, "API key not found"
         
-        # Update usage statistics
-        self.api_keys[key_hash]['last_used'] = datetime.utcnow().isoformat()
-        self.api_keys[key_hash]['usage_count'] += 1
+        # Update usage statistics (saved in batches)
+        metadata = self.api_keys[key_hash]
+        metadata['last_used'] = datetime.utcnow().isoformat()
+        metadata['usage_count'] += 1
+        self._api_key_stats['verified'] += 1
+        self._mark_usage_dirty()
         
-        # Save updated config (async in production)
-        config = {
+        return True, metadata, None
+    
+    def _mark_usage_dirty(self):
+        """
+        Record unsaved API key usage and save if the flush interval elapsed
+        """
+        self._usage_dirty = True
+        _managers_with_usage.add(self)
+        
+        if time.monotonic() - self._last_usage_save >= API_KEY_USAGE_FLUSH_SECONDS:
+            self.flush_api_key_usage()
+        else:
+            self._api_key_stats['config_writes_deferred'] += 1
+    
+    def flush_api_key_usage(self):
+        """
+        Save pending API key usage statistics
+        """
+        if not self._usage_dirty:
+            return
+        
+        self._save_config({
             'secret_key': self.secret_key,
             'api_keys': self.api_keys
-        }
-        self._save_config(config)
+        })
+        self._usage_dirty = False
+        self._last_usage_save = time.monotonic()
+    
+    def get_auth_cache_stats(self) -> Dict:
+        """
+        Get authentication cache statistics
         
-        return True, self.api_keys[key_hash], None
+        Returns:
+            Dictionary with token cache and API key counters
+        """
+        cache = self.token_cache
+        lookups = cache.hits + cache.misses
+        
+        return {
+            'jwt': {
+                'size': len(cache),
+                'max_size': cache.max_size,
+                'hits': cache.hits,
+                'misses': cache.misses,
+                'evictions': cache.evictions,
+                'hit_rate': cache.hits / lookups if lookups else 0.0
+            },
+            'api_key': {
+                'index_size': len(self.api_keys),
+                **self._api_key_stats,
+                'usage_pending': self._usage_dirty
+            }
+        }
     
     def revoke_api_key(self, api_key: str) -> bool:
         """
@@ -260,14 +420,16 @@ class AuthManager:
         key_hash = hashlib.sha256(api_key.encode()).hexdigest()
         
         if key_hash in self.api_keys:
+            # Removing the key from the index rejects it from the next request
             del self.api_keys[key_hash]
             
-            # Save updated config
+            # Save updated config (includes pending usage statistics)
             config = {
                 'secret_key': self.secret_key,
                 'api_keys': self.api_keys
             }
             self._save_config(config)
+            self._usage_dirty = False
             
             logging_system.log("INFO", "API key revoked", key_hash=key_hash[:16])
             return True
@@ -306,75 +468,53 @@ class AuthManager:
         Returns:
             Tuple of (is_allowed, limit_info)
         """
-        current_time = time.time()
         limit_config = self.rate_limits.get(limit_type, self.rate_limits['default'])
         
-        window = limit_config['window']
-        max_requests = limit_config['requests']
-        
-        # Get or create rate limit entry
-        if identifier not in rate_limit_storage:
-            rate_limit_storage[identifier] = {
-                'requests': [],
-                'blocked_until': None
-            }
-        
-        entry = rate_limit_storage[identifier]
-        
-        # Check if currently blocked
-        if entry['blocked_until'] and current_time < entry['blocked_until']:
-            remaining_time = int(entry['blocked_until'] - current_time)
-            return False, {
-                'allowed': False,
-                'limit': max_requests,
-                'remaining': 0,
-                'reset_in': remaining_time,
-                'retry_after': remaining_time
-            }
-        
-        # Clean up old requests outside the window
-        entry['requests'] = [req_time for req_time in entry['requests'] if current_time - req_time < window]
-        
-        # Check if limit exceeded
-        if len(entry['requests']) >= max_requests:
-            # Block for the remainder of the window
-            entry['blocked_until'] = current_time + window
-            return False, {
-                'allowed': False,
-                'limit': max_requests,
-                'remaining': 0,
-                'reset_in': window,
-                'retry_after': window
-            }
-        
-        # Add current request
-        entry['requests'].append(current_time)
-        
-        return True, {
-            'allowed': True,
-            'limit': max_requests,
-            'remaining': max_requests - len(entry['requests']),
-            'reset_in': window
-        }
+        return self.rate_limiter.check(
+            f"{limit_type}:{identifier}",
+            limit_config['requests'],
+            limit_config['window']
+        )
+
+
+def _flush_all_api_key_usage():
+    """Save pending API key usage of all managers at exit"""
+    for manager in list(_managers_with_usage):
+        try:
+            manager.flush_api_key_usage()
+        except Exception:
+            pass
+
+
+atexit.register(_flush_all_api_key_usage)
 
 
 # Global auth manager instance
 _auth_manager = None
 
 
-def init_auth_manager(secret_key: Optional[str] = None, config_path: Optional[str] = None) -> AuthManager:
+def init_auth_manager(
+    secret_key: Optional[str] = None,
+    config_path: Optional[str] = None,
+    rate_limit_backend: Optional[str] = None
+) -> AuthManager:
     """
     Initialize global auth manager
     
     Args:
         secret_key: JWT secret key
         config_path: Path to auth configuration file
+        rate_limit_backend: Rate limit backend URL
     
     Returns:
         AuthManager instance
     """
     global _auth_manager
-    _auth_manager = AuthManager(secret_key=secret_key, config_path=config_path)
+    _auth_manager = AuthManager(
+        secret_key=secret_key,
+        config_path=config_path,
+        rate_limit_backend=rate_limit_backend
+    )
     return _auth_manager
 
 
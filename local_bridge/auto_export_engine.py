@@ -6,7 +6,8 @@ Implements:
 - Approval-triggered auto-export
 - Multiple format simultaneous export
 - Automatic filename generation
-- Export queue management
+- Export queue management (persistent, see export_queue.py)
+- Batched, preset-grouped job claim for Lightroom
 
 Requirements: 6.1, 6.4
 """
@@ -16,10 +17,11 @@ import pathlib
 import json
 import uuid
 from datetime import datetime
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Optional, Set, Tuple
 from dataclasses import dataclass, asdict
 
 from export_preset_manager import ExportPresetManager, ExportPreset
+from export_queue import ExportQueue
 from models.database import get_session, Photo, Session as DBSession
 
 logger = logging.getLogger(__name__)
@@ -41,6 +43,7 @@ class ExportJob:
     completed_at: Optional[str] = None
     output_path: Optional[str] = None
     error_message: Optional[str] = None
+    priority: int = 2
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary"""
@@ -59,18 +62,40 @@ class AutoExportEngine:
     Manages automatic export of approved photos using configured presets.
     """
     
-    def __init__(self, preset_manager: Optional[ExportPresetManager] = None):
+    def __init__(self, preset_manager: Optional[ExportPresetManager] = None,
+                 queue_path: Optional[str] = None,
+                 processing_timeout: float = 1800.0):
         """
         Initialize AutoExportEngine
         
         Args:
             preset_manager: ExportPresetManager instance. If None, creates new one.
+            queue_path: SQLite file for the export queue. If None, the queue
+                is kept in memory and lost on restart.
+            processing_timeout: Seconds after which a claimed job that was
+                never completed (e.g. Lightroom or the bridge restarted) is
+                returned to pending
         """
         self.preset_manager = preset_manager or ExportPresetManager()
-        self.export_queue: List[ExportJob] = []
-        self.processing_jobs: Dict[str, ExportJob] = {}
+        self.export_queue = ExportQueue(queue_path or ':memory:')
+        self.processing_timeout = processing_timeout
         
-        logger.info("AutoExportEngine initialized")
+        requeued = self._requeue_stale_jobs()
+        
+        logger.info(f"AutoExportEngine initialized (requeued {requeued} stale jobs)")
+    
+    def _requeue_stale_jobs(self) -> int:
+        """
+        Return jobs stuck in processing for longer than processing_timeout to pending
+        
+        Returns:
+            Number of jobs requeued
+        """
+        requeued = self.export_queue.requeue_processing(older_than=self.processing_timeout)
+        if requeued:
+            logger.warning(f"Requeued {requeued} export jobs not completed within "
+                           f"{self.processing_timeout:.0f}s")
+        return requeued
     
     def trigger_auto_export(self, photo_id: int, db_session=None) -> List[ExportJob]:
         """
@@ -119,9 +144,10 @@ class AutoExportEngine:
             for preset in enabled_presets:
                 job = self._create_export_job(photo, preset)
                 export_jobs.append(job)
-                self.export_queue.append(job)
                 
-                logger.info(f"Created export job: job_id={job.id}, preset={preset.name}")
+                logger.debug(f"Created export job: job_id={job.id}, preset={preset.name}")
+            
+            self.export_queue.add_jobs(job.to_dict() for job in export_jobs)
             
             logger.info(f"Created {len(export_jobs)} export jobs for photo_id={photo_id}")
             return export_jobs
@@ -130,6 +156,64 @@ class AutoExportEngine:
             if close_session:
                 db_session.close()
     
+    def trigger_auto_export_bulk(self, photo_ids: List[int], db_session=None) -> Dict[int, List[ExportJob]]:
+        """
+        Trigger automatic export for many approved photos at once
+        
+        Loads the photos in one query, reads the enabled presets once and
+        inserts all jobs, grouped by preset, in one export queue transaction.
+        Photos that are missing or not approved are skipped.
+        
+        Args:
+            photo_ids: IDs of the approved photos
+            db_session: Database session (optional, creates new if None)
+            
+        Returns:
+            Dictionary of photo_id -> created ExportJob objects
+        """
+        logger.info(f"Triggering auto-export for {len(photo_ids)} photos")
+        
+        close_session = False
+        if db_session is None:
+            db_session = get_session()
+            close_session = True
+        
+        try:
+            photos = db_session.query(Photo).filter(
+                Photo.id.in_(photo_ids),
+                Photo.approved == True
+            ).order_by(Photo.id).all() if photo_ids else []
+            
+            skipped = len(set(photo_ids)) - len(photos)
+            if skipped:
+                logger.warning(f"Skipping auto-export for {skipped} photos not found or not approved")
+            
+            enabled_presets = self.preset_manager.get_enabled_presets()
+            
+            if not photos or not enabled_presets:
+                if not enabled_presets:
+                    logger.warning("No enabled export presets found, skipping auto-export")
+                return {}
+            
+            # One pass per preset keeps each preset's jobs together in the queue
+            jobs_by_photo: Dict[int, List[ExportJob]] = {photo.id: [] for photo in photos}
+            all_jobs = []
+            for preset in enabled_presets:
+                for photo in photos:
+                    job = self._create_export_job(photo, preset)
+                    jobs_by_photo[photo.id].append(job)
+                    all_jobs.append(job)
+            
+            self.export_queue.add_jobs(job.to_dict() for job in all_jobs)
+            
+            logger.info(f"Created {len(all_jobs)} export jobs for {len(photos)} photos "
+                        f"across {len(enabled_presets)} presets")
+            return jobs_by_photo
+            
+        finally:
+            if close_session:
+                db_session.close()
+    
     def _create_export_job(self, photo: Photo, preset: ExportPreset) -> ExportJob:
         """
         Create an export job for a photo and preset
@@ -195,9 +279,10 @@ class AutoExportEngine:
                 
                 job = self._create_export_job(photo, preset)
                 export_jobs.append(job)
-                self.export_queue.append(job)
                 
-                logger.info(f"Created export job: job_id={job.id}, preset={preset_name}")
+                logger.debug(f"Created export job: job_id={job.id}, preset={preset_name}")
+            
+            self.export_queue.add_jobs(job.to_dict() for job in export_jobs)
             
             logger.info(f"Created {len(export_jobs)} export jobs for photo_id={photo_id}")
             return export_jobs
@@ -263,7 +348,8 @@ class AutoExportEngine:
         return filename
     
     def get_export_path(self, photo: Photo, preset: ExportPreset, 
-                       sequence_number: Optional[int] = None) -> pathlib.Path:
+                       sequence_number: Optional[int] = None,
+                       reserved: Optional[Set[pathlib.Path]] = None) -> pathlib.Path:
         """
         Get full export path for a photo
         
@@ -271,6 +357,7 @@ class AutoExportEngine:
             photo: Photo object
             preset: ExportPreset object
             sequence_number: Optional sequence number
+            reserved: Paths already assigned to other jobs of the same batch
             
         Returns:
             Full path to export file
@@ -295,9 +382,10 @@ class AutoExportEngine:
         destination.mkdir(parents=True, exist_ok=True)
         
         # Handle filename conflicts
-        if full_path.exists():
+        reserved = reserved or set()
+        if full_path.exists() or full_path in reserved:
             counter = 1
-            while full_path.exists():
+            while full_path.exists() or full_path in reserved:
                 conflict_filename = f"{filename}_{counter}{extension}"
                 full_path = destination / conflict_filename
                 counter += 1
@@ -322,18 +410,19 @@ class AutoExportEngine:
         """
         logger.info(f"Processing export job: job_id={job_id}")
         
-        # Find job in queue
-        job = None
-        for j in self.export_queue:
-            if j.id == job_id:
-                job = j
-                break
+        # Move job from pending to processing
+        row = self.export_queue.claim_job(job_id)
         
-        if not job:
-            error_msg = f"Export job not found: {job_id}"
+        if not row:
+            if self.export_queue.get(job_id) is None:
+                error_msg = f"Export job not found: {job_id}"
+            else:
+                error_msg = f"Export job is not pending: {job_id}"
             logger.error(error_msg)
             return False, error_msg
         
+        job = ExportJob.from_dict(row)
+        
         # Get database session
         close_session = False
         if db_session is None:
@@ -341,12 +430,6 @@ class AutoExportEngine:
             close_session = True
         
         try:
-            # Update job status
-            job.status = 'processing'
-            job.started_at = datetime.now().isoformat()
-            self.processing_jobs[job_id] = job
-            self.export_queue.remove(job)
-            
             # Get photo and preset
             photo = db_session.query(Photo).filter(Photo.id == job.photo_id).first()
             if not photo:
@@ -358,7 +441,7 @@ class AutoExportEngine:
             
             # Generate export path
             export_path = self.get_export_path(photo, preset)
-            job.output_path = str(export_path)
+            self.export_queue.set_output_paths({job_id: str(export_path)})
             
             logger.info(f"Export job prepared: job_id={job_id}, output={export_path}")
             
@@ -368,12 +451,7 @@ class AutoExportEngine:
             error_msg = f"Failed to process export job: {e}"
             logger.error(error_msg, exc_info=True)
             
-            job.status = 'failed'
-            job.error_message = error_msg
-            job.completed_at = datetime.now().isoformat()
-            
-            if job_id in self.processing_jobs:
-                del self.processing_jobs[job_id]
+            self.export_queue.finish(job_id, 'failed', error_msg)
             
             return False, error_msg
             
@@ -381,6 +459,99 @@ class AutoExportEngine:
             if close_session:
                 db_session.close()
     
+    def claim_export_jobs(self, count: int = 10, preset_name: Optional[str] = None,
+                          db_session=None) -> Dict[str, Any]:
+        """
+        Claim a batch of pending export jobs that share one preset
+        
+        The preset of the next pending job is used unless preset_name is
+        given, so that Lightroom can run one export over all photos of the
+        batch. Photos are loaded with a single query.
+        
+        Args:
+            count: Maximum number of jobs to claim
+            preset_name: Only claim jobs for this preset (optional)
+            db_session: Database session (optional)
+            
+        Returns:
+            Dictionary with preset_name, claimed jobs, their Lightroom
+            configurations and the IDs of jobs that failed preparation
+        """
+        self._requeue_stale_jobs()
+        rows = self.export_queue.claim(count, preset_name=preset_name, group_by_preset=True)
+        jobs = [ExportJob.from_dict(row) for row in rows]
+        
+        batch = {
+            'preset_name': jobs[0].preset_name if jobs else preset_name,
+            'jobs': [],
+            'configs': [],
+            'failed_job_ids': []
+        }
+        
+        if not jobs:
+            return batch
+        
+        logger.info(f"Claimed {len(jobs)} export jobs for preset={batch['preset_name']}")
+        
+        preset = self.preset_manager.get_preset(batch['preset_name'])
+        if not preset:
+            error_msg = f"Preset not found: {batch['preset_name']}"
+            logger.error(error_msg)
+            for job in jobs:
+                self.export_queue.finish(job.id, 'failed', error_msg)
+            batch['failed_job_ids'] = [job.id for job in jobs]
+            return batch
+        
+        # Get database session
+        close_session = False
+        if db_session is None:
+            db_session = get_session()
+            close_session = True
+        
+        try:
+            photo_ids = list({job.photo_id for job in jobs})
+            photos = {
+                photo.id: photo
+                for photo in db_session.query(Photo).filter(Photo.id.in_(photo_ids)).all()
+            }
+            
+            reserved: Set[pathlib.Path] = set()
+            output_paths: Dict[str, str] = {}
+            
+            for job in jobs:
+                photo = photos.get(job.photo_id)
+                if not photo:
+                    self.export_queue.finish(job.id, 'failed', f"Photo not found: photo_id={job.photo_id}")
+                    batch['failed_job_ids'].append(job.id)
+                    continue
+                
+                export_path = self.get_export_path(photo, preset, reserved=reserved)
+                reserved.add(export_path)
+                
+                job.output_path = str(export_path)
+                output_paths[job.id] = job.output_path
+                
+                batch['jobs'].append(job.to_dict())
+                batch['configs'].append(self._build_lightroom_config(job, photo, preset, export_path))
+            
+            self.export_queue.set_output_paths(output_paths)
+            
+        except Exception as e:
+            error_msg = f"Failed to prepare export jobs: {e}"
+            logger.error(error_msg, exc_info=True)
+            for job in jobs:
+                if job.id not in batch['failed_job_ids']:
+                    self.export_queue.finish(job.id, 'failed', error_msg)
+            batch['failed_job_ids'] = [job.id for job in jobs]
+            batch['jobs'] = []
+            batch['configs'] = []
+            
+        finally:
+            if close_session:
+                db_session.close()
+        
+        return batch
+    
     def complete_export_job(self, job_id: str, success: bool, 
                            error_message: Optional[str] = None) -> bool:
         """
@@ -396,21 +567,13 @@ class AutoExportEngine:
         """
         logger.info(f"Completing export job: job_id={job_id}, success={success}")
         
-        if job_id not in self.processing_jobs:
+        row = self.export_queue.finish(job_id, 'completed' if success else 'failed', error_message)
+        
+        if not row:
             logger.warning(f"Export job not found in processing: {job_id}")
             return False
         
-        job = self.processing_jobs[job_id]
-        job.status = 'completed' if success else 'failed'
-        job.completed_at = datetime.now().isoformat()
-        
-        if error_message:
-            job.error_message = error_message
-        
-        # Remove from processing
-        del self.processing_jobs[job_id]
-        
-        logger.info(f"Export job completed: job_id={job_id}, status={job.status}")
+        logger.info(f"Export job completed: job_id={job_id}, status={row['status']}")
         
         return True
     
@@ -421,24 +584,38 @@ class AutoExportEngine:
         Returns:
             Next ExportJob or None if queue is empty
         """
-        if not self.export_queue:
-            return None
+        row = self.export_queue.peek()
         
-        # Return oldest job (FIFO)
-        return self.export_queue[0]
+        # Highest priority, oldest first (FIFO)
+        return ExportJob.from_dict(row) if row else None
     
-    def get_export_queue_status(self) -> Dict[str, Any]:
+    def get_export_queue_status(self, limit: int = 100, offset: int = 0,
+                                preset_name: Optional[str] = None) -> Dict[str, Any]:
         """
         Get export queue status
         
+        Counts cover the whole queue; job lists are paged.
+        
+        Args:
+            limit: Maximum jobs per list
+            offset: Number of pending jobs to skip
+            preset_name: Only list jobs for this preset (optional)
+            
         Returns:
             Dictionary with queue statistics
         """
+        counts = self.export_queue.get_counts()
+        
         return {
-            'pending_count': len(self.export_queue),
-            'processing_count': len(self.processing_jobs),
-            'pending_jobs': [job.to_dict() for job in self.export_queue],
-            'processing_jobs': [job.to_dict() for job in self.processing_jobs.values()]
+            'pending_count': counts['pending'],
+            'processing_count': counts['processing'],
+            'completed_count': counts['completed'],
+            'failed_count': counts['failed'],
+            'pending_by_preset': self.export_queue.get_preset_counts('pending'),
+            'limit': limit,
+            'offset': offset,
+            'pending_jobs': self.export_queue.list_jobs('pending', limit, offset, preset_name),
+            'processing_jobs': self.export_queue.list_jobs('processing', limit, 0, preset_name)
         }
     
     def get_export_job(self, job_id: str) -> Optional[ExportJob]:
@@ -451,16 +628,8 @@ class AutoExportEngine:
         Returns:
             ExportJob or None if not found
         """
-        # Check processing jobs
-        if job_id in self.processing_jobs:
-            return self.processing_jobs[job_id]
-        
-        # Check queue
-        for job in self.export_queue:
-            if job.id == job_id:
-                return job
-        
-        return None
+        row = self.export_queue.get(job_id)
+        return ExportJob.from_dict(row) if row else None
     
     def cancel_export_job(self, job_id: str) -> bool:
         """
@@ -474,16 +643,14 @@ class AutoExportEngine:
         """
         logger.info(f"Cancelling export job: job_id={job_id}")
         
-        # Check queue
-        for job in self.export_queue:
-            if job.id == job_id:
-                self.export_queue.remove(job)
-                logger.info(f"Export job cancelled from queue: {job_id}")
-                return True
+        if self.export_queue.cancel(job_id):
+            logger.info(f"Export job cancelled from queue: {job_id}")
+            return True
         
-        # Check processing (cannot cancel processing jobs)
-        if job_id in self.processing_jobs:
-            logger.warning(f"Cannot cancel processing job: {job_id}")
+        # Only pending jobs can be cancelled
+        job = self.export_queue.get(job_id)
+        if job:
+            logger.warning(f"Cannot cancel {job['status']} job: {job_id}")
             return False
         
         logger.warning(f"Export job not found: {job_id}")
@@ -496,13 +663,45 @@ class AutoExportEngine:
         Returns:
             Number of jobs cleared
         """
-        count = len(self.export_queue)
-        self.export_queue.clear()
+        count = self.export_queue.clear_pending()
         
         logger.info(f"Cleared {count} export jobs from queue")
         
         return count
     
+    def _build_lightroom_config(self, job: ExportJob, photo: Photo, preset: ExportPreset,
+                                export_path: pathlib.Path) -> Dict[str, Any]:
+        """
+        Build the Lightroom export configuration of a job
+        
+        Args:
+            job: ExportJob object
+            photo: Photo object
+            preset: ExportPreset object
+            export_path: Output path
+            
+        Returns:
+            Export configuration dictionary
+        """
+        return {
+            'job_id': job.id,
+            'photo_id': job.photo_id,
+            'photo_path': photo.file_path,
+            'lr_catalog_id': photo.lr_catalog_id,
+            'export_path': str(export_path),
+            'format': preset.format,
+            'quality': preset.quality,
+            'max_dimension': preset.max_dimension,
+            'color_space': preset.color_space,
+            'resize_mode': preset.resize_mode,
+            'sharpen_for_screen': preset.sharpen_for_screen,
+            'sharpen_amount': preset.sharpen_amount,
+            'watermark_enabled': preset.watermark_enabled,
+            'watermark_text': preset.watermark_text,
+            'metadata_include': preset.metadata_include,
+            'metadata_copyright': preset.metadata_copyright
+        }
+    
     def get_export_config_for_lightroom(self, job_id: str, db_session=None) -> Optional[Dict[str, Any]]:
         """
         Get export configuration for Lightroom
@@ -544,24 +743,7 @@ class AutoExportEngine:
             export_path = self.get_export_path(photo, preset)
             
             # Build Lightroom export configuration
-            config = {
-                'job_id': job_id,
-                'photo_id': job.photo_id,
-                'photo_path': photo.file_path,
-                'lr_catalog_id': photo.lr_catalog_id,
-                'export_path': str(export_path),
-                'format': preset.format,
-                'quality': preset.quality,
-                'max_dimension': preset.max_dimension,
-                'color_space': preset.color_space,
-                'resize_mode': preset.resize_mode,
-                'sharpen_for_screen': preset.sharpen_for_screen,
-                'sharpen_amount': preset.sharpen_amount,
-                'watermark_enabled': preset.watermark_enabled,
-                'watermark_text': preset.watermark_text,
-                'metadata_include': preset.metadata_include,
-                'metadata_copyright': preset.metadata_copyright
-            }
+            config = self._build_lightroom_config(job, photo, preset, export_path)
             
             logger.info(f"Generated export config for Lightroom: job_id={job_id}")
             
@@ -572,18 +754,30 @@ class AutoExportEngine:
                 db_session.close()
 
 
-# Convenience function for quick access
-def get_auto_export_engine(preset_manager: Optional[ExportPresetManager] = None) -> AutoExportEngine:
+# Global auto export engine instance
+_auto_export_engine: Optional[AutoExportEngine] = None
+
+
+def get_auto_export_engine(preset_manager: Optional[ExportPresetManager] = None,
+                           queue_path: Optional[str] = None) -> AutoExportEngine:
     """
-    Get an AutoExportEngine instance
+    Get or create global AutoExportEngine instance
+    
+    The instance is shared so that all callers use the same export queue.
     
     Args:
         preset_manager: Optional ExportPresetManager instance
+        queue_path: Optional SQLite file for the export queue
         
     Returns:
         AutoExportEngine instance
     """
-    return AutoExportEngine(preset_manager)
+    global _auto_export_engine
+    
+    if _auto_export_engine is None:
+        _auto_export_engine = AutoExportEngine(preset_manager, queue_path=queue_path)
+    
+    return _auto_export_engine
 
 
 if __name__ == '__main__':
@@ -0,0 +1,425 @@
+"""
+Content-Addressed Backup Store
+
+This module provides incremental, deduplicated storage for FailsafeManager
+backups:
+- Object store keyed by SHA-256 (objects/ab/abcdef...)
+- One JSON manifest per backup (relative path -> object hash)
+- Unchanged files skipped by (size, mtime) against the previous manifest
+- SQLite databases copied through the online backup API
+- Checksums computed while copying, never in a separate pass
+
+Backup time and disk usage scale with the files that changed since the
+previous backup of the same source, not with the total size.
+
+Requirements: 14.4
+"""
+
+import os
+import json
+import sqlite3
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+COPY_BUFFER_SIZE = 1024 * 1024
+SQLITE_HEADER = b'SQLite format 3\x00'
+SQLITE_SIDECAR_SUFFIXES = ('-wal', '-shm', '-journal')
+
+
+def combine_checksums(files: Dict[str, Dict]) -> str:
+    """
+    Combine per-file hashes into a single backup checksum
+    
+    Files are ordered by path components, which matches the order of
+    sorted(Path.rglob('*')) used for full-copy backups.
+    
+    Args:
+        files: Manifest file entries (relative path -> entry)
+    
+    Returns:
+        SHA-256 hex digest of the concatenated file hashes
+    """
+    ordered = sorted(files, key=lambda rel: Path(rel).parts)
+    combined = ''.join(files[rel]['hash'] for rel in ordered)
+    return hashlib.sha256(combined.encode()).hexdigest()
+
+
+def is_sqlite_database(path: Path) -> bool:
+    """Check the SQLite file header"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(SQLITE_HEADER)) == SQLITE_HEADER
+    except OSError:
+        return False
+
+
+def _walk_files(root: Path) -> Iterator[Tuple[str, os.stat_result]]:
+    """Recursively list regular files below root as (relative path, stat)"""
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        with os.scandir(current) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(Path(entry.path))
+                elif entry.is_file(follow_symlinks=False):
+                    rel = Path(entry.path).relative_to(root).as_posix()
+                    yield rel, entry.stat()
+
+
+class BackupStore:
+    """
+    Hash-keyed object store with per-backup manifests
+    
+    Not thread-safe on its own; FailsafeManager serializes access with its
+    backup lock.
+    """
+    
+    def __init__(self, root: str):
+        """
+        Initialize BackupStore
+        
+        Args:
+            root: Store directory (objects/, manifests/ and tmp/ live below it)
+        """
+        self.root = Path(root)
+        self.objects_dir = self.root / 'objects'
+        self.manifests_dir = self.root / 'manifests'
+        self.tmp_dir = self.root / 'tmp'
+        
+        for directory in (self.objects_dir, self.manifests_dir, self.tmp_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+    
+    # ------------------------------------------------------------------
+    # Objects
+    # ------------------------------------------------------------------
+    
+    def object_path(self, digest: str) -> Path:
+        """Get the path of an object"""
+        return self.objects_dir / digest[:2] / digest[2:]
+    
+    def has_object(self, digest: str) -> bool:
+        """Check whether an object is stored"""
+        return self.object_path(digest).exists()
+    
+    def _commit_temp(self, tmp_path: Path, digest: str) -> bool:
+        """
+        Move a fully written temp file into the object store
+        
+        Returns:
+            True if a new object was stored, False if it already existed
+        """
+        target = self.object_path(digest)
+        if target.exists():
+            tmp_path.unlink()
+            return False
+        target.parent.mkdir(exist_ok=True)
+        os.replace(tmp_path, target)
+        return True
+    
+    def _new_temp(self) -> Path:
+        """Create an empty temp file inside the store"""
+        fd, name = tempfile.mkstemp(dir=self.tmp_dir)
+        os.close(fd)
+        return Path(name)
+    
+    def put_file(self, path: Path) -> Tuple[str, int, bool]:
+        """
+        Copy a file into the store, hashing it in the same pass
+        
+        Args:
+            path: Source file
+        
+        Returns:
+            (hash, size, stored) where stored is False for an existing object
+        """
+        tmp_path = self._new_temp()
+        sha256 = hashlib.sha256()
+        size = 0
+        buffer = bytearray(COPY_BUFFER_SIZE)
+        view = memoryview(buffer)
+        try:
+            with open(path, 'rb') as src, open(tmp_path, 'wb') as dst:
+                while True:
+                    n = src.readinto(buffer)
+                    if not n:
+                        break
+                    sha256.update(view[:n])
+                    dst.write(view[:n])
+                    size += n
+            digest = sha256.hexdigest()
+            return digest, size, self._commit_temp(tmp_path, digest)
+        except BaseException:
+            if tmp_path.exists():
+                tmp_path.unlink()
+            raise
+    
+    def put_sqlite(self, path: Path) -> Tuple[str, int, bool]:
+        """
+        Copy a SQLite database into the store through the online backup API
+        
+        The backup API produces a consistent snapshot even while other
+        connections are writing, and folds any WAL content into the copy.
+        
+        Args:
+            path: Source database
+        
+        Returns:
+            (hash, size, stored) where stored is False for an existing object
+        """
+        tmp_path = self._new_temp()
+        try:
+            src = sqlite3.connect(str(path))
+            try:
+                dst = sqlite3.connect(str(tmp_path))
+                try:
+                    src.backup(dst)
+                finally:
+                    dst.close()
+            finally:
+                src.close()
+            
+            sha256 = hashlib.sha256()
+            size = 0
+            with open(tmp_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(COPY_BUFFER_SIZE), b''):
+                    sha256.update(chunk)
+                    size += len(chunk)
+            digest = sha256.hexdigest()
+            return digest, size, self._commit_temp(tmp_path, digest)
+        except BaseException:
+            if tmp_path.exists():
+                tmp_path.unlink()
+            raise
+    
+    def restore_object(self, digest: str, dest: Path) -> None:
+        """
+        Copy an object to dest, verifying its hash in the same pass
+        
+        Raises:
+            FileNotFoundError: If the object is missing
+            ValueError: If the object content does not match its hash
+        """
+        source = self.object_path(digest)
+        if not source.exists():
+            raise FileNotFoundError(f"Backup object not found: {digest}")
+        
+        sha256 = hashlib.sha256()
+        buffer = bytearray(COPY_BUFFER_SIZE)
+        view = memoryview(buffer)
+        with open(source, 'rb') as src, open(dest, 'wb') as dst:
+            while True:
+                n = src.readinto(buffer)
+                if not n:
+                    break
+                sha256.update(view[:n])
+                dst.write(view[:n])
+        
+        if sha256.hexdigest() != digest:
+            raise ValueError(f"Checksum mismatch for backup object {digest}")
+    
+    # ------------------------------------------------------------------
+    # Manifests
+    # ------------------------------------------------------------------
+    
+    def manifest_path(self, backup_id: str) -> Path:
+        """Get the manifest path of a backup"""
+        return self.manifests_dir / f"{backup_id}.json"
+    
+    def load_manifest(self, backup_id: str) -> Optional[Dict]:
+        """Load a manifest, or None if it is missing or unreadable"""
+        path = self.manifest_path(backup_id)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to load backup manifest {path}: {e}")
+            return None
+    
+    def _write_manifest(self, manifest: Dict) -> Path:
+        """Write a manifest atomically"""
+        path = self.manifest_path(manifest['backup_id'])
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return path
+    
+    def delete_manifest(self, backup_id: str) -> None:
+        """Delete a manifest (objects are removed by collect_garbage)"""
+        path = self.manifest_path(backup_id)
+        if path.exists():
+            path.unlink()
+    
+    # ------------------------------------------------------------------
+    # Backup / restore
+    # ------------------------------------------------------------------
+    
+    def _signature(self, path: Path, st: os.stat_result, sqlite: bool) -> List[int]:
+        """
+        Build the change-detection signature of a file
+        
+        SQLite databases also include their WAL file, since committed
+        transactions may live only in the WAL until a checkpoint.
+        """
+        signature = [st.st_size, st.st_mtime_ns]
+        if sqlite:
+            wal = path.with_name(path.name + '-wal')
+            try:
+                wal_st = wal.stat()
+                signature += [wal_st.st_size, wal_st.st_mtime_ns]
+            except OSError:
+                signature += [0, 0]
+        return signature
+    
+    def snapshot(
+        self,
+        source: Path,
+        backup_id: str,
+        backup_name: str,
+        previous: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Create a backup of a file or directory
+        
+        Files whose signature matches the previous manifest (and whose object
+        is still stored) are recorded without being read.
+        
+        Args:
+            source: File or directory to back up
+            backup_id: Backup ID (manifest file name)
+            backup_name: Human readable backup name
+            previous: Manifest of the previous backup of the same source
+        
+        Returns:
+            The written manifest
+        """
+        source = Path(source)
+        previous_files = previous.get('files', {}) if previous else {}
+        
+        if source.is_file():
+            kind = 'file'
+            listing: Iterable[Tuple[str, os.stat_result]] = [(source.name, source.stat())]
+            base = source.parent
+        else:
+            kind = 'dir'
+            listing = list(_walk_files(source))
+            base = source
+        
+        names = {rel for rel, _ in listing}
+        files: Dict[str, Dict] = {}
+        new_bytes = 0
+        reused = 0
+        
+        for rel, st in listing:
+            # WAL/SHM/journal content is captured by the database backup
+            if any(rel.endswith(suffix) and rel[:-len(suffix)] in names
+                   for suffix in SQLITE_SIDECAR_SUFFIXES):
+                continue
+            
+            path = base / rel
+            known = previous_files.get(rel)
+            if known is not None:
+                signature = self._signature(path, st, known.get('sqlite', False))
+                if known.get('sig') == signature and self.has_object(known['hash']):
+                    files[rel] = known
+                    reused += 1
+                    continue
+            
+            sqlite = is_sqlite_database(path)
+            signature = self._signature(path, st, sqlite)
+            if sqlite:
+                digest, size, stored = self.put_sqlite(path)
+            else:
+                digest, size, stored = self.put_file(path)
+            if stored:
+                new_bytes += size
+            
+            files[rel] = {'hash': digest, 'size': size, 'sig': signature, 'sqlite': sqlite}
+        
+        manifest = {
+            'version': 1,
+            'backup_id': backup_id,
+            'backup_name': backup_name,
+            'source_path': str(source),
+            'kind': kind,
+            'files': files,
+            'checksum': files[source.name]['hash'] if kind == 'file' else combine_checksums(files),
+            'size_bytes': sum(entry['size'] for entry in files.values()),
+            'new_bytes': new_bytes,
+            'reused_files': reused
+        }
+        self._write_manifest(manifest)
+        
+        logger.debug(
+            f"Backup snapshot {backup_id}: {len(files)} files, {reused} unchanged, "
+            f"{new_bytes} new bytes"
+        )
+        return manifest
+    
+    def restore(self, manifest: Dict, dest: Path) -> str:
+        """
+        Materialize a backup at dest
+        
+        Args:
+            manifest: Backup manifest
+            dest: Destination file (file backups) or directory (dir backups)
+        
+        Returns:
+            Checksum of the restored data, computed while copying
+        """
+        dest = Path(dest)
+        files = manifest['files']
+        
+        if manifest['kind'] == 'file':
+            entry = next(iter(files.values()))
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            self.restore_object(entry['hash'], dest)
+            return entry['hash']
+        
+        dest.mkdir(parents=True, exist_ok=True)
+        for rel, entry in files.items():
+            target = dest / rel
+            target.parent.mkdir(parents=True, exist_ok=True)
+            self.restore_object(entry['hash'], target)
+        return combine_checksums(files)
+    
+    def collect_garbage(self, live_backup_ids: Iterable[str]) -> int:
+        """
+        Delete objects not referenced by any live manifest
+        
+        Args:
+            live_backup_ids: Backups whose objects must be kept
+        
+        Returns:
+            Number of deleted objects
+        """
+        referenced: Set[str] = set()
+        for backup_id in live_backup_ids:
+            manifest = self.load_manifest(backup_id)
+            if manifest is None:
+                continue
+            referenced.update(entry['hash'] for entry in manifest['files'].values())
+        
+        deleted = 0
+        for bucket in self.objects_dir.iterdir():
+            if not bucket.is_dir():
+                continue
+            for obj in bucket.iterdir():
+                if bucket.name + obj.name not in referenced:
+                    obj.unlink()
+                    deleted += 1
+        
+        # Leftovers of interrupted backups
+        for tmp in self.tmp_dir.iterdir():
+            tmp.unlink()
+        
+        if deleted:
+            logger.debug(f"Backup store garbage collection removed {deleted} objects")
+        return deleted
@@ -15,14 +15,18 @@ from datetime import datetime
 from typing import Dict, List, Optional, Set
 from enum import Enum
 from dataclasses import dataclass, asdict
-from threading import Lock
+from threading import RLock
 
 from models.database import get_session, Job, Photo, Session as DBSession
 from logging_system import get_logging_system
 from job_queue_manager import get_job_queue_manager
+from state_store import StateStore, get_state_store, STATE_STORE_FILENAME
 
 logging_system = get_logging_system()
 
+# State store namespace for batch states
+BATCH_NAMESPACE = 'batch'
+
 
 class BatchStatus(Enum):
     """Batch processing status"""
@@ -74,24 +78,30 @@ class BatchController:
     - Error handling and recovery
     """
     
-    def __init__(self, state_dir: Optional[pathlib.Path] = None):
+    def __init__(self, state_dir: Optional[pathlib.Path] = None,
+                 state_store: Optional[StateStore] = None):
         """
         Initialize batch controller
         
         Args:
             state_dir: Directory for state persistence (default: data/batch_states)
+            state_store: Store for batch states (default: the shared store when
+                state_dir is not given, otherwise a store inside state_dir)
         """
         self.job_queue_manager = get_job_queue_manager()
         
-        # State directory
+        # State directory (legacy per-batch JSON files are migrated from here)
+        if state_store is None:
+            state_store = get_state_store(state_dir / STATE_STORE_FILENAME if state_dir else None)
         if state_dir is None:
             state_dir = pathlib.Path(__file__).parent / "data" / "batch_states"
         self.state_dir = state_dir
         self.state_dir.mkdir(parents=True, exist_ok=True)
+        self.state_store = state_store
         
         # Active batches
         self.active_batches: Dict[str, BatchState] = {}
-        self.batch_lock = Lock()
+        self.batch_lock = RLock()
         
         # Load persisted states
         self._load_persisted_states()
@@ -100,15 +110,12 @@ class BatchController:
                           state_dir=str(self.state_dir))
     
     def _load_persisted_states(self):
-        """Load persisted batch states from disk"""
+        """Load persisted batch states from the state store in one pass"""
         try:
-            state_files = list(self.state_dir.glob("*.json"))
+            self._migrate_legacy_state_files()
             
-            for state_file in state_files:
+            for batch_id, data in self.state_store.load_namespace(BATCH_NAMESPACE).items():
                 try:
-                    with open(state_file, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                    
                     batch_state = BatchState.from_dict(data)
                     
                     # Only load non-completed batches
@@ -120,8 +127,8 @@ class BatchController:
                                           status=batch_state.status)
                 
                 except Exception as e:
-                    logging_system.log_error("Failed to load batch state file",
-                                            file=str(state_file),
+                    logging_system.log_error("Failed to load batch state",
+                                            batch_id=batch_id,
                                             exception=e)
             
             logging_system.log("INFO", "Loaded persisted batch states",
@@ -130,12 +137,39 @@ class BatchController:
         except Exception as e:
             logging_system.log_error("Failed to load persisted states", exception=e)
     
-    def _persist_state(self, batch_id: str):
+    def _migrate_legacy_state_files(self):
+        """Move per-batch JSON state files into the state store"""
+        legacy = {}
+        for state_file in self.state_dir.glob("*.json"):
+            try:
+                with open(state_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                legacy[data['batch_id']] = data
+            except Exception as e:
+                logging_system.log_error("Failed to migrate batch state file",
+                                        file=str(state_file),
+                                        exception=e)
+        
+        if not legacy:
+            return
+        
+        self.state_store.put_many(BATCH_NAMESPACE, legacy)
+        for batch_id in legacy:
+            (self.state_dir / f"{batch_id}.json").unlink(missing_ok=True)
+        
+        logging_system.log("INFO", "Migrated batch state files to state store",
+                          count=len(legacy))
+    
+    def _persist_state(self, batch_id: str, durable: bool = True):
         """
-        Persist batch state to disk
+        Persist batch state to the state store
+        
+        Progress updates pass durable=False so that the latest state of a
+        batch is coalesced and flushed at most once per flush interval.
         
         Args:
             batch_id: Batch identifier
+            durable: Flush before returning (status transitions)
         """
         try:
             with self.batch_lock:
@@ -143,13 +177,8 @@ class BatchController:
                     return
                 
                 batch_state = self.active_batches[batch_id]
-                state_file = self.state_dir / f"{batch_id}.json"
-                
-                with open(state_file, 'w', encoding='utf-8') as f:
-                    json.dump(batch_state.to_dict(), f, indent=2, ensure_ascii=False)
-                
-                logging_system.log("DEBUG", "Persisted batch state",
-                                  batch_id=batch_id)
+                self.state_store.put(BATCH_NAMESPACE, batch_id, batch_state.to_dict(),
+                                     durable=durable)
         
         except Exception as e:
             logging_system.log_error("Failed to persist batch state",
@@ -164,11 +193,9 @@ class BatchController:
             batch_id: Batch identifier
         """
         try:
-            state_file = self.state_dir / f"{batch_id}.json"
-            if state_file.exists():
-                state_file.unlink()
-                logging_system.log("DEBUG", "Deleted persisted batch state",
-                                  batch_id=batch_id)
+            self.state_store.delete(BATCH_NAMESPACE, batch_id)
+            logging_system.log("DEBUG", "Deleted persisted batch state",
+                              batch_id=batch_id)
         
         except Exception as e:
             logging_system.log_error("Failed to delete persisted state",
@@ -408,6 +435,7 @@ class BatchController:
                 return
             
             batch_state = self.active_batches[batch_id]
+            completed = False
             
             if success:
                 if photo_id not in batch_state.processed_photo_ids:
@@ -423,14 +451,15 @@ class BatchController:
             if total_done >= batch_state.total_photos:
                 batch_state.status = BatchStatus.COMPLETED.value
                 batch_state.completed_at = datetime.utcnow().isoformat()
+                completed = True
                 
                 logging_system.log("INFO", "Batch processing completed",
                                   batch_id=batch_id,
                                   processed=batch_state.processed_count,
                                   failed=batch_state.failed_count)
         
-        # Persist state
-        self._persist_state(batch_id)
+        # Persist state (per-photo updates are coalesced, completion is durable)
+        self._persist_state(batch_id, durable=completed)
     
     def get_batch_status(self, batch_id: str) -> Optional[Dict]:
         """
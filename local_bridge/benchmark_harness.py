@@ -0,0 +1,809 @@
+"""
+End-to-End Benchmark Harness for Junmai AutoDev
+
+This module measures the real processing stages of the bridge on a
+deterministic synthetic corpus:
+- Corpus generation: JPEG/TIFF with EXIF, burst sequences with measured
+  pHash distances and a range of megapixel sizes
+- Local fake Ollama server so that LLM calls exercise the real HTTP client
+- Per-stage runs (EXIF, quality, context, pHash, LLM) and a full pipeline
+  run including grouping and database writes
+- Latency percentiles, photos/s, peak RSS and DB write counts as JSON
+- Baseline comparison that fails on regressions beyond a tolerance
+
+Usage:
+    python benchmark_harness.py --photos 60 --output bench.json
+    python benchmark_harness.py --photos 60 --baseline bench.json
+
+Requirements: 12.1, 12.2, 12.3
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import hashlib
+import logging
+import platform
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import psutil
+from PIL import Image, ImageFilter
+
+try:
+    import piexif
+    PIEXIF_AVAILABLE = True
+except ImportError:
+    PIEXIF_AVAILABLE = False
+
+try:
+    import imagehash
+    IMAGEHASH_AVAILABLE = True
+except ImportError:
+    IMAGEHASH_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+BENCHMARK_SCHEMA_VERSION = 1
+DEFAULT_MEGAPIXELS = (1.0, 4.0, 12.0)
+DEFAULT_TOLERANCE = 0.10
+
+FAKE_LLM_RESPONSE = (
+    "SCORE: 4.2\n"
+    "REASONING: Sharp subject with balanced exposure.\n"
+    "STRENGTHS: focus, exposure\n"
+    "WEAKNESSES: composition\n"
+    "TAGS: portrait, outdoor"
+)
+
+CAMERAS = [
+    (b'Canon', b'Canon EOS R5', b'RF24-70mm F2.8 L IS USM'),
+    (b'SONY', b'ILCE-7M4', b'FE 85mm F1.8'),
+    (b'NIKON CORPORATION', b'NIKON Z 6_2', b'NIKKOR Z 24-120mm f/4 S'),
+]
+
+
+# ========== Synthetic Corpus ==========
+
+def _base_image(rng: np.random.RandomState, width: int, height: int) -> np.ndarray:
+    """Build a textured RGB image (gradient, shapes and noise) from a seeded RNG."""
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    color_a = rng.randint(0, 256, 3).astype(np.float32)
+    color_b = rng.randint(0, 256, 3).astype(np.float32)
+    t = (x / max(width - 1, 1) * 0.6 + y / max(height - 1, 1) * 0.4)[..., None]
+    img = color_a * (1 - t) + color_b * t
+    
+    # Blocks and discs give pHash and the focus metric real structure
+    for _ in range(12):
+        cx, cy = rng.randint(0, width), rng.randint(0, height)
+        radius = rng.randint(max(width // 40, 2), max(width // 6, 3))
+        color = rng.randint(0, 256, 3).astype(np.float32)
+        if rng.rand() < 0.5:
+            mask = (x - cx) ** 2 + (y - cy) ** 2 < radius ** 2
+        else:
+            mask = (abs(x - cx) < radius) & (abs(y - cy) < radius // 2 + 1)
+        img[mask] = color
+    
+    img += rng.normal(0, 6, img.shape).astype(np.float32)
+    return np.clip(img, 0, 255).astype(np.uint8)
+
+
+def _perturb(img: np.ndarray, rng: np.random.RandomState, level: int) -> np.ndarray:
+    """Burst frame: shift, brightness change and noise that grow with level."""
+    if level == 0:
+        return img.copy()
+    shift = level * max(img.shape[1] // 200, 1)
+    out = np.roll(img, shift, axis=1).astype(np.float32)
+    out *= 1.0 + 0.015 * level
+    out += rng.normal(0, 2 + level, out.shape)
+    return np.clip(out, 0, 255).astype(np.uint8)
+
+
+def _exif_bytes(index: int, rng: np.random.RandomState, capture_time: datetime) -> bytes:
+    """EXIF block with camera, exposure, capture time and (for half the photos) GPS."""
+    make, model, lens = CAMERAS[index % len(CAMERAS)]
+    timestamp = capture_time.strftime('%Y:%m:%d %H:%M:%S').encode()
+    exif = {
+        '0th': {
+            piexif.ImageIFD.Make: make,
+            piexif.ImageIFD.Model: model,
+            piexif.ImageIFD.DateTime: timestamp,
+        },
+        'Exif': {
+            piexif.ExifIFD.ExposureTime: (1, int(rng.choice([30, 125, 250, 1000]))),
+            piexif.ExifIFD.FNumber: (int(rng.choice([14, 28, 40, 80])), 10),
+            piexif.ExifIFD.ISOSpeedRatings: int(rng.choice([100, 400, 1600, 6400])),
+            piexif.ExifIFD.DateTimeOriginal: timestamp,
+            piexif.ExifIFD.FocalLength: (int(rng.choice([16, 35, 85, 200])), 1),
+            piexif.ExifIFD.MeteringMode: 5,
+            piexif.ExifIFD.WhiteBalance: 0,
+            piexif.ExifIFD.LensModel: lens,
+        },
+        'GPS': {},
+    }
+    if index % 2 == 0:
+        exif['GPS'] = {
+            piexif.GPSIFD.GPSLatitudeRef: b'N',
+            piexif.GPSIFD.GPSLatitude: ((35, 1), (int(rng.randint(0, 60)), 1), (0, 1)),
+            piexif.GPSIFD.GPSLongitudeRef: b'E',
+            piexif.GPSIFD.GPSLongitude: ((139, 1), (int(rng.randint(0, 60)), 1), (0, 1)),
+        }
+    return piexif.dump(exif)
+
+
+def _phash(img: Image.Image) -> Optional[str]:
+    return str(imagehash.phash(img)) if IMAGEHASH_AVAILABLE else None
+
+
+def generate_corpus(
+    output_dir: str,
+    count: int = 60,
+    seed: int = 42,
+    megapixels: Sequence[float] = DEFAULT_MEGAPIXELS,
+    burst_size: int = 5,
+    burst_ratio: float = 0.5,
+    tiff_ratio: float = 0.2
+) -> Dict[str, Any]:
+    """
+    Generate a deterministic synthetic photo corpus
+    
+    The same arguments always produce byte-identical files. Burst frames are
+    increasingly perturbed copies of the first frame; the measured pHash
+    distance to the first frame is recorded for every frame.
+    
+    Args:
+        output_dir: Directory for the generated files (created if needed)
+        count: Number of photos
+        seed: RNG seed
+        megapixels: Image sizes to cycle through
+        burst_size: Frames per burst sequence
+        burst_ratio: Fraction of photos that belong to bursts
+        tiff_ratio: Fraction of photos written as TIFF instead of JPEG
+    
+    Returns:
+        Corpus manifest (also written to manifest.json in output_dir)
+    """
+    if not PIEXIF_AVAILABLE:
+        raise RuntimeError("piexif is required to generate the benchmark corpus")
+    
+    out = Path(output_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    rng = np.random.RandomState(seed)
+    start_time = datetime(2025, 6, 1, 6, 0, 0)
+    
+    photos: List[Dict[str, Any]] = []
+    burst_photos = int(count * burst_ratio) // max(burst_size, 1) * max(burst_size, 1)
+    index = 0
+    burst_id = 0
+    
+    while index < count:
+        in_burst = index < burst_photos and burst_size > 1
+        frames = burst_size if in_burst else 1
+        mp = megapixels[len(photos) % len(megapixels)] if not in_burst else megapixels[burst_id % len(megapixels)]
+        width = int(round((mp * 1e6 * 1.5) ** 0.5))
+        height = int(round(width / 1.5))
+        base = _base_image(rng, width, height)
+        base_hash = None
+        
+        for level in range(frames):
+            frame = _perturb(base, rng, level * 2)
+            image = Image.fromarray(frame)
+            if level == 0 and rng.rand() < 0.2:
+                image = image.filter(ImageFilter.GaussianBlur(radius=3))
+            
+            is_tiff = not in_burst and rng.rand() < tiff_ratio
+            suffix = '.tif' if is_tiff else '.jpg'
+            path = out / f"photo_{index:05d}{suffix}"
+            capture_time = start_time + timedelta(minutes=index * 7, seconds=level)
+            exif = _exif_bytes(index, rng, capture_time)
+            if is_tiff:
+                image.save(path, 'TIFF', exif=exif)
+            else:
+                image.save(path, 'JPEG', quality=90, exif=exif)
+            
+            phash = _phash(image)
+            if level == 0:
+                base_hash = phash
+            distance = None
+            if in_burst and IMAGEHASH_AVAILABLE and base_hash is not None:
+                distance = imagehash.hex_to_hash(phash) - imagehash.hex_to_hash(base_hash)
+            
+            photos.append({
+                'id': index + 1,
+                'file_path': str(path),
+                'format': 'tiff' if is_tiff else 'jpeg',
+                'megapixels': mp,
+                'width': width,
+                'height': height,
+                'file_size': path.stat().st_size,
+                'burst_id': burst_id if in_burst else None,
+                'burst_index': level if in_burst else None,
+                'phash': phash,
+                'phash_distance_to_first': int(distance) if distance is not None else None,
+            })
+            index += 1
+            if index >= count:
+                break
+        
+        if in_burst:
+            burst_id += 1
+    
+    digest = hashlib.sha256()
+    for photo in photos:
+        with open(photo['file_path'], 'rb') as f:
+            digest.update(f.read())
+    
+    manifest = {
+        'seed': seed,
+        'count': len(photos),
+        'megapixels': list(megapixels),
+        'burst_size': burst_size,
+        'bursts': burst_id,
+        'total_bytes': sum(p['file_size'] for p in photos),
+        'content_sha256': digest.hexdigest(),
+        'photos': photos,
+    }
+    with open(out / 'manifest.json', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    
+    return manifest
+
+
+# ========== Fake Ollama Server ==========
+
+class FakeOllamaServer:
+    """
+    Minimal local stand-in for the Ollama HTTP API
+    
+    Serves /api/generate, /api/chat and /api/tags with canned responses and
+    an optional fixed latency, so benchmarks exercise the real client without
+    depending on a model being installed.
+    """
+    
+    def __init__(self, latency_ms: float = 0.0, response_text: str = FAKE_LLM_RESPONSE):
+        """
+        Args:
+            latency_ms: Delay added to every generate/chat request
+            response_text: Text returned by /api/generate
+        """
+        self.latency = latency_ms / 1000.0
+        self.response_text = response_text
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def host(self) -> str:
+        """Base URL of the running server"""
+        if self._server is None:
+            raise RuntimeError("Fake Ollama server is not running")
+        address, port = self._server.server_address[:2]
+        return f"http://{address}:{port}"
+    
+    def _handler(self):
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+            
+            def _send(self, payload: Dict[str, Any]):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def do_GET(self):
+                if self.path == '/api/tags':
+                    self._send({'models': [{'name': 'llama3.1:8b-instruct'}]})
+                else:
+                    self.send_error(404)
+            
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                self.rfile.read(length)
+                with server._lock:
+                    server.request_count += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                if self.path == '/api/generate':
+                    self._send({'response': server.response_text, 'done': True})
+                elif self.path == '/api/chat':
+                    self._send({'message': {'role': 'assistant', 'content': '{}'}, 'done': True})
+                else:
+                    self.send_error(404)
+        
+        return Handler
+    
+    def start(self) -> 'FakeOllamaServer':
+        """Start serving on an ephemeral localhost port"""
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """Stop the server"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+    
+    def __enter__(self) -> 'FakeOllamaServer':
+        return self.start()
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+# ========== Measurement ==========
+
+def latency_summary(durations_ms: Sequence[float]) -> Dict[str, float]:
+    """
+    Summarize latencies
+    
+    Args:
+        durations_ms: Per-item durations in milliseconds
+    
+    Returns:
+        count, mean, p50, p90, p99 and max in milliseconds
+    """
+    if not durations_ms:
+        return {'count': 0}
+    values = np.asarray(durations_ms, dtype=np.float64)
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {
+        'count': int(values.size),
+        'mean_ms': round(float(values.mean()), 3),
+        'p50_ms': round(float(p50), 3),
+        'p90_ms': round(float(p90), 3),
+        'p99_ms': round(float(p99), 3),
+        'max_ms': round(float(values.max()), 3),
+    }
+
+
+class PeakRSSSampler:
+    """Samples the process RSS in a background thread and keeps the peak"""
+    
+    def __init__(self, interval: float = 0.02):
+        self.interval = interval
+        self._process = psutil.Process()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.peak_bytes = 0
+    
+    def _sample(self):
+        self.peak_bytes = max(self.peak_bytes, self._process.memory_info().rss)
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+    
+    def __enter__(self) -> 'PeakRSSSampler':
+        self._sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+    
+    @property
+    def peak_mb(self) -> float:
+        return round(self.peak_bytes / (1024 * 1024), 1)
+
+
+class DBWriteCounter:
+    """Counts INSERT/UPDATE/DELETE statements and affected rows on an engine"""
+    
+    WRITE_VERBS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+    
+    def __init__(self, engine):
+        from sqlalchemy import event
+        
+        self.statements = 0
+        self.rows = 0
+        self.commits = 0
+        event.listen(engine, 'after_cursor_execute', self._after_execute)
+        event.listen(engine, 'commit', self._on_commit)
+    
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(self.WRITE_VERBS):
+            self.statements += 1
+            if cursor.rowcount and cursor.rowcount > 0:
+                self.rows += cursor.rowcount
+    
+    def _on_commit(self, conn):
+        self.commits += 1
+    
+    def to_dict(self) -> Dict[str, int]:
+        return {'statements': self.statements, 'rows': self.rows, 'commits': self.commits}
+
+
+def _timed(func: Callable[[], Any], durations: List[float]) -> Any:
+    start = time.perf_counter()
+    result = func()
+    durations.append((time.perf_counter() - start) * 1000)
+    return result
+
+
+# ========== Benchmark Runner ==========
+
+class BenchmarkRunner:
+    """
+    Runs the bridge's processing stages over a corpus
+    
+    Components are created the same way the Celery tasks create them, with
+    the Ollama client pointed at the given host.
+    """
+    
+    def __init__(self, corpus: Dict[str, Any], ollama_host: str, llm_model: str = "llama3.1:8b-instruct"):
+        """
+        Args:
+            corpus: Manifest returned by generate_corpus()
+            ollama_host: Base URL of the (fake) Ollama server
+            llm_model: Model name sent to Ollama
+        """
+        from exif_analyzer import EXIFAnalyzer
+        from image_quality_evaluator import ImageQualityEvaluator
+        from context_engine import ContextEngine
+        from photo_grouper import PhotoGrouper
+        from ollama_client import OllamaClient
+        from ai_selector import AISelector
+        
+        self.corpus = corpus
+        self.paths = [photo['file_path'] for photo in corpus['photos']]
+        self.exif_analyzer = EXIFAnalyzer(cache_size=0)
+        self.quality_evaluator = ImageQualityEvaluator()
+        self.context_engine = ContextEngine()
+        self.photo_grouper = PhotoGrouper()
+        self.ollama_client = OllamaClient(host=ollama_host)
+        self.ai_selector = AISelector(
+            quality_evaluator=self.quality_evaluator,
+            exif_analyzer=self.exif_analyzer,
+            context_engine=self.context_engine,
+            ollama_client=self.ollama_client,
+            llm_model=llm_model
+        )
+    
+    def run_stages(self) -> Dict[str, Dict[str, float]]:
+        """
+        Run each stage in isolation over the whole corpus
+        
+        Returns:
+            Stage name -> latency summary
+        """
+        timings: Dict[str, List[float]] = {name: [] for name in ('exif', 'quality', 'context', 'phash', 'llm')}
+        exif_results = [_timed(lambda p=path: self.exif_analyzer.analyze(p), timings['exif']) for path in self.paths]
+        quality_results = [_timed(lambda p=path: self.quality_evaluator.evaluate(p), timings['quality']) for path in self.paths]
+        
+        contexts = [
+            _timed(lambda e=exif, q=quality: self.context_engine.determine_context(e, q), timings['context'])
+            for exif, quality in zip(exif_results, quality_results)
+        ]
+        for path in self.paths:
+            _timed(lambda p=path: self.photo_grouper.calculate_phash(p), timings['phash'])
+        for exif, quality, context, path in zip(exif_results, quality_results, contexts, self.paths):
+            _timed(lambda: self.ai_selector._llm_evaluate(quality, exif, context, path), timings['llm'])
+        
+        photos = [{'id': p['id'], 'file_path': p['file_path'], 'ai_score': 3.0} for p in self.corpus['photos']]
+        grouping: List[float] = []
+        _timed(lambda: self.photo_grouper.group_photos(photos), grouping)
+        
+        summaries = {name: latency_summary(values) for name, values in timings.items()}
+        summaries['grouping'] = latency_summary(grouping)
+        return summaries
+    
+    def run_pipeline(self, database_url: str) -> Dict[str, Any]:
+        """
+        Run the full pipeline: evaluate, store, hash, group and save groups
+        
+        Args:
+            database_url: SQLAlchemy URL of a fresh database
+        
+        Returns:
+            Pipeline timings, throughput, peak RSS and DB write counts
+        """
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from models.database import Base, Photo, Session as DBSession
+        from photo_grouper import PhotoGroupDatabase
+        
+        engine = create_engine(database_url)
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        counter = DBWriteCounter(engine)
+        
+        timings: Dict[str, List[float]] = {'evaluate': [], 'db_write': [], 'phash': [], 'photo_total': []}
+        grouping: List[float] = []
+        
+        try:
+            with PeakRSSSampler() as rss:
+                wall_start = time.perf_counter()
+                
+                session = DBSession(name='benchmark', status='developing')
+                db.add(session)
+                db.commit()
+                
+                photos = []
+                for path in self.paths:
+                    photo_start = time.perf_counter()
+                    evaluation = _timed(lambda p=path: self.ai_selector.evaluate(p), timings['evaluate'])
+                    phash = _timed(lambda p=path: self.photo_grouper.calculate_phash(p), timings['phash'])
+                    
+                    def store(p=path, e=evaluation, h=phash):
+                        camera = e['exif'].get('camera', {})
+                        settings = e['exif'].get('settings', {})
+                        photo = Photo(
+                            session_id=session.id,
+                            file_path=p,
+                            file_name=os.path.basename(p),
+                            file_size=os.path.getsize(p),
+                            camera_make=str(camera['make']) if camera.get('make') else None,
+                            camera_model=str(camera['model']) if camera.get('model') else None,
+                            iso=settings.get('iso'),
+                            ai_score=e['overall_score'],
+                            focus_score=e['quality']['focus_score'],
+                            exposure_score=e['quality']['exposure_score'],
+                            composition_score=e['quality']['composition_score'],
+                            detected_faces=e['quality']['faces_detected'],
+                            context_tag=e['context'].get('context'),
+                            phash=h,
+                            status='analyzed'
+                        )
+                        db.add(photo)
+                        db.commit()
+                        return photo
+                    
+                    photo = _timed(store, timings['db_write'])
+                    photos.append({'id': photo.id, 'file_path': path, 'phash': phash, 'ai_score': photo.ai_score})
+                    timings['photo_total'].append((time.perf_counter() - photo_start) * 1000)
+                
+                def group_and_save():
+                    groups = self.photo_grouper.group_photos(photos)
+                    group_db = PhotoGroupDatabase(db)
+                    for group in groups:
+                        group_db.save_group(group, session_id=session.id)
+                    return groups
+                
+                groups = _timed(group_and_save, grouping)
+                wall_time = time.perf_counter() - wall_start
+        finally:
+            db.close()
+            engine.dispose()
+        
+        stages = {name: latency_summary(values) for name, values in timings.items()}
+        stages['grouping'] = latency_summary(grouping)
+        return {
+            'photos': len(self.paths),
+            'groups': len(groups),
+            'wall_time_s': round(wall_time, 3),
+            'photos_per_second': round(len(self.paths) / wall_time, 3) if wall_time > 0 else None,
+            'peak_rss_mb': rss.peak_mb,
+            'db_writes': counter.to_dict(),
+            'stages': stages,
+        }
+
+
+def run_benchmark(
+    corpus_dir: Optional[str] = None,
+    count: int = 60,
+    seed: int = 42,
+    megapixels: Sequence[float] = DEFAULT_MEGAPIXELS,
+    llm_latency_ms: float = 0.0,
+    stages: bool = True,
+    pipeline: bool = True
+) -> Dict[str, Any]:
+    """
+    Generate (or reuse) a corpus and benchmark it
+    
+    Args:
+        corpus_dir: Corpus directory; a temporary one is used and removed if None.
+            An existing manifest with the same seed and count is reused.
+        count: Number of photos
+        seed: Corpus RNG seed
+        megapixels: Image sizes to cycle through
+        llm_latency_ms: Latency of the fake Ollama server
+        stages: Run each stage in isolation
+        pipeline: Run the full pipeline
+    
+    Returns:
+        Machine-readable benchmark result
+    """
+    temporary = corpus_dir is None
+    corpus_dir = corpus_dir or tempfile.mkdtemp(prefix='junmai_bench_')
+    work_dir = tempfile.mkdtemp(prefix='junmai_bench_db_')
+    
+    try:
+        manifest_path = Path(corpus_dir) / 'manifest.json'
+        corpus = None
+        if manifest_path.exists():
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                corpus = json.load(f)
+            if corpus.get('seed') != seed or corpus.get('count') != count or \
+               corpus.get('megapixels') != list(megapixels):
+                corpus = None
+        
+        generation_start = time.perf_counter()
+        if corpus is None:
+            corpus = generate_corpus(corpus_dir, count=count, seed=seed, megapixels=megapixels)
+        generation_time = time.perf_counter() - generation_start
+        
+        result: Dict[str, Any] = {
+            'schema_version': BENCHMARK_SCHEMA_VERSION,
+            'created_at': datetime.now().isoformat(),
+            'environment': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+            },
+            'corpus': {
+                'seed': corpus['seed'],
+                'count': corpus['count'],
+                'megapixels': corpus['megapixels'],
+                'bursts': corpus['bursts'],
+                'total_bytes': corpus['total_bytes'],
+                'content_sha256': corpus['content_sha256'],
+                'generation_time_s': round(generation_time, 3),
+            },
+            'llm_latency_ms': llm_latency_ms,
+        }
+        
+        with FakeOllamaServer(latency_ms=llm_latency_ms) as server:
+            runner = BenchmarkRunner(corpus, server.host)
+            if stages:
+                result['stages'] = runner.run_stages()
+            if pipeline:
+                result['pipeline'] = runner.run_pipeline(f"sqlite:///{Path(work_dir) / 'bench.db'}")
+            result['llm_requests'] = server.request_count
+        
+        return result
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        if temporary:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+
+
+# ========== Baseline Comparison ==========
+
+def _relative_change(current: float, baseline: float) -> Optional[float]:
+    if baseline in (None, 0) or current is None:
+        return None
+    return (current - baseline) / baseline
+
+
+def compare_results(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float = DEFAULT_TOLERANCE
+) -> Dict[str, Any]:
+    """
+    Compare a benchmark result with a baseline
+    
+    Latencies (p50/p90 per stage), peak RSS and DB write statements regress
+    when they grow by more than the tolerance; photos/s regresses when it
+    drops by more than the tolerance.
+    
+    Args:
+        current: Result of run_benchmark()
+        baseline: Earlier result of run_benchmark()
+        tolerance: Allowed relative change (0.10 = 10%)
+    
+    Returns:
+        Dictionary with passed flag, regressions, improvements and warnings
+    """
+    regressions: List[Dict[str, Any]] = []
+    improvements: List[Dict[str, Any]] = []
+    warnings: List[str] = []
+    
+    if current.get('corpus', {}).get('content_sha256') != baseline.get('corpus', {}).get('content_sha256'):
+        warnings.append('Corpus differs from baseline; results are not directly comparable')
+    
+    def check(metric: str, cur: Optional[float], base: Optional[float], higher_is_better: bool = False):
+        change = _relative_change(cur, base)
+        if change is None:
+            return
+        if higher_is_better:
+            change = -change
+        entry = {'metric': metric, 'baseline': base, 'current': cur, 'change': round(change, 4)}
+        if change > tolerance:
+            regressions.append(entry)
+        elif change < -tolerance:
+            improvements.append(entry)
+    
+    for section in ('stages', 'pipeline'):
+        cur_stages = (current.get(section) or {})
+        base_stages = (baseline.get(section) or {})
+        if section == 'pipeline':
+            cur_stages = cur_stages.get('stages', {})
+            base_stages = base_stages.get('stages', {})
+        for stage, base_summary in base_stages.items():
+            cur_summary = cur_stages.get(stage)
+            if cur_summary is None:
+                warnings.append(f"Stage {section}.{stage} missing from current result")
+                continue
+            for key in ('p50_ms', 'p90_ms'):
+                check(f"{section}.{stage}.{key}", cur_summary.get(key), base_summary.get(key))
+    
+    cur_pipeline = current.get('pipeline') or {}
+    base_pipeline = baseline.get('pipeline') or {}
+    if cur_pipeline and base_pipeline:
+        check('pipeline.photos_per_second', cur_pipeline.get('photos_per_second'),
+              base_pipeline.get('photos_per_second'), higher_is_better=True)
+        check('pipeline.peak_rss_mb', cur_pipeline.get('peak_rss_mb'), base_pipeline.get('peak_rss_mb'))
+        check('pipeline.db_writes.statements',
+              cur_pipeline.get('db_writes', {}).get('statements'),
+              base_pipeline.get('db_writes', {}).get('statements'))
+    
+    return {
+        'passed': not regressions,
+        'tolerance': tolerance,
+        'regressions': regressions,
+        'improvements': improvements,
+        'warnings': warnings,
+    }
+
+
+# ========== CLI ==========
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point; returns 1 when the baseline comparison fails"""
+    parser = argparse.ArgumentParser(description="Junmai AutoDev end-to-end benchmark")
+    parser.add_argument('--photos', type=int, default=60, help="Number of photos in the corpus")
+    parser.add_argument('--seed', type=int, default=42, help="Corpus RNG seed")
+    parser.add_argument('--megapixels', type=float, nargs='+', default=list(DEFAULT_MEGAPIXELS),
+                        help="Image sizes in megapixels")
+    parser.add_argument('--corpus-dir', help="Keep and reuse the corpus in this directory")
+    parser.add_argument('--llm-latency-ms', type=float, default=0.0, help="Fake Ollama response latency")
+    parser.add_argument('--skip-stages', action='store_true', help="Only run the full pipeline")
+    parser.add_argument('--skip-pipeline', action='store_true', help="Only run the isolated stages")
+    parser.add_argument('--output', help="Write the result JSON to this file")
+    parser.add_argument('--baseline', help="Compare against this result JSON")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed relative regression (default 0.10)")
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.WARNING)
+    
+    result = run_benchmark(
+        corpus_dir=args.corpus_dir,
+        count=args.photos,
+        seed=args.seed,
+        megapixels=args.megapixels,
+        llm_latency_ms=args.llm_latency_ms,
+        stages=not args.skip_stages,
+        pipeline=not args.skip_pipeline
+    )
+    
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        result['comparison'] = compare_results(result, baseline, args.tolerance)
+        exit_code = 0 if result['comparison']['passed'] else 1
+    
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
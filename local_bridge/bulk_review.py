@@ -0,0 +1,235 @@
+"""
+Bulk Review for Junmai AutoDev
+一括承認・却下
+
+Applies approve/reject decisions for many photos at once:
+- One transaction with one UPDATE per decision group and a bulk INSERT of
+  the LearningData rows
+- Auto-export jobs for all approved photos built in one pass, grouped by
+  preset (AutoExportEngine.trigger_auto_export_bulk)
+- One approval queue delta, one 'photos_reviewed' event and one desktop
+  notification for the whole batch
+
+Requirements: 5.3, 5.4, 6.1
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+
+from models.database import Photo, LearningData
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of decisions accepted in one request
+MAX_BULK_REVIEW_SIZE = 1000
+
+DECISION_APPROVE = 'approve'
+DECISION_REJECT = 'reject'
+VALID_DECISIONS = (DECISION_APPROVE, DECISION_REJECT)
+
+
+def parse_review_decisions(payload: Dict[str, Any], default_reason: str = 'User rejected') -> List[Tuple[int, str, Optional[str]]]:
+    """
+    Parse the decisions of a bulk review request.
+    
+    Accepts either a 'decisions' list of {photo_id, decision, reason} objects
+    or 'approve' / 'reject' lists of photo IDs. A photo listed more than once
+    keeps its last decision.
+    
+    Args:
+        payload: Request body
+        default_reason: Rejection reason for rejects without one
+    
+    Returns:
+        List of (photo_id, decision, reason) tuples
+    
+    Raises:
+        ValueError: If the payload is malformed, empty or too large
+    """
+    default_reason = payload.get('reason') or default_reason
+    raw: List[Dict[str, Any]] = []
+    
+    decisions = payload.get('decisions')
+    if decisions is not None:
+        if not isinstance(decisions, list):
+            raise ValueError("decisions must be a list")
+        raw.extend(decisions)
+    
+    for decision in VALID_DECISIONS:
+        photo_ids = payload.get(decision)
+        if photo_ids is None:
+            continue
+        if not isinstance(photo_ids, list):
+            raise ValueError(f"{decision} must be a list of photo IDs")
+        raw.extend({'photo_id': photo_id, 'decision': decision} for photo_id in photo_ids)
+    
+    if not raw:
+        raise ValueError("No decisions given")
+    
+    parsed: Dict[int, Tuple[int, str, Optional[str]]] = {}
+    for item in raw:
+        if not isinstance(item, dict):
+            raise ValueError("Each decision must be an object")
+        
+        photo_id = item.get('photo_id')
+        decision = item.get('decision')
+        if not isinstance(photo_id, int) or isinstance(photo_id, bool):
+            raise ValueError(f"Invalid photo_id: {photo_id!r}")
+        if decision not in VALID_DECISIONS:
+            raise ValueError(f"Invalid decision for photo {photo_id}: {decision!r}")
+        
+        reason = (item.get('reason') or default_reason) if decision == DECISION_REJECT else None
+        parsed.pop(photo_id, None)
+        parsed[photo_id] = (photo_id, decision, reason)
+    
+    if len(parsed) > MAX_BULK_REVIEW_SIZE:
+        raise ValueError(f"Too many decisions: {len(parsed)} (max {MAX_BULK_REVIEW_SIZE})")
+    
+    return list(parsed.values())
+
+
+def apply_bulk_review(
+    db_session,
+    decisions: List[Tuple[int, str, Optional[str]]],
+    auto_export: bool = False
+) -> Dict[str, Any]:
+    """
+    Apply approve/reject decisions in one transaction.
+    
+    Args:
+        db_session: Database session
+        decisions: (photo_id, decision, reason) tuples from parse_review_decisions
+        auto_export: Create export jobs for the approved photos
+    
+    Returns:
+        Dictionary with approved, rejected and not_found photo IDs,
+        session_ids, export_job_count and export_triggered
+    """
+    photo_ids = [photo_id for photo_id, _, _ in decisions]
+    rows = db_session.query(Photo.id, Photo.session_id, Photo.selected_preset).filter(
+        Photo.id.in_(photo_ids)
+    ).all()
+    found = {photo_id: (session_id, preset) for photo_id, session_id, preset in rows}
+    
+    approved_ids: List[int] = []
+    rejected_by_reason: Dict[str, List[int]] = {}
+    not_found: List[int] = []
+    learning_rows: List[Dict[str, Any]] = []
+    now = datetime.utcnow()
+    
+    for photo_id, decision, reason in decisions:
+        if photo_id not in found:
+            not_found.append(photo_id)
+            continue
+        
+        preset = found[photo_id][1]
+        if decision == DECISION_APPROVE:
+            approved_ids.append(photo_id)
+            learning_rows.append({
+                'photo_id': photo_id, 'action': 'approved',
+                'original_preset': preset, 'final_preset': preset, 'timestamp': now
+            })
+        else:
+            rejected_by_reason.setdefault(reason, []).append(photo_id)
+            learning_rows.append({
+                'photo_id': photo_id, 'action': 'rejected',
+                'original_preset': preset, 'final_preset': None, 'timestamp': now
+            })
+    
+    rejected_ids = [photo_id for ids in rejected_by_reason.values() for photo_id in ids]
+    
+    try:
+        if approved_ids:
+            db_session.query(Photo).filter(Photo.id.in_(approved_ids)).update({
+                Photo.approved: True,
+                Photo.approved_at: now,
+                Photo.status: 'completed'
+            }, synchronize_session=False)
+        
+        for reason, ids in rejected_by_reason.items():
+            db_session.query(Photo).filter(Photo.id.in_(ids)).update({
+                Photo.approved: False,
+                Photo.status: 'rejected',
+                Photo.rejection_reason: reason
+            }, synchronize_session=False)
+        
+        if learning_rows:
+            db_session.execute(insert(LearningData), learning_rows)
+        
+        db_session.commit()
+    except Exception:
+        db_session.rollback()
+        raise
+    
+    reviewed_ids = approved_ids + rejected_ids
+    session_ids = sorted({found[photo_id][0] for photo_id in reviewed_ids if found[photo_id][0] is not None})
+    
+    logger.info(f"Bulk review applied: {len(approved_ids)} approved, "
+                f"{len(rejected_ids)} rejected, {len(not_found)} not found")
+    
+    result = {
+        'approved': approved_ids,
+        'rejected': rejected_ids,
+        'not_found': not_found,
+        'session_ids': session_ids,
+        'export_job_count': 0,
+        'export_triggered': False
+    }
+    
+    if auto_export and approved_ids:
+        try:
+            from auto_export_engine import get_auto_export_engine
+            jobs_by_photo = get_auto_export_engine().trigger_auto_export_bulk(approved_ids, db_session)
+            result['export_job_count'] = sum(len(jobs) for jobs in jobs_by_photo.values())
+            result['export_triggered'] = True
+        except Exception as e:
+            logger.error(f"Failed to trigger auto-export for bulk review: {e}")
+    
+    _publish(result)
+    return result
+
+
+def _publish(result: Dict[str, Any]) -> None:
+    """Send the single queue delta, event and notification for a bulk review."""
+    reviewed_ids = result['approved'] + result['rejected']
+    if not reviewed_ids:
+        return
+    
+    try:
+        from approval_queue import get_approval_queue_service
+        session_ids = result['session_ids']
+        get_approval_queue_service().remove_many(
+            reviewed_ids, session_ids[0] if len(session_ids) == 1 else None
+        )
+    except Exception as e:
+        logger.warning(f"Failed to update approval queue after bulk review: {e}")
+    
+    try:
+        import websocket_events
+        websocket_events.broadcast_photos_reviewed(
+            approved_ids=result['approved'],
+            rejected_ids=result['rejected'],
+            session_ids=result['session_ids'],
+            export_job_count=result['export_job_count']
+        )
+    except Exception as e:
+        logger.warning(f"Failed to broadcast bulk review event: {e}")
+    
+    try:
+        from desktop_notifier import get_notifier, NotificationType, NotificationPriority
+        get_notifier().send(
+            title="一括レビュー完了",
+            message=f"承認 {len(result['approved'])}枚 / 却下 {len(result['rejected'])}枚",
+            notification_type=NotificationType.BATCH_COMPLETE,
+            priority=NotificationPriority.LOW,
+            data={
+                'approved': len(result['approved']),
+                'rejected': len(result['rejected']),
+                'export_jobs': result['export_job_count']
+            }
+        )
+    except Exception as e:
+        logger.warning(f"Failed to send bulk review notification: {e}")
@@ -12,9 +12,10 @@ Requirements: 4.1, 4.2, 4.4
 """
 
 from celery import Task
+from celery.signals import worker_process_init
 from celery_config import app, get_priority_for_photo, PRIORITY_HIGH, PRIORITY_MEDIUM, PRIORITY_LOW
 from models.database import get_session, Photo, Job, Session as DBSession
-from exif_analyzer import EXIFAnalyzer
+from exif_analyzer import get_exif_analyzer
 from image_quality_evaluator import ImageQualityEvaluator
 from ai_selector import AISelector
 from context_engine import ContextEngine
@@ -29,7 +30,7 @@ import traceback
 
 # Initialize components (without database session)
 logging_system = get_logging_system()
-exif_analyzer = EXIFAnalyzer()
+exif_analyzer = get_exif_analyzer()
 quality_evaluator = ImageQualityEvaluator()
 ai_selector = AISelector()
 context_engine = ContextEngine()
@@ -38,6 +39,12 @@ photo_grouper = PhotoGrouper()
 # PresetManager requires db_session, so we'll create it per-task
 
 
+@worker_process_init.connect
+def init_worker_logging(**kwargs):
+    """Write logs from a listener thread in each worker process (threads do not survive fork)"""
+    logging_system.enable_async()
+
+
 class BaseTask(Task):
     """
     Base task class with retry logic and error handling
@@ -8,16 +8,27 @@ This module provides cloud storage synchronization functionality including:
 - Error retry logic with exponential backoff
 - Batch upload operations
 
+Uploads run on a worker pool. Small files from the same folder are sent
+in one `rclone copy --files-from` call, and progress is read from
+rclone's JSON log output. An optional bandwidth budget is shared by all
+concurrent rclone processes.
+
 Requirements: 6.3
 """
 
 import logging
+import os
 import subprocess
 import pathlib
 import json
+import tempfile
 import time
 import uuid
-from typing import Dict, Any, List, Optional, Tuple
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from threading import Event, RLock
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Union
 from dataclasses import dataclass, asdict
 from datetime import datetime
 from enum import Enum
@@ -64,6 +75,7 @@ class UploadJob:
     retry_count: int = 0
     max_retries: int = 3
     error_message: Optional[str] = None
+    next_retry_at: Optional[float] = None
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary"""
@@ -82,6 +94,76 @@ class UploadJob:
             self.progress_percent = (bytes_uploaded / file_size) * 100.0
 
 
+def parse_bandwidth(value: Union[int, str, None]) -> Optional[int]:
+    """
+    Parse a bandwidth limit into bytes per second
+    
+    Args:
+        value: Bytes per second, or a string with K/M/G suffix (e.g. "10M")
+    
+    Returns:
+        Bytes per second, or None for no limit
+    """
+    if value in (None, '', 0, 'off'):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    
+    text = str(value).strip().upper().rstrip('B')
+    multipliers = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    if text and text[-1] in multipliers:
+        return int(float(text[:-1]) * multipliers[text[-1]])
+    return int(float(text))
+
+
+class JobIndex:
+    """
+    Insertion-ordered collection of upload jobs with lookup by job ID
+    
+    Supports the list operations used on the upload queues (append,
+    remove, len, iteration, [index]) while lookups and removals by ID
+    are O(1).
+    """
+    
+    def __init__(self):
+        self._jobs: 'OrderedDict[str, UploadJob]' = OrderedDict()
+    
+    def append(self, job: UploadJob) -> None:
+        """Add a job at the end (or move it there if already present)"""
+        self._jobs[job.id] = job
+        self._jobs.move_to_end(job.id)
+    
+    def remove(self, job: Union[UploadJob, str]) -> None:
+        """Remove a job; raises ValueError if it is not present"""
+        job_id = getattr(job, 'id', job)
+        if self._jobs.pop(job_id, None) is None:
+            raise ValueError(f"Job not in index: {job_id}")
+    
+    def get(self, job_id: str) -> Optional[UploadJob]:
+        """Get a job by ID"""
+        return self._jobs.get(job_id)
+    
+    def clear(self) -> None:
+        """Remove all jobs"""
+        self._jobs.clear()
+    
+    def __len__(self) -> int:
+        return len(self._jobs)
+    
+    def __iter__(self) -> Iterator[UploadJob]:
+        return iter(self._jobs.values())
+    
+    def __contains__(self, item: Any) -> bool:
+        return getattr(item, 'id', item) in self._jobs
+    
+    def __getitem__(self, index: int) -> UploadJob:
+        if index < 0:
+            index += len(self._jobs)
+        if index < 0 or index >= len(self._jobs):
+            raise IndexError("job index out of range")
+        return next(islice(self._jobs.values(), index, None))
+
+
 class CloudSyncManager:
     """
     Cloud Sync Manager for Junmai AutoDev System
@@ -101,16 +183,26 @@ class CloudSyncManager:
         self.provider = CloudProvider(self.config.get('provider', 'none'))
         self.remote_path = self.config.get('remote_path', '/Photos/Processed')
         
-        self.upload_queue: List[UploadJob] = []
+        self.upload_queue = JobIndex()
         self.active_uploads: Dict[str, UploadJob] = {}
-        self.completed_uploads: List[UploadJob] = []
-        self.failed_uploads: List[UploadJob] = []
+        self.completed_uploads = JobIndex()
+        self.failed_uploads = JobIndex()
+        self._lock = RLock()
+        self._wakeup = Event()
         
         # Retry configuration
         self.max_retries = 3
         self.retry_delay_base = 2  # seconds
         self.retry_delay_max = 60  # seconds
         
+        # Upload engine configuration
+        self.max_concurrent = self.config.get('max_concurrent', 3)
+        self.bandwidth_limit = parse_bandwidth(self.config.get('bandwidth_limit'))
+        self.small_file_threshold = self.config.get('small_file_threshold', 8 * 1024 * 1024)
+        self.batch_max_files = self.config.get('batch_max_files', 200)
+        self.batch_transfers = self.config.get('batch_transfers', 4)
+        self._worker_count = 1
+        
         # Check rclone availability
         self.rclone_available = self._check_rclone()
         
@@ -175,11 +267,11 @@ class CloudSyncManager:
             self.provider = CloudProvider(provider)
             self.remote_path = remote_path
             
-            self.config = {
+            self.config.update({
                 'enabled': enabled,
                 'provider': provider,
                 'remote_path': remote_path
-            }
+            })
             
             logger.info(f"Cloud sync configured: enabled={enabled}, provider={provider}")
             return True
@@ -192,9 +284,15 @@ class CloudSyncManager:
         """
         Get rclone remote name for the configured provider
         
+        The 'rclone_remote' config key overrides the provider mapping
+        (e.g. ':local' to sync to a local folder).
+        
         Returns:
             rclone remote name
         """
+        if self.config.get('rclone_remote'):
+            return self.config['rclone_remote']
+        
         remote_names = {
             CloudProvider.DROPBOX: 'dropbox',
             CloudProvider.GOOGLE_DRIVE: 'gdrive',
@@ -242,7 +340,8 @@ class CloudSyncManager:
             file_size=local_path.stat().st_size
         )
         
-        self.upload_queue.append(job)
+        with self._lock:
+            self.upload_queue.append(job)
         
         logger.info(f"Upload job created: job_id={job.id}, file={local_path.name}, "
                    f"size={job.file_size} bytes")
@@ -283,77 +382,152 @@ class CloudSyncManager:
         Returns:
             Tuple of (success, error_message)
         """
-        # Find job in queue
-        job = None
-        for j in self.upload_queue:
-            if j.id == job_id:
-                job = j
-                break
-        
-        if not job:
-            error_msg = f"Upload job not found: {job_id}"
-            logger.error(error_msg)
-            return False, error_msg
+        with self._lock:
+            job = self.upload_queue.get(job_id)
+            
+            if not job:
+                error_msg = f"Upload job not found: {job_id}"
+                logger.error(error_msg)
+                return False, error_msg
+            
+            # Update job status
+            self.upload_queue.remove(job)
+            self._mark_uploading(job)
         
-        # Update job status
+        return self._upload_single(job)
+    
+    def _mark_uploading(self, job: UploadJob) -> None:
+        """Move a job to the active uploads (lock held)"""
         job.status = UploadStatus.UPLOADING.value
         job.started_at = datetime.now().isoformat()
-        self.active_uploads[job_id] = job
-        self.upload_queue.remove(job)
+        job.next_retry_at = None
+        self.active_uploads[job.id] = job
+    
+    def _mark_completed(self, job: UploadJob) -> None:
+        """Move an active job to the completed uploads"""
+        with self._lock:
+            job.status = UploadStatus.COMPLETED.value
+            job.completed_at = datetime.now().isoformat()
+            job.progress_percent = 100.0
+            if job.file_size:
+                job.bytes_uploaded = job.file_size
+            
+            self.completed_uploads.append(job)
+            self.active_uploads.pop(job.id, None)
         
-        logger.info(f"Processing upload job: job_id={job_id}, file={pathlib.Path(job.local_path).name}")
+        logger.info(f"Upload completed: job_id={job.id}")
+    
+    def _remote_dir(self, job: UploadJob) -> str:
+        """Get the rclone destination folder of a job"""
+        remote_dir = job.remote_path.rsplit('/', 1)[0] if '/' in job.remote_path else ''
+        return f"{self.get_rclone_remote_name()}:{remote_dir or '/'}"
+    
+    def _bandwidth_per_process(self) -> Optional[int]:
+        """Get each rclone process's share of the bandwidth budget in bytes/s"""
+        if not self.bandwidth_limit:
+            return None
+        return max(1024, self.bandwidth_limit // max(1, self._worker_count))
+    
+    def _build_rclone_command(self, source: str, destination: str,
+                              files_from: Optional[str] = None,
+                              transfers: int = 1) -> List[str]:
+        """
+        Build an rclone copy command with JSON log output
+        
+        Args:
+            source: Local file, or folder when files_from is given
+            destination: rclone destination folder (remote:path)
+            files_from: File listing names relative to source
+            transfers: Parallel transfers within this rclone process
+        
+        Returns:
+            Command argument list
+        """
+        cmd = [
+            'rclone',
+            'copy',
+            source,
+            destination,
+            '--use-json-log',
+            '--stats', '1s',
+            '--stats-log-level', 'NOTICE',
+            '--transfers', str(transfers)
+        ]
+        
+        if files_from:
+            # INFO level logs a line per copied file, so a batch that exits
+            # with an error still tells which files made it
+            cmd.extend(['--files-from', files_from, '--no-traverse', '--log-level', 'INFO'])
+        
+        bandwidth = self._bandwidth_per_process()
+        if bandwidth:
+            cmd.extend(['--bwlimit', f"{bandwidth // 1024}K"])
+        
+        return cmd
+    
+    def _run_rclone(self, cmd: List[str], on_line) -> Tuple[int, str]:
+        """
+        Run rclone and pass each log line to a callback
+        
+        Args:
+            cmd: Command argument list
+            on_line: Callable receiving each stripped stderr line
+        
+        Returns:
+            Tuple of (return code, error output)
+        """
+        logger.debug(f"Executing rclone command: {' '.join(cmd)}")
+        
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True
+        )
+        
+        error_lines: List[str] = []
+        
+        # Monitor progress
+        while True:
+            output = process.stderr.readline()
+            if output == '' and process.poll() is not None:
+                break
+        
+            if output:
+                line = output.strip()
+                data = self._parse_rclone_json(line)
+                if data is not None and data.get('level') in ('error', 'critical'):
+                    error_lines.append(data.get('msg', line))
+                on_line(line)
+        
+        return_code = process.poll()
+        stderr = process.stderr.read() or '\n'.join(error_lines[-5:])
+        
+        return return_code, stderr
+    
+    def _upload_single(self, job: UploadJob) -> Tuple[bool, Optional[str]]:
+        """
+        Upload one active job with its own rclone process
+        
+        Args:
+            job: Active UploadJob
+        
+        Returns:
+            Tuple of (success, error_message)
+        """
+        logger.info(f"Processing upload job: job_id={job.id}, file={pathlib.Path(job.local_path).name}")
         
         try:
-            # Build rclone command
-            remote_name = self.get_rclone_remote_name()
-            rclone_remote_path = f"{remote_name}:{job.remote_path}"
-            
-            # Use rclone copy with progress
-            cmd = [
-                'rclone',
-                'copy',
-                job.local_path,
-                rclone_remote_path,
-                '--progress',
-                '--stats', '1s',
-                '--stats-one-line'
-            ]
-            
-            logger.debug(f"Executing rclone command: {' '.join(cmd)}")
-            
-            # Execute rclone
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            
-            # Monitor progress
-            while True:
-                output = process.stderr.readline()
-                if output == '' and process.poll() is not None:
-                    break
-                
-                if output:
-                    # Parse progress from rclone output
-                    self._parse_rclone_progress(job, output.strip())
+            cmd = self._build_rclone_command(job.local_path, self._remote_dir(job))
             
-            # Check result
-            return_code = process.poll()
+            return_code, stderr = self._run_rclone(
+                cmd, lambda line: self._parse_rclone_progress(job, line)
+            )
             
             if return_code == 0:
-                job.status = UploadStatus.COMPLETED.value
-                job.completed_at = datetime.now().isoformat()
-                job.progress_percent = 100.0
-                
-                self.completed_uploads.append(job)
-                del self.active_uploads[job_id]
-                
-                logger.info(f"Upload completed: job_id={job_id}")
+                self._mark_completed(job)
                 return True, None
             else:
-                stderr = process.stderr.read()
                 error_msg = f"rclone failed with code {return_code}: {stderr}"
                 logger.error(error_msg)
                 
@@ -366,15 +540,111 @@ class CloudSyncManager:
             
             return self._handle_upload_failure(job, error_msg)
     
+    def _upload_batch(self, jobs: List[UploadJob]) -> None:
+        """
+        Upload active jobs from one folder with a single rclone process
+        
+        Files are passed with --files-from. If rclone exits with an error,
+        only the files it logged as copied (or unchanged) are completed;
+        the rest are failed and retried.
+        
+        Args:
+            jobs: Active UploadJobs sharing source and destination folder
+        """
+        source_dir = str(pathlib.Path(jobs[0].local_path).parent)
+        by_name = {pathlib.Path(job.local_path).name: job for job in jobs}
+        failed_names: Dict[str, str] = {}
+        transferred_names = set()
+        
+        logger.info(f"Processing upload batch: {len(jobs)} files from {source_dir}")
+        
+        def on_line(line: str) -> None:
+            data = self._parse_rclone_json(line)
+            if data is None:
+                return
+            for transfer in (data.get('stats') or {}).get('transferring') or []:
+                job = by_name.get(transfer.get('name'))
+                if job:
+                    job.update_progress(transfer.get('bytes', 0), transfer.get('size') or job.file_size or 0)
+            name = data.get('object')
+            if name not in by_name:
+                return
+            if data.get('level') in ('error', 'critical'):
+                failed_names[name] = data.get('msg', 'Upload failed')
+            elif data.get('level') == 'info' and self._is_transfer_confirmation(data.get('msg', '')):
+                transferred_names.add(name)
+        
+        list_fd, list_path = tempfile.mkstemp(prefix='rclone_files_', suffix='.txt')
+        try:
+            with os.fdopen(list_fd, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(by_name) + '\n')
+            
+            cmd = self._build_rclone_command(source_dir, self._remote_dir(jobs[0]),
+                                             files_from=list_path, transfers=self.batch_transfers)
+            return_code, stderr = self._run_rclone(cmd, on_line)
+        
+        except Exception as e:
+            logger.error(f"Upload batch failed: {e}", exc_info=True)
+            for job in jobs:
+                self._handle_upload_failure(job, f"Upload failed: {e}")
+            return
+        finally:
+            try:
+                os.unlink(list_path)
+            except OSError:
+                pass
+        
+        for name, job in by_name.items():
+            if name in failed_names:
+                self._handle_upload_failure(job, failed_names[name])
+            elif return_code == 0 or name in transferred_names:
+                self._mark_completed(job)
+            else:
+                self._handle_upload_failure(job, f"rclone failed with code {return_code}: {stderr}")
+    
+    def _upload_unit(self, jobs: List[UploadJob]) -> None:
+        """Upload a claimed unit (single job or batch)"""
+        if len(jobs) == 1:
+            self._upload_single(jobs[0])
+        else:
+            self._upload_batch(jobs)
+    
+    @staticmethod
+    def _is_transfer_confirmation(msg: str) -> bool:
+        """Check whether an rclone INFO message confirms a file is at the destination"""
+        # e.g. "Copied (new)", "Copied (replaced existing)", "Multi-thread Copied (new)",
+        # "Unchanged skipping"
+        return 'Copied (' in msg or msg.startswith('Unchanged skipping')
+    
+    @staticmethod
+    def _parse_rclone_json(line: str) -> Optional[Dict[str, Any]]:
+        """Parse an rclone JSON log line, or return None for plain text"""
+        if not line.startswith('{'):
+            return None
+        try:
+            data = json.loads(line)
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+    
     def _parse_rclone_progress(self, job: UploadJob, output: str):
         """
         Parse progress information from rclone output
         
         Args:
             job: UploadJob to update
-            output: rclone output line
+            output: rclone output line (JSON log or text stats)
         """
         try:
+            # JSON log: {"level": "notice", "stats": {"bytes": ..., "totalBytes": ...}, ...}
+            data = self._parse_rclone_json(output)
+            if data is not None:
+                stats = data.get('stats')
+                if stats and stats.get('totalBytes'):
+                    job.update_progress(stats.get('bytes', 0), stats['totalBytes'])
+                    logger.debug(f"Upload progress: job_id={job.id}, {job.progress_percent:.1f}%")
+                return
+            
             # rclone progress format: "Transferred: 1.234 MiB / 10.000 MiB, 12%, 123 KiB/s, ETA 1m23s"
             if 'Transferred:' in output and '%' in output:
                 parts = output.split(',')
@@ -399,6 +669,9 @@ class CloudSyncManager:
         """
         Handle upload failure with retry logic
         
+        Failed jobs go back to the queue with an exponential backoff delay;
+        workers skip them until the delay has passed.
+        
         Args:
             job: Failed UploadJob
             error_message: Error message
@@ -406,40 +679,39 @@ class CloudSyncManager:
         Returns:
             Tuple of (success, error_message)
         """
-        job.error_message = error_message
-        job.retry_count += 1
-        
-        if job.retry_count < self.max_retries:
-            # Calculate retry delay with exponential backoff
-            delay = min(
-                self.retry_delay_base ** job.retry_count,
-                self.retry_delay_max
-            )
+        with self._lock:
+            job.error_message = error_message
+            job.retry_count += 1
+            self.active_uploads.pop(job.id, None)
+        
+            if job.retry_count < self.max_retries:
+                # Calculate retry delay with exponential backoff
+                delay = min(
+                    self.retry_delay_base ** job.retry_count,
+                    self.retry_delay_max
+                )
             
-            job.status = UploadStatus.RETRYING.value
+                job.status = UploadStatus.RETRYING.value
+                job.next_retry_at = time.time() + delay
             
-            logger.warning(f"Upload failed, will retry in {delay}s: job_id={job.id}, "
-                         f"attempt={job.retry_count}/{self.max_retries}")
+                logger.warning(f"Upload failed, will retry in {delay}s: job_id={job.id}, "
+                             f"attempt={job.retry_count}/{self.max_retries}")
             
-            # Move back to queue for retry
-            del self.active_uploads[job.id]
-            self.upload_queue.append(job)
-            
-            # Wait before retry
-            time.sleep(delay)
+                # Move back to queue for retry
+                self.upload_queue.append(job)
             
-            return False, f"Retrying ({job.retry_count}/{self.max_retries})"
-        else:
-            # Max retries exceeded
-            job.status = UploadStatus.FAILED.value
-            job.completed_at = datetime.now().isoformat()
+                return False, f"Retrying ({job.retry_count}/{self.max_retries})"
+            else:
+                # Max retries exceeded
+                job.status = UploadStatus.FAILED.value
+                job.completed_at = datetime.now().isoformat()
+                job.next_retry_at = None
             
-            self.failed_uploads.append(job)
-            del self.active_uploads[job.id]
+                self.failed_uploads.append(job)
             
-            logger.error(f"Upload failed after {self.max_retries} retries: job_id={job.id}")
+                logger.error(f"Upload failed after {self.max_retries} retries: job_id={job.id}")
             
-            return False, error_message
+                return False, error_message
     
     def get_next_upload_job(self) -> Optional[UploadJob]:
         """
@@ -448,18 +720,75 @@ class CloudSyncManager:
         Returns:
             Next UploadJob or None if queue is empty
         """
-        if not self.upload_queue:
-            return None
+        with self._lock:
+            if not self.upload_queue:
+                return None
+        
+            # Return oldest job (FIFO)
+            return self.upload_queue[0]
+    
+    def _claim_next_unit(self) -> Tuple[List[UploadJob], Optional[float]]:
+        """
+        Claim the next unit of work from the queue
+        
+        A unit is either one large file or up to batch_max_files small
+        files with the same source folder and destination folder. Jobs
+        waiting for a retry delay are skipped.
+        
+        Returns:
+            Tuple of (claimed jobs, earliest retry time of skipped jobs)
+        """
+        now = time.time()
+        unit: List[UploadJob] = []
+        names = set()
+        next_retry_at = None
+        
+        with self._lock:
+            for job in self.upload_queue:
+                if job.next_retry_at and job.next_retry_at > now:
+                    if next_retry_at is None or job.next_retry_at < next_retry_at:
+                        next_retry_at = job.next_retry_at
+                    continue
+                
+                small = job.file_size is not None and job.file_size <= self.small_file_threshold
+                
+                if not unit:
+                    unit.append(job)
+                    names.add(pathlib.Path(job.local_path).name)
+                    if not small:
+                        break
+                    head_dir = pathlib.Path(job.local_path).parent
+                    head_remote = self._remote_dir(job)
+                    continue
+                
+                name = pathlib.Path(job.local_path).name
+                if (small and name not in names
+                        and pathlib.Path(job.local_path).parent == head_dir
+                        and self._remote_dir(job) == head_remote):
+                    unit.append(job)
+                    names.add(name)
+                    if len(unit) >= self.batch_max_files:
+                        break
+            
+            for job in unit:
+                self.upload_queue.remove(job)
+                self._mark_uploading(job)
         
-        # Return oldest job (FIFO)
-        return self.upload_queue[0]
+        return unit, next_retry_at
     
-    def process_upload_queue(self, max_concurrent: int = 3) -> Dict[str, Any]:
+    def process_upload_queue(self, max_concurrent: Optional[int] = None,
+                             wait_for_retries: bool = True) -> Dict[str, Any]:
         """
         Process upload queue with concurrent uploads
         
+        Runs up to max_concurrent rclone processes at a time until the
+        queue is empty. The bandwidth budget is split between them.
+        
         Args:
             max_concurrent: Maximum number of concurrent uploads
+                (defaults to the 'max_concurrent' config value)
+            wait_for_retries: Keep running until jobs waiting for a retry
+                delay have been retried
             
         Returns:
             Dictionary with processing results
@@ -473,33 +802,51 @@ class CloudSyncManager:
                 'message': 'Cloud sync is not enabled'
             }
         
+        max_concurrent = max(1, max_concurrent or self.max_concurrent)
+        self._worker_count = max_concurrent
+        
         processed = 0
         succeeded = 0
         failed = 0
+        started = time.time()
         
-        logger.info(f"Processing upload queue: {len(self.upload_queue)} jobs pending")
+        logger.info(f"Processing upload queue: {len(self.upload_queue)} jobs pending, "
+                   f"max_concurrent={max_concurrent}")
         
-        while self.upload_queue and len(self.active_uploads) < max_concurrent:
-            job = self.get_next_upload_job()
+        with ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix='cloud-upload') as pool:
+            running = {}
             
-            if not job:
-                break
+            while True:
+                next_retry_at = None
+                while len(running) < max_concurrent:
+                    unit, next_retry_at = self._claim_next_unit()
+                    if not unit:
+                        break
+                    running[pool.submit(self._upload_unit, unit)] = unit
             
-            success, error = self.process_upload_job(job.id)
-            processed += 1
+                if not running:
+                    if wait_for_retries and next_retry_at is not None:
+                        self._wakeup.wait(max(0.0, next_retry_at - time.time()))
+                        continue
+                    break
             
-            if success:
-                succeeded += 1
-            else:
-                if job.status == UploadStatus.FAILED.value:
-                    failed += 1
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    unit = running.pop(future)
+                    for job in unit:
+                        processed += 1
+                        if job.status == UploadStatus.COMPLETED.value:
+                            succeeded += 1
+                        elif job.status == UploadStatus.FAILED.value:
+                            failed += 1
         
         result = {
             'processed': processed,
             'succeeded': succeeded,
             'failed': failed,
             'pending': len(self.upload_queue),
-            'active': len(self.active_uploads)
+            'active': len(self.active_uploads),
+            'elapsed_seconds': round(time.time() - started, 2)
         }
         
         logger.info(f"Upload queue processed: {result}")
@@ -516,26 +863,11 @@ class CloudSyncManager:
         Returns:
             UploadJob or None if not found
         """
-        # Check active uploads
-        if job_id in self.active_uploads:
-            return self.active_uploads[job_id]
-        
-        # Check queue
-        for job in self.upload_queue:
-            if job.id == job_id:
-                return job
-        
-        # Check completed
-        for job in self.completed_uploads:
-            if job.id == job_id:
-                return job
-        
-        # Check failed
-        for job in self.failed_uploads:
-            if job.id == job_id:
-                return job
-        
-        return None
+        with self._lock:
+            return (self.active_uploads.get(job_id)
+                    or self.upload_queue.get(job_id)
+                    or self.completed_uploads.get(job_id)
+                    or self.failed_uploads.get(job_id))
     
     def get_queue_status(self) -> Dict[str, Any]:
         """
@@ -544,22 +876,24 @@ class CloudSyncManager:
         Returns:
             Dictionary with queue statistics
         """
-        total_size = sum(job.file_size or 0 for job in self.upload_queue)
-        uploaded_size = sum(job.bytes_uploaded for job in self.active_uploads.values())
-        
-        return {
-            'enabled': self.is_enabled(),
-            'provider': self.provider.value,
-            'remote_path': self.remote_path,
-            'pending_count': len(self.upload_queue),
-            'active_count': len(self.active_uploads),
-            'completed_count': len(self.completed_uploads),
-            'failed_count': len(self.failed_uploads),
-            'total_queue_size': total_size,
-            'uploaded_size': uploaded_size,
-            'pending_jobs': [job.to_dict() for job in self.upload_queue[:10]],  # First 10
-            'active_jobs': [job.to_dict() for job in self.active_uploads.values()]
-        }
+        with self._lock:
+            total_size = sum(job.file_size or 0 for job in self.upload_queue)
+            uploaded_size = sum(job.bytes_uploaded for job in self.active_uploads.values())
+        
+            return {
+                'enabled': self.is_enabled(),
+                'provider': self.provider.value,
+                'remote_path': self.remote_path,
+                'pending_count': len(self.upload_queue),
+                'active_count': len(self.active_uploads),
+                'completed_count': len(self.completed_uploads),
+                'failed_count': len(self.failed_uploads),
+                'total_queue_size': total_size,
+                'uploaded_size': uploaded_size,
+                'bandwidth_limit': self.bandwidth_limit,
+                'pending_jobs': [job.to_dict() for job in islice(self.upload_queue, 10)],  # First 10
+                'active_jobs': [job.to_dict() for job in self.active_uploads.values()]
+            }
     
     def cancel_upload(self, job_id: str) -> bool:
         """
@@ -573,22 +907,33 @@ class CloudSyncManager:
         """
         logger.info(f"Cancelling upload job: job_id={job_id}")
         
-        # Check queue
-        for job in self.upload_queue:
-            if job.id == job_id:
+        with self._lock:
+            # Check queue
+            job = self.upload_queue.get(job_id)
+            if job:
                 job.status = UploadStatus.CANCELLED.value
                 self.upload_queue.remove(job)
                 logger.info(f"Upload job cancelled: {job_id}")
                 return True
         
-        # Cannot cancel active uploads
-        if job_id in self.active_uploads:
-            logger.warning(f"Cannot cancel active upload: {job_id}")
-            return False
+            # Cannot cancel active uploads
+            if job_id in self.active_uploads:
+                logger.warning(f"Cannot cancel active upload: {job_id}")
+                return False
         
         logger.warning(f"Upload job not found: {job_id}")
         return False
     
+    @staticmethod
+    def _reset_for_retry(job: UploadJob) -> None:
+        """Reset a failed job before queueing it again"""
+        job.status = UploadStatus.PENDING.value
+        job.retry_count = 0
+        job.error_message = None
+        job.bytes_uploaded = 0
+        job.progress_percent = 0.0
+        job.next_retry_at = None
+    
     def retry_failed_upload(self, job_id: str) -> bool:
         """
         Retry a failed upload job
@@ -601,27 +946,18 @@ class CloudSyncManager:
         """
         logger.info(f"Retrying failed upload: job_id={job_id}")
         
-        # Find in failed uploads
-        job = None
-        for j in self.failed_uploads:
-            if j.id == job_id:
-                job = j
-                break
-        
-        if not job:
-            logger.warning(f"Failed upload job not found: {job_id}")
-            return False
+        with self._lock:
+            # Find in failed uploads
+            job = self.failed_uploads.get(job_id)
         
-        # Reset job status
-        job.status = UploadStatus.PENDING.value
-        job.retry_count = 0
-        job.error_message = None
-        job.bytes_uploaded = 0
-        job.progress_percent = 0.0
+            if not job:
+                logger.warning(f"Failed upload job not found: {job_id}")
+                return False
         
-        # Move back to queue
-        self.failed_uploads.remove(job)
-        self.upload_queue.append(job)
+            # Move back to queue
+            self._reset_for_retry(job)
+            self.failed_uploads.remove(job)
+            self.upload_queue.append(job)
         
         logger.info(f"Failed upload queued for retry: {job_id}")
         
@@ -634,25 +970,21 @@ class CloudSyncManager:
         Returns:
             Number of jobs queued for retry
         """
-        count = len(self.failed_uploads)
+        with self._lock:
+            count = len(self.failed_uploads)
         
-        if count == 0:
-            logger.info("No failed uploads to retry")
-            return 0
+            if count == 0:
+                logger.info("No failed uploads to retry")
+                return 0
         
-        logger.info(f"Retrying {count} failed uploads")
+            logger.info(f"Retrying {count} failed uploads")
         
-        # Move all failed jobs back to queue
-        for job in self.failed_uploads[:]:
-            job.status = UploadStatus.PENDING.value
-            job.retry_count = 0
-            job.error_message = None
-            job.bytes_uploaded = 0
-            job.progress_percent = 0.0
+            # Move all failed jobs back to queue
+            for job in self.failed_uploads:
+                self._reset_for_retry(job)
+                self.upload_queue.append(job)
             
-            self.upload_queue.append(job)
-        
-        self.failed_uploads.clear()
+            self.failed_uploads.clear()
         
         logger.info(f"Queued {count} failed uploads for retry")
         
@@ -49,6 +49,10 @@ CONFIG_SCHEMA = {
                     "type": "string",
                     "enum": ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
                     "description": "Logging level"
+                },
+                "async_logging": {
+                    "type": "boolean",
+                    "description": "Write logs from a background thread (default: true)"
                 }
             },
             "required": ["hot_folders", "lightroom_catalog", "temp_folder", "log_level"]
@@ -7,19 +7,342 @@ Features:
 - 20 predefined shooting scenarios
 - Context score calculation with weighted conditions
 - Automatic preset recommendation based on context
+- Rules compiled once (pre-normalized weights, pre-resolved field accessors)
+- NumPy batch scoring of a columnar feature table
 
 Requirements: 3.1, 3.2, 3.3, 3.4, 3.5
 """
 
 import json
 import logging
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, List, Tuple, Optional
+from typing import Dict, Any, Callable, Iterable, List, Sequence, Tuple, Optional
 from datetime import time
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 
+# Minimum score for a context to be chosen over 'default'
+CONTEXT_SCORE_THRESHOLD = 0.5
+
+# Operators that compare the float value of a field
+NUMERIC_OPERATORS = ('>', '<', '>=', '<=', 'between')
+
+
+@lru_cache(maxsize=4096)
+def _parse_shutter_value(shutter_str: str) -> Optional[float]:
+    """Parse a shutter speed string to seconds (cached, see ContextEngine._parse_shutter_speed)"""
+    shutter_str = shutter_str.strip()
+    
+    # Handle fraction format "1/500"
+    if '/' in shutter_str:
+        parts = shutter_str.split('/')
+        if len(parts) == 2:
+            try:
+                numerator = float(parts[0])
+                denominator = float(parts[1])
+                if denominator != 0:
+                    return numerator / denominator
+            except ValueError:
+                pass
+    
+    # Handle decimal format
+    try:
+        return float(shutter_str)
+    except ValueError:
+        return None
+
+
+def parse_shutter_speed(shutter: Any) -> Optional[float]:
+    """
+    Convert a shutter speed (e.g. "1/500", "2", 0.5) to seconds
+    
+    Args:
+        shutter: Shutter speed string or number
+    
+    Returns:
+        Exposure time in seconds or None
+    """
+    if not shutter:
+        return None
+    return _parse_shutter_value(str(shutter))
+
+
+def _make_accessor(field_path: str) -> Callable[[Dict[str, Any], Optional[Dict[str, Any]]], Any]:
+    """
+    Build a field accessor with the dotted path split once
+    
+    Matches ContextEngine._get_field_value: 'ai_eval.*' reads the AI
+    evaluation when one is given, every other path reads the EXIF data.
+    """
+    parts = tuple(field_path.split('.'))
+    head, rest = parts[0], parts[1:]
+    
+    def get(exif_data: Dict[str, Any], ai_eval: Optional[Dict[str, Any]] = None) -> Any:
+        if head == 'ai_eval' and ai_eval:
+            current = ai_eval
+        else:
+            current = exif_data.get(head)
+        if current is None:
+            return None
+        for part in rest:
+            if not isinstance(current, dict):
+                return None
+            current = current.get(part)
+            if current is None:
+                return None
+        return current
+    
+    return get
+
+
+def _never(actual: Any) -> bool:
+    return False
+
+
+def _make_value_predicate(operator: str, expected_value: Any) -> Callable[[Any], bool]:
+    """
+    Build a predicate on a (non-None) field value with the expected value
+    converted once
+    
+    Matches ContextEngine._apply_operator, including conversion errors
+    evaluating to False.
+    """
+    if operator == '==':
+        return lambda actual: actual == expected_value
+    
+    if operator == '!=':
+        return lambda actual: actual != expected_value
+    
+    if operator in ('>', '<', '>=', '<='):
+        try:
+            expected = float(expected_value)
+        except (TypeError, ValueError):
+            return _never
+        compare = {
+            '>': float.__gt__, '<': float.__lt__, '>=': float.__ge__, '<=': float.__le__
+        }[operator]
+        
+        def numeric(actual: Any) -> bool:
+            try:
+                return compare(float(actual), expected)
+            except (TypeError, ValueError):
+                return False
+        return numeric
+    
+    if operator == 'in':
+        if not isinstance(expected_value, list):
+            return _never
+        try:
+            members = frozenset(expected_value)
+        except TypeError:
+            members = None
+        
+        def contains(actual: Any) -> bool:
+            if members is not None:
+                try:
+                    return actual in members
+                except TypeError:
+                    pass
+            return actual in expected_value
+        return contains
+    
+    if operator == 'between':
+        if not isinstance(expected_value, list) or len(expected_value) != 2:
+            return _never
+        min_val, max_val = expected_value
+        
+        def between(actual: Any) -> bool:
+            try:
+                return min_val <= float(actual) <= max_val
+            except (TypeError, ValueError):
+                return False
+        return between
+    
+    if operator == 'shutter_faster_than':
+        threshold = parse_shutter_speed(expected_value)
+        if threshold is None:
+            return _never
+        
+        def faster(actual: Any) -> bool:
+            # Faster shutter = smaller exposure time
+            actual_val = parse_shutter_speed(actual)
+            return actual_val is not None and actual_val < threshold
+        return faster
+    
+    logger.warning(f"Unknown operator: {operator}")
+    return _never
+
+
+class CompiledCondition:
+    """A rule condition with its accessor and predicate resolved"""
+    
+    __slots__ = ('field', 'operator', 'value', 'get', 'test')
+    
+    def __init__(self, condition: Dict[str, Any]):
+        self.field = condition.get('field')
+        self.operator = condition.get('operator')
+        self.value = condition.get('value')
+        
+        if not self.field or not self.operator:
+            self.get = None
+            self.test = _never
+        else:
+            self.get = _make_accessor(self.field)
+            self.test = _make_value_predicate(self.operator, self.value)
+    
+    @property
+    def key(self) -> Tuple[Any, ...]:
+        """Identity used to evaluate shared conditions once per batch"""
+        return (self.field, self.operator, json.dumps(self.value, sort_keys=True, default=str))
+    
+    def __call__(self, exif_data: Dict[str, Any], ai_eval: Optional[Dict[str, Any]] = None) -> bool:
+        if self.get is None:
+            return False
+        actual = self.get(exif_data, ai_eval)
+        return actual is not None and self._test(actual)
+    
+    def _test(self, actual: Any) -> bool:
+        """Apply the predicate, treating evaluation errors as not met"""
+        try:
+            return bool(self.test(actual))
+        except Exception as e:
+            logger.debug(f"Error evaluating condition {self.field} {self.operator} {self.value}: {e}")
+            return False
+    
+    def evaluate_column(self, column: Any, factorized: Optional[Tuple[np.ndarray, List[Any]]] = None) -> np.ndarray:
+        """
+        Evaluate the condition for a whole column of field values
+        
+        Numeric columns (float/int ndarrays, NaN = missing) are compared
+        with NumPy directly. Other columns are factorized so that the
+        predicate runs once per distinct value.
+        
+        Args:
+            column: Sequence of N field values (None = missing)
+            factorized: Precomputed factorize_column(column), shared by
+                conditions on the same field
+        
+        Returns:
+            Boolean array of length N
+        """
+        if self.get is None:
+            return np.zeros(len(column), dtype=bool)
+        
+        if (isinstance(column, np.ndarray) and column.dtype.kind in 'fiu'
+                and self.operator in NUMERIC_OPERATORS + ('==', '!=')):
+            mask = self._evaluate_numeric(column.astype(float, copy=False))
+            if mask is not None:
+                return mask
+        
+        codes, uniques = factorized if factorized is not None else factorize_column(column)
+        outcomes = np.fromiter(
+            (actual is not None and self._test(actual) for actual in uniques),
+            dtype=bool, count=len(uniques)
+        )
+        return outcomes[codes]
+    
+    def _evaluate_numeric(self, values: np.ndarray) -> Optional[np.ndarray]:
+        """Vectorized comparison on a float column (None if not applicable)"""
+        present = ~np.isnan(values)
+        if self.operator == 'between':
+            if not isinstance(self.value, list) or len(self.value) != 2:
+                return np.zeros(len(values), dtype=bool)
+            low, high = self.value
+            if not all(isinstance(v, (int, float)) for v in (low, high)):
+                return None
+            with np.errstate(invalid='ignore'):
+                return present & (values >= low) & (values <= high)
+        
+        if isinstance(self.value, bool) or not isinstance(self.value, (int, float)):
+            # Equality against non-numbers and string thresholds use the generic path
+            return None
+        expected = float(self.value)
+        
+        with np.errstate(invalid='ignore'):
+            if self.operator == '>':
+                return values > expected
+            if self.operator == '<':
+                return values < expected
+            if self.operator == '>=':
+                return values >= expected
+            if self.operator == '<=':
+                return values <= expected
+            if self.operator == '==':
+                return values == expected
+            return present & (values != expected)
+
+
+def factorize_column(column: Sequence[Any]) -> Tuple[np.ndarray, List[Any]]:
+    """
+    Encode a column as integer codes into its distinct values
+    
+    Values are distinguished by type as well as value so that 1, 1.0 and
+    True stay separate. NaN is returned as None (missing).
+    
+    Args:
+        column: Sequence of N field values
+    
+    Returns:
+        (codes array of length N, list of distinct values)
+    """
+    index: Dict[Tuple[type, Any], int] = {}
+    try:
+        codes = np.fromiter(
+            (index.setdefault((value.__class__, value), len(index)) for value in column),
+            dtype=np.intp, count=len(column)
+        )
+        uniques = [value for _, value in index]
+    except TypeError:
+        # Unhashable values (lists, dicts): compare by equality instead
+        uniques = []
+        codes = np.empty(len(column), dtype=np.intp)
+        for i, value in enumerate(column):
+            for code, known in enumerate(uniques):
+                if type(known) is type(value) and known == value:
+                    break
+            else:
+                code = len(uniques)
+                uniques.append(value)
+            codes[i] = code
+    
+    uniques = [None if isinstance(value, float) and value != value else value for value in uniques]
+    return codes, uniques
+
+
+class CompiledRule:
+    """A context rule with compiled conditions and pre-normalized weights"""
+    
+    __slots__ = ('name', 'conditions', 'weights')
+    
+    def __init__(self, name: str, rule: Dict[str, Any]):
+        self.name = name
+        self.conditions = [CompiledCondition(c) for c in rule.get('conditions', [])]
+        
+        weights = rule.get('weights', [])
+        if self.conditions:
+            # Use equal weights if mismatch
+            if len(weights) != len(self.conditions):
+                weights = [1.0 / len(self.conditions)] * len(self.conditions)
+            
+            # Normalize weights to sum to 1.0
+            weight_sum = sum(weights)
+            if weight_sum > 0:
+                weights = [w / weight_sum for w in weights]
+        self.weights = list(weights) if self.conditions else []
+    
+    def score(self, exif_data: Dict[str, Any], ai_eval: Optional[Dict[str, Any]] = None) -> float:
+        """Score one photo (0.0-1.0)"""
+        total_score = 0.0
+        for condition, weight in zip(self.conditions, self.weights):
+            if condition(exif_data, ai_eval):
+                total_score += weight
+        return total_score
+
+
 class ContextEngine:
     """
     コンテキスト認識エンジン
@@ -39,9 +362,37 @@ class ContextEngine:
             rules_file = Path(__file__).parent / 'config' / 'context_rules.json'
         
         self.rules_file = Path(rules_file)
+        self._rules: Dict[str, Any] = {}
+        self._compiled: List[CompiledRule] = []
         self.rules = self._load_context_rules()
         logger.info(f"Context engine initialized with {len(self.rules)} contexts")
     
+    @property
+    def rules(self) -> Dict[str, Any]:
+        """Context rule definitions (assigning recompiles them)"""
+        return self._rules
+    
+    @rules.setter
+    def rules(self, rules: Dict[str, Any]) -> None:
+        self._rules = rules
+        self._compiled = self._compile_rules(rules)
+    
+    def _compile_rules(self, rules: Dict[str, Any]) -> List[CompiledRule]:
+        """
+        ルールをコンパイル（ロード時・再読み込み時に1回のみ）
+        
+        Args:
+            rules: コンテキストルールの辞書
+        
+        Returns:
+            'default' を除くコンパイル済みルールのリスト
+        """
+        return [
+            CompiledRule(name, rule)
+            for name, rule in rules.items()
+            if name != 'default'  # Skip default, use as fallback
+        ]
+    
     def _load_context_rules(self) -> Dict[str, Any]:
         """
         コンテキストルール定義をロード
@@ -108,14 +459,11 @@ class ContextEngine:
         # Calculate scores for all contexts
         score_map = {}
         
-        for context_name, rule in self.rules.items():
-            if context_name == 'default':
-                continue  # Skip default, use as fallback
-            
-            score = self._evaluate_rule(rule, exif_data, ai_eval)
-            score_map[context_name] = score
+        for compiled in self._compiled:
+            score = compiled.score(exif_data, ai_eval)
+            score_map[compiled.name] = score
             
-            logger.debug(f"Context '{context_name}': score={score:.3f}")
+            logger.debug(f"Context '{compiled.name}': score={score:.3f}")
         
         # Find best matching context
         if score_map:
@@ -126,23 +474,14 @@ class ContextEngine:
             best_score = 0.0
         
         # Use default if best score is too low
-        threshold = 0.5
+        threshold = CONTEXT_SCORE_THRESHOLD
         if best_score < threshold:
             logger.info(f"Best score {best_score:.3f} below threshold {threshold}, using default")
             best_context = 'default'
             best_score = 0.0
         
-        # Get context details
-        context_rule = self.rules.get(best_context, self.rules['default'])
-        
-        result = {
-            'context': best_context,
-            'score': best_score,
-            'description': context_rule.get('description', ''),
-            'recommended_preset': context_rule.get('recommended_preset', 'Standard_Balanced_v1'),
-            'preset_blend': context_rule.get('preset_blend', 50),
-            'all_scores': score_map
-        }
+        result = self._build_result(best_context, best_score)
+        result['all_scores'] = score_map
         
         logger.info(
             f"Determined context: {best_context} "
@@ -151,6 +490,143 @@ class ContextEngine:
         
         return result
     
+    def _build_result(self, context: str, score: float) -> Dict[str, Any]:
+        """判定結果の辞書を作成（all_scores を除く）"""
+        context_rule = self.rules.get(context, self.rules['default'])
+        return {
+            'context': context,
+            'score': score,
+            'description': context_rule.get('description', ''),
+            'recommended_preset': context_rule.get('recommended_preset', 'Standard_Balanced_v1'),
+            'preset_blend': context_rule.get('preset_blend', 50)
+        }
+    
+    # ========== Batch API ==========
+    
+    def get_rule_fields(self) -> List[str]:
+        """
+        コンパイル済みルールが参照するフィールドパスの一覧
+        
+        Returns:
+            フィールドパスのリスト（例: ["settings.iso", "location.location_type"]）
+        """
+        fields = []
+        for compiled in self._compiled:
+            for condition in compiled.conditions:
+                if condition.field and condition.field not in fields:
+                    fields.append(condition.field)
+        return fields
+    
+    def build_feature_table(
+        self,
+        photos: Iterable[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]
+    ) -> Dict[str, List[Any]]:
+        """
+        写真ごとのEXIF/AI評価から列指向の特徴テーブルを作成
+        
+        Args:
+            photos: (exif_data, ai_eval) のイテラブル
+        
+        Returns:
+            フィールドパス -> N件の値のリスト（欠損はNone）
+        """
+        accessors = [(field, _make_accessor(field)) for field in self.get_rule_fields()]
+        table: Dict[str, List[Any]] = {field: [] for field, _ in accessors}
+        
+        for exif_data, ai_eval in photos:
+            for field, get in accessors:
+                table[field].append(get(exif_data, ai_eval))
+        
+        return table
+    
+    def score_contexts_batch(self, table: Dict[str, Sequence[Any]]) -> Tuple[List[str], np.ndarray]:
+        """
+        N枚の写真の全コンテキストのスコアを一括計算
+        
+        Conditions shared by several rules are evaluated once; the scores are
+        a single (contexts x conditions) @ (conditions x photos) product.
+        
+        Args:
+            table: フィールドパス -> N件の値（リストまたはNumPy配列、欠損はNone/NaN）
+        
+        Returns:
+            (コンテキスト名のリスト, スコア行列 shape=(コンテキスト数, N))
+        """
+        n = len(next(iter(table.values()))) if table else 0
+        names = [compiled.name for compiled in self._compiled]
+        
+        # Distinct conditions across all rules
+        condition_index: Dict[Tuple[Any, ...], int] = {}
+        conditions: List[CompiledCondition] = []
+        for compiled in self._compiled:
+            for condition in compiled.conditions:
+                if condition.key not in condition_index:
+                    condition_index[condition.key] = len(conditions)
+                    conditions.append(condition)
+        
+        masks = np.zeros((len(conditions), n), dtype=np.float64)
+        factorized: Dict[str, Tuple[np.ndarray, List[Any]]] = {}
+        for i, condition in enumerate(conditions):
+            column = table.get(condition.field) if condition.field else None
+            if column is None or len(column) != n:
+                continue  # Field missing for every photo
+            if not (isinstance(column, np.ndarray) and column.dtype.kind in 'fiu'):
+                if condition.field not in factorized:
+                    factorized[condition.field] = factorize_column(column)
+                masks[i] = condition.evaluate_column(column, factorized[condition.field])
+            else:
+                masks[i] = condition.evaluate_column(column)
+        
+        weights = np.zeros((len(names), len(conditions)), dtype=np.float64)
+        for r, compiled in enumerate(self._compiled):
+            for condition, weight in zip(compiled.conditions, compiled.weights):
+                weights[r, condition_index[condition.key]] += weight
+        
+        return names, weights @ masks
+    
+    def determine_contexts_batch(
+        self,
+        table: Dict[str, Sequence[Any]],
+        include_all_scores: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        N枚の写真のコンテキストを一括判定
+        
+        Args:
+            table: build_feature_table() 形式の列指向テーブル
+            include_all_scores: 各結果に全コンテキストのスコアを含めるか
+        
+        Returns:
+            determine_context() と同じ形式の結果のリスト
+        """
+        names, scores = self.score_contexts_batch(table)
+        n = scores.shape[1]
+        
+        if names:
+            best = scores.argmax(axis=0)
+            best_scores = scores[best, np.arange(n)]
+        else:
+            best = np.zeros(n, dtype=np.intp)
+            best_scores = np.zeros(n)
+        
+        # One result template per context, copied per photo
+        templates = {name: self._build_result(name, 0.0) for name in names + ['default']}
+        
+        results = []
+        for j in range(n):
+            score = float(best_scores[j])
+            if not names or score < CONTEXT_SCORE_THRESHOLD:
+                result = dict(templates['default'])
+            else:
+                result = dict(templates[names[best[j]]])
+                result['score'] = score
+            if include_all_scores:
+                result['all_scores'] = {name: float(scores[r, j]) for r, name in enumerate(names)}
+            results.append(result)
+        
+        logger.info(f"Determined contexts for {n} photos in batch")
+        return results
+    
     def _evaluate_rule(
         self, 
         rule: Dict[str, Any], 
@@ -168,31 +644,7 @@ class ContextEngine:
         Returns:
             スコア (0.0-1.0)
         """
-        conditions = rule.get('conditions', [])
-        weights = rule.get('weights', [])
-        
-        if not conditions:
-            return 0.0
-        
-        # Ensure weights match conditions
-        if len(weights) != len(conditions):
-            # Use equal weights if mismatch
-            weights = [1.0 / len(conditions)] * len(conditions)
-        
-        # Normalize weights to sum to 1.0
-        weight_sum = sum(weights)
-        if weight_sum > 0:
-            weights = [w / weight_sum for w in weights]
-        
-        # Evaluate each condition
-        total_score = 0.0
-        
-        for condition, weight in zip(conditions, weights):
-            condition_met = self._evaluate_condition(condition, exif_data, ai_eval)
-            if condition_met:
-                total_score += weight
-        
-        return total_score
+        return CompiledRule('', rule).score(exif_data, ai_eval)
     
     def _evaluate_condition(
         self,
@@ -211,25 +663,7 @@ class ContextEngine:
         Returns:
             条件が満たされているかどうか
         """
-        field = condition.get('field')
-        operator = condition.get('operator')
-        expected_value = condition.get('value')
-        
-        if not field or not operator:
-            return False
-        
-        # Get actual value from data
-        actual_value = self._get_field_value(field, exif_data, ai_eval)
-        
-        if actual_value is None:
-            return False
-        
-        # Evaluate based on operator
-        try:
-            return self._apply_operator(operator, actual_value, expected_value)
-        except Exception as e:
-            logger.debug(f"Error evaluating condition {field} {operator} {expected_value}: {e}")
-            return False
+        return CompiledCondition(condition)(exif_data, ai_eval)
     
     def _get_field_value(
         self,
@@ -248,24 +682,7 @@ class ContextEngine:
         Returns:
             フィールド値またはNone
         """
-        # Combine data sources
-        data = {**exif_data}
-        if ai_eval:
-            data['ai_eval'] = ai_eval
-        
-        # Navigate through nested dictionary
-        parts = field_path.split('.')
-        current = data
-        
-        for part in parts:
-            if isinstance(current, dict):
-                current = current.get(part)
-                if current is None:
-                    return None
-            else:
-                return None
-        
-        return current
+        return _make_accessor(field_path)(exif_data, ai_eval)
     
     def _apply_operator(
         self,
@@ -284,42 +701,7 @@ class ContextEngine:
         Returns:
             条件が満たされているかどうか
         """
-        if operator == '==':
-            return actual_value == expected_value
-        
-        elif operator == '!=':
-            return actual_value != expected_value
-        
-        elif operator == '>':
-            return float(actual_value) > float(expected_value)
-        
-        elif operator == '<':
-            return float(actual_value) < float(expected_value)
-        
-        elif operator == '>=':
-            return float(actual_value) >= float(expected_value)
-        
-        elif operator == '<=':
-            return float(actual_value) <= float(expected_value)
-        
-        elif operator == 'in':
-            if not isinstance(expected_value, list):
-                return False
-            return actual_value in expected_value
-        
-        elif operator == 'between':
-            if not isinstance(expected_value, list) or len(expected_value) != 2:
-                return False
-            min_val, max_val = expected_value
-            return min_val <= float(actual_value) <= max_val
-        
-        elif operator == 'shutter_faster_than':
-            # Compare shutter speeds (e.g., "1/500" vs "1/250")
-            return self._compare_shutter_speeds(actual_value, expected_value)
-        
-        else:
-            logger.warning(f"Unknown operator: {operator}")
-            return False
+        return _make_value_predicate(operator, expected_value)(actual_value)
     
     def _compare_shutter_speeds(self, actual: str, threshold: str) -> bool:
         """
@@ -356,28 +738,7 @@ class ContextEngine:
         Returns:
             秒数またはNone
         """
-        if not shutter_str:
-            return None
-        
-        shutter_str = str(shutter_str).strip()
-        
-        # Handle fraction format "1/500"
-        if '/' in shutter_str:
-            parts = shutter_str.split('/')
-            if len(parts) == 2:
-                try:
-                    numerator = float(parts[0])
-                    denominator = float(parts[1])
-                    if denominator != 0:
-                        return numerator / denominator
-                except ValueError:
-                    pass
-        
-        # Handle decimal format
-        try:
-            return float(shutter_str)
-        except ValueError:
-            return None
+        return parse_shutter_speed(shutter_str)
     
     def get_context_list(self) -> List[Dict[str, Any]]:
         """
@@ -12,9 +12,11 @@ import argparse
 import hashlib
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Any, Callable, Dict, Iterator, List, Tuple, Optional
 import logging
 
+from sqlalchemy import create_engine, select, text
+
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
@@ -27,8 +29,10 @@ from models.database import (
     Photo,
     Job,
     Preset,
+    PresetContextTag,
     Statistic,
     LearningData,
+    LearningAdjustment,
     PhotoGroup,
     ABTest,
     ABTestAssignment,
@@ -44,13 +48,77 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+DEFAULT_CHUNK_SIZE = 1000
+
+# Progress and chunk checksums live in the target database so that each
+# chunk and its checkpoint are committed in the same transaction.
+_PROGRESS_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS migration_progress (
+        table_name TEXT PRIMARY KEY,
+        last_id TEXT,
+        rows_migrated INTEGER NOT NULL DEFAULT 0,
+        chunks INTEGER NOT NULL DEFAULT 0,
+        completed INTEGER NOT NULL DEFAULT 0,
+        updated_at TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS migration_chunks (
+        table_name TEXT NOT NULL,
+        chunk_index INTEGER NOT NULL,
+        first_id TEXT NOT NULL,
+        last_id TEXT NOT NULL,
+        row_count INTEGER NOT NULL,
+        checksum TEXT NOT NULL,
+        PRIMARY KEY (table_name, chunk_index)
+    )
+    """
+]
+
+
+def _parse_datetime(value, default=None):
+    """Parse an ISO datetime from the source database."""
+    if value:
+        return datetime.fromisoformat(value)
+    return default() if callable(default) else default
+
+
+def _canonical(value) -> str:
+    """Type-normalized text of a value for chunk checksums."""
+    if value is None:
+        return 'N'
+    if isinstance(value, bool):
+        return 'T' if value else 'F'
+    if isinstance(value, (int, float)):
+        return repr(float(value))
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _chunk_checksum(rows: List[Dict[str, Any]], columns: List[str]) -> str:
+    """SHA256 over the given columns of a chunk of rows (ordered by id)."""
+    digest = hashlib.sha256()
+    for row in rows:
+        digest.update('\x1f'.join(_canonical(row[c]) for c in columns).encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
 class DataMigrationTool:
     """
     Data migration tool for Junmai AutoDev database.
     Handles backup, migration, and verification of database upgrades.
     """
     
-    def __init__(self, source_db_path: str, target_db_path: str = None, backup_dir: str = None):
+    def __init__(
+        self,
+        source_db_path: str,
+        target_db_path: str = None,
+        backup_dir: str = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ):
         """
         Initialize the data migration tool.
         
@@ -58,8 +126,10 @@ class DataMigrationTool:
             source_db_path: Path to the source database file
             target_db_path: Path to the target database file (default: source_db_path with .new suffix)
             backup_dir: Directory for backups (default: ./data/backups)
+            chunk_size: Rows read, inserted and committed per chunk
         """
         self.source_db_path = Path(source_db_path)
+        self.chunk_size = chunk_size
         
         if target_db_path:
             self.target_db_path = Path(target_db_path)
@@ -137,68 +207,57 @@ class DataMigrationTool:
             })
             raise
     
-    def migrate_data(self) -> bool:
+    def migrate_data(self, resume: bool = True) -> bool:
         """
         Migrate data from source database to target database.
         
+        Tables are streamed in primary key order and inserted in chunks; each
+        chunk is committed together with its progress checkpoint and
+        checksum, so an interrupted migration continues where it stopped.
+        
+        Args:
+            resume: Continue from the checkpoints in an existing target
+                database (False deletes the target database first)
+        
         Returns:
             True if migration successful, False otherwise
         """
         logger.info("Starting data migration...")
         
+        source_conn = None
+        engine = None
+        
         try:
+            if not resume and self.target_db_path.exists():
+                logger.info(f"Removing existing target database: {self.target_db_path}")
+                self.target_db_path.unlink()
+            
             # Initialize target database with new schema
             logger.info(f"Initializing target database: {self.target_db_path}")
             target_url = f'sqlite:///{self.target_db_path}'
-            init_db(target_url, echo=False)
+            engine = init_db(target_url, echo=False)
+            with engine.begin() as conn:
+                for statement in _PROGRESS_SCHEMA:
+                    conn.execute(text(statement))
             
             # Connect to source database
             source_conn = sqlite3.connect(self.source_db_path)
             source_conn.row_factory = sqlite3.Row
-            source_cursor = source_conn.cursor()
-            
-            # Get target session
-            target_session = get_session()
+            source_tables = {
+                row[0] for row in source_conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+            }
             
-            # Migrate each table
+            # Migrate each table (parents before children)
             migration_stats = {}
-            
-            # 1. Migrate sessions
-            logger.info("Migrating sessions...")
-            sessions_migrated = self._migrate_sessions(source_cursor, target_session)
-            migration_stats['sessions'] = sessions_migrated
-            
-            # 2. Migrate photos
-            logger.info("Migrating photos...")
-            photos_migrated = self._migrate_photos(source_cursor, target_session)
-            migration_stats['photos'] = photos_migrated
-            
-            # 3. Migrate jobs
-            logger.info("Migrating jobs...")
-            jobs_migrated = self._migrate_jobs(source_cursor, target_session)
-            migration_stats['jobs'] = jobs_migrated
-            
-            # 4. Migrate presets
-            logger.info("Migrating presets...")
-            presets_migrated = self._migrate_presets(source_cursor, target_session)
-            migration_stats['presets'] = presets_migrated
-            
-            # 5. Migrate statistics
-            logger.info("Migrating statistics...")
-            statistics_migrated = self._migrate_statistics(source_cursor, target_session)
-            migration_stats['statistics'] = statistics_migrated
-            
-            # 6. Migrate learning data
-            logger.info("Migrating learning data...")
-            learning_data_migrated = self._migrate_learning_data(source_cursor, target_session)
-            migration_stats['learning_data'] = learning_data_migrated
-            
-            # Commit all changes
-            target_session.commit()
-            
-            # Close connections
-            source_conn.close()
-            target_session.close()
+            for table_name, model, convert, derive in self._table_specs():
+                if table_name not in source_tables:
+                    logger.warning(f"Source has no {table_name} table, skipping")
+                    migration_stats[table_name] = 0
+                    continue
+                logger.info(f"Migrating {table_name}...")
+                migration_stats[table_name] = self._migrate_table(
+                    source_conn, engine, table_name, model, convert, derive
+                )
             
             logger.info("✓ Data migration completed successfully")
             for table, count in migration_stats.items():
@@ -215,11 +274,6 @@ class DataMigrationTool:
             
         except Exception as e:
             logger.error(f"✗ Migration failed: {e}")
-            if 'target_session' in locals():
-                target_session.rollback()
-                target_session.close()
-            if 'source_conn' in locals():
-                source_conn.close()
             
             self.migration_log.append({
                 'step': 'migration',
@@ -230,10 +284,55 @@ class DataMigrationTool:
             
             return False
     
-    def verify_migration(self) -> Dict:
+        finally:
+            if source_conn is not None:
+                source_conn.close()
+            if engine is not None:
+                engine.dispose()
+    
+    def get_migration_progress(self) -> Dict[str, Dict]:
+        """
+        Get per-table progress checkpoints from the target database.
+        
+        Returns:
+            Dictionary of table name -> rows_migrated, chunks, completed, last_id
+        """
+        if not self.target_db_path.exists():
+            return {}
+        
+        conn = sqlite3.connect(self.target_db_path)
+        try:
+            rows = conn.execute(
+                "SELECT table_name, last_id, rows_migrated, chunks, completed FROM migration_progress"
+            ).fetchall()
+        except sqlite3.OperationalError:
+            return {}
+        finally:
+            conn.close()
+        
+        return {
+            table_name: {
+                'last_id': json.loads(last_id) if last_id else None,
+                'rows_migrated': rows_migrated,
+                'chunks': chunks,
+                'completed': bool(completed)
+            }
+            for table_name, last_id, rows_migrated, chunks, completed in rows
+        }
+    
+    def verify_migration(self, max_chunks_per_table: Optional[int] = None) -> Dict:
         """
         Verify the migrated data integrity.
         
+        Compares record counts, then recomputes the checksum of each migrated
+        chunk from the target database and compares it with the checksum
+        recorded from the source rows during migration. The source is not
+        re-read.
+        
+        Args:
+            max_chunks_per_table: Verify an evenly spaced sample of at most
+                this many chunks per table (default: all chunks)
+        
         Returns:
             Dictionary with verification results
         """
@@ -245,6 +344,8 @@ class DataMigrationTool:
             'errors': []
         }
         
+        engine = None
+        
         try:
             # Connect to both databases
             source_conn = sqlite3.connect(self.source_db_path)
@@ -253,8 +354,10 @@ class DataMigrationTool:
             target_conn = sqlite3.connect(self.target_db_path)
             target_conn.row_factory = sqlite3.Row
             
+            engine = create_engine(f'sqlite:///{self.target_db_path}')
+            
             # Verify record counts
-            tables = ['sessions', 'photos', 'jobs', 'presets', 'statistics', 'learning_data']
+            tables = [spec[0] for spec in self._table_specs()]
             
             for table in tables:
                 source_count = source_conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
@@ -274,27 +377,21 @@ class DataMigrationTool:
                     results['success'] = False
                     results['errors'].append(f"Record count mismatch in {table}")
             
-            # Verify data integrity (sample checks)
+            # Verify data integrity (chunk checksums)
             logger.info("Verifying data integrity...")
             
-            # Check photos table
-            source_photos = source_conn.execute(
-                "SELECT id, file_path, file_name FROM photos ORDER BY id LIMIT 10"
-            ).fetchall()
-            
-            for source_photo in source_photos:
-                target_photo = target_conn.execute(
-                    "SELECT id, file_path, file_name FROM photos WHERE id = ?",
-                    (source_photo['id'],)
-                ).fetchone()
-                
-                if not target_photo:
-                    results['success'] = False
-                    results['errors'].append(f"Photo {source_photo['id']} not found in target")
-                elif (source_photo['file_path'] != target_photo['file_path'] or
-                      source_photo['file_name'] != target_photo['file_name']):
+            for table_name, model, _, _ in self._table_specs():
+                verified, mismatches = self._verify_chunks(
+                    target_conn, engine, table_name, model, max_chunks_per_table
+                )
+                results['checks'][table_name]['chunks_verified'] = verified
+                results['checks'][table_name]['chunk_mismatches'] = len(mismatches)
+                for chunk in mismatches:
                     results['success'] = False
-                    results['errors'].append(f"Photo {source_photo['id']} data mismatch")
+                    results['errors'].append(
+                        f"Checksum mismatch in {table_name} chunk {chunk['chunk_index']} "
+                        f"(id {chunk['first_id']}..{chunk['last_id']})"
+                    )
             
             # Check foreign key relationships
             logger.info("Verifying foreign key relationships...")
@@ -328,6 +425,7 @@ class DataMigrationTool:
             # Close connections
             source_conn.close()
             target_conn.close()
+            engine.dispose()
             
             if results['success']:
                 logger.info("✓ Migration verification passed")
@@ -459,181 +557,347 @@ class DataMigrationTool:
                 sha256_hash.update(byte_block)
         return sha256_hash.hexdigest()
     
-    def _migrate_sessions(self, source_cursor, target_session) -> int:
-        """Migrate sessions table."""
-        source_cursor.execute("SELECT * FROM sessions")
-        rows = source_cursor.fetchall()
+    # ========== Streaming Migration ==========
         
-        count = 0
-        for row in rows:
-            session = Session(
-                id=row['id'],
-                name=row['name'],
-                created_at=datetime.fromisoformat(row['created_at']) if row['created_at'] else datetime.utcnow(),
-                import_folder=row['import_folder'],
-                total_photos=row['total_photos'] or 0,
-                processed_photos=row['processed_photos'] or 0,
-                status=row['status'] or 'importing'
-            )
-            target_session.add(session)
-            count += 1
+    def _table_specs(self) -> List[Tuple[str, Any, Callable[[Dict], Dict], Optional[Callable]]]:
+        """
+        Tables to migrate, parents before children.
         
-        target_session.flush()
-        return count
+        Returns:
+            List of (table name, model, row converter, derived rows function)
+        """
+        return [
+            ('sessions', Session, self._convert_session, None),
+            ('photos', Photo, self._convert_photo, None),
+            ('jobs', Job, self._convert_job, None),
+            ('presets', Preset, self._convert_preset, self._derive_preset_tags),
+            ('statistics', Statistic, self._convert_statistic, None),
+            ('learning_data', LearningData, self._convert_learning_data, self._derive_learning_adjustments),
+        ]
     
-    def _migrate_photos(self, source_cursor, target_session) -> int:
-        """Migrate photos table."""
-        source_cursor.execute("SELECT * FROM photos")
-        rows = source_cursor.fetchall()
+    def _iter_source_chunks(self, source_conn, table_name: str, last_id) -> Iterator[List[Dict]]:
+        """
+        Stream source rows in primary key order, one chunk at a time.
         
-        count = 0
-        for row in rows:
-            # Convert Row to dict for easier access
-            row_dict = dict(row)
-            
-            photo = Photo(
-                id=row_dict['id'],
-                session_id=row_dict['session_id'],
-                file_path=row_dict['file_path'],
-                file_name=row_dict['file_name'],
-                file_size=row_dict['file_size'],
-                import_time=datetime.fromisoformat(row_dict['import_time']) if row_dict['import_time'] else datetime.utcnow(),
-                camera_make=row_dict['camera_make'],
-                camera_model=row_dict['camera_model'],
-                lens=row_dict['lens'],
-                focal_length=row_dict['focal_length'],
-                aperture=row_dict['aperture'],
-                shutter_speed=row_dict['shutter_speed'],
-                iso=row_dict['iso'],
-                capture_time=datetime.fromisoformat(row_dict['capture_time']) if row_dict.get('capture_time') else None,
-                gps_lat=row_dict['gps_lat'],
-                gps_lon=row_dict['gps_lon'],
-                ai_score=row_dict['ai_score'],
-                focus_score=row_dict['focus_score'],
-                exposure_score=row_dict['exposure_score'],
-                composition_score=row_dict['composition_score'],
-                subject_type=row_dict['subject_type'],
-                detected_faces=row_dict['detected_faces'] or 0,
-                context_tag=row_dict['context_tag'],
-                selected_preset=row_dict['selected_preset'],
-                status=row_dict['status'] or 'imported',
-                lr_catalog_id=row_dict['lr_catalog_id'],
-                virtual_copy_id=row_dict['virtual_copy_id'],
-                approved=bool(row_dict['approved']) if row_dict['approved'] is not None else False,
-                approved_at=datetime.fromisoformat(row_dict['approved_at']) if row_dict.get('approved_at') else None,
-                rejection_reason=row_dict['rejection_reason']
-            )
+        Args:
+            source_conn: Source database connection
+            table_name: Table to read
+            last_id: Primary key of the last migrated row (None to start at the beginning)
+        
+        Yields:
+            Lists of at most chunk_size row dictionaries
+        """
+        if last_id is None:
+            cursor = source_conn.execute(f"SELECT * FROM {table_name} ORDER BY id")
+        else:
+            cursor = source_conn.execute(f"SELECT * FROM {table_name} WHERE id > ? ORDER BY id", (last_id,))
+        
+        try:
+            while True:
+                rows = cursor.fetchmany(self.chunk_size)
+                if not rows:
+                    break
+                yield [dict(row) for row in rows]
+        finally:
+            cursor.close()
+    
+    def _migrate_table(
+        self,
+        source_conn,
+        engine,
+        table_name: str,
+        model,
+        convert: Callable[[Dict], Dict],
+        derive: Optional[Callable[[List[Dict]], List[Tuple[Any, List[Dict]]]]] = None
+    ) -> int:
+        """
+        Migrate one table in chunks, resuming from its checkpoint.
+        
+        Args:
+            source_conn: Source database connection
+            engine: Target database engine
+            table_name: Table to migrate
+            model: Target model class
+            convert: Source row -> target row dictionary
+            derive: Optional function returning (model, rows) of derived
+                tables to insert with each chunk
+        
+        Returns:
+            Total number of rows migrated for the table
+        """
+        with engine.connect() as conn:
+            progress = conn.execute(
+                text("SELECT last_id, rows_migrated, chunks, completed FROM migration_progress "
+                     "WHERE table_name = :table_name"),
+                {'table_name': table_name}
+            ).fetchone()
+        
+        if progress and progress.completed:
+            logger.info(f"  {table_name}: already migrated ({progress.rows_migrated} rows)")
+            return progress.rows_migrated
+        
+        last_id = json.loads(progress.last_id) if progress and progress.last_id else None
+        rows_migrated = progress.rows_migrated if progress else 0
+        chunk_index = progress.chunks if progress else 0
+        if last_id is not None:
+            logger.info(f"  Resuming {table_name} after id {last_id} ({rows_migrated} rows done)")
+        
+        table = model.__table__
+        columns = self._checksum_columns(table_name)
+        
+        for source_rows in self._iter_source_chunks(source_conn, table_name, last_id):
+            rows = [convert(row) for row in source_rows]
+            first_id, last_id = rows[0]['id'], rows[-1]['id']
             
-            # Handle new fields that may not exist in old schema
-            if 'phash' in row_dict:
-                photo.phash = row_dict['phash']
-            if 'photo_group_id' in row_dict:
-                photo.photo_group_id = row_dict['photo_group_id']
-            if 'is_best_in_group' in row_dict:
-                photo.is_best_in_group = bool(row_dict['is_best_in_group'])
+            with engine.begin() as conn:
+                conn.execute(table.insert(), rows)
+                if derive:
+                    for derived_model, derived_rows in derive(rows):
+                        if derived_rows:
+                            conn.execute(derived_model.__table__.insert(), derived_rows)
+                conn.execute(
+                    text("INSERT INTO migration_chunks "
+                         "(table_name, chunk_index, first_id, last_id, row_count, checksum) "
+                         "VALUES (:table_name, :chunk_index, :first_id, :last_id, :row_count, :checksum)"),
+                    {
+                        'table_name': table_name,
+                        'chunk_index': chunk_index,
+                        'first_id': json.dumps(first_id),
+                        'last_id': json.dumps(last_id),
+                        'row_count': len(rows),
+                        'checksum': _chunk_checksum(rows, columns)
+                    }
+                )
+                rows_migrated += len(rows)
+                chunk_index += 1
+                self._save_progress(conn, table_name, last_id, rows_migrated, chunk_index, completed=False)
             
-            target_session.add(photo)
-            count += 1
+            logger.debug(f"  {table_name}: {rows_migrated} rows migrated")
         
-        target_session.flush()
-        return count
+        with engine.begin() as conn:
+            self._save_progress(conn, table_name, last_id, rows_migrated, chunk_index, completed=True)
+        
+        return rows_migrated
+    
+    def _save_progress(self, conn, table_name: str, last_id, rows_migrated: int, chunks: int, completed: bool):
+        """Upsert the progress checkpoint of a table."""
+        conn.execute(
+            text("INSERT OR REPLACE INTO migration_progress "
+                 "(table_name, last_id, rows_migrated, chunks, completed, updated_at) "
+                 "VALUES (:table_name, :last_id, :rows_migrated, :chunks, :completed, :updated_at)"),
+            {
+                'table_name': table_name,
+                'last_id': json.dumps(last_id) if last_id is not None else None,
+                'rows_migrated': rows_migrated,
+                'chunks': chunks,
+                'completed': int(completed),
+                'updated_at': datetime.now().isoformat()
+            }
+        )
     
-    def _migrate_jobs(self, source_cursor, target_session) -> int:
-        """Migrate jobs table."""
-        source_cursor.execute("SELECT * FROM jobs")
-        rows = source_cursor.fetchall()
+    def _verify_chunks(
+        self,
+        target_conn,
+        engine,
+        table_name: str,
+        model,
+        max_chunks: Optional[int] = None
+    ) -> Tuple[int, List[Dict]]:
+        """
+        Recompute recorded chunk checksums from the target database.
         
-        count = 0
-        for row in rows:
-            job = Job(
-                id=row['id'],
-                photo_id=row['photo_id'],
-                priority=row['priority'] or 2,
-                config_json=row['config_json'],
-                status=row['status'] or 'pending',
-                created_at=datetime.fromisoformat(row['created_at']) if row['created_at'] else datetime.utcnow(),
-                started_at=datetime.fromisoformat(row['started_at']) if row.get('started_at') else None,
-                completed_at=datetime.fromisoformat(row['completed_at']) if row.get('completed_at') else None,
-                error_message=row['error_message'],
-                retry_count=row['retry_count'] or 0
-            )
-            target_session.add(job)
-            count += 1
+        Args:
+            target_conn: Target database connection
+            engine: Target database engine
+            table_name: Table to verify
+            model: Target model class
+            max_chunks: Verify an evenly spaced sample of at most this many chunks
         
-        target_session.flush()
-        return count
-    
-    def _migrate_presets(self, source_cursor, target_session) -> int:
-        """Migrate presets table."""
-        source_cursor.execute("SELECT * FROM presets")
-        rows = source_cursor.fetchall()
+        Returns:
+            Tuple of (chunks verified, mismatching chunk records)
+        """
+        try:
+            chunks = [dict(row) for row in target_conn.execute(
+                "SELECT chunk_index, first_id, last_id, row_count, checksum FROM migration_chunks "
+                "WHERE table_name = ? ORDER BY chunk_index",
+                (table_name,)
+            )]
+        except sqlite3.OperationalError:
+            # Target was not migrated by the streaming engine
+            return 0, []
         
-        count = 0
-        for row in rows:
-            preset = Preset(
-                id=row['id'],
-                name=row['name'],
-                version=row['version'],
-                context_tags=row['context_tags'],
-                config_template=row['config_template'],
-                blend_amount=row['blend_amount'] or 100,
-                usage_count=row['usage_count'] or 0,
-                avg_approval_rate=row['avg_approval_rate'],
-                created_at=datetime.fromisoformat(row['created_at']) if row['created_at'] else datetime.utcnow(),
-                updated_at=datetime.fromisoformat(row['updated_at']) if row['updated_at'] else datetime.utcnow()
-            )
-            target_session.add(preset)
-            count += 1
+        if max_chunks is not None and len(chunks) > max_chunks:
+            step = len(chunks) / max_chunks
+            chunks = [chunks[int(i * step)] for i in range(max_chunks)]
         
-        target_session.flush()
-        return count
-    
-    def _migrate_statistics(self, source_cursor, target_session) -> int:
-        """Migrate statistics table."""
-        source_cursor.execute("SELECT * FROM statistics")
-        rows = source_cursor.fetchall()
+        table = model.__table__
+        columns = self._checksum_columns(table_name)
+        mismatches = []
         
-        count = 0
-        for row in rows:
-            statistic = Statistic(
-                id=row['id'],
-                date=datetime.fromisoformat(row['date']) if row['date'] else datetime.utcnow(),
-                session_id=row['session_id'],
-                total_imported=row['total_imported'] or 0,
-                total_selected=row['total_selected'] or 0,
-                total_processed=row['total_processed'] or 0,
-                total_exported=row['total_exported'] or 0,
-                avg_processing_time=row['avg_processing_time'],
-                success_rate=row['success_rate'],
-                preset_usage=row['preset_usage']
-            )
-            target_session.add(statistic)
-            count += 1
+        with engine.connect() as conn:
+            for chunk in chunks:
+                rows = [
+                    dict(row._mapping)
+                    for row in conn.execute(
+                        select(table)
+                        .where(table.c.id >= json.loads(chunk['first_id']))
+                        .where(table.c.id <= json.loads(chunk['last_id']))
+                        .order_by(table.c.id)
+                    )
+                ]
+                if len(rows) != chunk['row_count'] or _chunk_checksum(rows, columns) != chunk['checksum']:
+                    mismatches.append(chunk)
         
-        target_session.flush()
-        return count
+        return len(chunks), mismatches
     
-    def _migrate_learning_data(self, source_cursor, target_session) -> int:
-        """Migrate learning_data table."""
-        source_cursor.execute("SELECT * FROM learning_data")
-        rows = source_cursor.fetchall()
-        
-        count = 0
+    def _checksum_columns(self, table_name: str) -> List[str]:
+        """Columns covered by chunk checksums (every column the converter sets)."""
+        for name, _, convert, _ in self._table_specs():
+            if name == table_name:
+                return sorted(convert({}))
+        raise ValueError(f"Unknown table: {table_name}")
+    
+    # ========== Row Converters ==========
+    
+    @staticmethod
+    def _convert_session(row: Dict) -> Dict:
+        """Convert a sessions row."""
+        return {
+            'id': row.get('id'),
+            'name': row.get('name'),
+            'created_at': _parse_datetime(row.get('created_at'), datetime.utcnow),
+            'import_folder': row.get('import_folder'),
+            'total_photos': row.get('total_photos') or 0,
+            'processed_photos': row.get('processed_photos') or 0,
+            'status': row.get('status') or 'importing'
+        }
+    
+    @staticmethod
+    def _convert_photo(row: Dict) -> Dict:
+        """Convert a photos row (new fields may not exist in old schemas)."""
+        return {
+            'id': row.get('id'),
+            'session_id': row.get('session_id'),
+            'file_path': row.get('file_path'),
+            'file_name': row.get('file_name'),
+            'file_size': row.get('file_size'),
+            'import_time': _parse_datetime(row.get('import_time'), datetime.utcnow),
+            'camera_make': row.get('camera_make'),
+            'camera_model': row.get('camera_model'),
+            'lens': row.get('lens'),
+            'focal_length': row.get('focal_length'),
+            'aperture': row.get('aperture'),
+            'shutter_speed': row.get('shutter_speed'),
+            'iso': row.get('iso'),
+            'capture_time': _parse_datetime(row.get('capture_time')),
+            'gps_lat': row.get('gps_lat'),
+            'gps_lon': row.get('gps_lon'),
+            'ai_score': row.get('ai_score'),
+            'focus_score': row.get('focus_score'),
+            'exposure_score': row.get('exposure_score'),
+            'composition_score': row.get('composition_score'),
+            'subject_type': row.get('subject_type'),
+            'detected_faces': row.get('detected_faces') or 0,
+            'context_tag': row.get('context_tag'),
+            'selected_preset': row.get('selected_preset'),
+            'phash': row.get('phash'),
+            'photo_group_id': row.get('photo_group_id'),
+            'is_best_in_group': bool(row.get('is_best_in_group')),
+            'status': row.get('status') or 'imported',
+            'lr_catalog_id': row.get('lr_catalog_id'),
+            'virtual_copy_id': row.get('virtual_copy_id'),
+            'approved': bool(row.get('approved')),
+            'approved_at': _parse_datetime(row.get('approved_at')),
+            'rejection_reason': row.get('rejection_reason')
+        }
+    
+    @staticmethod
+    def _convert_job(row: Dict) -> Dict:
+        """Convert a jobs row."""
+        return {
+            'id': row.get('id'),
+            'photo_id': row.get('photo_id'),
+            'priority': row.get('priority') or 2,
+            'config_json': row.get('config_json'),
+            'status': row.get('status') or 'pending',
+            'created_at': _parse_datetime(row.get('created_at'), datetime.utcnow),
+            'started_at': _parse_datetime(row.get('started_at')),
+            'completed_at': _parse_datetime(row.get('completed_at')),
+            'error_message': row.get('error_message'),
+            'retry_count': row.get('retry_count') or 0
+        }
+    
+    @staticmethod
+    def _convert_preset(row: Dict) -> Dict:
+        """Convert a presets row."""
+        return {
+            'id': row.get('id'),
+            'name': row.get('name'),
+            'version': row.get('version'),
+            'context_tags': row.get('context_tags'),
+            'config_template': row.get('config_template'),
+            'blend_amount': row.get('blend_amount') or 100,
+            'usage_count': row.get('usage_count') or 0,
+            'avg_approval_rate': row.get('avg_approval_rate'),
+            'created_at': _parse_datetime(row.get('created_at'), datetime.utcnow),
+            'updated_at': _parse_datetime(row.get('updated_at'), datetime.utcnow)
+        }
+    
+    @staticmethod
+    def _convert_statistic(row: Dict) -> Dict:
+        """Convert a statistics row."""
+        return {
+            'id': row.get('id'),
+            'date': _parse_datetime(row.get('date'), datetime.utcnow),
+            'session_id': row.get('session_id'),
+            'total_imported': row.get('total_imported') or 0,
+            'total_selected': row.get('total_selected') or 0,
+            'total_processed': row.get('total_processed') or 0,
+            'total_exported': row.get('total_exported') or 0,
+            'avg_processing_time': row.get('avg_processing_time'),
+            'success_rate': row.get('success_rate'),
+            'preset_usage': row.get('preset_usage')
+        }
+    
+    @staticmethod
+    def _convert_learning_data(row: Dict) -> Dict:
+        """Convert a learning_data row."""
+        return {
+            'id': row.get('id'),
+            'photo_id': row.get('photo_id'),
+            'action': row.get('action'),
+            'original_preset': row.get('original_preset'),
+            'final_preset': row.get('final_preset'),
+            'parameter_adjustments': row.get('parameter_adjustments'),
+            'timestamp': _parse_datetime(row.get('timestamp'), datetime.utcnow)
+        }
+    
+    @staticmethod
+    def _derive_preset_tags(rows: List[Dict]) -> List[Tuple[Any, List[Dict]]]:
+        """Build preset_context_tags rows from the JSON context tags of a chunk."""
+        tag_rows = []
+        for row in rows:
+            try:
+                tags = json.loads(row['context_tags']) if row['context_tags'] else []
+            except ValueError:
+                continue
+            tag_rows.extend({'preset_id': row['id'], 'tag': tag} for tag in dict.fromkeys(tags))
+        return [(PresetContextTag, tag_rows)]
+    
+    @staticmethod
+    def _derive_learning_adjustments(rows: List[Dict]) -> List[Tuple[Any, List[Dict]]]:
+        """Build learning_adjustments rows from the JSON adjustments of a chunk."""
+        adjustment_rows = []
         for row in rows:
-            learning_data = LearningData(
-                id=row['id'],
-                photo_id=row['photo_id'],
-                action=row['action'],
-                original_preset=row['original_preset'],
-                final_preset=row['final_preset'],
-                parameter_adjustments=row['parameter_adjustments'],
-                timestamp=datetime.fromisoformat(row['timestamp']) if row['timestamp'] else datetime.utcnow()
+            try:
+                adjustments = json.loads(row['parameter_adjustments']) if row['parameter_adjustments'] else {}
+            except ValueError:
+                continue
+            adjustment_rows.extend(
+                {'learning_id': row['id'], 'param': adjustment.param, 'value': adjustment.value}
+                for adjustment in LearningAdjustment.from_dict(adjustments)
             )
-            target_session.add(learning_data)
-            count += 1
-        
-        target_session.flush()
-        return count
+        return [(LearningAdjustment, adjustment_rows)]
 
 
 def main():
@@ -654,6 +918,12 @@ Examples:
   
   # Verify existing migration
   python data_migration_tool.py --source data/junmai.db --target data/junmai_new.db --verify-only
+  
+  # Re-run an interrupted migration (continues from the last committed chunk)
+  python data_migration_tool.py --source data/junmai.db --target data/junmai_new.db --no-backup
+  
+  # Start over, 5000 rows per chunk
+  python data_migration_tool.py --source data/junmai.db --restart --chunk-size 5000
         """
     )
     
@@ -694,6 +964,23 @@ Examples:
         action='store_true',
         help='Skip backup creation (not recommended)'
     )
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f'Rows per migration chunk (default: {DEFAULT_CHUNK_SIZE})'
+    )
+    parser.add_argument(
+        '--restart',
+        action='store_true',
+        help='Delete the target database and start over instead of resuming'
+    )
+    parser.add_argument(
+        '--verify-sample',
+        type=int,
+        metavar='CHUNKS',
+        help='Verify at most this many chunks per table (default: all)'
+    )
     
     args = parser.parse_args()
     
@@ -702,7 +989,8 @@ Examples:
         tool = DataMigrationTool(
             source_db_path=args.source,
             target_db_path=args.target,
-            backup_dir=args.backup_dir
+            backup_dir=args.backup_dir,
+            chunk_size=args.chunk_size
         )
         
         # Handle restore operation
@@ -730,7 +1018,7 @@ Examples:
             logger.info("MIGRATION VERIFICATION")
             logger.info("="*60)
             
-            results = tool.verify_migration()
+            results = tool.verify_migration(max_chunks_per_table=args.verify_sample)
             tool.save_migration_log()
             
             if results['success']:
@@ -760,7 +1048,7 @@ Examples:
         
         # Step 2: Migrate data (unless backup-only)
         if not args.backup_only:
-            success = tool.migrate_data()
+            success = tool.migrate_data(resume=not args.restart)
             
             if not success:
                 logger.error("\n" + "="*60)
@@ -770,7 +1058,7 @@ Examples:
                 sys.exit(1)
             
             # Step 3: Verify migration
-            results = tool.verify_migration()
+            results = tool.verify_migration(max_chunks_per_table=args.verify_sample)
             
             if not results['success']:
                 logger.error("\n" + "="*60)
@@ -17,7 +17,7 @@ from datetime import datetime, timedelta
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.image import MIMEImage
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from pathlib import Path
 from enum import Enum
 
@@ -476,6 +476,124 @@ class BatchNotificationManager:
         """Clear notification buffer"""
         self.buffer.clear()
         self.last_send_time = datetime.now()
+    
+    @staticmethod
+    def build_digest(notifications: List[Dict[str, Any]]) -> Tuple[str, str, str]:
+        """
+        Build one digest email from several notifications
+        
+        Args:
+            notifications: Notification dictionaries with 'type' and 'message' keys
+            
+        Returns:
+            Tuple of (subject, html_body, text_body)
+        """
+        # Group notifications by type
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for notif in notifications:
+            grouped.setdefault(notif.get('type', 'general'), []).append(notif)
+        
+        # Create batch summary
+        summary_html = '<html><body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">'
+        summary_html += '<h2>通知サマリー</h2>'
+        summary_html += f'<p>{len(notifications)}件の通知があります。</p>'
+        
+        summary_text = '通知サマリー\n\n'
+        summary_text += f'{len(notifications)}件の通知があります。\n\n'
+        
+        for notif_type, notifs in grouped.items():
+            summary_html += f'<h3>{notif_type} ({len(notifs)}件)</h3><ul>'
+            summary_text += f'{notif_type} ({len(notifs)}件):\n'
+            
+            for notif in notifs:
+                summary_html += f"<li>{notif.get('message', '')}</li>"
+                summary_text += f"- {notif.get('message', '')}\n"
+            
+            summary_html += '</ul>'
+            summary_text += '\n'
+        
+        summary_html += '</body></html>'
+        
+        return f'バッチ通知 - {len(notifications)}件', summary_html, summary_text
+
+
+class SMTPSession:
+    """
+    SMTP connection reused for a burst of emails
+    
+    Connects on the first message and reconnects once if the server closed
+    the connection in between.
+    """
+    
+    def __init__(self, config: SMTPConfig, timeout: float = 30.0):
+        """
+        Initialize SMTP session
+        
+        Args:
+            config: SMTP configuration
+            timeout: Socket timeout in seconds
+        """
+        self.config = config
+        self.timeout = timeout
+        self.server: Optional[smtplib.SMTP] = None
+        self.connections = 0
+        self.sent = 0
+    
+    def connect(self) -> None:
+        """Open and authenticate a new SMTP connection"""
+        smtp_server = self.config.get('smtp_server')
+        smtp_port = self.config.get('smtp_port')
+        use_tls = self.config.get('use_tls', True)
+        use_ssl = self.config.get('use_ssl', False)
+        username = self.config.get('username')
+        password = self.config.get('password')
+        
+        if use_ssl:
+            server = smtplib.SMTP_SSL(smtp_server, smtp_port, timeout=self.timeout)
+        else:
+            server = smtplib.SMTP(smtp_server, smtp_port, timeout=self.timeout)
+            if use_tls:
+                server.starttls()
+        
+        if username and password:
+            server.login(username, password)
+        
+        self.server = server
+        self.connections += 1
+    
+    def send_message(self, msg: MIMEMultipart) -> None:
+        """
+        Send a message over the session connection
+        
+        Args:
+            msg: Message to send
+        """
+        if self.server is None:
+            self.connect()
+        
+        try:
+            self.server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            self.server = None
+            self.connect()
+            self.server.send_message(msg)
+        
+        self.sent += 1
+    
+    def close(self) -> None:
+        """Close the connection"""
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except Exception:
+                pass
+            self.server = None
+    
+    def __enter__(self) -> 'SMTPSession':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
 
 
 class EmailNotifier:
@@ -495,6 +613,9 @@ class EmailNotifier:
         self.config = SMTPConfig(config_file)
         self.batch_manager = BatchNotificationManager(self.config)
         self.template = EmailTemplate()
+        
+        # NotificationOutbox delivering templated emails in the background (optional)
+        self.outbox = None
     
     def send(
         self,
@@ -519,13 +640,42 @@ class EmailNotifier:
         Returns:
             True if email was sent successfully
         """
+        return self.deliver(
+            to_addresses, subject, html_body, text_body, notification_type, attachments
+        ) == 'sent'
+    
+    def deliver(
+        self,
+        to_addresses: Optional[List[str]],
+        subject: str,
+        html_body: str,
+        text_body: str,
+        notification_type: EmailNotificationType = EmailNotificationType.PROCESSING_COMPLETE,
+        attachments: Optional[List[Path]] = None,
+        session: Optional[SMTPSession] = None
+    ) -> str:
+        """
+        Send email notification and report the outcome
+        
+        Args:
+            to_addresses: List of recipient email addresses (None = use config)
+            subject: Email subject
+            html_body: HTML email body
+            text_body: Plain text email body
+            notification_type: Type of notification
+            attachments: List of file paths to attach
+            session: Open SMTP session to reuse (a new connection is used otherwise)
+            
+        Returns:
+            'sent', 'skipped' (disabled or no recipients) or 'failed'
+        """
         if not self.config.is_enabled():
             logger.warning("Email notifications are disabled")
-            return False
+            return 'skipped'
         
         if not self.config.is_type_enabled(notification_type):
             logger.info(f"Email notification type {notification_type.value} is disabled")
-            return False
+            return 'skipped'
         
         # Use configured addresses if not specified
         if to_addresses is None:
@@ -533,7 +683,7 @@ class EmailNotifier:
         
         if not to_addresses:
             logger.warning("No recipient email addresses configured")
-            return False
+            return 'skipped'
         
         try:
             # Create message
@@ -559,49 +709,42 @@ class EmailNotifier:
                             msg.attach(img)
             
             # Send email
-            smtp_server = self.config.get('smtp_server')
-            smtp_port = self.config.get('smtp_port')
-            use_tls = self.config.get('use_tls', True)
-            use_ssl = self.config.get('use_ssl', False)
-            username = self.config.get('username')
-            password = self.config.get('password')
-            
-            if use_ssl:
-                server = smtplib.SMTP_SSL(smtp_server, smtp_port)
+            if session is not None:
+                session.send_message(msg)
             else:
-                server = smtplib.SMTP(smtp_server, smtp_port)
-                if use_tls:
-                    server.starttls()
-            
-            if username and password:
-                server.login(username, password)
-            
-            server.send_message(msg)
-            server.quit()
+                with SMTPSession(self.config) as own_session:
+                    own_session.send_message(msg)
             
             logger.info(f"Email sent successfully: {subject}")
-            return True
+            return 'sent'
             
         except Exception as e:
             logger.error(f"Failed to send email: {e}")
-            return False
+            return 'failed'
     
-    def send_with_template(
+    def smtp_session(self) -> SMTPSession:
+        """
+        Open an SMTP session for sending several emails over one connection
+        
+        Returns:
+            SMTPSession (use as a context manager)
+        """
+        return SMTPSession(self.config)
+    
+    def render_template(
         self,
         notification_type: EmailNotificationType,
-        data: Dict[str, Any],
-        to_addresses: Optional[List[str]] = None
-    ) -> bool:
+        data: Dict[str, Any]
+    ) -> Optional[Tuple[str, str, str]]:
         """
-        Send email using template
+        Render email template
         
         Args:
             notification_type: Type of notification
             data: Template data dictionary
-            to_addresses: List of recipient email addresses
             
         Returns:
-            True if email was sent successfully
+            Tuple of (subject, html_body, text_body), or None if data is missing a key
         """
         template = self.template.get_template(notification_type)
         
@@ -611,20 +754,72 @@ class EmailNotifier:
         
         # Format template
         try:
-            subject = template['subject'].format(**data)
-            html_body = template['html'].format(**data)
-            text_body = template['text'].format(**data)
+            return (
+                template['subject'].format(**data),
+                template['html'].format(**data),
+                template['text'].format(**data)
+            )
         except KeyError as e:
             logger.error(f"Missing template data key: {e}")
-            return False
+            return None
+    
+    def deliver_template(
+        self,
+        notification_type: EmailNotificationType,
+        data: Dict[str, Any],
+        to_addresses: Optional[List[str]] = None,
+        session: Optional[SMTPSession] = None
+    ) -> str:
+        """
+        Render and send templated email now
         
-        return self.send(
+        Args:
+            notification_type: Type of notification
+            data: Template data dictionary
+            to_addresses: List of recipient email addresses
+            session: Open SMTP session to reuse
+            
+        Returns:
+            'sent', 'skipped' or 'failed'
+        """
+        rendered = self.render_template(notification_type, data)
+        if rendered is None:
+            return 'failed'
+        
+        subject, html_body, text_body = rendered
+        return self.deliver(
             to_addresses=to_addresses,
             subject=subject,
             html_body=html_body,
             text_body=text_body,
-            notification_type=notification_type
+            notification_type=notification_type,
+            session=session
         )
+    
+    def send_with_template(
+        self,
+        notification_type: EmailNotificationType,
+        data: Dict[str, Any],
+        to_addresses: Optional[List[str]] = None
+    ) -> bool:
+        """
+        Send email using template
+        
+        When an outbox is attached the email is queued and sent by its
+        background worker; otherwise it is sent on the calling thread.
+        
+        Args:
+            notification_type: Type of notification
+            data: Template data dictionary
+            to_addresses: List of recipient email addresses
+            
+        Returns:
+            True if email was sent (or queued) successfully
+        """
+        if self.outbox is not None:
+            return self.outbox.enqueue_email(notification_type, data, to_addresses) is not None
+        
+        return self.deliver_template(notification_type, data, to_addresses) == 'sent'
 
     def send_processing_complete(
         self,
@@ -881,38 +1076,11 @@ class EmailNotifier:
         if not notifications:
             return True
         
-        # Group notifications by type
-        grouped = {}
-        for notif in notifications:
-            notif_type = notif.get('type', 'general')
-            if notif_type not in grouped:
-                grouped[notif_type] = []
-            grouped[notif_type].append(notif)
-        
-        # Create batch summary
-        summary_html = '<html><body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">'
-        summary_html += '<h2>通知サマリー</h2>'
-        summary_html += f'<p>{len(notifications)}件の通知があります。</p>'
-        
-        summary_text = '通知サマリー\n\n'
-        summary_text += f'{len(notifications)}件の通知があります。\n\n'
-        
-        for notif_type, notifs in grouped.items():
-            summary_html += f'<h3>{notif_type} ({len(notifs)}件)</h3><ul>'
-            summary_text += f'{notif_type} ({len(notifs)}件):\n'
-            
-            for notif in notifs:
-                summary_html += f"<li>{notif.get('message', '')}</li>"
-                summary_text += f"- {notif.get('message', '')}\n"
-            
-            summary_html += '</ul>'
-            summary_text += '\n'
-        
-        summary_html += '</body></html>'
+        subject, summary_html, summary_text = self.batch_manager.build_digest(notifications)
         
         return self.send(
             to_addresses=None,
-            subject=f'バッチ通知 - {len(notifications)}件',
+            subject=subject,
             html_body=summary_html,
             text_body=summary_text,
             notification_type=EmailNotificationType.BATCH_COMPLETE
@@ -944,24 +1112,9 @@ class EmailNotifier:
             True if connection is successful
         """
         try:
-            smtp_server = self.config.get('smtp_server')
-            smtp_port = self.config.get('smtp_port')
-            use_tls = self.config.get('use_tls', True)
-            use_ssl = self.config.get('use_ssl', False)
-            username = self.config.get('username')
-            password = self.config.get('password')
-            
-            if use_ssl:
-                server = smtplib.SMTP_SSL(smtp_server, smtp_port, timeout=10)
-            else:
-                server = smtplib.SMTP(smtp_server, smtp_port, timeout=10)
-                if use_tls:
-                    server.starttls()
-            
-            if username and password:
-                server.login(username, password)
+            with SMTPSession(self.config, timeout=10) as session:
+                session.connect()
             
-            server.quit()
             logger.info("SMTP connection test successful")
             return True
             
@@ -8,16 +8,23 @@ Features:
 - GPS location parsing with indoor/outdoor detection
 - Time of day detection from capture timestamp
 - Context hints inference for preset selection
+- Fast metadata-only tag reader with exifread fallback
+- Per-file result memoization and thread-pooled batch analysis
 
 Requirements: 1.3, 3.1
 """
 
 import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, time
-from typing import Dict, Optional, Tuple, Any
+from threading import Lock
+from typing import Dict, Iterable, Optional, Tuple, Any
 import logging
 from pathlib import Path
 
+from exif_reader import read_exif_tags
+
 try:
     import exifread
     EXIFREAD_AVAILABLE = True
@@ -66,12 +73,24 @@ class EXIFAnalyzer:
         'super_telephoto': (300, 9999)
     }
     
-    def __init__(self):
-        """Initialize EXIF analyzer"""
+    def __init__(self, cache_size: int = 2048):
+        """
+        Initialize EXIF analyzer
+        
+        Args:
+            cache_size: Number of analysis results memoized per file
+                fingerprint (path, size, mtime); 0 disables the cache
+        """
         if not EXIFREAD_AVAILABLE:
             logger.error("exifread library is not installed")
         if not PIEXIF_AVAILABLE:
             logger.warning("piexif library is not installed (optional)")
+        
+        self.cache_size = cache_size
+        self._cache: 'OrderedDict[Tuple[str, int, int], Dict[str, Any]]' = OrderedDict()
+        self._cache_lock = Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
     
     def analyze(self, file_path: str) -> Dict[str, Any]:
         """
@@ -93,14 +112,25 @@ class EXIFAnalyzer:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
         
-        if not EXIFREAD_AVAILABLE:
-            logger.error("Cannot analyze EXIF: exifread not installed")
-            return self._empty_result()
+        fingerprint = self._fingerprint(file_path)
+        cached = self._cache_get(fingerprint)
+        if cached is not None:
+            return cached
         
-        try:
-            with open(file_path, 'rb') as f:
-                tags = exifread.process_file(f, details=False)
+        tags = self._read_tags(file_path)
+        if tags is None:
+            if not EXIFREAD_AVAILABLE:
+                logger.error("Cannot analyze EXIF: exifread not installed")
+                return self._empty_result()
             
+            try:
+                with open(file_path, 'rb') as f:
+                    tags = exifread.process_file(f, details=False)
+            except Exception as e:
+                logger.error(f"Error analyzing EXIF for {file_path}: {e}")
+                return self._empty_result()
+        
+        try:
             result = {
                 'camera': self._extract_camera_info(tags),
                 'settings': self._extract_settings(tags),
@@ -113,12 +143,115 @@ class EXIFAnalyzer:
             result['context_hints'] = self._infer_context(result)
             
             logger.info(f"Successfully analyzed EXIF for: {Path(file_path).name}")
-            return result
+            self._cache_put(fingerprint, result)
+            return self._copy_result(result)
             
         except Exception as e:
             logger.error(f"Error analyzing EXIF for {file_path}: {e}")
             return self._empty_result()
     
+    def _read_tags(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """
+        メタデータ領域のみを読み込んでタグを取得
+        
+        Args:
+            file_path: 写真ファイルのパス
+        
+        Returns:
+            タグの辞書、または未対応形式/読み込み失敗の場合None（exifreadへフォールバック）
+        """
+        try:
+            return read_exif_tags(file_path)
+        except Exception as e:
+            logger.debug(f"Fast EXIF read failed for {file_path}, falling back to exifread: {e}")
+            return None
+    
+    def analyze_batch(
+        self,
+        file_paths: Iterable[str],
+        max_workers: int = 8
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        複数ファイルのEXIFを並列に解析
+        
+        Args:
+            file_paths: 写真ファイルのパスのイテラブル
+            max_workers: スレッド数
+        
+        Returns:
+            ファイルパス -> 解析結果の辞書（存在しないファイルは空の結果）
+        """
+        paths = list(dict.fromkeys(file_paths))
+        
+        def analyze_one(path: str) -> Dict[str, Any]:
+            try:
+                return self.analyze(path)
+            except FileNotFoundError:
+                logger.warning(f"File not found: {path}")
+                return self._empty_result()
+        
+        if len(paths) <= 1 or max_workers <= 1:
+            return {path: analyze_one(path) for path in paths}
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(paths))) as executor:
+            return dict(zip(paths, executor.map(analyze_one, paths)))
+    
+    def _fingerprint(self, file_path: str) -> Optional[Tuple[str, int, int]]:
+        """ファイルのフィンガープリント (path, size, mtime_ns) を取得"""
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        return (os.path.abspath(file_path), st.st_size, st.st_mtime_ns)
+    
+    def _cache_get(self, fingerprint: Optional[Tuple[str, int, int]]) -> Optional[Dict[str, Any]]:
+        """キャッシュから解析結果を取得"""
+        if fingerprint is None or self.cache_size <= 0:
+            return None
+        with self._cache_lock:
+            result = self._cache.get(fingerprint)
+            if result is None:
+                self.cache_misses += 1
+                return None
+            self._cache.move_to_end(fingerprint)
+            self.cache_hits += 1
+        return self._copy_result(result)
+    
+    def _cache_put(self, fingerprint: Optional[Tuple[str, int, int]], result: Dict[str, Any]):
+        """解析結果をキャッシュに保存"""
+        if fingerprint is None or self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[fingerprint] = result
+            self._cache.move_to_end(fingerprint)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+    
+    def _copy_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """呼び出し側の変更がキャッシュに影響しないよう結果をコピー"""
+        return {section: dict(values) for section, values in result.items()}
+    
+    def clear_cache(self):
+        """解析結果のキャッシュをクリア（パイプライン実行の区切りなど）"""
+        with self._cache_lock:
+            self._cache.clear()
+            self.cache_hits = 0
+            self.cache_misses = 0
+    
+    def get_cache_stats(self) -> Dict[str, int]:
+        """
+        キャッシュ統計を取得
+        
+        Returns:
+            size, hits, misses の辞書
+        """
+        with self._cache_lock:
+            return {
+                'size': len(self._cache),
+                'hits': self.cache_hits,
+                'misses': self.cache_misses
+            }
+    
     def _empty_result(self) -> Dict[str, Any]:
         """Return empty result structure"""
         return {
@@ -481,6 +614,18 @@ class EXIFAnalyzer:
         }
 
 
+# Shared analyzer so that pipeline stages reuse each other's results
+_exif_analyzer = None
+
+
+def get_exif_analyzer() -> EXIFAnalyzer:
+    """Get global EXIF analyzer instance"""
+    global _exif_analyzer
+    if _exif_analyzer is None:
+        _exif_analyzer = EXIFAnalyzer()
+    return _exif_analyzer
+
+
 # Convenience function for quick analysis
 def analyze_photo(file_path: str) -> Dict[str, Any]:
     """
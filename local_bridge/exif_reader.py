@@ -0,0 +1,351 @@
+"""
+Fast EXIF Tag Reader for Junmai AutoDev system.
+Reads only the metadata region of JPEG and TIFF-based RAW files.
+
+Features:
+- Bounded, block-cached positional reads (no full-file scan)
+- JPEG APP1 segment, TIFF/DNG/CR2/NEF/ARW/ORF/RW2 IFDs, RAF embedded JPEG
+- Parses only the IFD0, EXIF and GPS tags EXIFAnalyzer needs
+- exifread-compatible tag names and printable values
+
+Formats that are not recognized return None so that callers can fall
+back to exifread.
+
+Requirements: 1.3, 3.1
+"""
+
+import os
+import struct
+import logging
+from fractions import Fraction
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+BLOCK_SIZE = 64 * 1024
+MAX_READ_BYTES = 2 * 1024 * 1024
+
+# TIFF field types: type -> (size, struct code, signed)
+FIELD_TYPES = {
+    1: (1, 'B', False),   # BYTE
+    2: (1, 's', False),   # ASCII
+    3: (2, 'H', False),   # SHORT
+    4: (4, 'L', False),   # LONG
+    5: (8, 'L', False),   # RATIONAL
+    6: (1, 'b', True),    # SBYTE
+    7: (1, 'B', False),   # UNDEFINED
+    8: (2, 'h', True),    # SSHORT
+    9: (4, 'l', True),    # SLONG
+    10: (8, 'l', True),   # SRATIONAL
+    11: (4, 'f', True),   # FLOAT
+    12: (8, 'd', True),   # DOUBLE
+}
+
+EXIF_IFD_POINTER = 0x8769
+GPS_IFD_POINTER = 0x8825
+
+METERING_MODES = {
+    0: 'Unidentified', 1: 'Average', 2: 'CenterWeightedAverage', 3: 'Spot',
+    4: 'MultiSpot', 5: 'Pattern', 6: 'Partial', 255: 'other'
+}
+WHITE_BALANCE = {0: 'Auto', 1: 'Manual'}
+
+# Tags extracted per IFD: tag id -> (name, optional printable mapping)
+IMAGE_TAGS = {
+    0x010F: ('Make', None),
+    0x0110: ('Model', None),
+    0x0132: ('DateTime', None),
+}
+EXIF_TAGS = {
+    0x829A: ('ExposureTime', None),
+    0x829D: ('FNumber', None),
+    0x8827: ('ISOSpeedRatings', None),
+    0x9003: ('DateTimeOriginal', None),
+    0x9004: ('DateTimeDigitized', None),
+    0x9204: ('ExposureBiasValue', None),
+    0x9207: ('MeteringMode', METERING_MODES),
+    0x920A: ('FocalLength', None),
+    0xA403: ('WhiteBalance', WHITE_BALANCE),
+    0xA431: ('BodySerialNumber', None),
+    0xA433: ('LensMake', None),
+    0xA434: ('LensModel', None),
+}
+GPS_TAGS = {
+    0x0001: ('GPSLatitudeRef', None),
+    0x0002: ('GPSLatitude', None),
+    0x0003: ('GPSLongitudeRef', None),
+    0x0004: ('GPSLongitude', None),
+}
+
+
+class Ratio(Fraction):
+    """EXIF rational value (same interface as exifread.utils.Ratio)"""
+    
+    def __new__(cls, numerator=0, denominator=None):
+        try:
+            self = super().__new__(cls, numerator, denominator)
+        except ZeroDivisionError:
+            self = super().__new__(cls)
+            self._numerator = numerator
+            self._denominator = denominator
+        return self
+    
+    def __repr__(self) -> str:
+        return str(self)
+    
+    @property
+    def num(self):
+        return self.numerator
+    
+    @property
+    def den(self):
+        return self.denominator
+
+
+class Tag:
+    """EXIF tag value (str() gives the exifread-style printable value)"""
+    
+    __slots__ = ('printable', 'values')
+    
+    def __init__(self, printable: str, values: Any):
+        self.printable = printable
+        self.values = values
+    
+    def __str__(self) -> str:
+        return self.printable
+    
+    def __repr__(self) -> str:
+        return f"Tag({self.printable!r})"
+
+
+class BlockReader:
+    """
+    Positional reader that fetches aligned blocks on demand
+    
+    Uses os.pread where available so that concurrent readers never share
+    a file position. The total number of bytes read is capped.
+    """
+    
+    def __init__(self, fd: int, file_size: int, max_bytes: int = MAX_READ_BYTES):
+        self.fd = fd
+        self.file_size = file_size
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+        self._blocks: Dict[int, bytes] = {}
+    
+    def _block(self, index: int) -> bytes:
+        block = self._blocks.get(index)
+        if block is None:
+            if self.bytes_read + BLOCK_SIZE > self.max_bytes:
+                raise ValueError("Metadata region exceeds read limit")
+            offset = index * BLOCK_SIZE
+            if hasattr(os, 'pread'):
+                block = os.pread(self.fd, BLOCK_SIZE, offset)
+            else:
+                os.lseek(self.fd, offset, os.SEEK_SET)
+                block = os.read(self.fd, BLOCK_SIZE)
+            self.bytes_read += len(block)
+            self._blocks[index] = block
+        return block
+    
+    def read(self, offset: int, size: int) -> bytes:
+        """Read size bytes at offset (short read at end of file)"""
+        if offset < 0 or size < 0 or offset >= self.file_size:
+            return b''
+        size = min(size, self.file_size - offset)
+        first, last = offset // BLOCK_SIZE, (offset + size - 1) // BLOCK_SIZE
+        if first == last:
+            start = offset - first * BLOCK_SIZE
+            return self._block(first)[start:start + size]
+        data = b''.join(self._block(i) for i in range(first, last + 1))
+        start = offset - first * BLOCK_SIZE
+        return data[start:start + size]
+
+
+class TiffParser:
+    """Minimal TIFF IFD parser over a positional read function"""
+    
+    def __init__(self, read: Callable[[int, int], bytes], base: int):
+        """
+        Args:
+            read: Function (offset, size) -> bytes over the file
+            base: File offset of the TIFF header
+        """
+        self.read = read
+        self.base = base
+        
+        header = read(base, 8)
+        if len(header) < 8:
+            raise ValueError("Truncated TIFF header")
+        if header[:2] == b'II':
+            self.endian = '<'
+        elif header[:2] == b'MM':
+            self.endian = '>'
+        else:
+            raise ValueError("Invalid TIFF byte order")
+        self.first_ifd = struct.unpack(self.endian + 'L', header[4:8])[0]
+    
+    def _values(self, field_type: int, count: int, data: bytes) -> Any:
+        size, code, signed = FIELD_TYPES[field_type]
+        if field_type == 2:
+            values = data.split(b'\x00', 1)[0]
+            try:
+                return values.decode('utf-8')
+            except UnicodeDecodeError:
+                return values
+        if field_type in (5, 10):
+            raw = struct.unpack(f"{self.endian}{count * 2}{code}", data[:count * 8])
+            return [Ratio(raw[i], raw[i + 1]) for i in range(0, len(raw), 2)]
+        return list(struct.unpack(f"{self.endian}{count}{code}", data[:count * size]))
+    
+    def read_ifd(self, offset: int, wanted: Dict[int, Tuple[str, Optional[Dict]]]) -> Tuple[Dict[int, Tag], Dict[int, int]]:
+        """
+        Read the wanted tags of one IFD
+        
+        Args:
+            offset: IFD offset relative to the TIFF header
+            wanted: Tags to extract
+        
+        Returns:
+            (tag id -> Tag, sub-IFD pointer tag -> offset)
+        """
+        count_data = self.read(self.base + offset, 2)
+        if len(count_data) < 2:
+            return {}, {}
+        entry_count = struct.unpack(self.endian + 'H', count_data)[0]
+        entries = self.read(self.base + offset + 2, entry_count * 12)
+        
+        tags: Dict[int, Tag] = {}
+        pointers: Dict[int, int] = {}
+        
+        for i in range(0, len(entries) - 11, 12):
+            tag_id, field_type, count = struct.unpack(self.endian + 'HHL', entries[i:i + 8])
+            if tag_id in (EXIF_IFD_POINTER, GPS_IFD_POINTER):
+                pointers[tag_id] = struct.unpack(self.endian + 'L', entries[i + 8:i + 12])[0]
+                continue
+            if tag_id not in wanted or field_type not in FIELD_TYPES or count == 0:
+                continue
+            
+            size = FIELD_TYPES[field_type][0] * count
+            if size <= 4:
+                data = entries[i + 8:i + 8 + size]
+            else:
+                if count >= 1000:
+                    continue
+                value_offset = struct.unpack(self.endian + 'L', entries[i + 8:i + 12])[0]
+                data = self.read(self.base + value_offset, size)
+                if len(data) < size:
+                    continue
+            
+            values = self._values(field_type, count, data)
+            
+            # Same printable rules as exifread
+            if count == 1 and field_type != 2:
+                printable = str(values[0])
+            else:
+                printable = str(values)
+            name, mapping = wanted[tag_id]
+            if mapping is not None:
+                printable = ''.join(mapping.get(v, repr(v)) for v in values)
+            
+            tags[tag_id] = Tag(printable, values)
+        
+        return tags, pointers
+    
+    def extract(self) -> Dict[str, Tag]:
+        """
+        Extract IFD0, EXIF and GPS tags with exifread-style names
+        
+        Returns:
+            Dictionary like exifread.process_file() for the supported tags
+        """
+        result: Dict[str, Tag] = {}
+        
+        tags, pointers = self.read_ifd(self.first_ifd, IMAGE_TAGS)
+        for tag_id, tag in tags.items():
+            result['Image ' + IMAGE_TAGS[tag_id][0]] = tag
+        
+        if EXIF_IFD_POINTER in pointers:
+            tags, _ = self.read_ifd(pointers[EXIF_IFD_POINTER], EXIF_TAGS)
+            for tag_id, tag in tags.items():
+                result['EXIF ' + EXIF_TAGS[tag_id][0]] = tag
+        
+        if GPS_IFD_POINTER in pointers:
+            tags, _ = self.read_ifd(pointers[GPS_IFD_POINTER], GPS_TAGS)
+            for tag_id, tag in tags.items():
+                result['GPS ' + GPS_TAGS[tag_id][0]] = tag
+        
+        return result
+
+
+def _find_jpeg_exif(reader: BlockReader, start: int = 0) -> Optional[int]:
+    """
+    Walk JPEG markers and return the TIFF header offset of the Exif APP1
+    
+    Args:
+        reader: Block reader
+        start: Offset of the JPEG SOI marker
+    
+    Returns:
+        TIFF header offset or None if the JPEG has no Exif segment
+    """
+    if reader.read(start, 2) != b'\xff\xd8':
+        return None
+    
+    offset = start + 2
+    while True:
+        marker = reader.read(offset, 4)
+        if len(marker) < 4 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        if code == 0xFF:
+            # Fill byte
+            offset += 1
+            continue
+        if code in (0xD9, 0xDA):
+            # End of image / start of scan: no more metadata
+            return None
+        length = struct.unpack('>H', marker[2:4])[0]
+        if code == 0xE1 and reader.read(offset + 4, 6) == b'Exif\x00\x00':
+            return offset + 10
+        offset += 2 + length
+
+
+def read_exif_tags(file_path: str, max_bytes: int = MAX_READ_BYTES) -> Optional[Dict[str, Tag]]:
+    """
+    Read EXIF tags from the metadata region of a file
+    
+    Args:
+        file_path: Image file path
+        max_bytes: Maximum bytes to read from the file
+    
+    Returns:
+        exifread-style tag dictionary, or None if the format is not supported
+    """
+    fd = os.open(file_path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    try:
+        reader = BlockReader(fd, os.fstat(fd).st_size, max_bytes)
+        head = reader.read(0, 16)
+        
+        if head[:2] == b'\xff\xd8':
+            tiff_offset = _find_jpeg_exif(reader)
+            if tiff_offset is None:
+                return {}
+        elif head[:4] in (b'II*\x00', b'MM\x00*', b'IIRO', b'IIU\x00'):
+            # TIFF, DNG, CR2, NEF, ARW, PEF, ORF, RW2
+            tiff_offset = 0
+        elif head.startswith(b'FUJIFILMCCD-RAW'):
+            # RAF: metadata lives in the embedded JPEG preview
+            jpeg_offset = struct.unpack('>L', reader.read(84, 4))[0]
+            tiff_offset = _find_jpeg_exif(reader, jpeg_offset)
+            if tiff_offset is None:
+                return None
+        else:
+            return None
+        
+        tags = TiffParser(reader.read, tiff_offset).extract()
+        logger.debug(f"Read {len(tags)} EXIF tags from {file_path} ({reader.bytes_read} bytes)")
+        return tags
+    finally:
+        os.close(fd)
@@ -0,0 +1,436 @@
+"""
+Persistent Export Job Queue for Junmai AutoDev
+
+This module stores auto-export jobs in a SQLite table so that pending
+exports survive a restart of the bridge:
+- Primary key lookup by job id
+- (status, priority, created_at) index for claiming and paging
+- (status, preset_name, ...) index for grouping jobs by export preset
+- Atomic batched claim of pending jobs
+
+The queue uses its own SQLite file (WAL mode) so that bulk approvals,
+which enqueue one job per enabled preset per photo, do not contend with
+the main database.
+
+Requirements: 6.1, 6.4
+"""
+
+import logging
+import pathlib
+import sqlite3
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+JOB_COLUMNS = (
+    'id', 'photo_id', 'preset_name', 'status', 'priority', 'created_at',
+    'started_at', 'completed_at', 'output_path', 'error_message'
+)
+
+FINISHED_STATUSES = ('completed', 'failed')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS export_jobs (
+    id TEXT PRIMARY KEY,
+    photo_id INTEGER NOT NULL,
+    preset_name TEXT NOT NULL,
+    status TEXT NOT NULL CHECK (status IN ('pending', 'processing', 'completed', 'failed')),
+    priority INTEGER NOT NULL DEFAULT 2,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    completed_at TEXT,
+    output_path TEXT,
+    error_message TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_export_jobs_queue ON export_jobs (status, priority DESC, created_at);
+CREATE INDEX IF NOT EXISTS idx_export_jobs_preset ON export_jobs (status, preset_name, priority DESC, created_at);
+"""
+
+# Claim order: higher priority first, then FIFO (rowid breaks ties within a batch insert)
+_QUEUE_ORDER = "ORDER BY priority DESC, created_at, rowid"
+
+
+class ExportQueue:
+    """
+    SQLite-backed export job queue
+    
+    Rows are returned as dictionaries with the keys in JOB_COLUMNS. The
+    queue is thread-safe; all statements run on one connection under a lock.
+    """
+    
+    def __init__(self, db_path: Union[str, pathlib.Path] = ':memory:', retention_days: int = 7):
+        """
+        Initialize ExportQueue and create the table if needed
+        
+        Args:
+            db_path: SQLite file path, or ':memory:' for a non-persistent queue
+            retention_days: Days to keep completed/failed jobs
+        """
+        self.db_path = str(db_path)
+        self.retention_days = retention_days
+        self._lock = Lock()
+        
+        if self.db_path != ':memory:':
+            pathlib.Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        if self.db_path != ':memory:':
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        
+        purged = self.purge_finished()
+        counts = self.get_counts()
+        logger.info(f"Export queue opened: {self.db_path}, pending={counts['pending']}, "
+                    f"processing={counts['processing']}, purged={purged}")
+    
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        """Convert a table row to a job dictionary"""
+        return {key: row[key] for key in JOB_COLUMNS}
+    
+    def add_jobs(self, jobs: Iterable[Dict[str, Any]]) -> int:
+        """
+        Insert jobs in one transaction
+        
+        Args:
+            jobs: Job dictionaries (keys from JOB_COLUMNS)
+        
+        Returns:
+            Number of jobs inserted
+        """
+        rows = [tuple(job.get(key) for key in JOB_COLUMNS) for job in jobs]
+        if not rows:
+            return 0
+        
+        placeholders = ', '.join('?' * len(JOB_COLUMNS))
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    f"INSERT INTO export_jobs ({', '.join(JOB_COLUMNS)}) VALUES ({placeholders})",
+                    rows
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        
+        return len(rows)
+    
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a job by ID
+        
+        Args:
+            job_id: Job ID
+        
+        Returns:
+            Job dictionary or None if not found
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM export_jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_dict(row) if row else None
+    
+    def peek(self) -> Optional[Dict[str, Any]]:
+        """
+        Get the next pending job without claiming it
+        
+        Returns:
+            Job dictionary or None if no job is pending
+        """
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT * FROM export_jobs WHERE status = 'pending' {_QUEUE_ORDER} LIMIT 1"
+            ).fetchone()
+        return self._row_to_dict(row) if row else None
+    
+    def claim(self, count: int = 1, preset_name: Optional[str] = None,
+              group_by_preset: bool = False) -> List[Dict[str, Any]]:
+        """
+        Atomically move pending jobs to processing
+        
+        Args:
+            count: Maximum number of jobs to claim
+            preset_name: Only claim jobs for this preset
+            group_by_preset: Only claim jobs sharing the preset of the next
+                pending job, so that they can be exported in one pass
+        
+        Returns:
+            Claimed job dictionaries in queue order
+        """
+        if count < 1:
+            return []
+        
+        started_at = datetime.now().isoformat()
+        
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if preset_name is None and group_by_preset:
+                    head = self._conn.execute(
+                        f"SELECT preset_name FROM export_jobs WHERE status = 'pending' {_QUEUE_ORDER} LIMIT 1"
+                    ).fetchone()
+                    preset_name = head['preset_name'] if head else None
+                
+                if preset_name is None:
+                    rows = self._conn.execute(
+                        f"SELECT * FROM export_jobs WHERE status = 'pending' {_QUEUE_ORDER} LIMIT ?",
+                        (count,)
+                    ).fetchall()
+                else:
+                    rows = self._conn.execute(
+                        f"SELECT * FROM export_jobs WHERE status = 'pending' AND preset_name = ? "
+                        f"{_QUEUE_ORDER} LIMIT ?",
+                        (preset_name, count)
+                    ).fetchall()
+                
+                self._conn.executemany(
+                    "UPDATE export_jobs SET status = 'processing', started_at = ? WHERE id = ?",
+                    [(started_at, row['id']) for row in rows]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        
+        jobs = []
+        for row in rows:
+            job = self._row_to_dict(row)
+            job['status'] = 'processing'
+            job['started_at'] = started_at
+            jobs.append(job)
+        return jobs
+    
+    def claim_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Move a specific pending job to processing
+        
+        Args:
+            job_id: Job ID
+        
+        Returns:
+            Claimed job dictionary, or None if the job is not pending
+        """
+        started_at = datetime.now().isoformat()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE export_jobs SET status = 'processing', started_at = ? "
+                "WHERE id = ? AND status = 'pending'",
+                (started_at, job_id)
+            )
+            if cursor.rowcount == 0:
+                return None
+            row = self._conn.execute("SELECT * FROM export_jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_dict(row)
+    
+    def set_output_paths(self, output_paths: Dict[str, str]) -> None:
+        """
+        Store prepared output paths
+        
+        Args:
+            output_paths: Dictionary of job ID -> output path
+        """
+        if not output_paths:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "UPDATE export_jobs SET output_path = ? WHERE id = ?",
+                    [(path, job_id) for job_id, path in output_paths.items()]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+    
+    def finish(self, job_id: str, status: str, error_message: Optional[str] = None,
+               only_processing: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Mark a job as completed or failed
+        
+        Args:
+            job_id: Job ID
+            status: 'completed' or 'failed'
+            error_message: Optional error message
+            only_processing: Only update jobs that are currently processing
+        
+        Returns:
+            Updated job dictionary, or None if no job was updated
+        """
+        if status not in FINISHED_STATUSES:
+            raise ValueError(f"Invalid finished status: {status}")
+        
+        query = ("UPDATE export_jobs SET status = ?, completed_at = ?, "
+                 "error_message = COALESCE(?, error_message) WHERE id = ?")
+        if only_processing:
+            query += " AND status = 'processing'"
+        
+        with self._lock:
+            cursor = self._conn.execute(query, (status, datetime.now().isoformat(), error_message, job_id))
+            if cursor.rowcount == 0:
+                return None
+            row = self._conn.execute("SELECT * FROM export_jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_dict(row)
+    
+    def cancel(self, job_id: str) -> bool:
+        """
+        Remove a pending job
+        
+        Args:
+            job_id: Job ID
+        
+        Returns:
+            True if a pending job was removed
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM export_jobs WHERE id = ? AND status = 'pending'", (job_id,)
+            )
+        return cursor.rowcount > 0
+    
+    def clear_pending(self) -> int:
+        """
+        Remove all pending jobs
+        
+        Returns:
+            Number of jobs removed
+        """
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM export_jobs WHERE status = 'pending'")
+        return cursor.rowcount
+    
+    def requeue_processing(self, older_than: Optional[float] = None) -> int:
+        """
+        Return processing jobs to pending (e.g. after Lightroom restarted)
+        
+        Args:
+            older_than: Only requeue jobs claimed more than this many seconds
+                ago (default: all processing jobs)
+        
+        Returns:
+            Number of jobs requeued
+        """
+        query = ("UPDATE export_jobs SET status = 'pending', started_at = NULL, output_path = NULL "
+                 "WHERE status = 'processing'")
+        params: tuple = ()
+        if older_than is not None:
+            query += " AND started_at < ?"
+            params = ((datetime.now() - timedelta(seconds=older_than)).isoformat(),)
+        
+        with self._lock:
+            cursor = self._conn.execute(query, params)
+        return cursor.rowcount
+    
+    def purge_finished(self, older_than_days: Optional[int] = None) -> int:
+        """
+        Delete completed/failed jobs older than the retention period
+        
+        Args:
+            older_than_days: Retention in days (defaults to retention_days)
+        
+        Returns:
+            Number of jobs deleted
+        """
+        days = self.retention_days if older_than_days is None else older_than_days
+        cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM export_jobs WHERE status IN ('completed', 'failed') AND completed_at < ?",
+                (cutoff,)
+            )
+        return cursor.rowcount
+    
+    def count(self, status: str = 'pending') -> int:
+        """
+        Count jobs with a status
+        
+        Args:
+            status: Job status
+        
+        Returns:
+            Number of jobs
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM export_jobs WHERE status = ?", (status,)
+            ).fetchone()[0]
+    
+    def get_counts(self) -> Dict[str, int]:
+        """
+        Count jobs by status
+        
+        Returns:
+            Dictionary of status -> count
+        """
+        counts = {'pending': 0, 'processing': 0, 'completed': 0, 'failed': 0}
+        with self._lock:
+            for row in self._conn.execute("SELECT status, COUNT(*) FROM export_jobs GROUP BY status"):
+                counts[row[0]] = row[1]
+        return counts
+    
+    def list_jobs(self, status: str = 'pending', limit: int = 100, offset: int = 0,
+                  preset_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get one page of jobs in queue order
+        
+        Args:
+            status: Job status
+            limit: Page size
+            offset: Number of jobs to skip
+            preset_name: Only jobs for this preset
+        
+        Returns:
+            Job dictionaries
+        """
+        query = "SELECT * FROM export_jobs WHERE status = ?"
+        params: List[Any] = [status]
+        if preset_name is not None:
+            query += " AND preset_name = ?"
+            params.append(preset_name)
+        query += f" {_QUEUE_ORDER} LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+        
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+    
+    def get_preset_counts(self, status: str = 'pending') -> Dict[str, int]:
+        """
+        Count jobs per preset
+        
+        Args:
+            status: Job status
+        
+        Returns:
+            Dictionary of preset name -> count
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT preset_name, COUNT(*) FROM export_jobs WHERE status = ? GROUP BY preset_name",
+                (status,)
+            ).fetchall()
+        return {row[0]: row[1] for row in rows}
+    
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+    
+    def __len__(self) -> int:
+        """Number of pending jobs"""
+        return self.count('pending')
+    
+    def __contains__(self, item: Any) -> bool:
+        """Check whether a job (or job ID) is pending"""
+        job_id = getattr(item, 'id', item)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM export_jobs WHERE id = ? AND status = 'pending'", (job_id,)
+            ).fetchone()
+        return row is not None
@@ -21,6 +21,13 @@ from pathlib import Path
 import threading
 import time
 
+from backup_store import BackupStore
+from state_store import StateStore, get_state_store, STATE_STORE_FILENAME
+
+
+# チェックポイントの状態ストア名前空間
+CHECKPOINT_NAMESPACE = 'checkpoint'
+
 
 # ================================================================================
 # 状態定義 (State Definitions)
@@ -71,6 +78,8 @@ class BackupInfo:
     timestamp: str
     size_bytes: int
     checksum: str
+    storage: str = 'full'  # 'full'（完全コピー）または 'incremental'（マニフェスト）
+    new_bytes: int = 0
     
     def to_dict(self) -> Dict[str, Any]:
         """辞書形式に変換"""
@@ -94,7 +103,8 @@ class FailsafeManager:
         backup_dir: str = 'data/backups',
         auto_backup_interval: int = 300,  # 5分
         max_checkpoints: int = 10,
-        max_backups: int = 5
+        max_backups: int = 5,
+        state_store: Optional[StateStore] = None
     ):
         """
         Args:
@@ -103,6 +113,7 @@ class FailsafeManager:
             auto_backup_interval: 自動バックアップ間隔（秒）
             max_checkpoints: 保持する最大チェックポイント数
             max_backups: 保持する最大バックアップ数
+            state_store: チェックポイントの保存先（Noneの場合はcheckpoint_dir内のストア）
         """
         self.checkpoint_dir = Path(checkpoint_dir)
         self.backup_dir = Path(backup_dir)
@@ -117,11 +128,16 @@ class FailsafeManager:
         # ロガーの設定
         self.logger = self._setup_logger()
         
-        # チェックポイント管理
+        # チェックポイント管理（書き込みは状態ストアで集約される）
+        self.state_store = state_store or get_state_store(self.checkpoint_dir / STATE_STORE_FILENAME)
         self.checkpoints: Dict[str, CheckpointData] = {}
         self.active_operations: Dict[str, ProcessState] = {}
+        self._operation_checkpoints: Dict[str, List[str]] = {}
+        self._checkpoint_lock = threading.RLock()
+        self._load_checkpoints()
         
-        # バックアップ管理
+        # バックアップ管理（ハッシュキーのオブジェクトストア + マニフェスト）
+        self.backup_store = BackupStore(str(self.backup_dir / 'store'))
         self.backups: List[BackupInfo] = []
         self._load_backup_index()
         
@@ -202,15 +218,20 @@ class FailsafeManager:
             metadata=metadata or {}
         )
         
-        # チェックポイントをファイルに保存
-        checkpoint_file = self.checkpoint_dir / f"{checkpoint_id}.json"
+        # チェックポイントを状態ストアに保存
+        # 実行中の進捗更新は集約して書き込み、状態遷移は即座に永続化する
         try:
-            with open(checkpoint_file, 'w', encoding='utf-8') as f:
-                json.dump(checkpoint.to_dict(), f, indent=2, ensure_ascii=False)
+            self.state_store.put(
+                CHECKPOINT_NAMESPACE,
+                checkpoint_id,
+                checkpoint.to_dict(),
+                durable=state != ProcessState.RUNNING
+            )
             
             # メモリにも保存
-            self.checkpoints[checkpoint_id] = checkpoint
-            self.active_operations[operation_id] = state
+            with self._checkpoint_lock:
+                self._index_checkpoint(checkpoint)
+                self.active_operations[operation_id] = state
             
             self.logger.info(
                 f"Checkpoint saved: {checkpoint_id} for operation {operation_name} "
@@ -240,29 +261,18 @@ class FailsafeManager:
         if checkpoint_id in self.checkpoints:
             return self.checkpoints[checkpoint_id]
         
-        # ファイルから読み込み
-        checkpoint_file = self.checkpoint_dir / f"{checkpoint_id}.json"
-        if not checkpoint_file.exists():
-            self.logger.warning(f"Checkpoint not found: {checkpoint_id}")
-            return None
-        
+        # 状態ストアから読み込み
         try:
-            with open(checkpoint_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = self.state_store.get(CHECKPOINT_NAMESPACE, checkpoint_id)
+            if data is None:
+                self.logger.warning(f"Checkpoint not found: {checkpoint_id}")
+                return None
             
-            checkpoint = CheckpointData(
-                checkpoint_id=data['checkpoint_id'],
-                operation_id=data['operation_id'],
-                operation_name=data['operation_name'],
-                state=ProcessState(data['state']),
-                timestamp=data['timestamp'],
-                progress=data['progress'],
-                data=data['data'],
-                metadata=data.get('metadata', {})
-            )
+            checkpoint = self._checkpoint_from_dict(data)
             
             # メモリにキャッシュ
-            self.checkpoints[checkpoint_id] = checkpoint
+            with self._checkpoint_lock:
+                self._index_checkpoint(checkpoint)
             
             return checkpoint
             
@@ -281,14 +291,7 @@ class FailsafeManager:
             Optional[CheckpointData]: 最新のチェックポイント
         """
         # 該当する操作のチェックポイントを検索
-        operation_checkpoints = [
-            cp for cp in self.checkpoints.values()
-            if cp.operation_id == operation_id
-        ]
-        
-        if not operation_checkpoints:
-            # ファイルから検索
-            operation_checkpoints = self._load_operation_checkpoints(operation_id)
+        operation_checkpoints = self._load_operation_checkpoints(operation_id)
         
         if not operation_checkpoints:
             return None
@@ -298,30 +301,68 @@ class FailsafeManager:
         return operation_checkpoints[0]
     
     def _load_operation_checkpoints(self, operation_id: str) -> List[CheckpointData]:
-        """操作のすべてのチェックポイントを読み込み"""
-        checkpoints = []
+        """操作のすべてのチェックポイントを取得（古い順）"""
+        with self._checkpoint_lock:
+            return [
+                self.checkpoints[checkpoint_id]
+                for checkpoint_id in self._operation_checkpoints.get(operation_id, [])
+            ]
+    
+    def _checkpoint_from_dict(self, data: Dict[str, Any]) -> CheckpointData:
+        """辞書からチェックポイントを復元"""
+        return CheckpointData(
+            checkpoint_id=data['checkpoint_id'],
+            operation_id=data['operation_id'],
+            operation_name=data['operation_name'],
+            state=ProcessState(data['state']),
+            timestamp=data['timestamp'],
+            progress=data['progress'],
+            data=data['data'],
+            metadata=data.get('metadata', {})
+        )
+    
+    def _index_checkpoint(self, checkpoint: CheckpointData):
+        """チェックポイントをメモリと操作別インデックスに登録（ロック保持中）"""
+        self.checkpoints[checkpoint.checkpoint_id] = checkpoint
+        checkpoint_ids = self._operation_checkpoints.setdefault(checkpoint.operation_id, [])
+        if checkpoint.checkpoint_id in checkpoint_ids:
+            checkpoint_ids.remove(checkpoint.checkpoint_id)
+        checkpoint_ids.append(checkpoint.checkpoint_id)
+    
+    def _load_checkpoints(self):
+        """
+        状態ストアからすべてのチェックポイントを1回の読み込みで復元
         
-        for checkpoint_file in self.checkpoint_dir.glob(f"*{operation_id}*.json"):
+        旧形式のJSONファイル（チェックポイントごとに1ファイル）が残っている
+        場合は状態ストアへ移行してから削除します。
+        """
+        legacy = {}
+        for checkpoint_file in self.checkpoint_dir.glob('*.json'):
             try:
                 with open(checkpoint_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                
-                if data['operation_id'] == operation_id:
-                    checkpoint = CheckpointData(
-                        checkpoint_id=data['checkpoint_id'],
-                        operation_id=data['operation_id'],
-                        operation_name=data['operation_name'],
-                        state=ProcessState(data['state']),
-                        timestamp=data['timestamp'],
-                        progress=data['progress'],
-                        data=data['data'],
-                        metadata=data.get('metadata', {})
-                    )
-                    checkpoints.append(checkpoint)
+                legacy[data['checkpoint_id']] = data
+            except Exception as e:
+                self.logger.warning(f"Failed to migrate checkpoint file {checkpoint_file}: {e}")
+        
+        if legacy:
+            self.state_store.put_many(CHECKPOINT_NAMESPACE, legacy)
+            for checkpoint_id in legacy:
+                (self.checkpoint_dir / f"{checkpoint_id}.json").unlink(missing_ok=True)
+            self.logger.info(f"Migrated {len(legacy)} checkpoint files to the state store")
+        
+        checkpoints = []
+        for checkpoint_id, data in self.state_store.load_namespace(CHECKPOINT_NAMESPACE).items():
+            try:
+                checkpoints.append(self._checkpoint_from_dict(data))
             except Exception as e:
-                self.logger.warning(f"Failed to load checkpoint file {checkpoint_file}: {e}")
+                self.logger.warning(f"Failed to load checkpoint {checkpoint_id}: {e}")
         
-        return checkpoints
+        checkpoints.sort(key=lambda x: x.timestamp)
+        with self._checkpoint_lock:
+            for checkpoint in checkpoints:
+                self._index_checkpoint(checkpoint)
+                self.active_operations[checkpoint.operation_id] = checkpoint.state
     
     def _generate_checkpoint_id(self, operation_id: str) -> str:
         """チェックポイントIDを生成"""
@@ -330,22 +371,22 @@ class FailsafeManager:
     
     def _cleanup_old_checkpoints(self, operation_id: str):
         """古いチェックポイントをクリーンアップ"""
-        operation_checkpoints = self._load_operation_checkpoints(operation_id)
-        
-        if len(operation_checkpoints) > self.max_checkpoints:
-            # タイムスタンプでソート
-            operation_checkpoints.sort(key=lambda x: x.timestamp, reverse=True)
+        with self._checkpoint_lock:
+            checkpoint_ids = self._operation_checkpoints.get(operation_id, [])
+            if len(checkpoint_ids) <= self.max_checkpoints:
+                return
+            
+            # インデックスは古い順なので先頭から削除
+            expired = checkpoint_ids[:-self.max_checkpoints]
+            del checkpoint_ids[:-self.max_checkpoints]
             
-            # 古いものを削除
-            for checkpoint in operation_checkpoints[self.max_checkpoints:]:
-                checkpoint_file = self.checkpoint_dir / f"{checkpoint.checkpoint_id}.json"
+            for checkpoint_id in expired:
+                self.checkpoints.pop(checkpoint_id, None)
                 try:
-                    checkpoint_file.unlink()
-                    if checkpoint.checkpoint_id in self.checkpoints:
-                        del self.checkpoints[checkpoint.checkpoint_id]
-                    self.logger.debug(f"Deleted old checkpoint: {checkpoint.checkpoint_id}")
+                    self.state_store.delete(CHECKPOINT_NAMESPACE, checkpoint_id)
+                    self.logger.debug(f"Deleted old checkpoint: {checkpoint_id}")
                 except Exception as e:
-                    self.logger.warning(f"Failed to delete checkpoint {checkpoint.checkpoint_id}: {e}")
+                    self.logger.warning(f"Failed to delete checkpoint {checkpoint_id}: {e}")
     
     # ========================================================================
     # 処理再開機能 (Resume Functions)
@@ -449,6 +490,11 @@ class FailsafeManager:
         """
         バックアップを作成
         
+        前回の同一ソースのバックアップから (size, mtime) が変わっていない
+        ファイルは読まずにマニフェストへ引き継ぎ、変更されたファイルのみ
+        コピーと同時にハッシュを計算してオブジェクトストアに保存します。
+        SQLiteデータベースはオンラインバックアップAPIでコピーします。
+        
         Args:
             source_path: バックアップ元のパス
             backup_name: バックアップ名（Noneの場合は自動生成）
@@ -466,34 +512,40 @@ class FailsafeManager:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             backup_name = f"{source.stem}_backup_{timestamp}{source.suffix}"
         
-        backup_path = self.backup_dir / backup_name
-        
         with self._backup_lock:
             try:
-                # ファイルまたはディレクトリをコピー
-                if source.is_file():
-                    shutil.copy2(source, backup_path)
-                else:
-                    shutil.copytree(source, backup_path)
+                backup_id = self._generate_backup_id()
+                
+                # 差分検出用に前回のマニフェストを取得
+                previous = self._get_previous_manifest(str(source))
                 
-                # チェックサムを計算
-                checksum = self._calculate_checksum(backup_path)
+                manifest = self.backup_store.snapshot(
+                    source,
+                    backup_id=backup_id,
+                    backup_name=backup_name,
+                    previous=previous
+                )
                 
                 # バックアップ情報を作成
                 backup_info = BackupInfo(
-                    backup_id=self._generate_backup_id(),
+                    backup_id=backup_id,
                     source_path=str(source),
-                    backup_path=str(backup_path),
+                    backup_path=str(self.backup_store.manifest_path(backup_id)),
                     timestamp=datetime.now().isoformat(),
-                    size_bytes=self._get_size(backup_path),
-                    checksum=checksum
+                    size_bytes=manifest['size_bytes'],
+                    checksum=manifest['checksum'],
+                    storage='incremental',
+                    new_bytes=manifest['new_bytes']
                 )
                 
                 # バックアップリストに追加
                 self.backups.append(backup_info)
                 self._save_backup_index()
                 
-                self.logger.info(f"Backup created: {backup_name} ({backup_info.size_bytes} bytes)")
+                self.logger.info(
+                    f"Backup created: {backup_name} ({backup_info.size_bytes} bytes, "
+                    f"{backup_info.new_bytes} new, {manifest['reused_files']} files unchanged)"
+                )
                 
                 # 古いバックアップをクリーンアップ
                 self._cleanup_old_backups()
@@ -504,6 +556,13 @@ class FailsafeManager:
                 self.logger.error(f"Failed to create backup: {e}")
                 raise
     
+    def _get_previous_manifest(self, source_path: str) -> Optional[Dict[str, Any]]:
+        """同一ソースの最新の増分バックアップのマニフェストを取得"""
+        for backup in sorted(self.backups, key=lambda x: x.timestamp, reverse=True):
+            if backup.source_path == source_path and backup.storage == 'incremental':
+                return self.backup_store.load_manifest(backup.backup_id)
+        return None
+    
     def restore_backup(self, backup_id: str, restore_path: Optional[str] = None) -> str:
         """
         バックアップを復元
@@ -542,14 +601,20 @@ class FailsafeManager:
                     else:
                         shutil.move(restore_dest, temp_backup)
                 
-                # バックアップを復元
-                if backup_path.is_file():
-                    shutil.copy2(backup_path, restore_dest)
+                # バックアップを復元（増分バックアップはコピーと同時に検証）
+                if backup_info.storage == 'incremental':
+                    manifest = self.backup_store.load_manifest(backup_id)
+                    if manifest is None:
+                        raise FileNotFoundError(f"Backup manifest not found: {backup_path}")
+                    restored_checksum = self.backup_store.restore(manifest, restore_dest)
                 else:
-                    shutil.copytree(backup_path, restore_dest)
+                    if backup_path.is_file():
+                        shutil.copy2(backup_path, restore_dest)
+                    else:
+                        shutil.copytree(backup_path, restore_dest)
+                    restored_checksum = self._calculate_checksum(restore_dest)
                 
                 # チェックサムを検証
-                restored_checksum = self._calculate_checksum(restore_dest)
                 if restored_checksum != backup_info.checksum:
                     # チェックサム不一致の場合は元に戻す
                     if temp_backup and temp_backup.exists():
@@ -598,7 +663,7 @@ class FailsafeManager:
         """ファイルのチェックサムを計算"""
         sha256 = hashlib.sha256()
         with open(file_path, 'rb') as f:
-            for chunk in iter(lambda: f.read(4096), b''):
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
                 sha256.update(chunk)
         return sha256.hexdigest()
     
@@ -655,7 +720,9 @@ class FailsafeManager:
         for backup in self.backups[self.max_backups:]:
             backup_path = Path(backup.backup_path)
             try:
-                if backup_path.exists():
+                if backup.storage == 'incremental':
+                    self.backup_store.delete_manifest(backup.backup_id)
+                elif backup_path.exists():
                     if backup_path.is_file():
                         backup_path.unlink()
                     else:
@@ -667,6 +734,14 @@ class FailsafeManager:
         # リストを更新
         self.backups = self.backups[:self.max_backups]
         self._save_backup_index()
+        
+        # どのマニフェストからも参照されないオブジェクトを削除
+        try:
+            self.backup_store.collect_garbage(
+                b.backup_id for b in self.backups if b.storage == 'incremental'
+            )
+        except Exception as e:
+            self.logger.warning(f"Failed to collect backup garbage: {e}")
     
     # ========================================================================
     # 自動バックアップ機能 (Auto Backup Functions)
@@ -731,22 +806,15 @@ class FailsafeManager:
     # ========================================================================
     
     def _check_crash_recovery(self):
-        """クラッシュ復旧をチェック"""
+        """クラッシュ復旧をチェック（起動時に読み込んだチェックポイントを使用）"""
         self.logger.info("Checking for crash recovery...")
         
         # 実行中または一時停止中のチェックポイントを検索
-        recoverable_operations = []
-        
-        for checkpoint_file in self.checkpoint_dir.glob('*.json'):
-            try:
-                with open(checkpoint_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                state = ProcessState(data['state'])
-                if state in [ProcessState.RUNNING, ProcessState.PAUSED]:
-                    recoverable_operations.append(data)
-            except Exception as e:
-                self.logger.warning(f"Failed to check checkpoint {checkpoint_file}: {e}")
+        with self._checkpoint_lock:
+            recoverable_operations = [
+                checkpoint.to_dict() for checkpoint in self.checkpoints.values()
+                if checkpoint.state in [ProcessState.RUNNING, ProcessState.PAUSED]
+            ]
         
         if recoverable_operations:
             self.logger.warning(
@@ -769,16 +837,13 @@ class FailsafeManager:
         """
         recoverable = []
         
-        for checkpoint_file in self.checkpoint_dir.glob('*.json'):
+        for checkpoint_id, data in self.state_store.load_namespace(CHECKPOINT_NAMESPACE).items():
             try:
-                with open(checkpoint_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
                 state = ProcessState(data['state'])
                 if state in [ProcessState.RUNNING, ProcessState.PAUSED]:
                     recoverable.append(data)
             except Exception as e:
-                self.logger.warning(f"Failed to check checkpoint {checkpoint_file}: {e}")
+                self.logger.warning(f"Failed to check checkpoint {checkpoint_id}: {e}")
         
         return recoverable
     
@@ -797,6 +862,7 @@ class FailsafeManager:
             'backups': {
                 'total': len(self.backups),
                 'total_size_mb': sum(b.size_bytes for b in self.backups) / (1024 * 1024),
+                'new_size_mb': sum(b.new_bytes for b in self.backups) / (1024 * 1024),
                 'oldest': self.backups[0].timestamp if self.backups else None,
                 'newest': self.backups[-1].timestamp if self.backups else None
             },
@@ -816,19 +882,21 @@ class FailsafeManager:
     
     def clear_completed_checkpoints(self):
         """完了したチェックポイントをクリア"""
-        completed_ids = [
-            cp_id for cp_id, cp in self.checkpoints.items()
-            if cp.state == ProcessState.COMPLETED
-        ]
-        
-        for cp_id in completed_ids:
-            checkpoint_file = self.checkpoint_dir / f"{cp_id}.json"
-            try:
-                if checkpoint_file.exists():
-                    checkpoint_file.unlink()
-                del self.checkpoints[cp_id]
-            except Exception as e:
-                self.logger.warning(f"Failed to delete checkpoint {cp_id}: {e}")
+        with self._checkpoint_lock:
+            completed_ids = [
+                cp_id for cp_id, cp in self.checkpoints.items()
+                if cp.state == ProcessState.COMPLETED
+            ]
+            
+            for cp_id in completed_ids:
+                try:
+                    self.state_store.delete(CHECKPOINT_NAMESPACE, cp_id)
+                    checkpoint = self.checkpoints.pop(cp_id)
+                    self._operation_checkpoints[checkpoint.operation_id].remove(cp_id)
+                except Exception as e:
+                    self.logger.warning(f"Failed to delete checkpoint {cp_id}: {e}")
+            
+            self.state_store.flush()
         
         self.logger.info(f"Cleared {len(completed_ids)} completed checkpoints")
 
@@ -844,5 +912,5 @@ def get_failsafe_manager() -> FailsafeManager:
     """グローバルフェイルセーフマネージャーを取得"""
     global _global_failsafe_manager
     if _global_failsafe_manager is None:
-        _global_failsafe_manager = FailsafeManager()
+        _global_failsafe_manager = FailsafeManager(state_store=get_state_store())
     return _global_failsafe_manager
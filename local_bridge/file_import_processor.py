@@ -15,7 +15,7 @@ import shutil
 import hashlib
 import logging
 import pathlib
-from typing import Optional, Dict, List, Tuple
+from typing import Optional, Dict, List, Set, Tuple
 from datetime import datetime
 from sqlalchemy.orm import Session as DBSession
 
@@ -154,6 +154,61 @@ class FileImportProcessor:
         logger.debug(f"No duplicate found for {file_path}")
         return None
     
+    def find_imported_files(self,
+                            files: List[Tuple[str, int]],
+                            db_session: Optional[DBSession] = None,
+                            chunk_size: int = 500) -> Set[str]:
+        """
+        Find which files are already in the database, in bulk
+        
+        A file counts as imported when its absolute path is a Photo.file_path
+        or a photo with the same file name and size exists (copy/move imports
+        store the destination path). Queries are chunked by file name so
+        large folders need len(files) / chunk_size queries.
+        
+        Args:
+            files: List of (file_path, file_size) tuples
+            db_session: Database session (will create new one if not provided)
+            chunk_size: File names per query
+            
+        Returns:
+            Set of file paths (as given) that are already imported
+        """
+        close_session = False
+        if db_session is None:
+            db_session = get_session()
+            close_session = True
+        
+        try:
+            by_name: Dict[str, List[Tuple[str, int]]] = {}
+            for file_path, file_size in files:
+                by_name.setdefault(os.path.basename(file_path), []).append((file_path, file_size))
+            
+            known_paths = set()
+            known_name_sizes = set()
+            names = list(by_name)
+            for start in range(0, len(names), chunk_size):
+                rows = db_session.query(Photo.file_path, Photo.file_name, Photo.file_size).filter(
+                    Photo.file_name.in_(names[start:start + chunk_size])
+                ).all()
+                for file_path, file_name, file_size in rows:
+                    known_paths.add(file_path)
+                    known_name_sizes.add((file_name, file_size))
+            
+            imported = set()
+            for file_name, entries in by_name.items():
+                for file_path, file_size in entries:
+                    if (os.path.abspath(file_path) in known_paths
+                            or (file_name, file_size) in known_name_sizes):
+                        imported.add(file_path)
+            
+            logger.debug(f"Bulk lookup: {len(imported)}/{len(files)} files already imported")
+            return imported
+            
+        finally:
+            if close_session:
+                db_session.close()
+    
     def copy_file(self, source_path: str, destination_folder: str) -> str:
         """
         Copy file to destination folder
@@ -0,0 +1,292 @@
+"""
+Persistent Watch State for Hot Folder Monitoring
+
+This module keeps track of which hot folder files have already been
+handled so that files arriving while the bridge is down can be imported
+on the next start:
+- Journaled per-folder state (path -> size, mtime, inode)
+- Per-folder high-water mark (newest handled mtime)
+- Fast os.scandir-based reconciliation scan
+
+State is stored as a JSON snapshot plus an append-only journal of
+handled files. The journal is replayed on load and folded into the
+snapshot when it grows large or the state is closed.
+
+Requirements: 1.1, 1.2
+"""
+
+import os
+import json
+import logging
+import pathlib
+from datetime import datetime
+from threading import Lock
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# (size, mtime_ns, inode)
+FileSignature = Tuple[int, int, int]
+
+
+def scan_folder(folder: str, extensions: Set[str]) -> Iterator[Tuple[str, FileSignature]]:
+    """
+    Recursively list image files with their signatures
+    
+    Uses os.scandir so that file metadata comes from the directory listing
+    wherever the platform provides it.
+    
+    Args:
+        folder: Folder to scan
+        extensions: Lower-case file extensions to include
+    
+    Yields:
+        (absolute path, (size, mtime_ns, inode)) tuples
+    """
+    stack = [os.path.abspath(folder)]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                            continue
+                        if os.path.splitext(entry.name)[1].lower() not in extensions:
+                            continue
+                        st = entry.stat()
+                        yield entry.path, (st.st_size, st.st_mtime_ns, st.st_ino)
+                    except OSError as e:
+                        logger.warning(f"Failed to stat {entry.path}: {e}")
+        except OSError as e:
+            logger.warning(f"Failed to scan folder {current}: {e}")
+
+
+class WatchState:
+    """
+    Journaled record of handled hot folder files
+    
+    Thread-safe; record() may be called from import worker threads while a
+    reconciliation scan runs.
+    """
+    
+    def __init__(self, state_path: str, compact_every: int = 5000):
+        """
+        Initialize WatchState and load existing state from disk
+        
+        Args:
+            state_path: Path of the JSON snapshot (journal is stored next to it)
+            compact_every: Journal entries after which the snapshot is rewritten
+        """
+        self.state_path = pathlib.Path(state_path)
+        self.journal_path = self.state_path.with_suffix(self.state_path.suffix + '.journal')
+        self.compact_every = compact_every
+        
+        self._folders: Dict[str, Dict] = {}
+        self._journal_entries = 0
+        self._journal_file = None
+        self._lock = Lock()
+        
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        self._load()
+    
+    def _folder_state(self, folder: str) -> Dict:
+        """Get (or create) the state of a folder (lock held)"""
+        state = self._folders.get(folder)
+        if state is None:
+            state = {'high_water_mtime_ns': 0, 'last_scan': None, 'files': {}}
+            self._folders[folder] = state
+        return state
+    
+    def _apply(self, folder: str, path: str, signature: Optional[FileSignature]) -> None:
+        """Apply one handled/removed file to in-memory state (lock held)"""
+        state = self._folder_state(folder)
+        if signature is None:
+            state['files'].pop(path, None)
+            return
+        state['files'][path] = list(signature)
+        if signature[1] > state['high_water_mtime_ns']:
+            state['high_water_mtime_ns'] = signature[1]
+    
+    def _load(self) -> None:
+        """Load snapshot and replay journal"""
+        if self.state_path.exists():
+            try:
+                with open(self.state_path, 'r', encoding='utf-8') as f:
+                    self._folders = json.load(f).get('folders', {})
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to load watch state {self.state_path}: {e}")
+                self._folders = {}
+        
+        if self.journal_path.exists():
+            replayed = 0
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        folder, path, signature = json.loads(line)
+                    except ValueError:
+                        # Torn write at the end of the journal
+                        continue
+                    self._apply(folder, path, tuple(signature) if signature else None)
+                    replayed += 1
+            self._journal_entries = replayed
+            logger.info(f"Replayed {replayed} watch state journal entries")
+        
+        total = sum(len(state['files']) for state in self._folders.values())
+        logger.info(f"Watch state loaded: {len(self._folders)} folders, {total} files")
+    
+    def record(self, folder: str, path: str, signature: Optional[FileSignature]) -> None:
+        """
+        Record a handled file (or its removal when signature is None)
+        
+        Args:
+            folder: Watched folder the file belongs to
+            path: Absolute file path
+            signature: (size, mtime_ns, inode) at the time it was handled
+        """
+        with self._lock:
+            self._apply(folder, path, signature)
+            
+            if self._journal_file is None:
+                self._journal_file = open(self.journal_path, 'a', encoding='utf-8')
+            self._journal_file.write(json.dumps([folder, path, list(signature) if signature else None]) + '\n')
+            self._journal_file.flush()
+            self._journal_entries += 1
+            
+            if self._journal_entries >= self.compact_every:
+                self._compact()
+    
+    def is_handled(self, folder: str, path: str, signature: FileSignature) -> bool:
+        """
+        Check whether a file was handled with the same size and mtime
+        
+        Args:
+            folder: Watched folder
+            path: Absolute file path
+            signature: Current (size, mtime_ns, inode)
+        
+        Returns:
+            True if the file does not need to be imported again
+        """
+        with self._lock:
+            known = self._folders.get(folder, {}).get('files', {}).get(path)
+        return known is not None and known[0] == signature[0] and known[1] == signature[1]
+    
+    def reconcile(self, folder: str, extensions: Set[str],
+                  known_files_fn: Optional[Callable[[List[Tuple[str, int]]], Set[str]]] = None,
+                  lookup_batch_size: int = 5000) -> List[Tuple[str, FileSignature]]:
+        """
+        Scan a folder and return files that still need to be imported
+        
+        Files already in the watch state are skipped without touching the
+        database. Renamed files (same inode, size and mtime) are carried
+        over to their new path. The remaining files are checked against
+        the database in bulk through known_files_fn.
+        
+        Args:
+            folder: Watched folder
+            extensions: Image file extensions
+            known_files_fn: Callable taking [(path, size), ...] and returning
+                the subset of paths already imported
+            lookup_batch_size: Files per known_files_fn call
+        
+        Returns:
+            List of (path, signature) not yet imported, oldest first
+        """
+        folder = os.path.abspath(folder)
+        
+        with self._lock:
+            files = dict(self._folder_state(folder)['files'])
+        by_inode = {(sig[2], sig[0], sig[1]): path for path, sig in files.items() if len(sig) > 2 and sig[2]}
+        
+        seen: Set[str] = set()
+        candidates: List[Tuple[str, FileSignature]] = []
+        renamed = 0
+        
+        for path, signature in scan_folder(folder, extensions):
+            seen.add(path)
+            known = files.get(path)
+            if known is not None and known[0] == signature[0] and known[1] == signature[1]:
+                continue
+            
+            old_path = by_inode.get((signature[2], signature[0], signature[1])) if signature[2] else None
+            if known is None and old_path is not None and old_path != path:
+                self.record(folder, path, signature)
+                renamed += 1
+                continue
+            
+            candidates.append((path, signature))
+        
+        # Bulk database diff
+        imported = 0
+        if known_files_fn and candidates:
+            pending = []
+            for start in range(0, len(candidates), lookup_batch_size):
+                chunk = candidates[start:start + lookup_batch_size]
+                known_paths = known_files_fn([(path, sig[0]) for path, sig in chunk])
+                for path, signature in chunk:
+                    if path in known_paths:
+                        self.record(folder, path, signature)
+                        imported += 1
+                    else:
+                        pending.append((path, signature))
+            candidates = pending
+        
+        # Forget files that no longer exist
+        removed = [path for path in files if path not in seen]
+        for path in removed:
+            self.record(folder, path, None)
+        
+        with self._lock:
+            self._folder_state(folder)['last_scan'] = datetime.now().isoformat()
+        
+        candidates.sort(key=lambda item: item[1][1])
+        
+        logger.info(f"Reconciled {folder}: {len(seen)} files, {len(candidates)} to import, "
+                    f"{imported} already in database, {renamed} renamed, {len(removed)} removed")
+        
+        return candidates
+    
+    def get_folder_stats(self) -> Dict[str, Dict]:
+        """
+        Get per-folder watch state summary
+        
+        Returns:
+            Dictionary of folder -> {files, high_water_mtime_ns, last_scan}
+        """
+        with self._lock:
+            return {
+                folder: {
+                    'files': len(state['files']),
+                    'high_water_mtime_ns': state['high_water_mtime_ns'],
+                    'last_scan': state['last_scan']
+                }
+                for folder, state in self._folders.items()
+            }
+    
+    def _compact(self) -> None:
+        """Write snapshot atomically and truncate the journal (lock held)"""
+        tmp_path = self.state_path.with_suffix(self.state_path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'folders': self._folders}, f)
+        os.replace(tmp_path, self.state_path)
+        
+        if self._journal_file is not None:
+            self._journal_file.close()
+            self._journal_file = None
+        if self.journal_path.exists():
+            self.journal_path.unlink()
+        self._journal_entries = 0
+        
+        logger.debug(f"Watch state compacted to {self.state_path}")
+    
+    def close(self) -> None:
+        """Persist snapshot and release the journal file"""
+        with self._lock:
+            try:
+                self._compact()
+            except OSError as e:
+                logger.error(f"Failed to persist watch state: {e}")
+
@@ -4,20 +4,27 @@ Hot Folder Monitoring Service for Junmai AutoDev
 This module provides hot folder monitoring functionality including:
 - File system monitoring using watchdog library
 - New file detection logic
-- File write completion detection
+- File write completion detection (shared readiness scheduler)
 - Multiple folder simultaneous monitoring
+- Startup catch-up scan against persistent watch state
 
 Requirements: 1.1, 1.2
 """
 
+import os
 import time
+import heapq
 import logging
 import pathlib
-from typing import List, Callable, Set, Optional
-from threading import Thread, Event
+from collections import OrderedDict
+from queue import Queue, Full, Empty
+from typing import Dict, List, Callable, Optional, Set, Tuple
+from threading import Thread, Event, Condition
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler, FileSystemEvent
 
+from hot_folder_state import WatchState
+
 logger = logging.getLogger(__name__)
 
 
@@ -31,27 +38,331 @@ IMAGE_EXTENSIONS = {
 }
 
 
+class _PendingFile:
+    """Readiness state of a file that is still being written"""
+    __slots__ = ('path', 'first_seen', 'last_size', 'last_mtime', 'stable_checks', 'attempts')
+    
+    def __init__(self, path: str, first_seen: float):
+        self.path = path
+        self.first_seen = first_seen
+        self.last_size = -1
+        self.last_mtime = -1.0
+        self.stable_checks = 0
+        self.attempts = 0
+
+
+class FileReadinessScheduler:
+    """
+    Shared scheduler deciding when detected files are completely written
+    
+    Pending paths are kept in a heap ordered by their next check time and
+    stat'ed in batches by a single worker thread. A file is ready once its
+    size and mtime are unchanged for `stable_checks` consecutive checks.
+    Ready files are put on a bounded import queue consumed by a small pool
+    of import workers, so thread count stays constant regardless of how
+    many files arrive at once.
+    """
+    
+    def __init__(self, callback: Callable[[str], None],
+                 write_complete_delay: float = 2.0,
+                 check_interval: float = 0.5,
+                 stable_checks: int = 2,
+                 max_attempts: int = 10,
+                 import_workers: int = 2,
+                 import_queue_size: int = 100,
+                 batch_size: int = 256,
+                 dispatched_cache_size: int = 10000):
+        """
+        Initialize FileReadinessScheduler
+        
+        Args:
+            callback: Function to call for each file that is ready
+            write_complete_delay: Seconds to wait before the first check
+            check_interval: Seconds between size/mtime checks
+            stable_checks: Consecutive unchanged checks required
+            max_attempts: Checks before giving up on a file
+            import_workers: Number of threads running the callback
+            import_queue_size: Maximum ready files waiting for a worker
+            batch_size: Maximum files checked per scheduler pass
+            dispatched_cache_size: Number of dispatched files remembered to
+                suppress duplicate modify events
+        """
+        self.callback = callback
+        self.write_complete_delay = write_complete_delay
+        self.check_interval = check_interval
+        self.stable_checks = stable_checks
+        self.max_attempts = max_attempts
+        self.import_workers = import_workers
+        self.batch_size = batch_size
+        self.dispatched_cache_size = dispatched_cache_size
+        
+        self._pending: Dict[str, _PendingFile] = {}
+        self._heap: List = []
+        self._seq = 0
+        self._dispatched: "OrderedDict[str, tuple]" = OrderedDict()
+        self._import_queue: Queue = Queue(maxsize=import_queue_size)
+        self._cond = Condition()
+        self._stop_event = Event()
+        self._threads: List[Thread] = []
+        
+        self.stats = {
+            'scheduled': 0,
+            'ready': 0,
+            'imported': 0,
+            'failed': 0,
+            'not_ready': 0,
+            'duplicates': 0
+        }
+    
+    def start(self) -> None:
+        """Start scheduler and import worker threads"""
+        if self._threads:
+            return
+        
+        self._stop_event.clear()
+        self._threads.append(Thread(target=self._run_scheduler, name='hotfolder-readiness', daemon=True))
+        for i in range(self.import_workers):
+            self._threads.append(Thread(target=self._run_importer, name=f'hotfolder-import-{i}', daemon=True))
+        for thread in self._threads:
+            thread.start()
+        
+        logger.debug(f"FileReadinessScheduler started with {self.import_workers} import workers")
+    
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Stop worker threads
+        
+        Files still waiting for readiness or import are discarded.
+        
+        Args:
+            timeout: Seconds to wait for each thread
+        """
+        self._stop_event.set()
+        with self._cond:
+            discarded = len(self._pending) + self._import_queue.qsize()
+            self._pending.clear()
+            self._heap.clear()
+            self._cond.notify_all()
+        
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+        
+        while not self._import_queue.empty():
+            self._import_queue.get_nowait()
+        
+        if discarded:
+            logger.warning(f"FileReadinessScheduler stopped with {discarded} files not imported")
+    
+    def schedule(self, file_path: str) -> bool:
+        """
+        Start tracking a newly detected file
+        
+        Args:
+            file_path: Path to file
+            
+        Returns:
+            False if the file is already being tracked
+        """
+        with self._cond:
+            if file_path in self._pending:
+                return False
+            
+            now = time.monotonic()
+            self._pending[file_path] = _PendingFile(file_path, now)
+            self._push(now + self.write_complete_delay, file_path)
+            self.stats['scheduled'] += 1
+            self._cond.notify()
+        return True
+    
+    def submit_ready(self, file_path: str) -> bool:
+        """
+        Queue a file that is known to be completely written
+        
+        Skips the readiness checks; blocks while the import queue is full.
+        
+        Args:
+            file_path: Path to file
+            
+        Returns:
+            False if the file is pending or cannot be read
+        """
+        if self.is_pending(file_path):
+            return False
+        
+        signature = self._stat(file_path)
+        if not signature:
+            return False
+        
+        return self._enqueue_ready(file_path, signature)
+    
+    def is_pending(self, file_path: str) -> bool:
+        """Check whether a file is waiting for write completion"""
+        with self._cond:
+            return file_path in self._pending
+    
+    def get_stats(self) -> Dict:
+        """
+        Get scheduler statistics
+        
+        Returns:
+            Dictionary with counters and queue sizes
+        """
+        with self._cond:
+            stats = dict(self.stats)
+            stats['pending'] = len(self._pending)
+        stats['import_queue'] = self._import_queue.qsize()
+        return stats
+    
+    def _push(self, due: float, file_path: str) -> None:
+        """Add a check to the heap (lock held)"""
+        self._seq += 1
+        heapq.heappush(self._heap, (due, self._seq, file_path))
+    
+    def _run_scheduler(self) -> None:
+        """Scheduler loop checking due files in batches"""
+        while not self._stop_event.is_set():
+            with self._cond:
+                while not self._stop_event.is_set():
+                    if self._heap:
+                        wait = self._heap[0][0] - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+                if self._stop_event.is_set():
+                    return
+                
+                now = time.monotonic()
+                due = []
+                while self._heap and self._heap[0][0] <= now and len(due) < self.batch_size:
+                    _, _, file_path = heapq.heappop(self._heap)
+                    pending = self._pending.get(file_path)
+                    if pending is not None:
+                        due.append(pending)
+            
+            # stat() outside of the lock so event handlers never wait on disk I/O
+            results = [(pending, self._stat(pending.path)) for pending in due]
+            
+            ready = []
+            with self._cond:
+                now = time.monotonic()
+                for pending, signature in results:
+                    state = self._update(pending, signature)
+                    if state == 'wait':
+                        self._push(now + self.check_interval, pending.path)
+                        continue
+                    
+                    self._pending.pop(pending.path, None)
+                    if state == 'ready':
+                        ready.append((pending.path, signature))
+            
+            for file_path, signature in ready:
+                self._enqueue_ready(file_path, signature)
+    
+    @staticmethod
+    def _stat(file_path: str) -> Optional[tuple]:
+        """Get (size, mtime) of a file, None if it cannot be read"""
+        try:
+            st = os.stat(file_path)
+            return st.st_size, st.st_mtime
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Error checking file size: {e}")
+            return ()
+    
+    def _update(self, pending: _PendingFile, signature: Optional[tuple]) -> str:
+        """
+        Record one check of a pending file (lock held)
+        
+        Returns:
+            'ready', 'wait' or 'failed'
+        """
+        if signature is None and pending.attempts == 0:
+            logger.warning(f"File disappeared: {pending.path}")
+            self.stats['failed'] += 1
+            return 'failed'
+        
+        pending.attempts += 1
+        
+        if signature:
+            size, mtime = signature
+            if size == pending.last_size and mtime == pending.last_mtime and size > 0:
+                pending.stable_checks += 1
+                if pending.stable_checks >= self.stable_checks:
+                    logger.debug(f"File size stable at {size} bytes: {pending.path}")
+                    return 'ready'
+            else:
+                pending.stable_checks = 0
+            pending.last_size, pending.last_mtime = size, mtime
+        else:
+            pending.stable_checks = 0
+        
+        if pending.attempts >= self.max_attempts:
+            logger.warning(f"File not ready after waiting: {pending.path}")
+            self.stats['not_ready'] += 1
+            return 'failed'
+        
+        return 'wait'
+    
+    def _enqueue_ready(self, file_path: str, signature: tuple) -> bool:
+        """Hand a ready file to the import pool, waiting while the queue is full"""
+        with self._cond:
+            if self._dispatched.get(file_path) == signature:
+                logger.debug(f"File unchanged since last import, skipping: {file_path}")
+                self.stats['duplicates'] += 1
+                return False
+            self._dispatched[file_path] = signature
+            self._dispatched.move_to_end(file_path)
+            if len(self._dispatched) > self.dispatched_cache_size:
+                self._dispatched.popitem(last=False)
+            self.stats['ready'] += 1
+        
+        while not self._stop_event.is_set():
+            try:
+                self._import_queue.put(file_path, timeout=0.5)
+                return True
+            except Full:
+                continue
+        return False
+    
+    def _run_importer(self) -> None:
+        """Import worker loop"""
+        while not self._stop_event.is_set():
+            try:
+                file_path = self._import_queue.get(timeout=0.5)
+            except Empty:
+                continue
+            
+            try:
+                logger.info(f"File write complete, processing: {file_path}")
+                self.callback(file_path)
+                with self._cond:
+                    self.stats['imported'] += 1
+            except Exception as e:
+                logger.error(f"Error processing file {file_path}: {e}", exc_info=True)
+
+
 class FileEventHandler(FileSystemEventHandler):
     """
     File system event handler for hot folder monitoring
     
-    Handles file creation events and ensures files are completely written
-    before triggering callbacks.
+    Hands new image files to a shared FileReadinessScheduler, which
+    triggers the callback once the file is completely written.
     """
     
-    def __init__(self, callback: Callable[[str], None], write_complete_delay: float = 2.0):
+    def __init__(self, scheduler: FileReadinessScheduler):
         """
         Initialize FileEventHandler
         
         Args:
-            callback: Function to call when a new image file is detected
-            write_complete_delay: Seconds to wait to ensure file write is complete
+            scheduler: Readiness scheduler shared by all watched folders
         """
         super().__init__()
-        self.callback = callback
-        self.write_complete_delay = write_complete_delay
-        self._processing_files: Set[str] = set()
-        logger.debug(f"FileEventHandler initialized with {write_complete_delay}s write delay")
+        self.scheduler = scheduler
+        logger.debug("FileEventHandler initialized")
     
     def on_created(self, event: FileSystemEvent) -> None:
         """
@@ -71,29 +382,26 @@ class FileEventHandler(FileSystemEventHandler):
             return
         
         # Avoid duplicate processing
-        if file_path in self._processing_files:
+        if not self.scheduler.schedule(file_path):
             logger.debug(f"File already being processed: {file_path}")
             return
         
-        self._processing_files.add(file_path)
         logger.info(f"New image file detected: {file_path}")
-        
-        # Wait for file write to complete in a separate thread
-        thread = Thread(target=self._wait_and_process, args=(file_path,), daemon=True)
-        thread.start()
     
     def on_modified(self, event: FileSystemEvent) -> None:
         """
         Handle file modification events
         
         Some systems trigger modified instead of created for new files.
+        Writes to files that are already pending are picked up by the
+        scheduler's size/mtime checks.
         
         Args:
             event: File system event
         """
         # Treat modifications as potential new files
         if not event.is_directory and self._is_image_file(event.src_path):
-            if event.src_path not in self._processing_files:
+            if not self.scheduler.is_pending(event.src_path):
                 self.on_created(event)
     
     def _is_image_file(self, file_path: str) -> bool:
@@ -108,81 +416,6 @@ class FileEventHandler(FileSystemEventHandler):
         """
         extension = pathlib.Path(file_path).suffix.lower()
         return extension in IMAGE_EXTENSIONS
-    
-    def _wait_and_process(self, file_path: str) -> None:
-        """
-        Wait for file write to complete and then process
-        
-        Args:
-            file_path: Path to file
-        """
-        try:
-            # Wait for file write to complete
-            if not self._wait_for_file_ready(file_path):
-                logger.warning(f"File not ready after waiting: {file_path}")
-                self._processing_files.discard(file_path)
-                return
-            
-            # File is ready, trigger callback
-            logger.info(f"File write complete, processing: {file_path}")
-            self.callback(file_path)
-            
-        except Exception as e:
-            logger.error(f"Error processing file {file_path}: {e}", exc_info=True)
-        finally:
-            # Remove from processing set
-            self._processing_files.discard(file_path)
-    
-    def _wait_for_file_ready(self, file_path: str, max_attempts: int = 10) -> bool:
-        """
-        Wait for file to be completely written
-        
-        Checks file size stability to ensure write is complete.
-        
-        Args:
-            file_path: Path to file
-            max_attempts: Maximum number of attempts to check file stability
-            
-        Returns:
-            True if file is ready, False otherwise
-        """
-        path = pathlib.Path(file_path)
-        
-        # Wait initial delay
-        time.sleep(self.write_complete_delay)
-        
-        # Check if file exists
-        if not path.exists():
-            logger.warning(f"File disappeared: {file_path}")
-            return False
-        
-        # Check file size stability
-        previous_size = -1
-        stable_count = 0
-        required_stable_checks = 2
-        
-        for attempt in range(max_attempts):
-            try:
-                current_size = path.stat().st_size
-                
-                # Check if size is stable
-                if current_size == previous_size and current_size > 0:
-                    stable_count += 1
-                    if stable_count >= required_stable_checks:
-                        logger.debug(f"File size stable at {current_size} bytes: {file_path}")
-                        return True
-                else:
-                    stable_count = 0
-                
-                previous_size = current_size
-                time.sleep(0.5)
-                
-            except OSError as e:
-                logger.warning(f"Error checking file size (attempt {attempt + 1}): {e}")
-                time.sleep(0.5)
-        
-        logger.warning(f"File size not stable after {max_attempts} attempts: {file_path}")
-        return False
 
 
 class HotFolderWatcher:
@@ -194,20 +427,46 @@ class HotFolderWatcher:
     """
     
     def __init__(self, folders: Optional[List[str]] = None, 
-                 callback: Optional[Callable[[str], None]] = None,
-                 write_complete_delay: float = 2.0):
+                 callback: Optional[Callable[[str], Optional[bool]]] = None,
+                 write_complete_delay: float = 2.0,
+                 import_workers: int = 2,
+                 import_queue_size: int = 100,
+                 state_path: Optional[str] = None,
+                 known_files_fn: Optional[Callable[[List[Tuple[str, int]]], Set[str]]] = None):
         """
         Initialize HotFolderWatcher
         
         Args:
             folders: List of folder paths to monitor
-            callback: Function to call when new image file is detected
+            callback: Function to call when new image file is detected; may
+                return False if the file was not imported
             write_complete_delay: Seconds to wait to ensure file write is complete
+            import_workers: Number of threads running the callback
+            import_queue_size: Maximum ready files waiting for an import worker
+            state_path: Watch state file; enables the startup catch-up scan
+            known_files_fn: Bulk lookup taking [(path, size), ...] and returning
+                the paths already imported (used by the catch-up scan)
         """
         self.folders: List[pathlib.Path] = []
         self.callback = callback or self._default_callback
         self.write_complete_delay = write_complete_delay
         self.observer: Optional[Observer] = None
+        self.scheduler = FileReadinessScheduler(
+            self._on_file_ready,
+            write_complete_delay=write_complete_delay,
+            import_workers=import_workers,
+            import_queue_size=import_queue_size
+        )
+        self.watch_state: Optional[WatchState] = WatchState(state_path) if state_path else None
+        self.known_files_fn = known_files_fn
+        self._catch_up_thread: Optional[Thread] = None
+        self.catch_up_stats = {
+            'running': False,
+            'folders_scanned': 0,
+            'files_queued': 0,
+            'last_run': None,
+            'duration': None
+        }
         self._stop_event = Event()
         self._is_running = False
         
@@ -263,9 +522,11 @@ class HotFolderWatcher:
         
         # If already running, schedule the new folder
         if self._is_running and self.observer:
-            event_handler = FileEventHandler(self.callback, self.write_complete_delay)
+            event_handler = FileEventHandler(self.scheduler)
             self.observer.schedule(event_handler, str(path), recursive=True)
             logger.info(f"Started monitoring new folder: {path}")
+            if self.watch_state:
+                self._start_catch_up([path])
         
         return True
     
@@ -289,15 +550,21 @@ class HotFolderWatcher:
         logger.info(f"Removed folder from watch list: {path}")
         
         # Note: watchdog doesn't support unscheduling individual folders easily
-        # If this is needed while running, restart the observer
+        # If this is needed while running, restart the observer. The readiness
+        # scheduler keeps running so pending files are not lost.
         if self._is_running:
             logger.info("Restarting observer to apply folder changes")
-            self.stop()
-            self.start()
+            self._stop_observer()
+            if self.folders:
+                self._start_observer()
+            else:
+                self.scheduler.stop()
+                self._is_running = False
+                self._stop_event.set()
         
         return True
     
-    def set_callback(self, callback: Callable[[str], None]) -> None:
+    def set_callback(self, callback: Callable[[str], Optional[bool]]) -> None:
         """
         Set callback function for file detection
         
@@ -323,20 +590,16 @@ class HotFolderWatcher:
         
         logger.info("Starting HotFolderWatcher...")
         
-        # Create observer
-        self.observer = Observer()
-        
-        # Schedule event handlers for each folder
-        for folder in self.folders:
-            event_handler = FileEventHandler(self.callback, self.write_complete_delay)
-            self.observer.schedule(event_handler, str(folder), recursive=True)
-            logger.info(f"Scheduled monitoring for: {folder}")
-        
-        # Start observer
-        self.observer.start()
+        self.scheduler.start()
+        self._start_observer()
         self._is_running = True
         self._stop_event.clear()
         
+        # Catch up on files that arrived while not running; the observer is
+        # already active so nothing falls between the scan and live events
+        if self.watch_state:
+            self._start_catch_up(list(self.folders))
+        
         logger.info(f"HotFolderWatcher started, monitoring {len(self.folders)} folders")
     
     def stop(self) -> None:
@@ -349,15 +612,155 @@ class HotFolderWatcher:
         
         logger.info("Stopping HotFolderWatcher...")
         
+        self._stop_event.set()
+        self._stop_observer()
+        self.scheduler.stop()
+        
+        if self._catch_up_thread:
+            self._catch_up_thread.join(timeout=5.0)
+            self._catch_up_thread = None
+        if self.watch_state:
+            self.watch_state.close()
+        
+        self._is_running = False
+        
+        logger.info("HotFolderWatcher stopped")
+    
+    def _start_observer(self) -> None:
+        """Create observer and schedule event handlers for each folder"""
+        self.observer = Observer()
+        
+        for folder in self.folders:
+            event_handler = FileEventHandler(self.scheduler)
+            self.observer.schedule(event_handler, str(folder), recursive=True)
+            logger.info(f"Scheduled monitoring for: {folder}")
+        
+        self.observer.start()
+    
+    def _stop_observer(self) -> None:
+        """Stop and discard the observer"""
         if self.observer:
             self.observer.stop()
             self.observer.join(timeout=5.0)
             self.observer = None
+    
+    def _on_file_ready(self, file_path: str) -> None:
+        """
+        Forward a ready file to the current callback and journal it
         
-        self._is_running = False
-        self._stop_event.set()
+        Files are only recorded once the callback returns without raising
+        and without returning False, so files that were in flight when the
+        bridge stopped or whose import failed are picked up by the next
+        catch-up scan.
         
-        logger.info("HotFolderWatcher stopped")
+        Args:
+            file_path: Path to file
+        """
+        if self.callback(file_path) is False:
+            logger.info(f"File not imported, leaving it for the next catch-up scan: {file_path}")
+            return
+        
+        if self.watch_state:
+            folder = self._folder_of(file_path)
+            if folder is None:
+                return
+            try:
+                st = os.stat(file_path)
+                signature = (st.st_size, st.st_mtime_ns, st.st_ino)
+            except OSError:
+                # Moved away by the import; nothing left to catch up on
+                signature = None
+            self.watch_state.record(folder, os.path.abspath(file_path), signature)
+    
+    def _folder_of(self, file_path: str) -> Optional[str]:
+        """
+        Get the watched folder containing a file
+        
+        Args:
+            file_path: Path to file
+            
+        Returns:
+            Absolute folder path, or None if the file is not in a watched folder
+        """
+        path = os.path.abspath(file_path)
+        matches = [
+            os.path.abspath(folder) for folder in self.folders
+            if path.startswith(os.path.join(os.path.abspath(folder), ''))
+        ]
+        return max(matches, key=len) if matches else None
+    
+    def _start_catch_up(self, folders: List[pathlib.Path]) -> None:
+        """
+        Run the catch-up scan for folders in a background thread
+        
+        Args:
+            folders: Folders to reconcile
+        """
+        previous = self._catch_up_thread
+        
+        def run():
+            if previous:
+                previous.join()
+            self._catch_up(folders)
+        
+        self._catch_up_thread = Thread(target=run, name='hotfolder-catch-up', daemon=True)
+        self._catch_up_thread.start()
+    
+    def _catch_up(self, folders: List[pathlib.Path]) -> None:
+        """
+        Import files that arrived while the watcher was not running
+        
+        Each folder is diffed against the watch state and, in bulk, the
+        database. Files that settled before the write delay go straight to
+        the import queue; recent files go through readiness checks.
+        
+        Args:
+            folders: Folders to reconcile
+        """
+        self.catch_up_stats['running'] = True
+        started = time.time()
+        
+        try:
+            for folder in folders:
+                if self._stop_event.is_set():
+                    break
+                
+                candidates = self.watch_state.reconcile(
+                    os.path.abspath(folder), IMAGE_EXTENSIONS, self.known_files_fn
+                )
+                self.catch_up_stats['folders_scanned'] += 1
+                
+                settled_before_ns = int((time.time() - self.write_complete_delay) * 1e9)
+                for file_path, signature in candidates:
+                    if self._stop_event.is_set():
+                        break
+                    if signature[1] <= settled_before_ns:
+                        queued = self.scheduler.submit_ready(file_path)
+                    else:
+                        queued = self.scheduler.schedule(file_path)
+                    if queued:
+                        self.catch_up_stats['files_queued'] += 1
+                
+                logger.info(f"Catch-up scan queued {len(candidates)} files from {folder}")
+        except Exception as e:
+            logger.error(f"Catch-up scan failed: {e}", exc_info=True)
+        finally:
+            self.catch_up_stats['running'] = False
+            self.catch_up_stats['last_run'] = time.time()
+            self.catch_up_stats['duration'] = time.time() - started
+    
+    def get_stats(self) -> Dict:
+        """
+        Get readiness scheduler and catch-up statistics
+        
+        Returns:
+            Dictionary with pending, queued and imported file counts
+        """
+        stats = self.scheduler.get_stats()
+        stats['catch_up'] = dict(self.catch_up_stats)
+        if self.watch_state:
+            stats['watch_state'] = self.watch_state.get_folder_stats()
+        return stats
     
     def is_running(self) -> bool:
         """
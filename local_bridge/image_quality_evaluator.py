@@ -2,7 +2,7 @@
 Image Quality Evaluator Module
 
 This module provides comprehensive image quality evaluation including:
-- Focus evaluation using Laplacian variance
+- Focus evaluation using tiled, multi-scale Laplacian variance
 - Exposure evaluation using histogram analysis
 - Composition evaluation using Rule of Thirds
 - Face detection using OpenCV DNN
@@ -16,9 +16,46 @@ from typing import Dict, List, Tuple, Optional
 import logging
 from pathlib import Path
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 logger = logging.getLogger(__name__)
 
+# Focus analysis: the sharpness map is FOCUS_GRID_SIZE x FOCUS_GRID_SIZE tiles
+# computed on the pyramid level whose long edge fits FOCUS_MAX_DIMENSION; the
+# FOCUS_TOP_K best tiles are re-measured at full resolution for the score.
+FOCUS_GRID_SIZE = 8
+FOCUS_TOP_K = 4
+FOCUS_MAX_DIMENSION = 1024
+FOCUS_MAX_WORKERS = min(8, os.cpu_count() or 1)
+
+_focus_executor: Optional[ThreadPoolExecutor] = None
+_focus_executor_lock = threading.Lock()
+
+
+def _get_focus_executor() -> ThreadPoolExecutor:
+    """Get the thread pool shared by all focus evaluations."""
+    global _focus_executor
+    with _focus_executor_lock:
+        if _focus_executor is None:
+            # OpenCV releases the GIL, so tiles are processed in parallel
+            _focus_executor = ThreadPoolExecutor(
+                max_workers=FOCUS_MAX_WORKERS,
+                thread_name_prefix='focus'
+            )
+        return _focus_executor
+
+
+def _laplacian_variance(gray: np.ndarray) -> float:
+    """Variance of the Laplacian of a grayscale image region."""
+    _, std = cv2.meanStdDev(cv2.Laplacian(gray, cv2.CV_64F))
+    return float(std[0, 0]) ** 2
+
+
+def _tile_bounds(length: int, count: int, index: int) -> Tuple[int, int]:
+    """Start and end of tile `index` when `length` pixels are split into `count` tiles."""
+    return index * length // count, (index + 1) * length // count
+
 
 class ImageQualityEvaluator:
     """
@@ -117,10 +154,10 @@ class ImageQualityEvaluator:
                 raise ValueError(f"Could not load image: {image_path}")
             
             # Perform individual evaluations
-            focus_score, focus_metrics = self._calculate_focus(img)
+            faces, face_locations = self._detect_faces(img)
+            focus_score, focus_metrics = self._calculate_focus(img, face_locations)
             exposure_score, exposure_metrics = self._calculate_exposure(img)
             composition_score, composition_metrics = self._calculate_composition(img)
-            faces, face_locations = self._detect_faces(img)
             
             # Calculate overall score (weighted average)
             overall_score = self._calculate_overall_score(
@@ -145,24 +182,70 @@ class ImageQualityEvaluator:
             logger.error(f"Error evaluating image {image_path}: {e}")
             raise
     
-    def _calculate_focus(self, img: np.ndarray) -> Tuple[float, Dict]:
+    def _calculate_focus(
+        self,
+        img: np.ndarray,
+        face_locations: Optional[List[Tuple[int, int, int, int]]] = None
+    ) -> Tuple[float, Dict]:
         """
-        Calculate focus score using Laplacian variance.
+        Calculate focus score using tiled Laplacian variance.
+        
+        The image is split into a grid of tiles and the Laplacian variance of
+        each tile is computed on a downscaled pyramid level, giving a
+        sharpness map. The score is taken from the sharpest tiles only, so a
+        sharp subject against a blurred background (bokeh) is not rated as
+        blurry. When faces are detected, only the tiles covering them are
+        considered, weighted by how much of each face they contain. The
+        selected tiles are re-measured at full resolution so the score uses
+        the same scale as a full-frame Laplacian variance.
         
         Higher variance indicates sharper image.
         
         Args:
             img: Input image (BGR format)
+            face_locations: Face bounding boxes (x, y, width, height) from
+                _detect_faces (optional)
             
         Returns:
             Tuple of (score 0-5, metrics dict)
         """
-        # Convert to grayscale
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        height, width = img.shape[:2]
+        rows = min(FOCUS_GRID_SIZE, height)
+        cols = min(FOCUS_GRID_SIZE, width)
+        
+        # Pick the pyramid level whose long edge fits FOCUS_MAX_DIMENSION
+        level = 0
+        while max(height, width) >> level > FOCUS_MAX_DIMENSION:
+            level += 1
+        
+        if level:
+            small = cv2.resize(
+                img,
+                (max(cols, width >> level), max(rows, height >> level)),
+                interpolation=cv2.INTER_AREA
+            )
+        else:
+            small = img
+        
+        sharpness = self._calculate_tile_variances(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), rows, cols)
+        face_weights = self._calculate_face_tile_weights(face_locations or [], height, width, rows, cols)
+        subject_weighted = bool(face_weights.any())
+        
+        # Candidate tiles: those covering a face, otherwise the whole frame
+        candidates = np.flatnonzero(face_weights) if subject_weighted else np.arange(rows * cols)
+        order = np.argsort(sharpness.flat[candidates], kind='stable')[::-1]
+        top_tiles = candidates[order[:FOCUS_TOP_K]]
+        
+        if level:
+            tile_variances = list(_get_focus_executor().map(
+                lambda index: self._calculate_tile_variance(img, index, rows, cols),
+                top_tiles
+            ))
+        else:
+            tile_variances = [float(sharpness.flat[index]) for index in top_tiles]
         
-        # Calculate Laplacian variance
-        laplacian = cv2.Laplacian(gray, cv2.CV_64F)
-        variance = laplacian.var()
+        weights = face_weights.flat[top_tiles] if subject_weighted else None
+        variance = float(np.average(tile_variances, weights=weights))
         
         # Normalize to 0-5 scale
         # Typical values: <100 (blurry), 100-500 (acceptable), >500 (sharp)
@@ -175,13 +258,81 @@ class ImageQualityEvaluator:
         
         score = min(score, 5.0)
         
+        peak = sharpness.max()
+        sharpness_map = sharpness / peak if peak > 0 else sharpness
+        
         metrics = {
             'laplacian_variance': round(variance, 2),
-            'sharpness_category': self._categorize_sharpness(variance)
+            'sharpness_category': self._categorize_sharpness(variance),
+            'sharpness_map': np.round(sharpness_map, 2).tolist(),
+            'focus_tiles': [[int(index // cols), int(index % cols)] for index in top_tiles],
+            'subject_weighted': subject_weighted,
+            'pyramid_level': level
         }
         
         return score, metrics
     
+    def _calculate_tile_variances(self, gray: np.ndarray, rows: int, cols: int) -> np.ndarray:
+        """
+        Calculate the Laplacian variance of each tile of a grayscale image.
+        
+        Each row of tiles is processed by the focus thread pool.
+        
+        Returns:
+            Array of shape (rows, cols) with the tile variances
+        """
+        height, width = gray.shape
+        
+        def row_variances(row: int) -> List[float]:
+            y1, y2 = _tile_bounds(height, rows, row)
+            return [
+                _laplacian_variance(gray[y1:y2, slice(*_tile_bounds(width, cols, col))])
+                for col in range(cols)
+            ]
+        
+        return np.array(list(_get_focus_executor().map(row_variances, range(rows))))
+    
+    def _calculate_tile_variance(self, img: np.ndarray, index: int, rows: int, cols: int) -> float:
+        """Calculate the Laplacian variance of one tile at full resolution."""
+        height, width = img.shape[:2]
+        y1, y2 = _tile_bounds(height, rows, index // cols)
+        x1, x2 = _tile_bounds(width, cols, index % cols)
+        return _laplacian_variance(cv2.cvtColor(img[y1:y2, x1:x2], cv2.COLOR_BGR2GRAY))
+    
+    def _calculate_face_tile_weights(
+        self,
+        face_locations: List[Tuple[int, int, int, int]],
+        height: int,
+        width: int,
+        rows: int,
+        cols: int
+    ) -> np.ndarray:
+        """
+        Weight each tile by the share of the detected faces it contains.
+        
+        Returns:
+            Array of shape (rows, cols); 0 for tiles without a face
+        """
+        weights = np.zeros((rows, cols))
+        
+        for x, y, w, h in face_locations:
+            if w <= 0 or h <= 0:
+                continue
+            
+            for row in range(rows):
+                y1, y2 = _tile_bounds(height, rows, row)
+                overlap_h = min(y2, y + h) - max(y1, y)
+                if overlap_h <= 0:
+                    continue
+                
+                for col in range(cols):
+                    x1, x2 = _tile_bounds(width, cols, col)
+                    overlap_w = min(x2, x + w) - max(x1, x)
+                    if overlap_w > 0:
+                        weights[row, col] += overlap_w * overlap_h / (w * h)
+        
+        return weights
+    
     def _categorize_sharpness(self, variance: float) -> str:
         """Categorize sharpness based on Laplacian variance."""
         if variance < 100:
@@ -14,15 +14,16 @@ from celery_tasks import (
     evaluate_quality_task,
     group_similar_photos_task,
     apply_preset_task,
-    export_photo_task,
-    process_batch_photos
+    export_photo_task
 )
 from models.database import get_session, Photo, Job, Session as DBSession
 from logging_system import get_logging_system
-from priority_manager import get_priority_manager
+from priority_manager import get_priority_manager, PRIORITY_MAX
+from job_scheduler import get_job_scheduler
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 import json
+import uuid
 
 logging_system = get_logging_system()
 
@@ -42,6 +43,7 @@ class JobQueueManager:
         """Initialize job queue manager"""
         self.celery_app = app
         self.priority_manager = get_priority_manager()
+        self.scheduler = get_job_scheduler()
         logging_system.log("INFO", "Job queue manager initialized")
     
     def submit_photo_processing(
@@ -76,31 +78,36 @@ class JobQueueManager:
                 user_requested=user_requested
             )
             
-            # Submit task
-            result = process_photo_task.apply_async(
-                args=[photo_id, config],
-                priority=priority
-            )
-            
-            # Create job record
+            # Create job record before the scheduler can dispatch it
+            task_id = str(uuid.uuid4())
             job = Job(
-                id=result.id,
+                id=task_id,
                 photo_id=photo_id,
                 priority=priority,
-                config_json=json.dumps(config) if config else None,
+                config_json=json.dumps(config or {}),
                 status='pending',
                 retry_count=0
             )
             db_session.add(job)
             db_session.commit()
             
+            # Hand over to the scheduler, which feeds Celery
+            self.scheduler.start()
+            self.scheduler.submit(
+                job_id=task_id,
+                photo_id=photo_id,
+                priority=priority,
+                session_id=photo.session_id,
+                config=config
+            )
+            
             logging_system.log("INFO", "Photo processing job submitted",
                               photo_id=photo_id,
-                              task_id=result.id,
+                              task_id=task_id,
                               priority=priority,
                               user_requested=user_requested)
             
-            return result.id
+            return task_id
             
         finally:
             db_session.close()
@@ -113,6 +120,9 @@ class JobQueueManager:
         """
         Submit batch of photos for processing
         
+        Jobs are created in one transaction and held by the scheduler,
+        which releases them to Celery with per-session fair share.
+        
         Args:
             photo_ids: List of photo IDs
             priority: Task priority
@@ -122,7 +132,38 @@ class JobQueueManager:
             
         Requirements: 4.1
         """
-        task_ids = process_batch_photos(photo_ids, priority)
+        db_session = get_session()
+        try:
+            session_by_photo = dict(
+                db_session.query(Photo.id, Photo.session_id).filter(
+                    Photo.id.in_(photo_ids)
+                ).all()
+            ) if photo_ids else {}
+            
+            task_ids = [str(uuid.uuid4()) for _ in photo_ids]
+            db_session.add_all([
+                Job(
+                    id=task_id,
+                    photo_id=photo_id,
+                    priority=priority,
+                    config_json=json.dumps({}),
+                    status='pending',
+                    retry_count=0
+                )
+                for task_id, photo_id in zip(task_ids, photo_ids)
+            ])
+            db_session.commit()
+        finally:
+            db_session.close()
+        
+        self.scheduler.start()
+        for task_id, photo_id in zip(task_ids, photo_ids):
+            self.scheduler.submit(
+                job_id=task_id,
+                photo_id=photo_id,
+                priority=priority,
+                session_id=session_by_photo.get(photo_id)
+            )
         
         logging_system.log("INFO", "Batch processing submitted",
                           photo_count=len(photo_ids),
@@ -285,7 +326,9 @@ class JobQueueManager:
         Requirements: 4.1
         """
         try:
-            self.celery_app.control.revoke(task_id, terminate=True)
+            # Jobs still held by the scheduler never reached the broker
+            if not self.scheduler.cancel(task_id):
+                self.celery_app.control.revoke(task_id, terminate=True)
             
             # Update job status in database
             db_session = get_session()
@@ -317,7 +360,8 @@ class JobQueueManager:
         Requirements: 4.1
         """
         try:
-            # Stop consuming from queues
+            # Stop releasing held jobs, then stop consuming from queues
+            self.scheduler.pause()
             self.celery_app.control.cancel_consumer('high_priority')
             self.celery_app.control.cancel_consumer('medium_priority')
             self.celery_app.control.cancel_consumer('low_priority')
@@ -346,6 +390,7 @@ class JobQueueManager:
             self.celery_app.control.add_consumer('medium_priority')
             self.celery_app.control.add_consumer('low_priority')
             self.celery_app.control.add_consumer('default')
+            self.scheduler.resume()
             
             logging_system.log("INFO", "Job queue resumed")
             
@@ -482,7 +527,12 @@ class JobQueueManager:
             
         Requirements: 4.4
         """
-        return self.priority_manager.adjust_job_priority(job_id, new_priority)
+        success = self.priority_manager.adjust_job_priority(job_id, new_priority)
+        if success:
+            self.scheduler.update_priority(
+                job_id, max(1, min(PRIORITY_MAX, new_priority))
+            )
+        return success
     
     def rebalance_priorities(self) -> Dict:
         """
@@ -493,7 +543,9 @@ class JobQueueManager:
             
         Requirements: 4.4
         """
-        return self.priority_manager.rebalance_queue_priorities()
+        stats = self.priority_manager.rebalance_queue_priorities()
+        self._sync_scheduler_priorities()
+        return stats
     
     def boost_session_priority(self, session_id: int, boost_amount: int = 2) -> Dict:
         """
@@ -508,7 +560,11 @@ class JobQueueManager:
             
         Requirements: 4.4
         """
-        return self.priority_manager.boost_session_priority(session_id, boost_amount)
+        stats = self.priority_manager.boost_session_priority(session_id, boost_amount)
+        stats['scheduler_boosted'] = self.scheduler.boost_session(
+            session_id, boost_amount, max_priority=PRIORITY_MAX
+        )
+        return stats
     
     def get_priority_distribution(self) -> Dict:
         """
@@ -533,7 +589,9 @@ class JobQueueManager:
             
         Requirements: 4.4
         """
-        return self.priority_manager.auto_boost_starving_jobs(age_threshold_hours)
+        stats = self.priority_manager.auto_boost_starving_jobs(age_threshold_hours)
+        self._sync_scheduler_priorities()
+        return stats
     
     def get_starvation_candidates(self, age_threshold_hours: int = 12) -> List[Dict]:
         """
@@ -548,6 +606,89 @@ class JobQueueManager:
         Requirements: 4.4
         """
         return self.priority_manager.get_starvation_candidates(age_threshold_hours)
+    
+    def get_scheduler_stats(self) -> Dict:
+        """
+        Get statistics of the local job scheduler
+        
+        Returns:
+            Scheduler statistics (held, in-flight and per-session counts)
+            
+        Requirements: 4.4
+        """
+        return self.scheduler.get_stats()
+    
+    def restore_pending_jobs(self) -> int:
+        """
+        Hand pending jobs that never reached the broker back to the scheduler
+        
+        Held jobs only live in the scheduler's memory; after a restart their
+        rows are still 'pending' without started_at and are resubmitted here.
+        
+        Returns:
+            Number of jobs restored
+            
+        Requirements: 4.1, 4.4
+        """
+        db_session = get_session()
+        try:
+            rows = db_session.query(
+                Job.id, Job.photo_id, Job.priority, Job.config_json, Photo.session_id
+            ).join(Photo, Job.photo_id == Photo.id).filter(
+                Job.status == 'pending',
+                Job.started_at.is_(None)
+            ).order_by(Job.created_at).all()
+        finally:
+            db_session.close()
+        
+        restored = 0
+        for job_id, photo_id, priority, config_json, session_id in rows:
+            if self.scheduler.is_queued(job_id):
+                continue
+            try:
+                self.scheduler.submit(
+                    job_id=job_id,
+                    photo_id=photo_id,
+                    priority=priority,
+                    session_id=session_id,
+                    config=json.loads(config_json) if config_json else None
+                )
+                restored += 1
+            except ValueError:
+                # Already dispatched by this process
+                continue
+        
+        if rows:
+            self.scheduler.start()
+        
+        logging_system.log("INFO", "Pending jobs restored to scheduler", count=restored)
+        return restored
+    
+    def shutdown(self):
+        """Stop the scheduler's dispatcher thread"""
+        self.scheduler.stop()
+    
+    def _sync_scheduler_priorities(self) -> int:
+        """
+        Push priorities of pending jobs from the database into the scheduler
+        
+        Returns:
+            Number of held jobs whose priority was synced
+        """
+        db_session = get_session()
+        try:
+            rows = db_session.query(Job.id, Job.priority).filter(
+                Job.status == 'pending'
+            ).all()
+        finally:
+            db_session.close()
+        
+        synced = 0
+        for job_id, priority in rows:
+            if self.scheduler.update_priority(job_id, priority):
+                synced += 1
+        
+        return synced
 
 
 # Global instance
@@ -0,0 +1,620 @@
+"""
+Job Scheduler for Junmai AutoDev
+
+This module provides a local dispatcher that owns the execution order of
+photo processing jobs. Jobs are held in per-session priority heaps and only
+released to Celery while a small in-flight window has room, so priority
+adjustments, starvation boosts and session fair-share actually reorder
+execution instead of only updating the jobs table.
+
+Requirements: 4.1, 4.4
+"""
+
+from logging_system import get_logging_system
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+from datetime import datetime
+import heapq
+import itertools
+import threading
+import time
+
+logging_system = get_logging_system()
+
+
+@dataclass
+class ScheduledJob:
+    """A job held by the scheduler until it is dispatched"""
+    job_id: str
+    photo_id: int
+    priority: int
+    session_id: Optional[int] = None
+    config: Optional[Dict] = None
+    enqueued_at: float = 0.0
+    submitted_at: datetime = field(default_factory=datetime.utcnow)
+
+    def to_dict(self) -> Dict:
+        """Convert to dictionary"""
+        return {
+            'job_id': self.job_id,
+            'photo_id': self.photo_id,
+            'priority': self.priority,
+            'session_id': self.session_id,
+            'submitted_at': self.submitted_at.isoformat()
+        }
+
+
+class _SessionQueue:
+    """Priority heap of held jobs for one session"""
+
+    def __init__(self):
+        self.heap: List[list] = []
+        self.queued = 0
+        self.in_flight = 0
+        self.virtual_time = 0.0
+
+
+def _dispatch_to_celery(job: ScheduledJob) -> Any:
+    """
+    Send a job to the Celery broker using the job ID as task ID
+
+    The job row's started_at is set once the broker has the task, so jobs
+    still pending without it are known to have been held by the scheduler
+    only (see JobQueueManager.restore_pending_jobs).
+    """
+    from celery_tasks import process_photo_task
+    from models.database import get_session, Job
+
+    result = process_photo_task.apply_async(
+        args=[job.photo_id, job.config],
+        priority=job.priority,
+        task_id=job.job_id
+    )
+
+    try:
+        db_session = get_session()
+        try:
+            db_session.query(Job).filter(Job.id == job.job_id).update(
+                {Job.started_at: datetime.utcnow()}, synchronize_session=False
+            )
+            db_session.commit()
+        finally:
+            db_session.close()
+    except Exception as e:
+        logging_system.log_error("Failed to record job dispatch",
+                                job_id=job.job_id,
+                                exception=e)
+
+    return result
+
+
+def _record_celery_result(job_id: str, photo_id: int, result: Any) -> None:
+    """
+    Put a successfully processed photo into the approval queue
+
+    Celery workers complete photos in another process; the scheduler sees
+    the completion when it reaps the task, so the in-memory approval queue
+    does not have to wait for its periodic resync.
+    """
+    successful = getattr(result, 'successful', None)
+    if successful is None or not successful():
+        return
+
+    from approval_queue import get_approval_queue_service
+    from models.database import get_session, Photo
+
+    db_session = get_session()
+    try:
+        row = db_session.query(Photo.session_id, Photo.ai_score).filter(
+            Photo.id == photo_id,
+            Photo.status == 'completed',
+            Photo.approved == False
+        ).first()
+    finally:
+        db_session.close()
+
+    if row is not None:
+        get_approval_queue_service().add(photo_id, row.session_id, row.ai_score)
+
+
+class JobScheduler:
+    """
+    Priority scheduler with aging and per-session fair share
+
+    Ordering rules:
+    - Effective priority = priority + aging_per_minute * minutes waited
+    - Sessions that have already had many jobs dispatched are penalized by
+      fair_share_penalty per dispatch relative to the least-served session
+    - At most max_in_flight jobs are handed to Celery at any time
+
+    Aging grows at the same rate for every held job, so the heap key
+    (priority - rate * enqueue_time) never changes while a job waits and
+    no periodic re-heapify is required.
+    """
+
+    def __init__(
+        self,
+        dispatch_fn: Optional[Callable[[ScheduledJob], Any]] = None,
+        finished_fn: Optional[Callable[[str, int, Any], None]] = None,
+        max_in_flight: int = 6,
+        aging_per_minute: float = 0.1,
+        fair_share_penalty: float = 1.0,
+        poll_interval: float = 1.0
+    ):
+        """
+        Initialize job scheduler
+
+        Args:
+            dispatch_fn: Callable that hands a job to the executor and returns
+                an AsyncResult-like object (defaults to Celery)
+            finished_fn: Callable invoked with (job_id, photo_id, result) when
+                a dispatched job's result is ready (defaults to adding the
+                photo to the approval queue when dispatching to Celery)
+            max_in_flight: Maximum number of dispatched, unfinished jobs
+            aging_per_minute: Priority points gained per minute of waiting
+            fair_share_penalty: Priority points deducted per dispatch a session
+                is ahead of the least-served active session
+            poll_interval: Seconds between completion checks in the dispatcher
+        """
+        self.dispatch_fn = dispatch_fn or _dispatch_to_celery
+        self.finished_fn = finished_fn or (_record_celery_result if dispatch_fn is None else None)
+        self.config = {
+            'max_in_flight': max_in_flight,
+            'aging_per_minute': aging_per_minute,
+            'fair_share_penalty': fair_share_penalty,
+            'poll_interval': poll_interval,
+        }
+
+        self._lock = threading.RLock()
+        self._sessions: Dict[Optional[int], _SessionQueue] = {}
+        self._entries: Dict[str, list] = {}
+        self._jobs: Dict[str, ScheduledJob] = {}
+        self._in_flight: Dict[str, Dict] = {}
+        self._counter = itertools.count()
+
+        self._stats = {
+            'submitted': 0,
+            'dispatched': 0,
+            'completed': 0,
+            'cancelled': 0,
+            'dispatch_errors': 0,
+        }
+
+        self.is_running = False
+        self.is_paused = False
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        logging_system.log("INFO", "Job scheduler initialized",
+                          max_in_flight=max_in_flight,
+                          aging_per_minute=aging_per_minute)
+
+    # ------------------------------------------------------------------
+    # Queue operations
+    # ------------------------------------------------------------------
+
+    def submit(
+        self,
+        job_id: str,
+        photo_id: int,
+        priority: int,
+        session_id: Optional[int] = None,
+        config: Optional[Dict] = None
+    ) -> bool:
+        """
+        Hold a job for dispatch
+
+        Args:
+            job_id: Job/task ID (also used as the Celery task ID)
+            photo_id: Photo database ID
+            priority: Base priority (1-10)
+            session_id: Session the photo belongs to (fair-share bucket)
+            config: Optional processing configuration
+
+        Returns:
+            True if the job was dispatched immediately
+        """
+        job = ScheduledJob(
+            job_id=job_id,
+            photo_id=photo_id,
+            priority=priority,
+            session_id=session_id,
+            config=config,
+            enqueued_at=time.monotonic()
+        )
+
+        with self._lock:
+            if job_id in self._jobs or job_id in self._in_flight:
+                raise ValueError(f"Job already scheduled: {job_id}")
+
+            self._push(job)
+            self._stats['submitted'] += 1
+
+        self.pump()
+        return not self.is_queued(job_id)
+
+    def update_priority(self, job_id: str, priority: int) -> bool:
+        """
+        Change the base priority of a held job
+
+        Args:
+            job_id: Job ID
+            priority: New base priority
+
+        Returns:
+            True if the job was still held and has been reordered
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return False
+            if job.priority == priority:
+                return True
+
+            self._remove_entry(job_id)
+            job.priority = priority
+            self._push(job)
+
+        logging_system.log("DEBUG", "Scheduled job reprioritized",
+                          job_id=job_id, priority=priority)
+        return True
+
+    def boost_session(self, session_id: Optional[int], amount: int, max_priority: int = 10) -> int:
+        """
+        Raise the priority of every held job in a session
+
+        Args:
+            session_id: Session ID
+            amount: Priority points to add
+            max_priority: Upper bound for the resulting priority
+
+        Returns:
+            Number of jobs boosted
+        """
+        with self._lock:
+            job_ids = [
+                job_id for job_id, job in self._jobs.items()
+                if job.session_id == session_id
+            ]
+            boosted = 0
+            for job_id in job_ids:
+                job = self._jobs[job_id]
+                new_priority = min(max_priority, job.priority + amount)
+                if new_priority != job.priority:
+                    self.update_priority(job_id, new_priority)
+                    boosted += 1
+
+        return boosted
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Remove a held job before it reaches the broker
+
+        Args:
+            job_id: Job ID
+
+        Returns:
+            True if the job was held and has been removed
+        """
+        with self._lock:
+            if job_id not in self._jobs:
+                return False
+            self._remove_entry(job_id)
+            del self._jobs[job_id]
+            self._stats['cancelled'] += 1
+
+        logging_system.log("INFO", "Scheduled job cancelled", job_id=job_id)
+        return True
+
+    def mark_finished(self, job_id: str) -> bool:
+        """
+        Release the in-flight slot of a dispatched job
+
+        Args:
+            job_id: Job ID
+
+        Returns:
+            True if the job was in flight
+        """
+        with self._lock:
+            info = self._in_flight.pop(job_id, None)
+            if info is None:
+                return False
+            queue = self._sessions.get(info['session_id'])
+            if queue is not None:
+                queue.in_flight -= 1
+                self._drop_idle_session(info['session_id'])
+            self._stats['completed'] += 1
+
+        self._wakeup.set()
+        return True
+
+    def is_queued(self, job_id: str) -> bool:
+        """Check whether a job is still held by the scheduler"""
+        with self._lock:
+            return job_id in self._jobs
+
+    def pause(self):
+        """Stop releasing jobs to the broker (held jobs are kept)"""
+        self.is_paused = True
+        logging_system.log("INFO", "Job scheduler paused")
+
+    def resume(self):
+        """Resume releasing jobs to the broker"""
+        self.is_paused = False
+        self._wakeup.set()
+        logging_system.log("INFO", "Job scheduler resumed")
+
+    # ------------------------------------------------------------------
+    # Dispatch
+    # ------------------------------------------------------------------
+
+    def pump(self) -> int:
+        """
+        Dispatch held jobs until the in-flight window is full
+
+        Returns:
+            Number of jobs dispatched
+        """
+        dispatched = 0
+
+        while not self.is_paused:
+            with self._lock:
+                if len(self._in_flight) >= self.config['max_in_flight']:
+                    break
+                job = self._pop_next()
+                if job is None:
+                    break
+                queue = self._sessions[job.session_id]
+                queue.in_flight += 1
+                queue.virtual_time += 1
+                self._in_flight[job.job_id] = {
+                    'session_id': job.session_id,
+                    'photo_id': job.photo_id,
+                    'result': None,
+                    'dispatched_at': time.monotonic()
+                }
+
+            try:
+                result = self.dispatch_fn(job)
+            except Exception as e:
+                with self._lock:
+                    self._in_flight.pop(job.job_id, None)
+                    queue.in_flight -= 1
+                    queue.virtual_time -= 1
+                    self._push(job)
+                    self._stats['dispatch_errors'] += 1
+                logging_system.log_error("Failed to dispatch scheduled job",
+                                        job_id=job.job_id,
+                                        exception=e)
+                break
+
+            with self._lock:
+                info = self._in_flight.get(job.job_id)
+                if info is not None:
+                    info['result'] = result
+                self._stats['dispatched'] += 1
+            dispatched += 1
+
+            logging_system.log("DEBUG", "Scheduled job dispatched",
+                              job_id=job.job_id,
+                              photo_id=job.photo_id,
+                              priority=job.priority,
+                              session_id=job.session_id)
+
+        return dispatched
+
+    def reap(self) -> int:
+        """
+        Release slots of dispatched jobs whose results are ready
+
+        Returns:
+            Number of slots released
+        """
+        with self._lock:
+            candidates = [
+                (job_id, info['photo_id'], info['result'])
+                for job_id, info in self._in_flight.items()
+                if info['result'] is not None
+            ]
+
+        released = 0
+        for job_id, photo_id, result in candidates:
+            ready = getattr(result, 'ready', None)
+            if ready is None:
+                continue
+            try:
+                if not ready() or not self.mark_finished(job_id):
+                    continue
+            except Exception as e:
+                logging_system.log_error("Failed to check job result",
+                                        job_id=job_id,
+                                        exception=e)
+                break
+
+            released += 1
+            if self.finished_fn is not None:
+                try:
+                    self.finished_fn(job_id, photo_id, result)
+                except Exception as e:
+                    logging_system.log_error("Failed to handle finished job",
+                                            job_id=job_id,
+                                            exception=e)
+
+        return released
+
+    def start(self):
+        """Start the background dispatcher thread"""
+        if self.is_running:
+            return
+
+        self.is_running = True
+        self._thread = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self._thread.start()
+
+        logging_system.log("INFO", "Job scheduler started")
+
+    def stop(self):
+        """Stop the background dispatcher thread"""
+        if not self.is_running:
+            return
+
+        self.is_running = False
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+
+        logging_system.log("INFO", "Job scheduler stopped")
+
+    def _dispatch_loop(self):
+        """Main dispatcher loop (runs in separate thread)"""
+        while self.is_running:
+            try:
+                self.reap()
+                self.pump()
+            except Exception as e:
+                logging_system.log_error("Error in job scheduler loop", exception=e)
+
+            self._wakeup.wait(self.config['poll_interval'])
+            self._wakeup.clear()
+
+    # ------------------------------------------------------------------
+    # Introspection
+    # ------------------------------------------------------------------
+
+    def effective_priority(self, job_id: str) -> Optional[float]:
+        """Get the aged priority of a held job"""
+        with self._lock:
+            entry = self._entries.get(job_id)
+            if entry is None:
+                return None
+            return -entry[0] + self._aging_rate() * time.monotonic()
+
+    def get_queued_jobs(self, limit: int = 100) -> List[Dict]:
+        """
+        Get held jobs ordered by aged priority (before fair-share adjustment)
+
+        Args:
+            limit: Maximum number of jobs to return
+
+        Returns:
+            List of job dictionaries
+        """
+        with self._lock:
+            ordered = sorted(
+                self._jobs.values(),
+                key=lambda job: (self._entries[job.job_id][0], self._entries[job.job_id][1])
+            )[:limit]
+            return [job.to_dict() for job in ordered]
+
+    def get_stats(self) -> Dict:
+        """
+        Get scheduler statistics
+
+        Returns:
+            Statistics dictionary
+        """
+        with self._lock:
+            sessions = {
+                str(session_id): {
+                    'queued': queue.queued,
+                    'in_flight': queue.in_flight,
+                    'dispatched': queue.virtual_time
+                }
+                for session_id, queue in self._sessions.items()
+            }
+            return {
+                'queued': len(self._jobs),
+                'in_flight': len(self._in_flight),
+                'max_in_flight': self.config['max_in_flight'],
+                'is_running': self.is_running,
+                'is_paused': self.is_paused,
+                'sessions': sessions,
+                **self._stats,
+                'timestamp': datetime.utcnow().isoformat()
+            }
+
+    # ------------------------------------------------------------------
+    # Heap helpers (caller holds the lock)
+    # ------------------------------------------------------------------
+
+    def _aging_rate(self) -> float:
+        return self.config['aging_per_minute'] / 60.0
+
+    def _push(self, job: ScheduledJob):
+        queue = self._sessions.get(job.session_id)
+        if queue is None:
+            queue = self._sessions[job.session_id] = _SessionQueue()
+
+        if queue.queued == 0 and queue.in_flight == 0:
+            # A session (re)joining must not carry credit from idle time
+            queue.virtual_time = max(queue.virtual_time, self._min_virtual_time(exclude=job.session_id))
+
+        key = -(job.priority - self._aging_rate() * job.enqueued_at)
+        entry = [key, next(self._counter), job.job_id]
+        heapq.heappush(queue.heap, entry)
+        queue.queued += 1
+        self._entries[job.job_id] = entry
+        self._jobs[job.job_id] = job
+
+    def _remove_entry(self, job_id: str):
+        entry = self._entries.pop(job_id)
+        entry[2] = None
+        self._sessions[self._jobs[job_id].session_id].queued -= 1
+
+    def _min_virtual_time(self, exclude: Any = object()) -> float:
+        active = [
+            queue.virtual_time for session_id, queue in self._sessions.items()
+            if session_id != exclude and (queue.queued or queue.in_flight)
+        ]
+        return min(active) if active else 0.0
+
+    def _peek(self, queue: _SessionQueue) -> Optional[list]:
+        while queue.heap and queue.heap[0][2] is None:
+            heapq.heappop(queue.heap)
+        return queue.heap[0] if queue.heap else None
+
+    def _pop_next(self) -> Optional[ScheduledJob]:
+        min_vtime = self._min_virtual_time()
+        penalty = self.config['fair_share_penalty']
+
+        best_queue = None
+        best_score = None
+        for session_id, queue in self._sessions.items():
+            if queue.queued == 0:
+                continue
+            head = self._peek(queue)
+            if head is None:
+                continue
+            # Lower is better: heap key plus fair-share penalty
+            score = (head[0] + penalty * (queue.virtual_time - min_vtime), head[1])
+            if best_score is None or score < best_score:
+                best_queue, best_score = queue, score
+
+        if best_queue is None:
+            return None
+
+        queue = best_queue
+        entry = heapq.heappop(queue.heap)
+        job_id = entry[2]
+        queue.queued -= 1
+        del self._entries[job_id]
+        return self._jobs.pop(job_id)
+
+    def _drop_idle_session(self, session_id: Optional[int]):
+        queue = self._sessions.get(session_id)
+        if queue is not None and queue.queued == 0 and queue.in_flight == 0:
+            del self._sessions[session_id]
+
+
+# Global instance
+_job_scheduler = None
+
+def get_job_scheduler() -> JobScheduler:
+    """Get global job scheduler instance"""
+    global _job_scheduler
+    if _job_scheduler is None:
+        from celery_config import app
+        concurrency = app.conf.worker_concurrency or 3
+        _job_scheduler = JobScheduler(max_in_flight=concurrency * 2)
+    return _job_scheduler
@@ -9,11 +9,12 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from collections import defaultdict
 import json
-import statistics
+import numpy as np
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_, or_, case
 
-from models.database import LearningData, Photo, Preset, get_session
+from models.database import LearningData, LearningAdjustment, Photo, Preset, get_session
+from preset_manager import invalidate_preset_selection_cache
 
 
 class LearningSystem:
@@ -174,63 +175,54 @@ class LearningSystem:
         """
         cutoff_date = datetime.utcnow() - timedelta(days=days)
         
-        # 承認または修正されたデータを取得
-        query = self.db.query(LearningData, Photo).join(
-            Photo, LearningData.photo_id == Photo.id
-        ).filter(
-            and_(
-                LearningData.action.in_(['approved', 'modified']),
-                LearningData.timestamp >= cutoff_date
-            )
-        )
-        
+        # 承認または修正されたデータの条件
+        criteria = [
+            LearningData.action.in_(['approved', 'modified']),
+            LearningData.timestamp >= cutoff_date
+        ]
         if context_tag:
-            query = query.filter(Photo.context_tag == context_tag)
-        
+            criteria.append(Photo.context_tag == context_tag)
         if preset_name:
-            query = query.filter(LearningData.original_preset == preset_name)
-        
-        results = query.all()
+            criteria.append(LearningData.original_preset == preset_name)
+        
+        # アクション別件数をSQLで集計
+        action_counts = dict(
+            self.db.query(LearningData.action, func.count(LearningData.id)).join(
+                Photo, LearningData.photo_id == Photo.id
+            ).filter(
+                and_(*criteria)
+            ).group_by(
+                LearningData.action
+            ).all()
+        )
+        approval_count = action_counts.get('approved', 0)
+        modification_count = action_counts.get('modified', 0)
+        sample_count = approval_count + modification_count
         
-        if len(results) < self.min_samples_for_learning:
+        if sample_count < self.min_samples_for_learning:
             return {
                 'status': 'insufficient_data',
-                'sample_count': len(results),
+                'sample_count': sample_count,
                 'min_required': self.min_samples_for_learning
             }
         
-        # パラメータ調整の集計
-        parameter_stats = defaultdict(list)
-        approval_count = 0
-        modification_count = 0
-        
-        for learning_data, photo in results:
-            if learning_data.action == 'approved':
-                approval_count += 1
-            elif learning_data.action == 'modified':
-                modification_count += 1
-                adjustments = learning_data.get_parameter_adjustments()
-                for param, value in adjustments.items():
-                    parameter_stats[param].append(value)
+        # 修正データの調整値を (param, value) の列として取得
+        adjustment_rows = self.db.query(LearningAdjustment.param, LearningAdjustment.value).join(
+            LearningData, LearningAdjustment.learning_id == LearningData.id
+        ).join(
+            Photo, LearningData.photo_id == Photo.id
+        ).filter(
+            and_(LearningData.action == 'modified', *criteria)
+        ).all()
         
         # 統計計算
-        avg_adjustments = {}
-        for param, values in parameter_stats.items():
-            if values:
-                avg_adjustments[param] = {
-                    'mean': statistics.mean(values),
-                    'median': statistics.median(values),
-                    'stdev': statistics.stdev(values) if len(values) > 1 else 0,
-                    'min': min(values),
-                    'max': max(values),
-                    'count': len(values)
-                }
+        avg_adjustments = self._aggregate_adjustments(adjustment_rows)
         
-        approval_rate = approval_count / len(results) if results else 0
+        approval_rate = approval_count / sample_count
         
         return {
             'status': 'success',
-            'sample_count': len(results),
+            'sample_count': sample_count,
             'approval_count': approval_count,
             'modification_count': modification_count,
             'approval_rate': approval_rate,
@@ -240,6 +232,47 @@ class LearningSystem:
             'analysis_period_days': days
         }
     
+    def _aggregate_adjustments(self, rows: List[Tuple[str, float]]) -> Dict:
+        """
+        パラメータ別の調整値統計をNumPyで一括計算する
+        
+        Args:
+            rows: (パラメータ名, 調整値) のリスト
+        
+        Returns:
+            Dict: パラメータ名 -> mean/median/stdev/min/max/count
+        """
+        if not rows:
+            return {}
+        
+        params, values = zip(*rows)
+        names, codes = np.unique(np.array(params, dtype=object), return_inverse=True)
+        values = np.asarray(values, dtype=np.float64)
+        
+        # パラメータ順・値順にソートして各グループの範囲を求める
+        order = np.lexsort((values, codes))
+        sorted_values = values[order]
+        counts = np.bincount(codes, minlength=len(names))
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        ends = starts + counts
+        
+        means = np.bincount(codes, weights=values, minlength=len(names)) / counts
+        squared = np.bincount(codes, weights=(values - means[codes]) ** 2, minlength=len(names))
+        stdevs = np.where(counts > 1, np.sqrt(squared / np.maximum(counts - 1, 1)), 0.0)
+        medians = (sorted_values[starts + (counts - 1) // 2] + sorted_values[starts + counts // 2]) / 2
+        
+        return {
+            name: {
+                'mean': float(means[i]),
+                'median': float(medians[i]),
+                'stdev': float(stdevs[i]),
+                'min': float(sorted_values[starts[i]]),
+                'max': float(sorted_values[ends[i] - 1]),
+                'count': int(counts[i])
+            }
+            for i, name in enumerate(names)
+        }
+    
     def generate_customized_preset(
         self,
         base_preset_name: str,
@@ -347,6 +380,7 @@ class LearningSystem:
             self.db.add(preset)
         
         self.db.commit()
+        invalidate_preset_selection_cache(self.db)
         return preset
     
     def evaluate_preset_effectiveness(
@@ -366,8 +400,15 @@ class LearningSystem:
         """
         cutoff_date = datetime.utcnow() - timedelta(days=days)
         
-        # プリセット使用履歴を取得
-        results = self.db.query(LearningData, Photo).join(
+        # アクション・コンテキスト別にプリセット使用履歴をSQLで集計
+        has_ai_score = and_(Photo.ai_score.isnot(None), Photo.ai_score != 0)
+        rows = self.db.query(
+            LearningData.action,
+            Photo.context_tag,
+            func.count(LearningData.id),
+            func.sum(case((has_ai_score, Photo.ai_score), else_=0)),
+            func.count(case((has_ai_score, 1)))
+        ).join(
             Photo, LearningData.photo_id == Photo.id
         ).filter(
             and_(
@@ -377,33 +418,40 @@ class LearningSystem:
                 ),
                 LearningData.timestamp >= cutoff_date
             )
+        ).group_by(
+            LearningData.action,
+            Photo.context_tag
         ).all()
         
-        if not results:
+        if not rows:
             return {
                 'status': 'no_data',
                 'preset_name': preset_name
             }
         
         # 統計計算
-        total_uses = len(results)
-        approved_count = sum(1 for ld, _ in results if ld.action == 'approved')
-        rejected_count = sum(1 for ld, _ in results if ld.action == 'rejected')
-        modified_count = sum(1 for ld, _ in results if ld.action == 'modified')
+        action_counts = defaultdict(int)
+        context_usage = defaultdict(int)
+        ai_score_sum = 0.0
+        ai_score_count = 0
+        for action, context_tag, count, score_sum, score_count in rows:
+            action_counts[action] += count
+            if context_tag:
+                context_usage[context_tag] += count
+            ai_score_sum += score_sum or 0.0
+            ai_score_count += score_count
+        
+        total_uses = sum(action_counts.values())
+        approved_count = action_counts['approved']
+        rejected_count = action_counts['rejected']
+        modified_count = action_counts['modified']
         
         approval_rate = approved_count / total_uses if total_uses > 0 else 0
         modification_rate = modified_count / total_uses if total_uses > 0 else 0
         rejection_rate = rejected_count / total_uses if total_uses > 0 else 0
         
         # AI評価スコアの平均
-        ai_scores = [photo.ai_score for _, photo in results if photo.ai_score]
-        avg_ai_score = statistics.mean(ai_scores) if ai_scores else None
-        
-        # コンテキスト別の使用状況
-        context_usage = defaultdict(int)
-        for _, photo in results:
-            if photo.context_tag:
-                context_usage[photo.context_tag] += 1
+        avg_ai_score = ai_score_sum / ai_score_count if ai_score_count else None
         
         return {
             'status': 'success',
@@ -560,7 +608,7 @@ class LearningSystem:
                 
                 self.db.add(learning_data)
                 imported_count += 1
-                
+            
             except Exception as e:
                 error_count += 1
                 print(f"Error importing record: {e}")
@@ -587,31 +635,18 @@ class LearningSystem:
         """
         cutoff_date = datetime.utcnow() - timedelta(days=days)
         
-        # 全体統計
-        total_records = self.db.query(func.count(LearningData.id)).filter(
-            LearningData.timestamp >= cutoff_date
-        ).scalar()
-        
-        approved = self.db.query(func.count(LearningData.id)).filter(
-            and_(
-                LearningData.action == 'approved',
-                LearningData.timestamp >= cutoff_date
-            )
-        ).scalar()
-        
-        rejected = self.db.query(func.count(LearningData.id)).filter(
-            and_(
-                LearningData.action == 'rejected',
+        # 全体統計（アクション別件数を1クエリで集計）
+        action_counts = dict(
+            self.db.query(LearningData.action, func.count(LearningData.id)).filter(
                 LearningData.timestamp >= cutoff_date
-            )
-        ).scalar()
-        
-        modified = self.db.query(func.count(LearningData.id)).filter(
-            and_(
-                LearningData.action == 'modified',
-                LearningData.timestamp >= cutoff_date
-            )
-        ).scalar()
+            ).group_by(
+                LearningData.action
+            ).all()
+        )
+        total_records = sum(action_counts.values())
+        approved = action_counts.get('approved', 0)
+        rejected = action_counts.get('rejected', 0)
+        modified = action_counts.get('modified', 0)
         
         # プリセット別統計
         preset_stats = self.db.query(
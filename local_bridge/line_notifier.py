@@ -13,6 +13,7 @@ Requirements: 8.1
 import logging
 import requests
 import json
+import time
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 from pathlib import Path
@@ -20,6 +21,9 @@ from enum import Enum
 
 logger = logging.getLogger(__name__)
 
+# LINE Notify rejects messages longer than this
+LINE_MESSAGE_MAX_LENGTH = 1000
+
 
 class LineNotificationType(Enum):
     """LINE notification types"""
@@ -176,6 +180,27 @@ class LineMessageFormatter:
         
         return message.strip()
     
+    @staticmethod
+    def format_digest(notification_type: LineNotificationType, messages: List[str]) -> str:
+        """
+        Format several messages of one type as a single digest message
+        
+        Args:
+            notification_type: Type of the coalesced notifications
+            messages: Formatted messages, oldest first
+            
+        Returns:
+            Digest message (within LINE Notify's 1000 character limit)
+        """
+        header = f"📬 通知まとめ ({notification_type.value}: {len(messages)}件)"
+        body = "\n\n".join(messages)
+        message = f"{header}\n\n{body}"
+        
+        if len(message) > LINE_MESSAGE_MAX_LENGTH:
+            message = message[:LINE_MESSAGE_MAX_LENGTH - 3] + '...'
+        
+        return message
+    
     @staticmethod
     def _format_default(data: Dict[str, Any]) -> str:
         """Format default message"""
@@ -317,20 +342,30 @@ class LineTokenManager:
         current_count = rate_limit.get('current_count', 0)
         reset_time = rate_limit.get('reset_time')
         
-        # Reset counter if hour has passed
+        # Reset counter if hour has passed (the next increment starts a new hour)
         if reset_time:
             reset_dt = datetime.fromisoformat(reset_time)
             if datetime.now() > reset_dt:
                 self.config['rate_limit']['current_count'] = 0
-                self.config['rate_limit']['reset_time'] = (
-                    datetime.now().replace(minute=0, second=0, microsecond=0)
-                    .isoformat()
-                )
+                self.config['rate_limit']['reset_time'] = None
                 self._save_config()
                 return True
         
         return current_count < max_per_hour
     
+    def next_available_time(self) -> Optional[datetime]:
+        """
+        Get when sending is allowed again after the hourly limit was reached
+        
+        Returns:
+            Reset time, or None if sending is allowed now
+        """
+        if self.check_rate_limit():
+            return None
+        
+        reset_time = self.config.get('rate_limit', {}).get('reset_time')
+        return datetime.fromisoformat(reset_time) if reset_time else None
+    
     def increment_rate_limit(self) -> None:
         """Increment rate limit counter"""
         if 'rate_limit' not in self.config:
@@ -370,6 +405,9 @@ class LineNotifier:
         """
         self.token_manager = LineTokenManager(config_file)
         self.formatter = LineMessageFormatter()
+        
+        # NotificationOutbox delivering messages in the background (optional)
+        self.outbox = None
     
     def send(
         self,
@@ -392,23 +430,50 @@ class LineNotifier:
         Returns:
             True if notification was sent successfully
         """
+        result = self.deliver(message, notification_type, image_path, sticker_package_id, sticker_id)
+        return result['status'] == 'sent'
+    
+    def deliver(
+        self,
+        message: str,
+        notification_type: LineNotificationType = LineNotificationType.SYSTEM_STATUS,
+        image_path: Optional[Path] = None,
+        sticker_package_id: Optional[int] = None,
+        sticker_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Send LINE notification and report the outcome
+        
+        Args:
+            message: Notification message
+            notification_type: Type of notification
+            image_path: Path to image file to attach
+            sticker_package_id: LINE sticker package ID
+            sticker_id: LINE sticker ID
+            
+        Returns:
+            Dictionary with 'status' ('sent', 'skipped', 'rate_limited' or
+            'failed') and 'retry_at' (epoch seconds when rate limited)
+        """
         if not self.token_manager.is_enabled():
             logger.warning("LINE Notify is disabled or token not configured")
-            return False
+            return {'status': 'skipped', 'retry_at': None}
         
         if not self.token_manager.is_type_enabled(notification_type):
             logger.info(f"LINE notification type {notification_type.value} is disabled")
-            return False
+            return {'status': 'skipped', 'retry_at': None}
         
         if not self.token_manager.check_rate_limit():
             logger.warning("LINE Notify rate limit exceeded")
-            return False
+            next_available = self.token_manager.next_available_time()
+            retry_at = next_available.timestamp() if next_available else time.time() + 60
+            return {'status': 'rate_limited', 'retry_at': retry_at}
         
         try:
             token = self.token_manager.get_token()
             if not token:
                 logger.error("LINE Notify token not configured")
-                return False
+                return {'status': 'skipped', 'retry_at': None}
             
             headers = {
                 'Authorization': f'Bearer {token}'
@@ -443,14 +508,38 @@ class LineNotifier:
             if response.status_code == 200:
                 logger.info(f"LINE notification sent successfully: {message[:50]}...")
                 self.token_manager.increment_rate_limit()
-                return True
+                return {'status': 'sent', 'retry_at': None}
+            elif response.status_code == 429:
+                logger.warning("LINE Notify API rate limit reached")
+                return {'status': 'rate_limited', 'retry_at': self._retry_at(response)}
             else:
                 logger.error(f"Failed to send LINE notification: {response.status_code} - {response.text}")
-                return False
+                return {'status': 'failed', 'retry_at': None}
             
         except Exception as e:
             logger.error(f"Failed to send LINE notification: {e}")
-            return False
+            return {'status': 'failed', 'retry_at': None}
+    
+    @staticmethod
+    def _retry_at(response) -> float:
+        """
+        Get when to retry after a 429 response
+        
+        Args:
+            response: LINE Notify API response
+            
+        Returns:
+            Epoch seconds (X-RateLimit-Reset, Retry-After, or one minute)
+        """
+        headers = getattr(response, 'headers', None) or {}
+        try:
+            if headers.get('X-RateLimit-Reset'):
+                return float(headers['X-RateLimit-Reset'])
+            if headers.get('Retry-After'):
+                return time.time() + float(headers['Retry-After'])
+        except (TypeError, ValueError):
+            pass
+        return time.time() + 60
     
     def send_with_data(
         self,
@@ -461,17 +550,43 @@ class LineNotifier:
         """
         Send LINE notification with formatted data
         
+        When an outbox is attached the message is queued and sent by its
+        background worker; otherwise it is sent on the calling thread.
+        
         Args:
             notification_type: Type of notification
             data: Data dictionary for formatting
             image_path: Path to image file to attach
             
         Returns:
-            True if notification was sent successfully
+            True if notification was sent (or queued) successfully
         """
+        if self.outbox is not None:
+            return self.outbox.enqueue_line(notification_type, data, image_path) is not None
+        
         message = self.formatter.format_message(notification_type, data)
         return self.send(message, notification_type, image_path)
     
+    def deliver_data(
+        self,
+        notification_type: LineNotificationType,
+        data: Dict[str, Any],
+        image_path: Optional[Path] = None
+    ) -> Dict[str, Any]:
+        """
+        Format and send LINE notification now
+        
+        Args:
+            notification_type: Type of notification
+            data: Data dictionary for formatting
+            image_path: Path to image file to attach
+            
+        Returns:
+            Outcome dictionary (see deliver)
+        """
+        message = self.formatter.format_message(notification_type, data)
+        return self.deliver(message, notification_type, image_path)
+    
     def send_processing_complete(
         self,
         session_name: str,
@@ -0,0 +1,501 @@
+"""
+Indexed Log Reader for Junmai AutoDev
+
+This module provides fast queries over the JSON-lines log files:
+- Reverse block reading from EOF for tail queries
+- Sidecar offset index per log (timestamp -> byte offset, level counts)
+- Index maintenance on write and rotation via IndexedRotatingFileHandler
+- Time-range and level-filtered queries across rotated files
+
+The sidecar (e.g. main.log.idx) describes the current file and each
+rotated backup. It is validated against the files on every query, so
+entries appended by other processes (Celery workers) are indexed
+incrementally and replaced files are re-indexed once.
+
+Requirements: 14.2, 14.4
+"""
+
+import os
+import json
+import logging
+import logging.handlers
+import pathlib
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+
+TimeValue = Union[str, float, int, datetime, None]
+
+
+def to_epoch(value: TimeValue) -> Optional[float]:
+    """
+    Convert an ISO string, datetime or epoch seconds to epoch seconds
+    
+    Args:
+        value: Time value
+    
+    Returns:
+        Epoch seconds or None
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(str(value)).timestamp()
+
+
+def read_lines_reverse(
+    path: Union[str, pathlib.Path],
+    start: int = 0,
+    end: Optional[int] = None,
+    block_size: int = 64 * 1024
+) -> Iterator[bytes]:
+    """
+    Yield lines of a file from last to first, reading blocks from the end
+    
+    Args:
+        path: File path
+        start: Byte offset where reading stops
+        end: Byte offset to start from (defaults to EOF)
+        block_size: Bytes read per block
+    
+    Yields:
+        Lines without line terminators (empty lines skipped)
+    """
+    with open(path, 'rb') as f:
+        if end is None:
+            f.seek(0, os.SEEK_END)
+            end = f.tell()
+        
+        position = end
+        remainder = b''
+        while position > start:
+            read_size = min(block_size, position - start)
+            position -= read_size
+            f.seek(position)
+            block = f.read(read_size) + remainder
+            lines = block.split(b'\n')
+            # The first piece may be a partial line continued in the previous block
+            remainder = lines[0]
+            for line in reversed(lines[1:]):
+                line = line.rstrip(b'\r')
+                if line:
+                    yield line
+        
+        remainder = remainder.rstrip(b'\r')
+        if remainder:
+            yield remainder
+
+
+def _parse_line(line: bytes) -> Optional[Dict[str, Any]]:
+    """Parse one JSON log line, None if malformed"""
+    try:
+        return json.loads(line)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def _entry_time(entry: Dict[str, Any]) -> Optional[float]:
+    """Get epoch timestamp of a parsed entry"""
+    try:
+        return to_epoch(entry.get('timestamp'))
+    except (TypeError, ValueError):
+        return None
+
+
+def _empty_file_index(inode: int = 0) -> Dict[str, Any]:
+    """Create an index entry for an empty file"""
+    return {
+        'inode': inode,
+        'bytes': 0,
+        'lines': 0,
+        'levels': {},
+        'first_ts': None,
+        'last_ts': None,
+        'checkpoints': []
+    }
+
+
+class LogIndex:
+    """
+    Sparse offset index of one log file and its rotated backups
+    
+    files[0] describes the active file, files[i] describes <log>.i.
+    Every checkpoint_every lines a (timestamp, offset) checkpoint is
+    recorded so time-range queries can seek instead of scanning.
+    """
+    
+    def __init__(
+        self,
+        log_path: Union[str, pathlib.Path],
+        backup_count: int = 5,
+        checkpoint_every: int = 256,
+        save_interval: float = 1.0
+    ):
+        """
+        Initialize log index and load the sidecar if present
+        
+        Args:
+            log_path: Path of the active log file
+            backup_count: Number of rotated backups kept by the handler
+            checkpoint_every: Lines between offset checkpoints
+            save_interval: Minimum seconds between sidecar writes
+        """
+        self.log_path = pathlib.Path(log_path)
+        self.index_path = self.log_path.with_name(self.log_path.name + '.idx')
+        self.backup_count = backup_count
+        self.checkpoint_every = checkpoint_every
+        self.save_interval = save_interval
+        
+        self.files: List[Dict[str, Any]] = [_empty_file_index()]
+        self._lock = threading.RLock()
+        self._last_save = 0.0
+        self._dirty = False
+        
+        self._load()
+    
+    def file_path(self, i: int) -> pathlib.Path:
+        """Get path of the i-th file (0 = active)"""
+        if i == 0:
+            return self.log_path
+        return self.log_path.with_name(f"{self.log_path.name}.{i}")
+    
+    def _load(self) -> None:
+        """Load sidecar index"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            files = data.get('files') or []
+            if files:
+                self.files = files
+        except (OSError, ValueError):
+            pass
+    
+    def save(self, force: bool = False) -> None:
+        """
+        Write sidecar index (rate limited unless forced)
+        
+        Args:
+            force: Write even if saved recently
+        """
+        with self._lock:
+            if not self._dirty and not force:
+                return
+            now = time.time()
+            if not force and now - self._last_save < self.save_interval:
+                return
+            
+            tmp_path = self.index_path.with_name(self.index_path.name + '.tmp')
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({'version': 1, 'files': self.files}, f)
+                os.replace(tmp_path, self.index_path)
+                self._last_save = now
+                self._dirty = False
+            except OSError:
+                pass
+    
+    def _add_line(self, entry: Dict[str, Any], offset: int, length: int,
+                  timestamp: Optional[float], level: Optional[str]) -> None:
+        """Account one line in a file index (lock held)"""
+        if entry['lines'] % self.checkpoint_every == 0 and timestamp is not None:
+            entry['checkpoints'].append([timestamp, offset])
+        entry['lines'] += 1
+        entry['bytes'] = offset + length
+        if level:
+            entry['levels'][level] = entry['levels'].get(level, 0) + 1
+        if timestamp is not None:
+            if entry['first_ts'] is None:
+                entry['first_ts'] = timestamp
+            entry['last_ts'] = timestamp
+        self._dirty = True
+    
+    def record_write(self, offset: int, length: int, timestamp: float, level: str) -> None:
+        """
+        Record a line written to the active file
+        
+        Args:
+            offset: Byte offset where the line starts
+            length: Line length in bytes including terminator
+            timestamp: Record time (epoch seconds)
+            level: Level name
+        """
+        with self._lock:
+            entry = self.files[0]
+            if entry['bytes'] != offset:
+                # Another writer appended; catch up before adding our line
+                self._refresh_file(0)
+                entry = self.files[0]
+                if entry['bytes'] != offset:
+                    return
+            self._add_line(entry, offset, length, timestamp, level)
+        self.save()
+    
+    def rotate(self) -> None:
+        """Shift index entries to mirror a file rotation"""
+        with self._lock:
+            self.files.insert(0, _empty_file_index())
+            del self.files[self.backup_count + 1:]
+            for i, entry in enumerate(self.files):
+                try:
+                    entry['inode'] = os.stat(self.file_path(i)).st_ino
+                except OSError:
+                    pass
+            self._dirty = True
+        self.save(force=True)
+    
+    def reset(self) -> None:
+        """Forget the active file (after it was cleared)"""
+        with self._lock:
+            self.files[0] = _empty_file_index()
+            self._dirty = True
+        self.save(force=True)
+    
+    def _scan(self, entry: Dict[str, Any], path: pathlib.Path, start: int, end: int) -> None:
+        """Index complete lines of path between start and end (lock held)"""
+        with open(path, 'rb') as f:
+            f.seek(start)
+            offset = start
+            while offset < end:
+                line = f.readline()
+                if not line or not line.endswith(b'\n'):
+                    # Partial line still being written
+                    break
+                parsed = _parse_line(line) or {}
+                self._add_line(
+                    entry, offset, len(line),
+                    _entry_time(parsed),
+                    parsed.get('level', 'INFO' if parsed else None)
+                )
+                offset += len(line)
+    
+    def _refresh_file(self, i: int) -> None:
+        """Validate one file entry against disk (lock held)"""
+        path = self.file_path(i)
+        while len(self.files) <= i:
+            self.files.append(_empty_file_index())
+        
+        try:
+            st = os.stat(path)
+        except OSError:
+            if self.files[i]['lines'] or self.files[i]['bytes']:
+                self.files[i] = _empty_file_index()
+                self._dirty = True
+            return
+        
+        entry = self.files[i]
+        if entry['inode'] != st.st_ino or st.st_size < entry['bytes']:
+            # Replaced or truncated file: rebuild its index once
+            entry = _empty_file_index(st.st_ino)
+            self.files[i] = entry
+            self._dirty = True
+        
+        if st.st_size > entry['bytes']:
+            self._scan(entry, path, entry['bytes'], st.st_size)
+    
+    def refresh(self) -> None:
+        """Bring the index up to date with the files on disk"""
+        with self._lock:
+            for i in range(self.backup_count + 1):
+                self._refresh_file(i)
+            del self.files[self.backup_count + 1:]
+        self.save()
+    
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Get a copy of the per-file index entries"""
+        with self._lock:
+            return [
+                dict(entry, levels=dict(entry['levels']), checkpoints=list(entry['checkpoints']))
+                for entry in self.files
+            ]
+    
+    @staticmethod
+    def seek_range(entry: Dict[str, Any], since: Optional[float],
+                   until: Optional[float]) -> Tuple[int, int]:
+        """
+        Get byte range of a file that can contain entries within [since, until]
+        
+        Args:
+            entry: File index entry
+            since: Lower time bound
+            until: Upper time bound
+        
+        Returns:
+            (start offset, end offset)
+        """
+        start, end = 0, entry['bytes']
+        for ts, offset in entry['checkpoints']:
+            if since is not None and ts < since:
+                start = offset
+            if until is not None and ts > until:
+                end = offset
+                break
+        return start, end
+
+
+class IndexedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    RotatingFileHandler that keeps a LogIndex up to date
+    
+    The stream is flushed after every record (as StreamHandler does), so
+    the file size before a write is the offset of the new line.
+    """
+    
+    def __init__(self, filename, maxBytes: int = 0, backupCount: int = 0,
+                 encoding: Optional[str] = None, checkpoint_every: int = 256):
+        super().__init__(filename, maxBytes=maxBytes, backupCount=backupCount, encoding=encoding)
+        self.index = LogIndex(self.baseFilename, backup_count=backupCount, checkpoint_every=checkpoint_every)
+        self.index.refresh()
+        self._newline_bytes = len(os.linesep) if self.terminator == '\n' else len(self.terminator)
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        """Write record and add it to the index"""
+        try:
+            msg = self.format(record)
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            
+            # Append-mode writes land at EOF, which may have moved if
+            # another process writes the same file
+            offset = os.fstat(self.stream.fileno()).st_size
+            self.stream.write(msg + self.terminator)
+            self.flush()
+            
+            length = len(msg.encode(self.encoding or 'utf-8')) + self._newline_bytes
+            self.index.record_write(offset, length, record.created, record.levelname)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+    
+    def doRollover(self) -> None:
+        """Rotate files and the index together"""
+        super().doRollover()
+        self.index.rotate()
+    
+    def close(self) -> None:
+        """Persist the index and close the file"""
+        self.index.save(force=True)
+        super().close()
+
+
+class LogQueryEngine:
+    """
+    Query interface over an indexed log and its rotated backups
+    """
+    
+    def __init__(self, index: LogIndex):
+        """
+        Initialize query engine
+        
+        Args:
+            index: LogIndex of the log to query
+        """
+        self.index = index
+    
+    def query(
+        self,
+        lines: int = 100,
+        level: Optional[str] = None,
+        since: TimeValue = None,
+        until: TimeValue = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the most recent entries matching the filters
+        
+        Files are visited newest first; files without matching levels or
+        outside the time range are skipped using the index, and the
+        remaining ones are read backwards from the nearest checkpoint.
+        
+        Args:
+            lines: Maximum entries to return
+            level: Only entries with this level
+            since: Only entries at or after this time
+            until: Only entries at or before this time
+        
+        Returns:
+            Matching entries in chronological order
+        """
+        level = level.upper() if level else None
+        since_ts = to_epoch(since)
+        until_ts = to_epoch(until)
+        
+        self.index.refresh()
+        files = self.index.snapshot()
+        
+        results: List[Dict[str, Any]] = []
+        for i, entry in enumerate(files):
+            if len(results) >= lines:
+                break
+            if not entry['lines']:
+                continue
+            if level and not entry['levels'].get(level):
+                continue
+            if since_ts is not None and entry['last_ts'] is not None and entry['last_ts'] < since_ts:
+                # Older files are older still
+                break
+            if until_ts is not None and entry['first_ts'] is not None and entry['first_ts'] > until_ts:
+                continue
+            
+            start, end = LogIndex.seek_range(entry, since_ts, until_ts)
+            
+            try:
+                for raw in read_lines_reverse(self.index.file_path(i), start, end):
+                    parsed = _parse_line(raw)
+                    if parsed is None:
+                        continue
+                    if level and parsed.get('level') != level:
+                        continue
+                    if since_ts is not None or until_ts is not None:
+                        ts = _entry_time(parsed)
+                        if ts is None:
+                            continue
+                        if since_ts is not None and ts < since_ts:
+                            break
+                        if until_ts is not None and ts > until_ts:
+                            continue
+                    results.append(parsed)
+                    if len(results) >= lines:
+                        break
+            except OSError:
+                continue
+        
+        results.reverse()
+        return results
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get statistics of the log and its backups from the index
+        
+        Returns:
+            Dictionary with totals and per-file line/level counts
+        """
+        self.index.refresh()
+        files = self.index.snapshot()
+        
+        levels: Dict[str, int] = {}
+        for entry in files:
+            for name, count in entry['levels'].items():
+                levels[name] = levels.get(name, 0) + count
+        
+        active = files[0] if files else _empty_file_index()
+        timestamps = [e['first_ts'] for e in files if e['first_ts'] is not None]
+        
+        return {
+            'line_count': active['lines'],
+            'file_size_bytes': active['bytes'],
+            'total_line_count': sum(e['lines'] for e in files),
+            'total_size_bytes': sum(e['bytes'] for e in files),
+            'levels': levels,
+            'oldest_entry': datetime.fromtimestamp(min(timestamps)).isoformat() if timestamps else None,
+            'newest_entry': (
+                datetime.fromtimestamp(active['last_ts']).isoformat() if active['last_ts'] else None
+            ),
+            'rotated_files': sum(1 for e in files[1:] if e['lines'])
+        }
@@ -7,6 +7,7 @@ This module provides comprehensive logging functionality including:
 - Log level filtering
 - JSON-formatted structured logs
 - Performance metrics tracking
+- Optional asynchronous mode (bounded queue, writes on a listener thread)
 
 Requirements: 14.2, 14.4
 """
@@ -14,12 +15,73 @@ Requirements: 14.2, 14.4
 import logging
 import logging.handlers
 import json
+import queue
+import atexit
 import pathlib
+import threading
 import time
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Callable
 from enum import Enum
 
+from log_index import IndexedRotatingFileHandler, LogQueryEngine
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+_json_encoder = json.JSONEncoder(ensure_ascii=False, default=str)
+
+
+def _encode_json(data: Dict[str, Any]) -> str:
+    """
+    Serialize a log entry to JSON
+    
+    Uses orjson when installed; non-serializable values are converted
+    with str() instead of failing the log call.
+    """
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        except TypeError:
+            pass
+    return _json_encoder.encode(data)
+
+
+class LazyField:
+    """
+    Log field evaluated only when the record is actually written
+    
+    Example:
+        logging_system.log("DEBUG", "Queue state", queue=LazyField(manager.snapshot))
+    """
+    __slots__ = ('fn',)
+    
+    def __init__(self, fn: Callable[[], Any]):
+        self.fn = fn
+    
+    def resolve(self) -> Any:
+        try:
+            return self.fn()
+        except Exception as e:
+            return f"<lazy field failed: {e}>"
+
+
+def _resolve_fields(fields: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Evaluate LazyField values in place
+    
+    Records may be formatted more than once (rotation checks format the
+    record before writing it), so resolved values replace the lazy ones.
+    """
+    for key, value in fields.items():
+        if isinstance(value, LazyField):
+            fields[key] = value.resolve()
+    return fields
+
 
 class LogCategory(Enum):
     """Log categories for structured logging"""
@@ -59,9 +121,9 @@ class StructuredFormatter(logging.Formatter):
         
         # Add extra fields if present
         if hasattr(record, 'extra_fields'):
-            log_data.update(record.extra_fields)
+            log_data.update(_resolve_fields(record.extra_fields))
         
-        return json.dumps(log_data, ensure_ascii=False)
+        return _encode_json(log_data)
 
 
 class PerformanceFormatter(logging.Formatter):
@@ -89,9 +151,79 @@ class PerformanceFormatter(logging.Formatter):
         
         # Add metrics if present
         if hasattr(record, 'metrics'):
-            log_data["metrics"] = record.metrics
+            log_data["metrics"] = _resolve_fields(record.metrics)
         
-        return json.dumps(log_data, ensure_ascii=False)
+        return _encode_json(log_data)
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that never blocks the caller on log I/O
+    
+    Records are enqueued unformatted; formatting happens on the listener
+    thread. Under overload, DEBUG records are sampled once the queue is
+    past its high-water mark, INFO records are dropped when it is full,
+    and WARNING and above wait briefly for space.
+    """
+    
+    def __init__(
+        self,
+        log_queue: queue.Queue,
+        high_water: float = 0.8,
+        debug_sample_rate: int = 10,
+        block_timeout: float = 0.5
+    ):
+        """
+        Initialize queue handler
+        
+        Args:
+            log_queue: Bounded queue shared with the listener
+            high_water: Queue fill ratio above which DEBUG is sampled
+            debug_sample_rate: Keep 1 of every N DEBUG records under overload
+            block_timeout: Seconds WARNING+ records may wait for space
+        """
+        super().__init__(log_queue)
+        self.high_water_size = max(1, int(log_queue.maxsize * high_water)) if log_queue.maxsize else 0
+        self.debug_sample_rate = max(1, debug_sample_rate)
+        self.block_timeout = block_timeout
+        self._debug_seen = 0
+        self.stats = {'enqueued': 0, 'dropped': 0, 'sampled_out': 0}
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Pass the record through unformatted (formatted by the listener)"""
+        return record
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Enqueue record applying the overload policy"""
+        if (record.levelno <= logging.DEBUG and self.high_water_size
+                and self.queue.qsize() >= self.high_water_size):
+            self._debug_seen += 1
+            if self._debug_seen % self.debug_sample_rate:
+                self.stats['sampled_out'] += 1
+                return
+        
+        try:
+            if record.levelno >= logging.WARNING:
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+            self.stats['enqueued'] += 1
+        except queue.Full:
+            self.stats['dropped'] += 1
+
+
+class _CategoryRouter(logging.Handler):
+    """Dispatches records from the listener to their logger's handlers"""
+    
+    def __init__(self, handlers: Dict[str, List[logging.Handler]]):
+        super().__init__()
+        self.handlers = handlers
+    
+    def handle(self, record: logging.LogRecord) -> bool:
+        for handler in self.handlers.get(record.name, ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        return True
 
 
 class LoggingSystem:
@@ -128,6 +260,15 @@ class LoggingSystem:
         # Ensure log directory exists
         self.log_dir.mkdir(parents=True, exist_ok=True)
         
+        # Output handlers per logger name (attached directly in sync mode,
+        # driven by the queue listener in async mode)
+        self._handlers: Dict[str, List[logging.Handler]] = {}
+        self._query_engines: Dict[str, LogQueryEngine] = {}
+        self._queue: Optional[queue.Queue] = None
+        self._queue_handler: Optional[BoundedQueueHandler] = None
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self._async_lock = threading.Lock()
+        
         # Initialize loggers
         self.main_logger = self._setup_logger(
             "junmai.main",
@@ -177,9 +318,9 @@ class LoggingSystem:
         # Remove existing handlers
         logger.handlers.clear()
         
-        # Create rotating file handler
+        # Create rotating file handler (maintains the offset index used by read_logs)
         log_path = self.log_dir / filename
-        handler = logging.handlers.RotatingFileHandler(
+        handler = IndexedRotatingFileHandler(
             log_path,
             maxBytes=self.max_bytes,
             backupCount=self.backup_count,
@@ -187,6 +328,8 @@ class LoggingSystem:
         )
         handler.setFormatter(formatter)
         logger.addHandler(handler)
+        self._handlers[name] = [handler]
+        self._query_engines[filename[:-len('.log')]] = LogQueryEngine(handler.index)
         
         return logger
     
@@ -199,6 +342,105 @@ class LoggingSystem:
         console_handler.setFormatter(console_formatter)
         console_handler.setLevel(self.log_level)
         self.main_logger.addHandler(console_handler)
+        self._handlers[self.main_logger.name].append(console_handler)
+    
+    def _loggers(self) -> List[logging.Logger]:
+        """Get all loggers managed by this system"""
+        return [self.main_logger, self.performance_logger, self.error_logger]
+    
+    def enable_async(
+        self,
+        queue_size: int = 10000,
+        debug_sample_rate: int = 10
+    ) -> None:
+        """
+        Switch to asynchronous logging
+        
+        Log calls only enqueue the record; formatting, file writes and
+        rotation run on a single listener thread.
+        
+        Args:
+            queue_size: Maximum records buffered before the overload policy applies
+            debug_sample_rate: Keep 1 of every N DEBUG records under overload
+        """
+        with self._async_lock:
+            if self._listener is not None:
+                return
+            
+            self._queue = queue.Queue(maxsize=queue_size)
+            self._queue_handler = BoundedQueueHandler(self._queue, debug_sample_rate=debug_sample_rate)
+            self._listener = logging.handlers.QueueListener(self._queue, _CategoryRouter(self._handlers))
+            
+            for logger in self._loggers():
+                for handler in self._handlers[logger.name]:
+                    logger.removeHandler(handler)
+                logger.addHandler(self._queue_handler)
+            
+            self._listener.start()
+            atexit.register(self.disable_async)
+    
+    def disable_async(self) -> None:
+        """Flush pending records and return to synchronous logging"""
+        with self._async_lock:
+            if self._listener is None:
+                return
+            
+            for logger in self._loggers():
+                logger.removeHandler(self._queue_handler)
+            
+            # Writes everything still queued before returning
+            self._listener.stop()
+            self._listener = None
+            
+            for logger in self._loggers():
+                for handler in self._handlers[logger.name]:
+                    logger.addHandler(handler)
+            
+            atexit.unregister(self.disable_async)
+    
+    def is_async(self) -> bool:
+        """Check whether asynchronous logging is enabled"""
+        return self._listener is not None
+    
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Wait until queued records have been written
+        
+        Args:
+            timeout: Maximum seconds to wait
+            
+        Returns:
+            True if the queue drained in time
+        """
+        log_queue = self._queue
+        if self._listener is not None and log_queue is not None:
+            deadline = time.time() + timeout
+            while log_queue.unfinished_tasks:
+                if time.time() >= deadline:
+                    return False
+                time.sleep(0.005)
+        
+        for handlers in self._handlers.values():
+            for handler in handlers:
+                handler.flush()
+        return True
+    
+    def get_queue_stats(self) -> Dict[str, Any]:
+        """
+        Get asynchronous logging statistics
+        
+        Returns:
+            Dictionary with queue depth, enqueued, dropped and sampled counts
+        """
+        if self._queue_handler is None or self._listener is None:
+            return {"async": False}
+        
+        return {
+            "async": True,
+            "queue_size": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            **self._queue_handler.stats
+        }
     
     def log(
         self,
@@ -219,6 +461,10 @@ class LoggingSystem:
         logger = self._get_logger(category)
         log_level = getattr(logging, level.upper(), logging.INFO)
         
+        # Filtered records cost nothing beyond this check
+        if not logger.isEnabledFor(log_level):
+            return
+        
         # Create log record with extra fields
         extra = {'extra_fields': extra_fields} if extra_fields else {}
         logger.log(log_level, message, extra=extra)
@@ -245,6 +491,9 @@ class LoggingSystem:
             message: Optional message
             **metrics: Additional metrics to log
         """
+        if not self.performance_logger.isEnabledFor(logging.INFO):
+            return
+        
         extra = {
             'operation': operation,
             'duration_ms': duration_ms,
@@ -319,51 +568,41 @@ class LoggingSystem:
         self,
         category: str = "main",
         lines: int = 100,
-        level_filter: Optional[str] = None
+        level_filter: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
         Read and parse log entries
         
+        Reads backwards from the end of the log and continues into rotated
+        files until enough entries match. Time bounds use the offset index
+        to seek instead of scanning whole files.
+        
         Args:
             category: Log category (main, performance, errors)
-            lines: Number of lines to read (from end)
+            lines: Number of entries to return (most recent)
             level_filter: Filter by log level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+            since: Only entries at or after this ISO timestamp
+            until: Only entries at or before this ISO timestamp
             
         Returns:
-            List of parsed log entries
+            List of parsed log entries in chronological order
         """
-        log_file = self.log_dir / f"{category}.log"
-        
-        if not log_file.exists():
+        engine = self._query_engines.get(category)
+        if engine is None:
             return []
         
-        entries = []
+        # Make queued records visible to readers
+        self.flush()
         
         try:
-            with open(log_file, 'r', encoding='utf-8') as f:
-                # Read all lines
-                all_lines = f.readlines()
-                
-                # Get last N lines
-                recent_lines = all_lines[-lines:] if len(all_lines) > lines else all_lines
-                
-                for line in recent_lines:
-                    try:
-                        entry = json.loads(line.strip())
-                        
-                        # Apply level filter if specified
-                        if level_filter and entry.get('level') != level_filter.upper():
-                            continue
-                        
-                        entries.append(entry)
-                    except json.JSONDecodeError:
-                        # Skip malformed lines
-                        continue
-        
+            return engine.query(lines=lines, level=level_filter, since=since, until=until)
+        except ValueError:
+            raise
         except Exception as e:
             self.log_error(f"Failed to read logs: {e}", exception=e)
-        
-        return entries
+            return []
     
     def clear_logs(self, category: Optional[str] = None) -> None:
         """
@@ -378,43 +617,46 @@ class LoggingSystem:
             log_file = self.log_dir / f"{cat}.log"
             if log_file.exists():
                 log_file.unlink()
+                if cat in self._query_engines:
+                    self._query_engines[cat].index.reset()
                 self.log("INFO", f"Cleared {cat} logs")
     
     def get_log_stats(self) -> Dict[str, Any]:
         """
         Get statistics about log files
         
+        Line and level counts come from the offset index, so only data
+        appended since the last call is read.
+        
         Returns:
             Dictionary with log statistics
         """
+        self.flush()
+        
         stats = {
             "log_directory": str(self.log_dir),
-            "categories": {}
+            "categories": {},
+            "queue": self.get_queue_stats()
         }
         
         for category in ["main", "performance", "errors"]:
             log_file = self.log_dir / f"{category}.log"
+            file_size = log_file.stat().st_size if log_file.exists() else 0
             
-            if log_file.exists():
-                file_size = log_file.stat().st_size
-                
-                # Count lines
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    line_count = sum(1 for _ in f)
-                
-                stats["categories"][category] = {
-                    "file_size_bytes": file_size,
-                    "file_size_mb": round(file_size / (1024 * 1024), 2),
-                    "line_count": line_count,
-                    "path": str(log_file)
-                }
-            else:
-                stats["categories"][category] = {
-                    "file_size_bytes": 0,
-                    "file_size_mb": 0,
-                    "line_count": 0,
-                    "path": str(log_file)
-                }
+            category_stats = {
+                "file_size_bytes": file_size,
+                "file_size_mb": round(file_size / (1024 * 1024), 2),
+                "line_count": 0,
+                "path": str(log_file)
+            }
+            
+            engine = self._query_engines.get(category)
+            if engine is not None:
+                index_stats = engine.stats()
+                index_stats.pop("file_size_bytes", None)
+                category_stats.update(index_stats)
+            
+            stats["categories"][category] = category_stats
         
         return stats
 
@@ -11,7 +11,14 @@ Manages multiple LLM models for the Junmai AutoDev system, including:
 Requirements: 18.1, 18.2, 18.3, 18.4
 """
 
+import os
+import copy
+import atexit
 import logging
+import sqlite3
+import tempfile
+import threading
+import weakref
 import requests
 import json
 import time
@@ -24,6 +31,20 @@ from enum import Enum
 logger = logging.getLogger(__name__)
 
 
+USAGE_FLUSH_INTERVAL_SECONDS = 5.0
+INFERENCE_TIME_EMA_ALPHA = 0.2  # Weight of the newest inference in avg_inference_time
+
+_USAGE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS model_usage (
+    model TEXT PRIMARY KEY,
+    usage_count INTEGER NOT NULL DEFAULT 0,
+    success_count INTEGER NOT NULL DEFAULT 0,
+    avg_inference_time REAL,
+    last_used TEXT
+);
+"""
+
+
 class ModelPurpose(Enum):
     """Model purpose categories."""
     SPEED = "speed"  # Fast inference, lower quality
@@ -64,6 +85,298 @@ class ModelMetadata:
         return cls(**data)
 
 
+class _UsageDelta:
+    """
+    Usage recorded in one process since the last flush.
+    
+    The inference times are kept as the terms of the exponential moving
+    average, so the delta can later be folded into whatever average the
+    database holds by then: new = decay * old + partial (or own_average
+    when there is no average yet).
+    """
+    
+    __slots__ = ('usage_count', 'success_count', 'last_used', 'own_average', 'decay', 'partial')
+    
+    def __init__(self):
+        self.usage_count = 0
+        self.success_count = 0
+        self.last_used: Optional[str] = None
+        self.own_average: Optional[float] = None  # Average of this delta alone (no prior value)
+        self.decay = 1.0
+        self.partial = 0.0
+    
+    def add(self, inference_time: float, success: bool) -> None:
+        """Record one inference."""
+        self.usage_count += 1
+        if success:
+            self.success_count += 1
+            if self.own_average is None:
+                self.own_average = inference_time
+            else:
+                self.own_average = (
+                    INFERENCE_TIME_EMA_ALPHA * inference_time +
+                    (1 - INFERENCE_TIME_EMA_ALPHA) * self.own_average
+                )
+            self.decay *= 1 - INFERENCE_TIME_EMA_ALPHA
+            self.partial = (1 - INFERENCE_TIME_EMA_ALPHA) * self.partial + INFERENCE_TIME_EMA_ALPHA * inference_time
+        self.last_used = datetime.now().isoformat()
+    
+    def merge(self, newer: '_UsageDelta') -> None:
+        """Append a delta recorded after this one."""
+        self.usage_count += newer.usage_count
+        self.success_count += newer.success_count
+        self.last_used = max(self.last_used or '', newer.last_used or '') or None
+        self.own_average = newer.apply(self.own_average)
+        self.partial = newer.decay * self.partial + newer.partial
+        self.decay *= newer.decay
+    
+    def apply(self, avg_inference_time: Optional[float]) -> Optional[float]:
+        """Fold the recorded inference times into an average."""
+        if self.own_average is None:
+            return avg_inference_time
+        if avg_inference_time is None:
+            return self.own_average
+        return self.decay * avg_inference_time + self.partial
+
+
+class ModelUsageStore:
+    """
+    Cross-process usage counters for models.
+    
+    record() only updates in-memory deltas. flush() adds the deltas to a
+    SQLite table in one transaction (additive upsert, so concurrent worker
+    processes never overwrite each other's counts) and reads back the
+    merged totals. avg_inference_time is an exponential moving average;
+    each flush folds the process's inference times into the stored value.
+    Deltas are flushed periodically and at exit.
+    """
+    
+    def __init__(self, db_path: str, flush_interval: float = USAGE_FLUSH_INTERVAL_SECONDS):
+        """
+        Initialize the usage store.
+        
+        Args:
+            db_path: SQLite file path
+            flush_interval: Maximum delay before recorded usage is flushed (seconds)
+        """
+        self.db_path = str(db_path)
+        self.flush_interval = flush_interval
+        
+        self._lock = threading.Lock()
+        self._pending: Dict[str, _UsageDelta] = {}
+        self._totals: Dict[str, Dict] = {}
+        self._timer: Optional[threading.Timer] = None
+        self._closed = False
+        
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_USAGE_SCHEMA)
+        self._totals = self._read_totals()
+        
+        _usage_stores.add(self)
+    
+    def _read_totals(self) -> Dict[str, Dict]:
+        """Read merged totals of all processes."""
+        rows = self._conn.execute(
+            "SELECT model, usage_count, success_count, avg_inference_time, last_used FROM model_usage"
+        ).fetchall()
+        return {
+            row[0]: {
+                'usage_count': row[1],
+                'success_count': row[2],
+                'avg_inference_time': row[3],
+                'last_used': row[4]
+            }
+            for row in rows
+        }
+    
+    def seed(self, usage: Dict[str, Dict]) -> None:
+        """
+        Create rows for models that have no usage row yet.
+        
+        Used to carry over statistics stored in the JSON metadata file.
+        
+        Args:
+            usage: Model name -> totals (usage_count, success_count,
+                avg_inference_time, last_used)
+        """
+        rows = [
+            (name, values['usage_count'], values['success_count'],
+             values['avg_inference_time'], values.get('last_used'))
+            for name, values in usage.items()
+            if values.get('usage_count')
+        ]
+        if not rows:
+            return
+        
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO model_usage "
+                    "(model, usage_count, success_count, avg_inference_time, last_used) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._totals = self._read_totals()
+    
+    def replace(self, model_name: str, values: Dict) -> None:
+        """
+        Overwrite the totals of a model (e.g. on metadata import).
+        
+        Args:
+            model_name: Model name
+            values: Totals (usage_count, success_count, avg_inference_time, last_used)
+        """
+        with self._lock:
+            self._pending.pop(model_name, None)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO model_usage "
+                "(model, usage_count, success_count, avg_inference_time, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (model_name, values['usage_count'], values['success_count'],
+                 values['avg_inference_time'], values.get('last_used'))
+            )
+            self._totals[model_name] = dict(values)
+    
+    def record(self, model_name: str, inference_time: float, success: bool) -> None:
+        """
+        Record one inference in memory.
+        
+        Args:
+            model_name: Model name
+            inference_time: Time taken for inference (seconds)
+            success: Whether inference was successful
+        """
+        with self._lock:
+            delta = self._pending.get(model_name)
+            if delta is None:
+                delta = self._pending[model_name] = _UsageDelta()
+            delta.add(inference_time, success)
+            
+            if self._timer is None and not self._closed:
+                self._timer = threading.Timer(self.flush_interval, self._timed_flush)
+                self._timer.daemon = True
+                self._timer.start()
+    
+    def totals(self, model_name: str) -> Optional[Dict]:
+        """
+        Get the totals of a model including unflushed usage.
+        
+        Args:
+            model_name: Model name
+        
+        Returns:
+            Totals dictionary or None if the model has never been used
+        """
+        with self._lock:
+            base = self._totals.get(model_name)
+            delta = self._pending.get(model_name)
+        
+        if base is None and delta is None:
+            return None
+        
+        totals = dict(base) if base else {
+            'usage_count': 0, 'success_count': 0, 'avg_inference_time': None, 'last_used': None
+        }
+        if delta:
+            totals['usage_count'] += delta.usage_count
+            totals['success_count'] += delta.success_count
+            totals['avg_inference_time'] = delta.apply(totals['avg_inference_time'])
+            totals['last_used'] = max(totals['last_used'] or '', delta.last_used)
+        return totals
+    
+    def _timed_flush(self) -> None:
+        """Flush timer callback."""
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush model usage {self.db_path}: {e}")
+    
+    def flush(self) -> int:
+        """
+        Add pending usage to the database and reload merged totals.
+        
+        Returns:
+            Number of models written
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            
+            if self._closed:
+                return 0
+            
+            pending = self._pending
+            self._pending = {}
+            
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                if pending:
+                    self._conn.executemany(
+                        "INSERT INTO model_usage "
+                        "(model, usage_count, success_count, avg_inference_time, last_used) "
+                        "VALUES (?, ?, ?, ?, ?) "
+                        "ON CONFLICT(model) DO UPDATE SET "
+                        "usage_count = usage_count + excluded.usage_count, "
+                        "success_count = success_count + excluded.success_count, "
+                        "avg_inference_time = CASE "
+                        "WHEN ? IS NULL THEN avg_inference_time "
+                        "WHEN avg_inference_time IS NULL THEN excluded.avg_inference_time "
+                        "ELSE ? * avg_inference_time + ? END, "
+                        "last_used = MAX(COALESCE(last_used, ''), excluded.last_used)",
+                        [
+                            (name, delta.usage_count, delta.success_count, delta.own_average,
+                             delta.last_used, delta.own_average, delta.decay, delta.partial)
+                            for name, delta in pending.items()
+                        ]
+                    )
+                self._totals = self._read_totals()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                # Keep usage recorded while we were flushing
+                for name, delta in self._pending.items():
+                    pending.setdefault(name, _UsageDelta()).merge(delta)
+                self._pending = pending
+                raise
+            
+            return len(pending)
+    
+    def close(self) -> None:
+        """Flush pending usage and close the database."""
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush model usage {self.db_path} on close: {e}")
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._conn.close()
+
+
+_usage_stores: "weakref.WeakSet[ModelUsageStore]" = weakref.WeakSet()
+
+
+def _flush_usage_stores() -> None:
+    """Flush every open usage store (registered with atexit)."""
+    for store in list(_usage_stores):
+        try:
+            store.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush model usage {store.db_path}: {e}")
+
+
+atexit.register(_flush_usage_stores)
+
+
 class ModelManager:
     """
     Multi-model management system for LLM models.
@@ -143,7 +456,8 @@ class ModelManager:
     def __init__(
         self,
         ollama_host: str = "http://localhost:11434",
-        metadata_file: str = "data/model_metadata.json"
+        metadata_file: str = "data/model_metadata.json",
+        usage_file: Optional[str] = None
     ):
         """
         Initialize Model Manager.
@@ -151,6 +465,8 @@ class ModelManager:
         Args:
             ollama_host: Ollama server host URL
             metadata_file: Path to model metadata storage file
+            usage_file: Path to the usage counter database
+                (default: <metadata_file stem>_usage.db next to metadata_file)
         """
         self.ollama_host = ollama_host
         self.metadata_file = Path(metadata_file)
@@ -160,6 +476,16 @@ class ModelManager:
         # Load metadata
         self._load_metadata()
         
+        # Usage counters (authoritative over the usage fields in the JSON file)
+        if usage_file is None:
+            usage_file = self.metadata_file.with_name(f"{self.metadata_file.stem}_usage.db")
+        self.usage = ModelUsageStore(usage_file)
+        self.usage.seed({
+            name: self._usage_from_metadata(metadata)
+            for name, metadata in self.models.items()
+        })
+        self._apply_usage()
+        
         # Sync with Ollama
         self._sync_with_ollama()
         
@@ -189,16 +515,23 @@ class ModelManager:
     
     def _initialize_default_metadata(self):
         """Initialize with default model catalog."""
-        self.models = self.MODEL_CATALOG.copy()
+        self.models = copy.deepcopy(self.MODEL_CATALOG)
         self.current_model = "llama3.1:8b-instruct"
         logger.info("Initialized with default model catalog")
     
     def _save_metadata(self):
-        """Save model metadata to file."""
+        """
+        Save model metadata to file.
+        
+        The file is replaced atomically (temp file + rename) so concurrent
+        readers never see a partial file. Called only when catalog state
+        changes; usage statistics are persisted by ModelUsageStore.
+        """
         try:
             # Ensure directory exists
             self.metadata_file.parent.mkdir(parents=True, exist_ok=True)
             
+            self._apply_usage()
             data = {
                 'current_model': self.current_model,
                 'models': {
@@ -208,26 +541,83 @@ class ModelManager:
                 'last_updated': datetime.now().isoformat()
             }
             
-            with open(self.metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            fd, temp_path = tempfile.mkstemp(
+                dir=self.metadata_file.parent,
+                prefix=f".{self.metadata_file.name}.",
+                suffix=".tmp"
+            )
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=2, ensure_ascii=False)
+                os.replace(temp_path, self.metadata_file)
+            except BaseException:
+                Path(temp_path).unlink(missing_ok=True)
+                raise
             
             logger.debug("Metadata saved")
         
         except Exception as e:
             logger.error(f"Error saving metadata: {e}")
     
+    @staticmethod
+    def _usage_from_metadata(metadata: ModelMetadata) -> Dict:
+        """Convert the usage fields of a metadata entry to usage totals."""
+        return {
+            'usage_count': metadata.usage_count,
+            'success_count': int(round((metadata.success_rate or 0.0) * metadata.usage_count)),
+            'avg_inference_time': metadata.avg_inference_time,
+            'last_used': metadata.last_used
+        }
+    
+    def _apply_usage(self, model_name: Optional[str] = None):
+        """
+        Copy usage totals into the model metadata.
+        
+        Args:
+            model_name: Model to update (default: all models)
+        """
+        names = [model_name] if model_name else list(self.models)
+        for name in names:
+            totals = self.usage.totals(name)
+            if totals is None or name not in self.models:
+                continue
+            model = self.models[name]
+            model.usage_count = totals['usage_count']
+            model.last_used = max(model.last_used or '', totals['last_used'] or '') or None
+            model.success_rate = (
+                totals['success_count'] / totals['usage_count']
+                if totals['usage_count'] else None
+            )
+            model.avg_inference_time = totals['avg_inference_time']
+    
+    def flush_usage(self) -> int:
+        """
+        Flush recorded usage and load the totals merged across processes.
+        
+        Returns:
+            Number of models written
+        """
+        written = self.usage.flush()
+        self._apply_usage()
+        return written
+    
     def _sync_with_ollama(self):
         """Sync model list with Ollama server."""
         try:
             installed_models = self.list_installed_models()
+            changed = False
             
             # Update installed status
             for model_name in self.models:
-                self.models[model_name].installed = model_name in installed_models
+                installed = model_name in installed_models
+                if self.models[model_name].installed != installed:
+                    self.models[model_name].installed = installed
+                    changed = True
             
             # Add any new models found in Ollama
             for model_name in installed_models:
                 if model_name not in self.models:
+                    changed = True
                     # Create basic metadata for unknown models
                     self.models[model_name] = ModelMetadata(
                         name=model_name,
@@ -240,7 +630,8 @@ class ModelManager:
                         installed=True
                     )
             
-            self._save_metadata()
+            if changed:
+                self._save_metadata()
             logger.info(f"Synced with Ollama: {len(installed_models)} models installed")
         
         except Exception as e:
@@ -487,6 +878,9 @@ class ModelManager:
         """
         Record model usage statistics.
         
+        Only in-memory counters are updated; they are flushed to the usage
+        database periodically (see ModelUsageStore).
+        
         Args:
             model_name: Model name
             inference_time: Time taken for inference (seconds)
@@ -495,36 +889,8 @@ class ModelManager:
         if model_name not in self.models:
             return
         
-        model = self.models[model_name]
-        
-        # Update usage count
-        model.usage_count += 1
-        
-        # Update last used
-        model.last_used = datetime.now().isoformat()
-        
-        # Update average inference time
-        if success:
-            if model.avg_inference_time is None:
-                model.avg_inference_time = inference_time
-            else:
-                # Exponential moving average
-                alpha = 0.2
-                model.avg_inference_time = (
-                    alpha * inference_time +
-                    (1 - alpha) * model.avg_inference_time
-                )
-        
-        # Update success rate
-        if model.success_rate is None:
-            model.success_rate = 1.0 if success else 0.0
-        else:
-            # Update success rate
-            total_attempts = model.usage_count
-            successful_attempts = int(model.success_rate * (total_attempts - 1)) + (1 if success else 0)
-            model.success_rate = successful_attempts / total_attempts
-        
-        self._save_metadata()
+        self.usage.record(model_name, inference_time, success)
+        self._apply_usage(model_name)
     
     def get_model_statistics(self, model_name: str) -> Optional[Dict]:
         """
@@ -539,6 +905,7 @@ class ModelManager:
         if model_name not in self.models:
             return None
         
+        self._apply_usage(model_name)
         model = self.models[model_name]
         
         return {
@@ -586,6 +953,7 @@ class ModelManager:
         }
         
         purpose = purpose_map.get(priority, ModelPurpose.BALANCED)
+        self._apply_usage()
         
         # Get models that fit in VRAM and match purpose
         candidates = self.list_available_models(
@@ -672,6 +1040,7 @@ class ModelManager:
             output_file: Output file path
         """
         try:
+            self._apply_usage()
             data = {
                 'current_model': self.current_model,
                 'models': {
@@ -703,6 +1072,7 @@ class ModelManager:
             # Import models
             for model_name, model_data in data.get('models', {}).items():
                 self.models[model_name] = ModelMetadata.from_dict(model_data)
+                self.usage.replace(model_name, self._usage_from_metadata(self.models[model_name]))
             
             # Import current model if valid
             current = data.get('current_model')
@@ -5,8 +5,10 @@ from .database import (
     Photo,
     Job,
     Preset,
+    PresetContextTag,
     Statistic,
     LearningData,
+    LearningAdjustment,
     init_db,
     get_session
 )
@@ -17,8 +19,10 @@ __all__ = [
     'Photo',
     'Job',
     'Preset',
+    'PresetContextTag',
     'Statistic',
     'LearningData',
+    'LearningAdjustment',
     'init_db',
     'get_session'
 ]
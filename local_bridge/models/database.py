@@ -196,6 +196,9 @@ class Preset(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
+    # Relationships
+    tag_links = relationship('PresetContextTag', back_populates='preset', cascade='all, delete-orphan')
+    
     def __repr__(self):
         return f"<Preset(id={self.id}, name='{self.name}', version='{self.version}')>"
     
@@ -204,8 +207,13 @@ class Preset(Base):
         return json.loads(self.context_tags) if self.context_tags else []
     
     def set_context_tags(self, tags_list):
-        """Set context tags from list"""
+        """Set context tags from list (also updates the normalized rows)"""
         self.context_tags = json.dumps(tags_list, ensure_ascii=False)
+        existing = {link.tag: link for link in self.tag_links}
+        self.tag_links = [
+            existing.get(tag) or PresetContextTag(tag=tag)
+            for tag in dict.fromkeys(tags_list)
+        ]
     
     def get_config_template(self):
         """Parse and return config template"""
@@ -216,6 +224,20 @@ class Preset(Base):
         self.config_template = json.dumps(config_dict, ensure_ascii=False)
 
 
+class PresetContextTag(Base):
+    """プリセットとコンテキストタグの対応テーブル（タグ検索用）"""
+    __tablename__ = 'preset_context_tags'
+    
+    preset_id = Column(Integer, ForeignKey('presets.id'), primary_key=True)
+    tag = Column(String(100), primary_key=True)
+    
+    # Relationships
+    preset = relationship('Preset', back_populates='tag_links')
+    
+    def __repr__(self):
+        return f"<PresetContextTag(preset_id={self.preset_id}, tag='{self.tag}')>"
+
+
 class Statistic(Base):
     """統計データテーブル"""
     __tablename__ = 'statistics'
@@ -264,6 +286,7 @@ class LearningData(Base):
     
     # Relationships
     photo = relationship('Photo', back_populates='learning_data')
+    adjustments = relationship('LearningAdjustment', back_populates='learning_data', cascade='all, delete-orphan')
     
     def __repr__(self):
         return f"<LearningData(id={self.id}, photo_id={self.photo_id}, action='{self.action}')>"
@@ -273,8 +296,34 @@ class LearningData(Base):
         return json.loads(self.parameter_adjustments) if self.parameter_adjustments else {}
     
     def set_parameter_adjustments(self, adjustments_dict):
-        """Set parameter adjustments from dictionary"""
+        """Set parameter adjustments from dictionary (also updates the normalized rows)"""
         self.parameter_adjustments = json.dumps(adjustments_dict, ensure_ascii=False)
+        self.adjustments = LearningAdjustment.from_dict(adjustments_dict)
+
+
+class LearningAdjustment(Base):
+    """学習データのパラメータ調整値テーブル（1パラメータ1行、集計用）"""
+    __tablename__ = 'learning_adjustments'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    learning_id = Column(Integer, ForeignKey('learning_data.id'), nullable=False)
+    param = Column(String(100), nullable=False)
+    value = Column(Float, nullable=False)
+    
+    # Relationships
+    learning_data = relationship('LearningData', back_populates='adjustments')
+    
+    def __repr__(self):
+        return f"<LearningAdjustment(learning_id={self.learning_id}, param='{self.param}', value={self.value})>"
+    
+    @staticmethod
+    def from_dict(adjustments_dict):
+        """Build rows for the numeric values of an adjustments dictionary"""
+        return [
+            LearningAdjustment(param=param, value=float(value))
+            for param, value in (adjustments_dict or {}).items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool)
+        ]
 
 
 class PhotoGroup(Base):
@@ -334,6 +383,7 @@ class ABTest(Base):
     preset_a = relationship('Preset', foreign_keys=[preset_a_id])
     preset_b = relationship('Preset', foreign_keys=[preset_b_id])
     assignments = relationship('ABTestAssignment', back_populates='ab_test', cascade='all, delete-orphan')
+    variant_stats = relationship('ABTestVariantStats', back_populates='ab_test', cascade='all, delete-orphan')
     
     def __repr__(self):
         return f"<ABTest(id={self.id}, name='{self.name}', status='{self.status}')>"
@@ -397,6 +447,45 @@ class ABTestAssignment(Base):
         }
 
 
+class ABTestVariantStats(Base):
+    """A/Bテストのバリアント別集計テーブル（十分統計量）"""
+    __tablename__ = 'ab_test_variant_stats'
+    
+    test_id = Column(Integer, ForeignKey('ab_tests.id'), primary_key=True)
+    variant = Column(
+        String(1),
+        CheckConstraint("variant IN ('A', 'B')"),
+        primary_key=True
+    )
+    assignments = Column(Integer, default=0, nullable=False)
+    results = Column(Integer, default=0, nullable=False)
+    approvals = Column(Integer, default=0, nullable=False)
+    time_count = Column(Integer, default=0, nullable=False)
+    time_sum = Column(Float, default=0.0, nullable=False)
+    time_sumsq = Column(Float, default=0.0, nullable=False)
+    sequential_max_ratio = Column(Float, default=1.0, nullable=False)  # このバリアントが優勢な間の逐次検定の尤度比の最大値
+    
+    # Relationships
+    ab_test = relationship('ABTest', back_populates='variant_stats')
+    
+    def __repr__(self):
+        return f"<ABTestVariantStats(test_id={self.test_id}, variant='{self.variant}', results={self.results})>"
+    
+    def to_dict(self):
+        """Convert variant statistics to dictionary"""
+        return {
+            'test_id': self.test_id,
+            'variant': self.variant,
+            'assignments': self.assignments,
+            'results': self.results,
+            'approvals': self.approvals,
+            'time_count': self.time_count,
+            'time_sum': self.time_sum,
+            'time_sumsq': self.time_sumsq,
+            'sequential_max_ratio': self.sequential_max_ratio
+        }
+
+
 class DesktopNotification(Base):
     """デスクトップ通知履歴テーブル"""
     __tablename__ = 'desktop_notifications'
@@ -479,14 +568,21 @@ Index('idx_photos_session', Photo.session_id)
 Index('idx_photos_status', Photo.status)
 Index('idx_photos_group', Photo.photo_group_id)
 Index('idx_photos_phash', Photo.phash)
+Index('idx_photos_file_name', Photo.file_name, Photo.file_size)
+Index('idx_photos_approval_queue', Photo.status, Photo.approved, Photo.ai_score, Photo.session_id)
 Index('idx_jobs_status', Job.status)
 Index('idx_jobs_priority', Job.priority)
 Index('idx_statistics_date', Statistic.date)
+Index('idx_preset_context_tags_tag', PresetContextTag.tag)
+Index('idx_learning_data_timestamp', LearningData.timestamp)
+Index('idx_learning_data_preset', LearningData.original_preset, LearningData.timestamp)
+Index('idx_learning_adjustments_learning', LearningAdjustment.learning_id)
 Index('idx_photo_groups_session', PhotoGroup.session_id)
 Index('idx_ab_tests_status', ABTest.status)
 Index('idx_ab_test_assignments_test', ABTestAssignment.test_id)
 Index('idx_ab_test_assignments_photo', ABTestAssignment.photo_id)
 Index('idx_ab_test_assignments_variant', ABTestAssignment.variant)
+Index('idx_ab_test_assignments_test_photo', ABTestAssignment.test_id, ABTestAssignment.photo_id)
 Index('idx_desktop_notifications_type', DesktopNotification.notification_type)
 Index('idx_desktop_notifications_priority', DesktopNotification.priority)
 Index('idx_desktop_notifications_sent_at', DesktopNotification.sent_at)
@@ -0,0 +1,550 @@
+"""
+Notification Outbox for Junmai AutoDev
+通知アウトボックス
+
+Persistent queue between request handlers and the email/LINE notifiers:
+- Enqueueing is a single SQLite INSERT; delivery runs on a background worker
+- A burst of emails shares one SMTP connection
+- Notifications of the same type within the coalesce window are sent as
+  one digest
+- LINE rate limits reschedule messages instead of dropping them
+- Undelivered notifications survive restarts and failed deliveries are
+  retried with exponential backoff
+
+Requirements: 8.1, 8.2
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import logging
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+
+from email_notifier import EmailNotifier, EmailNotificationType, get_email_notifier
+from line_notifier import LineNotifier, LineNotificationType, get_line_notifier
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_EMAIL = 'email'
+CHANNEL_LINE = 'line'
+
+# Notification types delivered right away instead of being coalesced
+IMMEDIATE_TYPES = frozenset({'error'})
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel TEXT NOT NULL,
+    notification_type TEXT NOT NULL,
+    group_key TEXT,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    available_at REAL NOT NULL,
+    sent_at REAL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_status_available ON outbox (status, available_at);
+"""
+
+
+class NotificationOutbox:
+    """
+    Persistent notification queue drained by a background worker
+    
+    Rows move pending -> sending -> sent/skipped/failed. Rows left in
+    'sending' by a crashed process are returned to 'pending' on startup.
+    """
+    
+    def __init__(
+        self,
+        db_path: str = 'data/notification_outbox.db',
+        email_notifier: Optional[EmailNotifier] = None,
+        line_notifier: Optional[LineNotifier] = None,
+        coalesce_window: float = 30.0,
+        poll_interval: float = 1.0,
+        max_attempts: int = 5,
+        retry_base_delay: float = 30.0,
+        batch_limit: int = 100
+    ):
+        """
+        Initialize notification outbox
+        
+        Args:
+            db_path: Path to the SQLite queue database
+            email_notifier: Email notifier (default: singleton)
+            line_notifier: LINE notifier (default: singleton)
+            coalesce_window: Seconds to collect same-type notifications into a digest (0 = off)
+            poll_interval: Seconds between worker polls
+            max_attempts: Delivery attempts before a notification is marked failed
+            retry_base_delay: Delay before the first retry (doubled on each attempt)
+            batch_limit: Maximum notifications claimed per poll
+        """
+        self.db_path = str(db_path)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.email_notifier = email_notifier or get_email_notifier()
+        self.line_notifier = line_notifier or get_line_notifier()
+        self.coalesce_window = coalesce_window
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.batch_limit = batch_limit
+        
+        self._local = threading.local()
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._process_lock = threading.Lock()
+        
+        conn = self._connection()
+        conn.executescript(_SCHEMA)
+        
+        recovered = conn.execute(
+            "UPDATE outbox SET status = 'pending' WHERE status = 'sending'"
+        ).rowcount
+        if recovered:
+            logger.info(f"Recovered {recovered} notifications interrupted during delivery")
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Get the connection of the current thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def enqueue_email(
+        self,
+        notification_type: EmailNotificationType,
+        data: Dict[str, Any],
+        to_addresses: Optional[List[str]] = None
+    ) -> Optional[int]:
+        """
+        Queue a templated email
+        
+        Args:
+            notification_type: Type of notification
+            data: Template data dictionary
+            to_addresses: List of recipient email addresses (None = use config)
+        
+        Returns:
+            Outbox row ID, or None if the notification could not be queued
+        """
+        payload = {'data': data, 'to_addresses': to_addresses}
+        group_key = json.dumps(sorted(to_addresses)) if to_addresses else ''
+        return self._enqueue(CHANNEL_EMAIL, notification_type.value, payload, group_key)
+    
+    def enqueue_line(
+        self,
+        notification_type: LineNotificationType,
+        data: Dict[str, Any],
+        image_path: Optional[Path] = None
+    ) -> Optional[int]:
+        """
+        Queue a LINE message
+        
+        Messages with an image are never merged into a digest.
+        
+        Args:
+            notification_type: Type of notification
+            data: Data dictionary for formatting
+            image_path: Path to image file to attach
+        
+        Returns:
+            Outbox row ID, or None if the notification could not be queued
+        """
+        payload = {'data': data, 'image_path': str(image_path) if image_path else None}
+        group_key = None if image_path else ''
+        return self._enqueue(CHANNEL_LINE, notification_type.value, payload, group_key)
+    
+    def _enqueue(
+        self,
+        channel: str,
+        notification_type: str,
+        payload: Dict[str, Any],
+        group_key: Optional[str]
+    ) -> Optional[int]:
+        """
+        Insert a pending notification
+        
+        Coalescable notifications join the pending group of the same channel,
+        type and recipients, so the whole group becomes due together. Other
+        notifications get no group key and are always sent on their own.
+        
+        Returns:
+            Outbox row ID, or None on error
+        """
+        now = time.time()
+        coalesce = (
+            self.coalesce_window > 0
+            and group_key is not None
+            and notification_type not in IMMEDIATE_TYPES
+        )
+        if not coalesce:
+            group_key = None
+        
+        try:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                available_at = now
+                if coalesce:
+                    row = conn.execute(
+                        """
+                        SELECT MIN(available_at) FROM outbox
+                        WHERE status = 'pending' AND channel = ?
+                          AND notification_type = ? AND group_key = ?
+                        """,
+                        (channel, notification_type, group_key)
+                    ).fetchone()
+                    available_at = row[0] if row[0] is not None else now + self.coalesce_window
+                
+                cursor = conn.execute(
+                    """
+                    INSERT INTO outbox (channel, notification_type, group_key, payload,
+                                        created_at, available_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    (channel, notification_type, group_key,
+                     json.dumps(payload, ensure_ascii=False, default=str), now, available_at)
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        except Exception as e:
+            logger.error(f"Failed to queue {channel} notification: {e}")
+            return None
+        
+        if available_at <= now:
+            self._wakeup.set()
+        
+        return cursor.lastrowid
+    
+    def _claim_due(self, now: float) -> List[sqlite3.Row]:
+        """
+        Atomically mark due notifications as 'sending'
+        
+        Args:
+            now: Current time (epoch seconds)
+        
+        Returns:
+            Claimed rows, oldest first
+        """
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                """
+                SELECT * FROM outbox
+                WHERE status = 'pending' AND available_at <= ?
+                ORDER BY available_at, id
+                LIMIT ?
+                """,
+                (now, self.batch_limit)
+            ).fetchall()
+            if rows:
+                conn.executemany(
+                    "UPDATE outbox SET status = 'sending', attempts = attempts + 1 WHERE id = ?",
+                    [(row['id'],) for row in rows]
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return rows
+    
+    @staticmethod
+    def _group(rows: List[sqlite3.Row]) -> List[List[sqlite3.Row]]:
+        """Group claimed rows that are sent as one digest"""
+        groups: Dict[Tuple, List[sqlite3.Row]] = {}
+        for row in rows:
+            if row['group_key'] is None:
+                key = ('single', row['id'])
+            else:
+                key = (row['channel'], row['notification_type'], row['group_key'])
+            groups.setdefault(key, []).append(row)
+        return list(groups.values())
+    
+    def process_due(self, now: Optional[float] = None) -> Dict[str, int]:
+        """
+        Deliver all due notifications
+        
+        Emails share one SMTP connection. After a LINE rate limit the
+        remaining LINE notifications are rescheduled for when it resets.
+        
+        Args:
+            now: Current time (epoch seconds, default: time.time())
+        
+        Returns:
+            Dictionary with counts of sent, skipped, retried, failed and
+            rescheduled notifications
+        """
+        now = time.time() if now is None else now
+        stats = {'sent': 0, 'skipped': 0, 'retried': 0, 'failed': 0, 'rescheduled': 0}
+        
+        with self._process_lock:
+            rows = self._claim_due(now)
+            if not rows:
+                return stats
+            
+            groups = self._group(rows)
+            email_groups = [g for g in groups if g[0]['channel'] == CHANNEL_EMAIL]
+            line_groups = [g for g in groups if g[0]['channel'] == CHANNEL_LINE]
+            
+            if email_groups:
+                with self.email_notifier.smtp_session() as session:
+                    for group in email_groups:
+                        status = self._deliver_email(group, session)
+                        self._record(group, status, now, stats)
+            
+            line_retry_at = None
+            for group in line_groups:
+                if line_retry_at is not None:
+                    self._reschedule(group, line_retry_at, stats)
+                    continue
+                
+                result = self._deliver_line(group)
+                if result['status'] == 'rate_limited':
+                    line_retry_at = result.get('retry_at') or now + 60
+                    logger.info(f"LINE rate limited, rescheduling until {line_retry_at:.0f}")
+                    self._reschedule(group, line_retry_at, stats)
+                else:
+                    self._record(group, result['status'], now, stats)
+        
+        return stats
+    
+    def _deliver_email(self, group: List[sqlite3.Row], session) -> str:
+        """
+        Send one email, or a digest for several notifications
+        
+        Returns:
+            'sent', 'skipped' or 'failed'
+        """
+        notifier = self.email_notifier
+        notification_type = EmailNotificationType(group[0]['notification_type'])
+        payloads = [json.loads(row['payload']) for row in group]
+        to_addresses = payloads[0].get('to_addresses')
+        
+        try:
+            if len(group) == 1:
+                return notifier.deliver_template(
+                    notification_type, payloads[0]['data'], to_addresses, session=session
+                )
+            
+            notifications = []
+            for payload in payloads:
+                rendered = notifier.render_template(notification_type, payload['data'])
+                if rendered is not None:
+                    notifications.append({'type': notification_type.value, 'message': rendered[0]})
+            
+            if not notifications:
+                return 'failed'
+            
+            subject, html_body, text_body = notifier.batch_manager.build_digest(notifications)
+            return notifier.deliver(
+                to_addresses, subject, html_body, text_body, notification_type, session=session
+            )
+        except Exception as e:
+            logger.error(f"Failed to deliver email notification: {e}")
+            return 'failed'
+    
+    def _deliver_line(self, group: List[sqlite3.Row]) -> Dict[str, Any]:
+        """
+        Send one LINE message, or a digest for several notifications
+        
+        Returns:
+            Outcome dictionary from LineNotifier.deliver
+        """
+        notifier = self.line_notifier
+        notification_type = LineNotificationType(group[0]['notification_type'])
+        payloads = [json.loads(row['payload']) for row in group]
+        
+        try:
+            if len(group) == 1:
+                image_path = payloads[0].get('image_path')
+                return notifier.deliver_data(
+                    notification_type, payloads[0]['data'], Path(image_path) if image_path else None
+                )
+            
+            messages = [
+                notifier.formatter.format_message(notification_type, payload['data'])
+                for payload in payloads
+            ]
+            digest = notifier.formatter.format_digest(notification_type, messages)
+            return notifier.deliver(digest, notification_type)
+        except Exception as e:
+            logger.error(f"Failed to deliver LINE notification: {e}")
+            return {'status': 'failed', 'retry_at': None}
+    
+    def _record(self, group: List[sqlite3.Row], status: str, now: float, stats: Dict[str, int]) -> None:
+        """Store the delivery outcome of a group"""
+        conn = self._connection()
+        ids = [(row['id'],) for row in group]
+        
+        if status in ('sent', 'skipped'):
+            conn.executemany(
+                "UPDATE outbox SET status = ?, sent_at = ?, last_error = NULL WHERE id = ?",
+                [(status, now, row_id) for (row_id,) in ids]
+            )
+            stats[status] += len(group)
+            return
+        
+        # Failed: back off exponentially, give up after max_attempts
+        for row in group:
+            attempts = row['attempts'] + 1
+            if attempts >= self.max_attempts:
+                conn.execute(
+                    "UPDATE outbox SET status = 'failed', last_error = ? WHERE id = ?",
+                    ('delivery failed', row['id'])
+                )
+                stats['failed'] += 1
+                logger.error(
+                    f"Giving up on {row['channel']} notification {row['id']} after {attempts} attempts"
+                )
+            else:
+                delay = min(self.retry_base_delay * (2 ** (attempts - 1)), 3600)
+                conn.execute(
+                    """
+                    UPDATE outbox SET status = 'pending', available_at = ?, last_error = ?
+                    WHERE id = ?
+                    """,
+                    (now + delay, 'delivery failed', row['id'])
+                )
+                stats['retried'] += 1
+    
+    def _reschedule(self, group: List[sqlite3.Row], retry_at: float, stats: Dict[str, int]) -> None:
+        """Return a rate-limited group to the queue without counting the attempt"""
+        self._connection().executemany(
+            """
+            UPDATE outbox SET status = 'pending', available_at = ?, attempts = attempts - 1,
+                              last_error = 'rate limited'
+            WHERE id = ?
+            """,
+            [(retry_at, row['id']) for row in group]
+        )
+        stats['rescheduled'] += len(group)
+    
+    def purge(self, older_than_seconds: float = 7 * 24 * 3600) -> int:
+        """
+        Delete delivered notifications older than the given age
+        
+        Args:
+            older_than_seconds: Minimum age of deleted rows
+        
+        Returns:
+            Number of deleted rows
+        """
+        cutoff = time.time() - older_than_seconds
+        return self._connection().execute(
+            "DELETE FROM outbox WHERE status IN ('sent', 'skipped') AND sent_at < ?",
+            (cutoff,)
+        ).rowcount
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get queue statistics
+        
+        Returns:
+            Dictionary with counts per channel and status, and the age of
+            the oldest pending notification in seconds
+        """
+        conn = self._connection()
+        counts: Dict[str, Dict[str, int]] = {}
+        for row in conn.execute(
+            "SELECT channel, status, COUNT(*) AS count FROM outbox GROUP BY channel, status"
+        ):
+            counts.setdefault(row['channel'], {})[row['status']] = row['count']
+        
+        oldest = conn.execute(
+            "SELECT MIN(created_at) FROM outbox WHERE status = 'pending'"
+        ).fetchone()[0]
+        
+        return {
+            'counts': counts,
+            'oldest_pending_age': time.time() - oldest if oldest is not None else None,
+            'running': self.is_running()
+        }
+    
+    def start(self) -> None:
+        """Start the background worker and route the notifiers through the outbox"""
+        if self.is_running():
+            return
+        
+        self._stop_event.clear()
+        self._worker = threading.Thread(
+            target=self._run, name='notification-outbox', daemon=True
+        )
+        self._worker.start()
+        
+        self.email_notifier.outbox = self
+        self.line_notifier.outbox = self
+        logger.info("Notification outbox worker started")
+    
+    def stop(self, drain: bool = False, timeout: float = 10.0) -> None:
+        """
+        Stop the background worker
+        
+        Args:
+            drain: Deliver all due notifications before returning
+            timeout: Seconds to wait for the worker to finish
+        """
+        if self.email_notifier.outbox is self:
+            self.email_notifier.outbox = None
+        if self.line_notifier.outbox is self:
+            self.line_notifier.outbox = None
+        
+        self._stop_event.set()
+        self._wakeup.set()
+        if self._worker is not None:
+            self._worker.join(timeout)
+            self._worker = None
+        
+        if drain:
+            self.process_due()
+        
+        logger.info("Notification outbox worker stopped")
+    
+    def is_running(self) -> bool:
+        """Check whether the background worker is running"""
+        return self._worker is not None and self._worker.is_alive()
+    
+    def _run(self) -> None:
+        """Worker loop"""
+        last_purge = time.time()
+        while not self._stop_event.is_set():
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            if self._stop_event.is_set():
+                break
+            
+            try:
+                self.process_due()
+                if time.time() - last_purge > 3600:
+                    self.purge()
+                    last_purge = time.time()
+            except Exception as e:
+                logger.error(f"Notification outbox worker error: {e}")
+
+
+# Singleton instance
+_notification_outbox_instance: Optional[NotificationOutbox] = None
+
+
+def get_notification_outbox() -> NotificationOutbox:
+    """
+    Get singleton notification outbox instance
+    
+    Returns:
+        NotificationOutbox instance
+    """
+    global _notification_outbox_instance
+    if _notification_outbox_instance is None:
+        _notification_outbox_instance = NotificationOutbox()
+    return _notification_outbox_instance
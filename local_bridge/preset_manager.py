@@ -12,13 +12,89 @@ Requirements: 3.3, 10.1, 10.2
 
 import json
 import os
+import time
+import threading
+import weakref
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from pathlib import Path
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc
 
-from models.database import Preset, LearningData, Photo
+from models.database import Preset, PresetContextTag, LearningData, Photo
+
+
+class PresetSelectionCache:
+    """
+    Version-stamped cache of the context tag -> preset ranking.
+    
+    Shared by all PresetManager instances in the process and keyed by
+    database engine. Writes through PresetManager bump the engine's version;
+    the TTL bounds staleness for writes made by other processes.
+    """
+    
+    def __init__(self, ttl_seconds: float = 300.0):
+        """
+        Initialize the cache.
+        
+        Args:
+            ttl_seconds: Maximum age of a ranking before it is rebuilt
+        """
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._versions = weakref.WeakKeyDictionary()
+        self._entries = weakref.WeakKeyDictionary()
+    
+    def version(self, engine) -> int:
+        """Get the current version for an engine."""
+        with self._lock:
+            return self._versions.get(engine, 0)
+    
+    def invalidate(self, engine) -> None:
+        """Bump the version so the next lookup rebuilds the ranking."""
+        with self._lock:
+            self._versions[engine] = self._versions.get(engine, 0) + 1
+    
+    def get(self, engine, build: Callable[[], Dict]) -> Dict:
+        """
+        Get the ranking for an engine, rebuilding it if stale.
+        
+        Args:
+            engine: Database engine the ranking belongs to
+            build: Function returning a fresh ranking
+        
+        Returns:
+            Ranking dictionary produced by build
+        """
+        with self._lock:
+            version = self._versions.get(engine, 0)
+            entry = self._entries.get(engine)
+        
+        if entry is not None and entry[0] == version and \
+           time.monotonic() - entry[1] < self.ttl_seconds:
+            return entry[2]
+        
+        ranking = build()
+        with self._lock:
+            # Keep the result only if no write happened while building
+            if self._versions.get(engine, 0) == version:
+                self._entries[engine] = (version, time.monotonic(), ranking)
+        return ranking
+
+
+_selection_cache = PresetSelectionCache()
+
+
+def invalidate_preset_selection_cache(db_session: Session) -> None:
+    """
+    Invalidate the preset selection cache for a session's database.
+    
+    Call after committing preset changes made outside PresetManager.
+    
+    Args:
+        db_session: SQLAlchemy database session
+    """
+    _selection_cache.invalidate(db_session.get_bind())
 
 
 class PresetManager:
@@ -93,6 +169,7 @@ class PresetManager:
         self.db.add(preset)
         self.db.commit()
         self.db.refresh(preset)
+        self._invalidate_selection_cache()
         
         return preset
     
@@ -123,7 +200,7 @@ class PresetManager:
         
         # Filter by context tag if specified
         if context_tag:
-            query = query.filter(Preset.context_tags.like(f'%"{context_tag}"%'))
+            query = query.join(PresetContextTag).filter(PresetContextTag.tag == context_tag)
         
         # Apply ordering
         if order_by == "usage_count":
@@ -184,6 +261,7 @@ class PresetManager:
         
         self.db.commit()
         self.db.refresh(preset)
+        self._invalidate_selection_cache()
         
         return preset
     
@@ -203,6 +281,7 @@ class PresetManager:
         
         self.db.delete(preset)
         self.db.commit()
+        self._invalidate_selection_cache()
         
         return True
     
@@ -216,6 +295,10 @@ class PresetManager:
         """
         Select the best preset for a given context.
         
+        The ranking (approval rate, then usage count) is served from the
+        shared selection cache, so this is a dictionary lookup plus an
+        identity-map/primary-key load per call.
+        
         Args:
             context_tag: Context tag (e.g., "backlit_portrait", "low_light_indoor")
             learning_data: Optional learning data for personalization
@@ -223,30 +306,22 @@ class PresetManager:
         Returns:
             Best matching Preset object, or None if no match
         """
-        # Find presets matching the context tag
-        matching_presets = self.db.query(Preset).filter(
-            Preset.context_tags.like(f'%"{context_tag}"%')
-        ).all()
-        
-        if not matching_presets:
+        for attempt in range(2):
+            ranking = _selection_cache.get(self.db.get_bind(), self._build_selection_ranking)
+            ranked_ids = ranking['contexts'].get(context_tag)
             # Fall back to default preset
-            return self.get_preset_by_name("default")
-        
-        # If only one match, return it
-        if len(matching_presets) == 1:
-            return matching_presets[0]
-        
-        # Multiple matches: select based on approval rate and usage
-        # Sort by approval rate (descending), then usage count (descending)
-        best_preset = max(
-            matching_presets,
-            key=lambda p: (
-                p.avg_approval_rate if p.avg_approval_rate is not None else 0,
-                p.usage_count
-            )
-        )
+            preset_id = ranked_ids[0] if ranked_ids else ranking['default_id']
+            if preset_id is None:
+                return None
+            
+            preset = self.db.get(Preset, preset_id)
+            if preset is not None:
+                return preset
+            
+            # Deleted since the ranking was built (e.g. by another process)
+            self._invalidate_selection_cache()
         
-        return best_preset
+        return None
     
     def map_contexts_to_presets(self) -> Dict[str, List[str]]:
         """
@@ -255,18 +330,53 @@ class PresetManager:
         Returns:
             Dictionary mapping context tags to list of preset names
         """
-        presets = self.list_presets()
-        mapping = {}
+        rows = self.db.query(PresetContextTag.tag, Preset.name).join(
+            Preset, Preset.id == PresetContextTag.preset_id
+        ).order_by(Preset.name).all()
         
-        for preset in presets:
-            tags = preset.get_context_tags()
-            for tag in tags:
-                if tag not in mapping:
-                    mapping[tag] = []
-                mapping[tag].append(preset.name)
+        mapping = {}
+        for tag, name in rows:
+            mapping.setdefault(tag, []).append(name)
         
         return mapping
     
+    def _build_selection_ranking(self) -> Dict:
+        """
+        Build the context tag -> ranked preset IDs mapping.
+        
+        Returns:
+            Dictionary with 'contexts' (tag -> preset IDs, best first)
+            and 'default_id' (ID of the "default" preset or None)
+        """
+        rows = self.db.query(
+            PresetContextTag.tag,
+            Preset.id,
+            Preset.avg_approval_rate,
+            Preset.usage_count
+        ).join(Preset, Preset.id == PresetContextTag.preset_id).all()
+        
+        # Sort by approval rate (descending), then usage count (descending)
+        rows.sort(key=lambda r: (
+            -(r.avg_approval_rate if r.avg_approval_rate is not None else 0),
+            -(r.usage_count or 0),
+            r.id
+        ))
+        
+        contexts: Dict[str, List[int]] = {}
+        for row in rows:
+            contexts.setdefault(row.tag, []).append(row.id)
+        
+        default = self.db.query(Preset.id).filter_by(name="default").first()
+        
+        return {
+            'contexts': contexts,
+            'default_id': default.id if default else None
+        }
+    
+    def _invalidate_selection_cache(self) -> None:
+        """Invalidate the shared selection cache after a preset write."""
+        _selection_cache.invalidate(self.db.get_bind())
+    
     # ========== Version Management ==========
     
     def create_preset_version(
@@ -564,6 +674,7 @@ class PresetManager:
             )
         
         self.db.commit()
+        self._invalidate_selection_cache()
     
     def get_preset_statistics(self, preset_id: int) -> Dict:
         """
@@ -0,0 +1,139 @@
+# progress_protocol.py
+#
+# Compact progress frame protocol shared by the WebSocket server and
+# the HTTP fallback server
+#
+# Clients opt in during registration:
+#   {"type": "register", "client_type": "gui",
+#    "capabilities": {"progress_batch": true, "encoding": "msgpack"}}
+#
+# Clients with progress_batch receive one 'job_progress_batch' message per
+# frame whose updates are rows ordered like PROGRESS_BATCH_FIELDS. Other
+# clients receive the coalesced 'job_progress' messages unchanged.
+#
+# Requirements: 4.5
+
+import json
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Union
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+
+PROGRESS_BATCH_TYPE = 'job_progress_batch'
+PROGRESS_BATCH_FIELDS = ['job_id', 'photo_id', 'session_id', 'stage', 'progress', 'message', 'details']
+
+ENCODING_JSON = 'json'
+ENCODING_MSGPACK = 'msgpack'
+
+
+def supported_encodings() -> List[str]:
+    """Get encodings the server can produce"""
+    if MSGPACK_AVAILABLE:
+        return [ENCODING_JSON, ENCODING_MSGPACK]
+    return [ENCODING_JSON]
+
+
+def negotiate_capabilities(requested: Optional[Dict], allow_binary: bool = True) -> Dict:
+    """
+    Resolve client-requested capabilities against server support
+
+    Args:
+        requested: Capabilities sent by the client on registration
+        allow_binary: Whether the transport can carry binary frames
+
+    Returns:
+        Accepted capabilities
+    """
+    requested = requested or {}
+    encoding = requested.get('encoding', ENCODING_JSON)
+    if encoding not in supported_encodings() or (encoding != ENCODING_JSON and not allow_binary):
+        encoding = ENCODING_JSON
+
+    return {
+        'progress_batch': bool(requested.get('progress_batch', False)),
+        'encoding': encoding
+    }
+
+
+def filter_by_sessions(updates: List[Dict], sessions: Optional[Iterable]) -> List[Dict]:
+    """
+    Keep updates belonging to subscribed sessions
+
+    Updates without a session are delivered to everyone.
+
+    Args:
+        updates: Progress messages
+        sessions: Subscribed session IDs (None or empty means all)
+
+    Returns:
+        Filtered updates
+    """
+    if not sessions:
+        return updates
+    return [u for u in updates if u.get('session_id') is None or u.get('session_id') in sessions]
+
+
+def is_session_visible(message: Dict, sessions: Optional[Iterable]) -> bool:
+    """Check whether a message passes a client's session filter"""
+    if not sessions:
+        return True
+    session_id = message.get('session_id')
+    return session_id is None or session_id in sessions
+
+
+def build_progress_batch(updates: List[Dict]) -> Dict:
+    """
+    Build a compact batch message from progress updates
+
+    Args:
+        updates: Progress messages (one per job)
+
+    Returns:
+        Batch message
+    """
+    return {
+        'type': PROGRESS_BATCH_TYPE,
+        'fields': PROGRESS_BATCH_FIELDS,
+        'updates': [[u.get(field) for field in PROGRESS_BATCH_FIELDS] for u in updates],
+        'timestamp': datetime.now().isoformat()
+    }
+
+
+def merge_progress_batches(older: Dict, newer: Dict) -> Dict:
+    """
+    Merge two batch messages keeping the latest row of each job
+
+    Args:
+        older: Batch still waiting for delivery
+        newer: Batch produced by the latest frame
+
+    Returns:
+        Merged batch message
+    """
+    rows = {row[0]: row for row in older['updates']}
+    for row in newer['updates']:
+        rows[row[0]] = row
+    merged = dict(newer)
+    merged['updates'] = list(rows.values())
+    return merged
+
+
+def encode_message(message: Dict, encoding: str = ENCODING_JSON) -> Union[str, bytes]:
+    """
+    Serialize a message for the wire
+
+    Args:
+        message: Message dictionary
+        encoding: 'json' (text frame) or 'msgpack' (binary frame)
+
+    Returns:
+        Encoded payload
+    """
+    if encoding == ENCODING_MSGPACK and MSGPACK_AVAILABLE:
+        return msgpack.packb(message, use_bin_type=True, default=str)
+    return json.dumps(message)
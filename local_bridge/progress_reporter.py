@@ -6,7 +6,8 @@
 # Requirements: 4.5
 
 import logging
-from typing import Dict, Optional, Any
+import threading
+from typing import Callable, Dict, List, Optional, Any
 from datetime import datetime
 from enum import Enum
 
@@ -27,6 +28,98 @@ class ProcessingStage(Enum):
     FAILED = "failed"
 
 
+class ProgressCoalescer:
+    """
+    Merges per-job progress updates within a frame interval
+    
+    Only the latest update of each job survives a frame, so the number of
+    broadcasts is bounded by frame rate instead of update rate.
+    """
+    
+    def __init__(self, flush_fn: Callable[[List[Dict]], None], interval: float = 0.15):
+        """
+        Initialize coalescer
+        
+        Args:
+            flush_fn: Called with the list of merged updates once per frame
+            interval: Frame interval in seconds
+        """
+        self.flush_fn = flush_fn
+        self.interval = interval
+        self.pending: Dict[str, Dict] = {}
+        self.lock = threading.Lock()
+        self.stats = {'received': 0, 'flushed': 0, 'frames': 0}
+        self._wakeup = threading.Event()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+    
+    def add(self, job_id: str, update: Dict):
+        """
+        Add an update, replacing any pending update of the same job
+        
+        Args:
+            job_id: Job identifier
+            update: Progress message
+        """
+        with self.lock:
+            self.pending[job_id] = update
+            self.stats['received'] += 1
+        
+        if not self._running:
+            self.start()
+    
+    def discard(self, job_id: str):
+        """Drop the pending update of a job (e.g. superseded by completion)"""
+        with self.lock:
+            self.pending.pop(job_id, None)
+    
+    def flush(self) -> int:
+        """
+        Send all pending updates as one frame
+        
+        Returns:
+            Number of updates flushed
+        """
+        with self.lock:
+            if not self.pending:
+                return 0
+            updates = list(self.pending.values())
+            self.pending = {}
+            self.stats['flushed'] += len(updates)
+            self.stats['frames'] += 1
+        
+        try:
+            self.flush_fn(updates)
+        except Exception as e:
+            logger.error(f"Failed to flush progress frame: {e}")
+        
+        return len(updates)
+    
+    def start(self):
+        """Start the frame thread"""
+        with self.lock:
+            if self._running:
+                return
+            self._running = True
+        
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the frame thread and flush remaining updates"""
+        self._running = False
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self.flush()
+    
+    def _run(self):
+        """Frame loop (runs in separate thread)"""
+        while self._running:
+            self._wakeup.wait(self.interval)
+            self.flush()
+
+
 class ProgressReporter:
     """
     Real-time progress reporter for photo processing jobs
@@ -34,18 +127,29 @@ class ProgressReporter:
     Sends progress updates via WebSocket to connected clients
     including Lightroom plugin, GUI, and mobile apps.
     
+    When a frame interval is configured, progress updates are coalesced
+    per job and sent once per frame via broadcast_frame() on servers that
+    support it. Lifecycle events (start, stage, completion, errors) are
+    always sent immediately.
+    
     Requirements: 4.5
     """
     
-    def __init__(self, websocket_server=None):
+    def __init__(self, websocket_server=None, frame_interval: Optional[float] = None):
         """
         Initialize progress reporter
         
         Args:
-            websocket_server: WebSocket server instance for broadcasting
+            websocket_server: WebSocket server instance (or list of servers)
+                for broadcasting
+            frame_interval: Progress coalescing interval in seconds
+                (None sends every update immediately)
         """
         self.websocket_server = websocket_server
         self.active_jobs = {}  # job_id -> job_info
+        self.coalescer: Optional[ProgressCoalescer] = None
+        if frame_interval:
+            self.coalescer = ProgressCoalescer(self._broadcast_frame, frame_interval)
         logger.info("Progress reporter initialized")
     
     def start_job(self, job_id: str, photo_id: int, photo_info: Dict):
@@ -60,6 +164,7 @@ class ProgressReporter:
         self.active_jobs[job_id] = {
             'job_id': job_id,
             'photo_id': photo_id,
+            'session_id': photo_info.get('session_id'),
             'photo_info': photo_info,
             'started_at': datetime.now(),
             'current_stage': None,
@@ -75,6 +180,7 @@ class ProgressReporter:
             'type': 'job_started',
             'job_id': job_id,
             'photo_id': photo_id,
+            'session_id': photo_info.get('session_id'),
             'photo_info': photo_info,
             'timestamp': datetime.now().isoformat()
         })
@@ -108,17 +214,23 @@ class ProgressReporter:
         
         logger.debug(f"Job {job_id} progress: {stage.value} - {progress}%")
         
-        # Broadcast progress update
-        self._broadcast({
+        update = {
             'type': 'job_progress',
             'job_id': job_id,
             'photo_id': job_info['photo_id'],
+            'session_id': job_info.get('session_id'),
             'stage': stage.value,
             'progress': progress,
             'message': message or f"Processing: {stage.value}",
             'details': details or {},
             'timestamp': datetime.now().isoformat()
-        }, channel='jobs')
+        }
+        
+        # Coalesce into the next frame, or broadcast immediately
+        if self.coalescer:
+            self.coalescer.add(job_id, update)
+        else:
+            self._broadcast(update, channel='jobs')
     
     def complete_stage(self, job_id: str, stage: ProcessingStage, result: Optional[Dict] = None):
         """
@@ -175,11 +287,16 @@ class ProgressReporter:
         
         logger.info(f"Job {job_id} completed: success={success}, duration={duration:.2f}s")
         
+        # Completion supersedes any progress still waiting for the next frame
+        if self.coalescer:
+            self.coalescer.discard(job_id)
+        
         # Broadcast job completion
         self._broadcast({
             'type': 'job_completed' if success else 'job_failed',
             'job_id': job_id,
             'photo_id': job_info['photo_id'],
+            'session_id': job_info.get('session_id'),
             'success': success,
             'result': result or {},
             'duration': duration,
@@ -289,6 +406,24 @@ class ProgressReporter:
         """
         return self.active_jobs.copy()
     
+    def flush(self):
+        """Send pending coalesced progress updates immediately"""
+        if self.coalescer:
+            self.coalescer.flush()
+    
+    def shutdown(self):
+        """Stop the coalescing thread, flushing pending updates"""
+        if self.coalescer:
+            self.coalescer.stop()
+    
+    def _servers(self) -> List:
+        """Get configured broadcast targets"""
+        if not self.websocket_server:
+            return []
+        if isinstance(self.websocket_server, (list, tuple)):
+            return list(self.websocket_server)
+        return [self.websocket_server]
+    
     def _broadcast(self, message: Dict, channel: Optional[str] = None):
         """
         Broadcast message via WebSocket
@@ -297,31 +432,54 @@ class ProgressReporter:
             message: Message to broadcast
             channel: Optional channel for filtered broadcast
         """
-        if self.websocket_server:
+        servers = self._servers()
+        if not servers:
+            logger.debug(f"No WebSocket server configured, message not broadcast: {message['type']}")
+            return
+        
+        for server in servers:
             try:
-                self.websocket_server.broadcast(message, channel=channel)
+                server.broadcast(message, channel=channel)
             except Exception as e:
                 logger.error(f"Failed to broadcast message: {e}")
-        else:
-            logger.debug(f"No WebSocket server configured, message not broadcast: {message['type']}")
+    
+    def _broadcast_frame(self, updates: List[Dict]):
+        """
+        Broadcast one frame of coalesced progress updates
+        
+        Args:
+            updates: Latest progress message of each job
+        """
+        for server in self._servers():
+            try:
+                if hasattr(server, 'broadcast_frame'):
+                    server.broadcast_frame(updates, channel='jobs')
+                else:
+                    for update in updates:
+                        server.broadcast(update, channel='jobs')
+            except Exception as e:
+                logger.error(f"Failed to broadcast progress frame: {e}")
 
 
 # Global progress reporter instance
 _progress_reporter: Optional[ProgressReporter] = None
 
 
-def init_progress_reporter(websocket_server=None) -> ProgressReporter:
+def init_progress_reporter(websocket_server=None, frame_interval: Optional[float] = None) -> ProgressReporter:
     """
     Initialize global progress reporter
     
     Args:
-        websocket_server: WebSocket server instance
+        websocket_server: WebSocket server instance (or list of servers)
+        frame_interval: Progress coalescing interval in seconds
         
     Returns:
         ProgressReporter instance
     """
     global _progress_reporter
-    _progress_reporter = ProgressReporter(websocket_server)
+    if _progress_reporter is not None:
+        _progress_reporter.shutdown()
+    _progress_reporter = ProgressReporter(websocket_server, frame_interval)
     return _progress_reporter
 
 
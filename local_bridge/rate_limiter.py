@@ -0,0 +1,486 @@
+"""
+Rate Limiter for Junmai AutoDev
+レート制限エンジン
+
+Sliding window counter rate limiting used by AuthManager:
+- O(1) time and memory per identifier (two counters instead of a timestamp list)
+- LRU/TTL eviction of idle identifiers in the in-memory backend
+- Optional shared backends (SQLite locally, Redis) so limits hold across
+  gunicorn workers
+- Lock-free fast path that rejects blocked identifiers without touching
+  the backend
+
+The estimate for a request at time t in window k is
+
+    count(k - 1) * (1 - elapsed / window) + count(k)
+
+i.e. the previous window's count is weighted by how much of it still
+overlaps the sliding window.
+
+Requirements: 9.5
+"""
+
+import math
+import os
+import sqlite3
+import threading
+import time
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_MAX_ENTRIES = 10000
+
+
+def sliding_window_hit(
+    state: Optional[Tuple[int, int, int]],
+    limit: int,
+    window: float,
+    now: float
+) -> Tuple[bool, Tuple[int, int, int]]:
+    """
+    Apply one request to a sliding window counter.
+    
+    Args:
+        state: (window_index, previous_count, current_count) or None for a new identifier
+        limit: Maximum requests per window
+        window: Window length in seconds
+        now: Current time (epoch seconds)
+    
+    Returns:
+        Tuple of (is_allowed, new_state); denied requests are not counted
+    """
+    index = int(now // window)
+    previous, current = 0, 0
+    
+    if state is not None:
+        state_index, state_previous, state_current = state
+        if index == state_index:
+            previous, current = state_previous, state_current
+        elif index == state_index + 1:
+            previous = state_current
+    
+    elapsed = now - index * window
+    estimate = previous * (1 - elapsed / window) + current
+    
+    allowed = estimate + 1 <= limit
+    if allowed:
+        current += 1
+    
+    return allowed, (index, previous, current)
+
+
+def describe_window(
+    allowed: bool,
+    state: Tuple[int, int, int],
+    limit: int,
+    window: float,
+    now: float
+) -> Dict:
+    """
+    Build the limit_info dictionary for a request.
+    
+    Args:
+        allowed: Whether the request was allowed
+        state: Counter state after the request
+        limit: Maximum requests per window
+        window: Window length in seconds
+        now: Current time (epoch seconds)
+    
+    Returns:
+        Dictionary with allowed, limit, remaining, reset_in (and retry_after when denied)
+    """
+    index, previous, current = state
+    elapsed = now - index * window
+    estimate = previous * (1 - elapsed / window) + current
+    reset_in = max(1, math.ceil(window - elapsed))
+    
+    if allowed:
+        return {
+            'allowed': True,
+            'limit': limit,
+            'remaining': max(0, int(limit - estimate)),
+            'reset_in': reset_in
+        }
+    
+    # Time until estimate + 1 <= limit again
+    budget = limit - 1
+    if current <= budget and previous > 0:
+        retry_after = window * (1 - (budget - current) / previous) - elapsed
+    elif current > 0:
+        retry_after = (window - elapsed) + window * (1 - budget / current)
+    else:
+        retry_after = window - elapsed
+    retry_after = max(1, math.ceil(retry_after))
+    
+    return {
+        'allowed': False,
+        'limit': limit,
+        'remaining': 0,
+        'reset_in': retry_after,
+        'retry_after': retry_after
+    }
+
+
+class MemoryRateLimitBackend:
+    """
+    In-process backend with LRU and TTL eviction.
+    
+    Identifiers idle for two windows carry no state and are dropped; the
+    least recently used identifiers are evicted beyond max_entries.
+    """
+    
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Initialize the in-memory backend.
+        
+        Args:
+            max_entries: Maximum number of tracked identifiers
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Tuple[int, int, int]]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def hit(self, key: str, limit: int, window: float, now: float) -> Tuple[bool, Tuple[int, int, int]]:
+        """
+        Count a request for key.
+        
+        Args:
+            key: Identifier key
+            limit: Maximum requests per window
+            window: Window length in seconds
+            now: Current time (epoch seconds)
+        
+        Returns:
+            Tuple of (is_allowed, counter state)
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            allowed, state = sliding_window_hit(entry[1] if entry else None, limit, window, now)
+            self._entries[key] = ((state[0] + 2) * window, state)
+            
+            # Drop expired identifiers from the LRU end, then enforce the size cap
+            while self._entries:
+                oldest_key, (expires_at, _) = next(iter(self._entries.items()))
+                if expires_at > now and len(self._entries) <= self.max_entries:
+                    break
+                del self._entries[oldest_key]
+        
+        return allowed, state
+    
+    def reset(self, key: Optional[str] = None):
+        """Forget one key or all keys."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteRateLimitBackend:
+    """
+    Backend shared by all processes on one machine through a SQLite file.
+    
+    Each check is one short IMMEDIATE transaction; expired rows are pruned
+    periodically.
+    """
+    
+    PRUNE_EVERY = 1000
+    
+    def __init__(self, db_path: str):
+        """
+        Initialize the SQLite backend.
+        
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = str(db_path)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._hits = 0
+        
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS rate_limits (
+                key TEXT PRIMARY KEY,
+                window_index INTEGER NOT NULL,
+                prev_count INTEGER NOT NULL,
+                cur_count INTEGER NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Get the connection of the current thread."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def hit(self, key: str, limit: int, window: float, now: float) -> Tuple[bool, Tuple[int, int, int]]:
+        """
+        Count a request for key.
+        
+        Args:
+            key: Identifier key
+            limit: Maximum requests per window
+            window: Window length in seconds
+            now: Current time (epoch seconds)
+        
+        Returns:
+            Tuple of (is_allowed, counter state)
+        """
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT window_index, prev_count, cur_count FROM rate_limits WHERE key = ?",
+                (key,)
+            ).fetchone()
+            allowed, state = sliding_window_hit(tuple(row) if row else None, limit, window, now)
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limits "
+                "(key, window_index, prev_count, cur_count, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (key, state[0], state[1], state[2], (state[0] + 2) * window)
+            )
+            
+            self._hits += 1
+            if self._hits % self.PRUNE_EVERY == 0:
+                conn.execute("DELETE FROM rate_limits WHERE expires_at <= ?", (now,))
+            
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        
+        return allowed, state
+    
+    def reset(self, key: Optional[str] = None):
+        """Forget one key or all keys."""
+        conn = self._connection()
+        if key is None:
+            conn.execute("DELETE FROM rate_limits")
+        else:
+            conn.execute("DELETE FROM rate_limits WHERE key = ?", (key,))
+    
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+
+
+class RedisRateLimitBackend:
+    """
+    Backend shared through Redis.
+    
+    The counter update runs as one Lua script, so concurrent workers are
+    atomic; idle keys expire after two windows.
+    """
+    
+    KEY_PREFIX = "ratelimit"
+    
+    SCRIPT = """
+    local limit = tonumber(ARGV[1])
+    local window = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local index = math.floor(now / window)
+    local state = redis.call('HMGET', KEYS[1], 'i', 'p', 'c')
+    local previous, current = 0, 0
+    local state_index = tonumber(state[1])
+    if state_index == index then
+        previous = tonumber(state[2])
+        current = tonumber(state[3])
+    elseif state_index == index - 1 then
+        previous = tonumber(state[3])
+    end
+    local estimate = previous * (1 - (now - index * window) / window) + current
+    local allowed = 0
+    if estimate + 1 <= limit then
+        current = current + 1
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'i', index, 'p', previous, 'c', current)
+    redis.call('PEXPIRE', KEYS[1], math.ceil(2 * window * 1000))
+    return {allowed, index, previous, current}
+    """
+    
+    def __init__(self, url: str):
+        """
+        Initialize the Redis backend.
+        
+        Args:
+            url: Redis URL (redis://host:port/db)
+        """
+        if not REDIS_AVAILABLE:
+            raise ImportError("redis package is required for the Redis rate limit backend")
+        
+        self.client = redis.Redis.from_url(url)
+        self.client.ping()
+        self._script = self.client.register_script(self.SCRIPT)
+    
+    def hit(self, key: str, limit: int, window: float, now: float) -> Tuple[bool, Tuple[int, int, int]]:
+        """
+        Count a request for key.
+        
+        Args:
+            key: Identifier key
+            limit: Maximum requests per window
+            window: Window length in seconds
+            now: Current time (epoch seconds)
+        
+        Returns:
+            Tuple of (is_allowed, counter state)
+        """
+        allowed, index, previous, current = self._script(
+            keys=[f"{self.KEY_PREFIX}:{key}"],
+            args=[limit, window, now]
+        )
+        return bool(allowed), (int(index), int(previous), int(current))
+    
+    def reset(self, key: Optional[str] = None):
+        """Forget one key or all keys."""
+        if key is None:
+            keys = list(self.client.scan_iter(f"{self.KEY_PREFIX}:*"))
+            if keys:
+                self.client.delete(*keys)
+        else:
+            self.client.delete(f"{self.KEY_PREFIX}:{key}")
+    
+    def __len__(self) -> int:
+        return sum(1 for _ in self.client.scan_iter(f"{self.KEY_PREFIX}:*"))
+
+
+def create_rate_limit_backend(url: Optional[str] = None, max_entries: int = DEFAULT_MAX_ENTRIES):
+    """
+    Create a backend from a URL.
+    
+    Args:
+        url: 'memory', 'sqlite:///path/to/file.db' or 'redis://host:port/db'
+            (default: RATE_LIMIT_BACKEND environment variable, else memory)
+        max_entries: Identifier limit of the in-memory backend
+    
+    Returns:
+        Backend instance; falls back to memory if the shared backend is unavailable
+    """
+    url = url or os.getenv('RATE_LIMIT_BACKEND', 'memory')
+    
+    try:
+        if url.startswith('sqlite:///'):
+            return SQLiteRateLimitBackend(url[len('sqlite:///'):])
+        if url.startswith(('redis://', 'rediss://', 'unix://')):
+            return RedisRateLimitBackend(url)
+    except Exception as e:
+        logger.warning(f"Rate limit backend {url} unavailable ({e}), using in-memory limits")
+    else:
+        if url != 'memory':
+            logger.warning(f"Unknown rate limit backend {url}, using in-memory limits")
+    
+    return MemoryRateLimitBackend(max_entries=max_entries)
+
+
+class RateLimiter:
+    """
+    Sliding window counter rate limiter with pluggable backends.
+    """
+    
+    def __init__(self, backend=None, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Initialize the rate limiter.
+        
+        Args:
+            backend: Backend instance or URL (default: RATE_LIMIT_BACKEND, else memory)
+            max_entries: Identifier limit for in-memory state
+        """
+        if backend is None or isinstance(backend, str):
+            backend = create_rate_limit_backend(backend, max_entries=max_entries)
+        self.backend = backend
+        self.max_entries = max_entries
+        
+        # key -> epoch seconds until which requests are rejected locally
+        self._blocked: Dict[str, float] = {}
+        self._fallback: Optional[MemoryRateLimitBackend] = None
+    
+    def check(self, key: str, limit: int, window: float, now: Optional[float] = None) -> Tuple[bool, Dict]:
+        """
+        Check and count a request.
+        
+        Args:
+            key: Identifier key (include the limit type to keep limits separate)
+            limit: Maximum requests per window
+            window: Window length in seconds
+            now: Current time (default: time.time())
+        
+        Returns:
+            Tuple of (is_allowed, limit_info)
+        """
+        if now is None:
+            now = time.time()
+        
+        # Fast path: a blocked identifier stays blocked until retry_after,
+        # whatever other workers do, so no backend round trip is needed
+        blocked_until = self._blocked.get(key)
+        if blocked_until is not None:
+            if now < blocked_until:
+                retry_after = max(1, math.ceil(blocked_until - now))
+                return False, {
+                    'allowed': False,
+                    'limit': limit,
+                    'remaining': 0,
+                    'reset_in': retry_after,
+                    'retry_after': retry_after
+                }
+            self._blocked.pop(key, None)
+        
+        try:
+            allowed, state = self.backend.hit(key, limit, window, now)
+        except Exception as e:
+            logger.warning(f"Rate limit backend failed ({e}), using in-memory limits")
+            if self._fallback is None:
+                self._fallback = MemoryRateLimitBackend(max_entries=self.max_entries)
+            allowed, state = self._fallback.hit(key, limit, window, now)
+        
+        info = describe_window(allowed, state, limit, window, now)
+        
+        if not allowed:
+            if len(self._blocked) >= self.max_entries:
+                self._prune_blocked(now)
+            self._blocked[key] = now + info['retry_after']
+        
+        return allowed, info
+    
+    def _prune_blocked(self, now: float):
+        """Drop expired entries from the local blocked cache."""
+        for key, until in list(self._blocked.items()):
+            if until <= now:
+                self._blocked.pop(key, None)
+        if len(self._blocked) >= self.max_entries:
+            self._blocked.clear()
+    
+    def reset(self, key: Optional[str] = None):
+        """
+        Forget the state of one key or all keys.
+        
+        Args:
+            key: Identifier key (None for all)
+        """
+        if key is None:
+            self._blocked.clear()
+        else:
+            self._blocked.pop(key, None)
+        self.backend.reset(key)
+        if self._fallback is not None:
+            self._fallback.reset(key)
@@ -0,0 +1,326 @@
+"""
+Coalescing State Store for Junmai AutoDev
+
+This module provides one durable key/value store for operation state
+shared by FailsafeManager checkpoints and BatchController batch states:
+- SQLite table in WAL mode; every flush is a single atomic transaction
+- Write coalescing: only the latest value per key is written, at most
+  once per flush interval
+- Durable writes for state transitions (flushed before put() returns)
+- One-query namespace load for startup recovery
+
+Values are JSON-serializable dictionaries grouped by namespace.
+
+Requirements: 14.3
+"""
+
+import json
+import atexit
+import logging
+import pathlib
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_STATE_STORE_PATH = pathlib.Path(__file__).parent / "data" / "state_store.db"
+STATE_STORE_FILENAME = "state_store.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS state_entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+"""
+
+# Marker for a pending delete in the write buffer
+_DELETED = object()
+
+
+class StateStore:
+    """
+    SQLite-backed key/value store with write-behind coalescing
+    
+    Thread-safe. Pending (not yet flushed) writes are visible to get() and
+    load_namespace() of the same instance, so callers always read their
+    latest state.
+    """
+    
+    def __init__(self, db_path: Union[str, pathlib.Path] = ':memory:', flush_interval_ms: int = 200):
+        """
+        Initialize StateStore and create the table if needed
+        
+        Args:
+            db_path: SQLite file path, or ':memory:' for a non-persistent store
+            flush_interval_ms: Maximum delay before a coalesced write is flushed
+        """
+        self.db_path = str(db_path)
+        self.flush_interval = flush_interval_ms / 1000.0
+        
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[str, str], Any] = {}
+        self._timer: Optional[threading.Timer] = None
+        self._closed = False
+        
+        # Statistics
+        self.writes_requested = 0
+        self.writes_flushed = 0
+        self.flush_count = 0
+        
+        if self.db_path != ':memory:':
+            pathlib.Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        if self.db_path != ':memory:':
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # Flushes are coalesced, so each commit can afford an fsync
+            self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(_SCHEMA)
+        
+        logger.info(f"State store opened: {self.db_path}")
+    
+    def put(self, namespace: str, key: str, value: Dict[str, Any], durable: bool = False) -> None:
+        """
+        Store the latest value of a key
+        
+        Args:
+            namespace: Value namespace (e.g. 'checkpoint', 'batch')
+            key: Key within the namespace
+            value: JSON-serializable dictionary
+            durable: Flush before returning instead of within the flush interval
+        """
+        # Serialize now so later mutation of value by the caller is not persisted half-way
+        encoded = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._pending[(namespace, key)] = encoded
+            self.writes_requested += 1
+        
+        if durable:
+            self.flush()
+        else:
+            self._schedule_flush()
+    
+    def delete(self, namespace: str, key: str, durable: bool = False) -> None:
+        """
+        Delete a key
+        
+        Args:
+            namespace: Value namespace
+            key: Key within the namespace
+            durable: Flush before returning instead of within the flush interval
+        """
+        with self._lock:
+            self._pending[(namespace, key)] = _DELETED
+            self.writes_requested += 1
+        
+        if durable:
+            self.flush()
+        else:
+            self._schedule_flush()
+    
+    def get(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the latest value of a key
+        
+        Args:
+            namespace: Value namespace
+            key: Key within the namespace
+        
+        Returns:
+            Stored dictionary or None if not found
+        """
+        with self._lock:
+            pending = self._pending.get((namespace, key))
+            if pending is None:
+                row = self._conn.execute(
+                    "SELECT value FROM state_entries WHERE namespace = ? AND key = ?",
+                    (namespace, key)
+                ).fetchone()
+                pending = row[0] if row else _DELETED
+        return None if pending is _DELETED else json.loads(pending)
+    
+    def load_namespace(self, namespace: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Load all values of a namespace in one query
+        
+        Args:
+            namespace: Value namespace
+        
+        Returns:
+            Dictionary of key -> value
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value FROM state_entries WHERE namespace = ?",
+                (namespace,)
+            ).fetchall()
+            encoded = dict(rows)
+            for (ns, key), value in self._pending.items():
+                if ns != namespace:
+                    continue
+                if value is _DELETED:
+                    encoded.pop(key, None)
+                else:
+                    encoded[key] = value
+        
+        values = {}
+        for key, value in encoded.items():
+            try:
+                values[key] = json.loads(value)
+            except ValueError as e:
+                logger.warning(f"Skipping unreadable state entry {namespace}/{key}: {e}")
+        return values
+    
+    def put_many(self, namespace: str, values: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Store several values and flush them in one transaction
+        
+        Args:
+            namespace: Value namespace
+            values: Dictionary of key -> value
+        """
+        encoded = {key: json.dumps(value, ensure_ascii=False) for key, value in values.items()}
+        with self._lock:
+            for key, value in encoded.items():
+                self._pending[(namespace, key)] = value
+            self.writes_requested += len(encoded)
+        self.flush()
+    
+    def _schedule_flush(self) -> None:
+        """Start the flush timer unless one is already pending"""
+        with self._lock:
+            if self._timer is not None or self._closed:
+                return
+            self._timer = threading.Timer(self.flush_interval, self._timed_flush)
+            self._timer.daemon = True
+            self._timer.start()
+    
+    def _timed_flush(self) -> None:
+        """Flush timer callback"""
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush state store {self.db_path}: {e}")
+    
+    def flush(self) -> int:
+        """
+        Write all pending values in one transaction
+        
+        Returns:
+            Number of keys written or deleted
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            
+            if not self._pending or self._closed:
+                return 0
+            
+            pending = self._pending
+            self._pending = {}
+            
+            now = time.time()
+            upserts = [(ns, key, value, now) for (ns, key), value in pending.items() if value is not _DELETED]
+            deletes = [(ns, key) for (ns, key), value in pending.items() if value is _DELETED]
+            
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                if upserts:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO state_entries (namespace, key, value, updated_at) "
+                        "VALUES (?, ?, ?, ?)",
+                        upserts
+                    )
+                if deletes:
+                    self._conn.executemany(
+                        "DELETE FROM state_entries WHERE namespace = ? AND key = ?",
+                        deletes
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                # Keep newer writes made while we were flushing
+                pending.update(self._pending)
+                self._pending = pending
+                raise
+            
+            self.writes_flushed += len(pending)
+            self.flush_count += 1
+            return len(pending)
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get write coalescing statistics
+        
+        Returns:
+            Dictionary with requested/flushed write counts and pending keys
+        """
+        with self._lock:
+            return {
+                'db_path': self.db_path,
+                'writes_requested': self.writes_requested,
+                'writes_flushed': self.writes_flushed,
+                'flush_count': self.flush_count,
+                'pending': len(self._pending)
+            }
+    
+    def close(self) -> None:
+        """Flush pending writes and close the database"""
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush state store {self.db_path} on close: {e}")
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._conn.close()
+        
+        with _stores_lock:
+            if _stores.get(self.db_path) is self:
+                del _stores[self.db_path]
+
+
+# Open stores by path; every component using the same file shares one instance
+_stores: Dict[str, StateStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_state_store(db_path: Optional[Union[str, pathlib.Path]] = None) -> StateStore:
+    """
+    Get the shared state store for a database file
+    
+    Args:
+        db_path: SQLite file path (default: data/state_store.db)
+    
+    Returns:
+        StateStore instance shared by all callers using the same path
+    """
+    path = str(pathlib.Path(db_path or DEFAULT_STATE_STORE_PATH).resolve())
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = StateStore(path)
+            _stores[path] = store
+        return store
+
+
+def flush_all_state_stores() -> None:
+    """Flush every open state store"""
+    with _stores_lock:
+        stores: List[StateStore] = list(_stores.values())
+    for store in stores:
+        try:
+            store.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush state store {store.db_path}: {e}")
+
+
+atexit.register(flush_all_state_stores)
@@ -9,7 +9,9 @@ from datetime import datetime, timedelta
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
-from models.database import Base, Preset, Photo, Session as DBSession, ABTest, ABTestAssignment
+from models.database import (
+    Base, Preset, Photo, Session as DBSession, ABTest, ABTestAssignment, ABTestVariantStats
+)
 from ab_test_manager import ABTestManager
 
 
@@ -430,5 +432,203 @@ def test_list_ab_tests(db_session, sample_presets):
     assert portrait_tests[0].id == test1.id
 
 
+
+def test_bulk_assignment(db_session, sample_presets, sample_photos):
+    """Test assigning many photos in one call"""
+    manager = ABTestManager(db_session)
+    preset_a, preset_b = sample_presets
+    
+    ab_test = manager.create_ab_test(
+        name='Test Bulk',
+        description='Testing bulk assignment',
+        preset_a_id=preset_a.id,
+        preset_b_id=preset_b.id
+    )
+    
+    first = manager.assign_photo_to_variant(test_id=ab_test.id, photo_id=sample_photos[0].id)
+    photo_ids = [photo.id for photo in sample_photos[:41]]
+    variants = manager.assign_photos_to_variants(ab_test.id, photo_ids + photo_ids[:5])
+    
+    assert list(variants) == photo_ids
+    assert variants[sample_photos[0].id] == first.variant
+    assert db_session.query(ABTestAssignment).filter_by(test_id=ab_test.id).count() == 41
+    assert sorted(list(variants.values()).count(v) for v in 'AB') == [20, 21]
+    assert manager.get_test_progress(ab_test.id)['total_assignments'] == 41
+
+
+def test_assign_session_to_variants(db_session, sample_presets):
+    """Test assigning the photos of a session filtered by context tag"""
+    manager = ABTestManager(db_session)
+    preset_a, preset_b = sample_presets
+    
+    session = DBSession(name='Bulk Session', status='importing')
+    db_session.add(session)
+    db_session.commit()
+    for i in range(10):
+        db_session.add(Photo(
+            session_id=session.id,
+            file_path=f'/test/session_{i}.cr3',
+            file_name=f'session_{i}.cr3',
+            context_tag='backlit_portrait' if i < 6 else 'landscape_sky',
+            status='imported'
+        ))
+    db_session.commit()
+    
+    ab_test = manager.create_ab_test(
+        name='Test Session',
+        description='Testing session assignment',
+        preset_a_id=preset_a.id,
+        preset_b_id=preset_b.id,
+        context_tag='backlit_portrait'
+    )
+    
+    variants = manager.assign_session_to_variants(ab_test.id, session.id)
+    
+    assert len(variants) == 6
+    assert list(variants.values()).count('A') == 3
+
+
+def test_variant_stats_match_assignments(db_session, sample_presets, sample_photos):
+    """Test that incremental statistics match a full recomputation"""
+    from scipy import stats
+    
+    manager = ABTestManager(db_session)
+    preset_a, preset_b = sample_presets
+    
+    ab_test = manager.create_ab_test(
+        name='Test Stats',
+        description='Testing sufficient statistics',
+        preset_a_id=preset_a.id,
+        preset_b_id=preset_b.id
+    )
+    
+    variants = manager.assign_photos_to_variants(ab_test.id, [photo.id for photo in sample_photos[:80]])
+    times = {'A': [], 'B': []}
+    for i, photo in enumerate(sample_photos[:80]):
+        # Record a result, then overwrite it to exercise re-recording
+        manager.record_result(ab_test.id, photo.id, approved=False, processing_time=100.0)
+        time = 4.0 + (i % 7) * 0.5
+        manager.record_result(ab_test.id, photo.id, approved=i % 3 != 0, processing_time=time)
+        times[variants[photo.id]].append(time)
+    
+    incremental = {row.variant: row.to_dict() for row in manager._load_variant_stats(ab_test.id).values()}
+    rebuilt = {row.variant: row.to_dict() for row in manager.rebuild_variant_stats(ab_test.id).values()}
+    for variant in 'AB':
+        for column in ('assignments', 'results', 'approvals', 'time_count'):
+            assert incremental[variant][column] == rebuilt[variant][column]
+        assert incremental[variant]['time_sum'] == pytest.approx(rebuilt[variant]['time_sum'])
+        assert incremental[variant]['time_sumsq'] == pytest.approx(rebuilt[variant]['time_sumsq'])
+    
+    result = manager.test_statistical_significance(ab_test.id)
+    t_statistic, p_value = stats.ttest_ind(times['A'], times['B'])
+    
+    assert result['processing_time_test']['t_statistic'] == pytest.approx(t_statistic)
+    assert result['processing_time_test']['p_value'] == pytest.approx(p_value)
+
+
+def test_legacy_test_stats_rebuilt(db_session, sample_presets, sample_photos):
+    """Test that tests without statistics rows are rebuilt from assignments"""
+    manager = ABTestManager(db_session)
+    preset_a, preset_b = sample_presets
+    
+    ab_test = ABTest(name='Legacy', preset_a_id=preset_a.id, preset_b_id=preset_b.id, status='active')
+    db_session.add(ab_test)
+    db_session.commit()
+    for i in range(4):
+        db_session.add(ABTestAssignment(
+            test_id=ab_test.id,
+            photo_id=sample_photos[i].id,
+            variant='A' if i % 2 == 0 else 'B',
+            preset_id=preset_a.id if i % 2 == 0 else preset_b.id,
+            approved=True,
+            result_recorded_at=datetime.utcnow() if i < 3 else None
+        ))
+    db_session.commit()
+    
+    progress = manager.get_test_progress(ab_test.id)
+    
+    assert progress['total_assignments'] == 4
+    assert progress['completed_assignments'] == 3
+    assert db_session.query(ABTestVariantStats).filter_by(test_id=ab_test.id).count() == 2
+
+
+def test_sequential_test_early_stopping(db_session, sample_presets, sample_photos):
+    """Test the sequential test used for early stopping"""
+    manager = ABTestManager(db_session)
+    preset_a, preset_b = sample_presets
+    
+    ab_test = manager.create_ab_test(
+        name='Test Sequential',
+        description='Testing early stopping',
+        preset_a_id=preset_a.id,
+        preset_b_id=preset_b.id
+    )
+    
+    variants = manager.assign_photos_to_variants(ab_test.id, [photo.id for photo in sample_photos])
+    counts = {'A': 0, 'B': 0}
+    for photo_id, variant in variants.items():
+        # A: 30% approval, B: 90% approval
+        approved = counts[variant] % 10 < (3 if variant == 'A' else 9)
+        counts[variant] += 1
+        manager.record_result(ab_test.id, photo_id, approved=approved)
+    
+    sequential = manager.get_test_progress(ab_test.id)['sequential_test']
+    
+    assert sequential['can_stop_early'] is True
+    assert sequential['winner'] == 'B'
+    assert sequential['p_value'] < manager.significance_level
+    
+    # Identical variants never reach the threshold
+    ab_test_2 = manager.create_ab_test(
+        name='Test Sequential Null',
+        description='Testing no difference',
+        preset_a_id=preset_a.id,
+        preset_b_id=preset_b.id
+    )
+    variants = manager.assign_photos_to_variants(ab_test_2.id, [photo.id for photo in sample_photos])
+    for i, photo_id in enumerate(variants):
+        manager.record_result(ab_test_2.id, photo_id, approved=(i // 2) % 2 == 0)
+    
+    assert manager.get_test_progress(ab_test_2.id)['sequential_test']['can_stop_early'] is False
+
+
+def test_sequential_test_keeps_early_stop(db_session, sample_presets, sample_photos):
+    """Test the early-stop decision and p-value do not revert as data arrives"""
+    manager = ABTestManager(db_session)
+    preset_a, preset_b = sample_presets
+    
+    ab_test = manager.create_ab_test(
+        name='Test Sequential Running',
+        description='Testing the running maximum',
+        preset_a_id=preset_a.id,
+        preset_b_id=preset_b.id
+    )
+    
+    variants = manager.assign_photos_to_variants(ab_test.id, [photo.id for photo in sample_photos])
+    counts = {'A': 0, 'B': 0}
+    for photo_id, variant in variants.items():
+        approved = counts[variant] % 10 < (3 if variant == 'A' else 9)
+        counts[variant] += 1
+        manager.record_result(ab_test.id, photo_id, approved=approved)
+    
+    crossed = manager.get_test_progress(ab_test.id)['sequential_test']
+    assert crossed['can_stop_early'] is True
+    
+    # Variant B regresses to the same approval rate as A
+    counts = {'A': 0, 'B': 0}
+    for photo_id, variant in variants.items():
+        if variant == 'B':
+            manager.record_result(ab_test.id, photo_id, approved=counts['B'] % 10 < 3)
+            counts['B'] += 1
+    
+    sequential = manager.get_test_progress(ab_test.id)['sequential_test']
+    
+    assert sequential['likelihood_ratio'] < sequential['threshold']
+    assert sequential['can_stop_early'] is True
+    assert sequential['winner'] == 'B'
+    assert sequential['p_value'] <= crossed['p_value']
+    assert sequential['max_likelihood_ratio'] >= crossed['max_likelihood_ratio']
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
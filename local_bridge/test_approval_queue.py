@@ -0,0 +1,289 @@
+"""
+Tests for the approval queue index and service
+
+Requirements: 5.1, 5.2, 7.2
+"""
+
+import json
+
+import pytest
+from flask import Flask
+
+import approval_queue
+import websocket_events
+from approval_queue import ApprovalQueueIndex, ApprovalQueueService
+from models.database import init_db, get_session, Session, Photo
+
+
+@pytest.fixture
+def db(tmp_path):
+    init_db(f"sqlite:///{tmp_path / 'queue.db'}")
+    db_session = get_session()
+    try:
+        session = Session(name="Wedding", import_folder="/photos/wedding")
+        other = Session(name="Portrait", import_folder="/photos/portrait")
+        db_session.add_all([session, other])
+        db_session.commit()
+        yield db_session, session.id, other.id
+    finally:
+        db_session.close()
+
+
+@pytest.fixture
+def pushes(monkeypatch):
+    events = []
+    monkeypatch.setattr(
+        websocket_events, 'broadcast_approval_queue_updated',
+        lambda **kwargs: events.append(kwargs)
+    )
+    return events
+
+
+def add_photo(db_session, session_id, name, ai_score, status='completed', approved=False):
+    photo = Photo(
+        session_id=session_id,
+        file_path=f"/photos/{name}.jpg",
+        file_name=f"{name}.jpg",
+        ai_score=ai_score,
+        status=status,
+        approved=approved
+    )
+    db_session.add(photo)
+    db_session.commit()
+    return photo.id
+
+
+class TestApprovalQueueIndex:
+    """Sorted in-memory index"""
+    
+    @pytest.fixture(params=[True, False], ids=['sortedcontainers', 'bisect'])
+    def index(self, request, monkeypatch):
+        if request.param and not approval_queue.SORTEDCONTAINERS_AVAILABLE:
+            pytest.skip("sortedcontainers not installed")
+        monkeypatch.setattr(approval_queue, 'SORTEDCONTAINERS_AVAILABLE', request.param)
+        return ApprovalQueueIndex({
+            1: (10, 3.0),
+            2: (10, 4.5),
+            3: (20, 4.5),
+            4: (20, None),
+            5: (10, 2.0),
+        })
+    
+    def test_page_ordered_by_score_then_id(self, index):
+        assert index.page(0, 10) == [2, 3, 1, 5, 4]
+        assert index.page(1, 2) == [3, 1]
+        assert index.page(5, 10) == []
+    
+    def test_session_and_min_score_filters(self, index):
+        assert index.page(0, 10, session_id=10) == [2, 1, 5]
+        assert index.count(session_id=20) == 2
+        assert index.count(session_id=99) == 0
+        assert index.count(min_score=3.0) == 3
+        assert index.page(0, 10, session_id=10, min_score=3.0) == [2, 1]
+    
+    def test_add_update_remove(self, index):
+        assert index.add(6, 20, 5.0)
+        assert not index.add(6, 20, 5.0)
+        assert index.add(5, 10, 4.9)
+        assert index.page(0, 3) == [6, 5, 2]
+        assert index.position(5) == 1
+        
+        assert index.remove(6) == (20, 5.0)
+        assert index.remove(6) is None
+        assert index.count() == 5
+        assert 6 not in index
+
+
+class TestApprovalQueueService:
+    """Service backed by the database"""
+    
+    def test_seeded_from_database(self, db):
+        db_session, session_id, _ = db
+        best = add_photo(db_session, session_id, 'best', 4.8)
+        good = add_photo(db_session, session_id, 'good', 3.5)
+        add_photo(db_session, session_id, 'approved', 5.0, approved=True)
+        add_photo(db_session, session_id, 'processing', 4.0, status='processing')
+        
+        service = ApprovalQueueService(broadcast=False)
+        
+        assert service.get_page(0, 10) == ([best, good], 2)
+        assert service.count(session_id=session_id) == 2
+    
+    def test_remove_pushes_delta(self, db, pushes):
+        db_session, session_id, other_id = db
+        first = add_photo(db_session, session_id, 'a', 4.0)
+        add_photo(db_session, other_id, 'b', 3.0)
+        service = ApprovalQueueService()
+        
+        service.remove(first)
+        
+        assert service.count() == 1
+        assert pushes == [{'queue_count': 1, 'session_id': session_id, 'added': [], 'removed': [first]}]
+    
+    def test_add_pushes_position(self, db, pushes):
+        db_session, session_id, _ = db
+        add_photo(db_session, session_id, 'a', 4.0)
+        service = ApprovalQueueService()
+        
+        service.add(999, session_id, 4.5)
+        
+        assert pushes[-1]['added'] == [
+            {'photo_id': 999, 'session_id': session_id, 'ai_score': 4.5, 'position': 0}
+        ]
+        assert pushes[-1]['queue_count'] == 2
+    
+    def test_resync_picks_up_changes_from_other_processes(self, db, pushes):
+        db_session, session_id, _ = db
+        kept = add_photo(db_session, session_id, 'kept', 3.0)
+        gone = add_photo(db_session, session_id, 'gone', 4.0)
+        service = ApprovalQueueService(resync_interval=3600)
+        assert service.count() == 2
+        
+        # A Celery worker completes a photo; another worker approves one
+        new = add_photo(db_session, session_id, 'new', 4.9)
+        db_session.query(Photo).filter(Photo.id == gone).update({'approved': True})
+        db_session.commit()
+        assert service.count() == 2
+        
+        assert service.resync() == {'added': [new], 'removed': [gone]}
+        assert service.get_page(0, 10) == ([new, kept], 2)
+        assert pushes[-1]['removed'] == [gone]
+        assert pushes[-1]['added'][0]['photo_id'] == new
+    
+    def test_reseeded_when_database_changes(self, db, tmp_path):
+        db_session, session_id, _ = db
+        add_photo(db_session, session_id, 'a', 4.0)
+        service = ApprovalQueueService(broadcast=False)
+        assert service.count() == 1
+        
+        init_db(f"sqlite:///{tmp_path / 'other.db'}")
+        
+        assert service.count() == 0
+    
+    def test_fetch_photos_drops_stale_entries(self, db):
+        db_session, session_id, _ = db
+        first = add_photo(db_session, session_id, 'a', 4.0)
+        second = add_photo(db_session, session_id, 'b', 3.0)
+        service = ApprovalQueueService(broadcast=False)
+        photo_ids, _ = service.get_page(0, 10)
+        
+        db_session.query(Photo).filter(Photo.id == first).update({'status': 'rejected'})
+        db_session.commit()
+        
+        photos = service.fetch_photos(db_session, photo_ids)
+        
+        assert [p.id for p in photos] == [second]
+        assert service.count() == 1
+
+
+def test_api_queue_and_approve(db, pushes, monkeypatch):
+    from api_extended import api_bp
+    
+    db_session, session_id, _ = db
+    low = add_photo(db_session, session_id, 'low', 2.5)
+    high = add_photo(db_session, session_id, 'high', 4.5)
+    monkeypatch.setattr(approval_queue, '_approval_queue_service', ApprovalQueueService())
+    
+    app = Flask(__name__)
+    app.register_blueprint(api_bp)
+    client = app.test_client()
+    
+    data = json.loads(client.get('/api/approval/queue?limit=1').data)
+    assert [p['id'] for p in data['photos']] == [high]
+    assert data['total'] == 2
+    
+    response = client.post(f'/api/approval/{high}/approve', json={})
+    assert response.status_code == 200
+    assert pushes[-1]['removed'] == [high]
+    
+    data = json.loads(client.get('/api/approval/queue').data)
+    assert [p['id'] for p in data['photos']] == [low]
+    assert data['total'] == 1
+
+
+def test_queued_deltas_merged_for_slow_client(db, monkeypatch):
+    """Deltas waiting in a client's send queue are merged, not replaced"""
+    import threading
+    import time
+    from datetime import datetime
+    from websocket_server import WebSocketServer
+    
+    class BlockedWebSocket:
+        def __init__(self):
+            self.sent = []
+            self.release = threading.Event()
+        
+        def send(self, payload):
+            self.release.wait(5)
+            self.sent.append(json.loads(payload))
+    
+    db_session, session_id, other_id = db
+    first = add_photo(db_session, session_id, 'a', 4.0)
+    second = add_photo(db_session, other_id, 'b', 3.0)
+    
+    server = WebSocketServer(Flask(__name__))
+    ws = BlockedWebSocket()
+    server.clients.add(ws)
+    server.client_info[ws] = {'id': id(ws), 'connected_at': datetime.now(),
+                              'last_ping': datetime.now(), 'client_type': 'gui',
+                              'subscriptions': {'approval'}}
+    monkeypatch.setattr(websocket_events, 'get_websocket_server', lambda: server)
+    service = ApprovalQueueService()
+    
+    # First delta occupies the writer; the rest wait in the queue
+    service.remove(first)
+    time.sleep(0.05)
+    service.add(100, session_id, 4.5)
+    service.add(101, other_id, 2.0)
+    service.remove(101)
+    service.remove_many([second])
+    
+    ws.release.set()
+    assert server.send_queues[ws].flush(timeout=5)
+    
+    assert [m['removed'] for m in ws.sent] == [[first], [101, second]]
+    assert [item['photo_id'] for item in ws.sent[1]['added']] == [100]
+    assert ws.sent[1]['queue_count'] == 1
+    assert 'session_id' not in ws.sent[1]
+    assert server.send_queues[ws].get_metrics()['merged'] == 3
+
+
+def test_completed_job_added_when_reaped(db, pushes, monkeypatch):
+    """Photos completed by a Celery worker enter the queue when the task is reaped"""
+    from job_scheduler import JobScheduler, _record_celery_result
+    
+    class Result:
+        def __init__(self, success):
+            self.success = success
+        
+        def ready(self):
+            return True
+        
+        def successful(self):
+            return self.success
+    
+    db_session, session_id, _ = db
+    done = add_photo(db_session, session_id, 'done', 4.0, status='processing')
+    failed = add_photo(db_session, session_id, 'failed', 3.0, status='processing')
+    service = ApprovalQueueService()
+    assert service.count() == 0
+    
+    outcomes = {done: True, failed: False}
+    scheduler = JobScheduler(
+        dispatch_fn=lambda job: Result(outcomes[job.photo_id]),
+        finished_fn=_record_celery_result
+    )
+    scheduler.submit('job-done', done, 5, session_id=session_id)
+    scheduler.submit('job-failed', failed, 5, session_id=session_id)
+    
+    # The worker finishes the photo in its own process
+    db_session.query(Photo).filter(Photo.id.in_([done, failed])).update(
+        {'status': 'completed'}, synchronize_session=False
+    )
+    db_session.commit()
+    
+    monkeypatch.setattr(approval_queue, '_approval_queue_service', service)
+    assert scheduler.reap() == 2
+    
+    assert service.get_page(0, 10) == ([done], 1)
+    assert pushes[-1]['added'][0]['photo_id'] == done
@@ -216,6 +216,87 @@ class TestAuthManager:
             assert 'key_hash' in key_info
             assert key_info['key_hash'].endswith('...')
     
+    def test_jwt_signature_verified_once(self, monkeypatch):
+        """Test repeated verification of a token is served from the cache"""
+        token = self.auth_manager.generate_jwt_token("user_1", "cached")
+        
+        decode_calls = []
+        original_decode = jwt.decode
+        
+        def counting_decode(*args, **kwargs):
+            decode_calls.append(1)
+            return original_decode(*args, **kwargs)
+        
+        monkeypatch.setattr(jwt, 'decode', counting_decode)
+        
+        for i in range(5):
+            is_valid, payload, error = self.auth_manager.verify_jwt_token(token)
+            assert is_valid is True
+            assert payload['username'] == "cached"
+        
+        # Callers get copies; mutating one does not affect the cache
+        payload['username'] = "changed"
+        assert self.auth_manager.verify_jwt_token(token)[1]['username'] == "cached"
+        
+        assert len(decode_calls) == 1
+        stats = self.auth_manager.get_auth_cache_stats()['jwt']
+        assert stats['hits'] == 5
+        assert stats['misses'] == 1
+    
+    def test_jwt_cache_not_used_after_expiry(self):
+        """Test cached tokens are rejected after exp"""
+        token = self.auth_manager.generate_jwt_token("user_1", "expiring", expires_in_hours=1/3600)
+        
+        assert self.auth_manager.verify_jwt_token(token)[0] is True
+        time.sleep(2)
+        
+        is_valid, payload, error = self.auth_manager.verify_jwt_token(token)
+        assert is_valid is False
+        assert "expired" in error.lower()
+    
+    def test_jwt_cache_bounded(self):
+        """Test token cache evicts least recently used tokens"""
+        self.auth_manager.token_cache.max_size = 3
+        
+        for i in range(5):
+            token = self.auth_manager.generate_jwt_token(f"user_{i}", f"user{i}", expires_in_hours=1 + i)
+            self.auth_manager.verify_jwt_token(token)
+        
+        stats = self.auth_manager.get_auth_cache_stats()['jwt']
+        assert stats['size'] == 3
+        assert stats['evictions'] == 2
+        
+        # Invalid tokens are never cached
+        self.auth_manager.verify_jwt_token("invalid.token.here")
+        assert len(self.auth_manager.token_cache) == 3
+    
+    def test_api_key_usage_saved_in_batches(self):
+        """Test API key verification does not rewrite the config every time"""
+        api_key = self.auth_manager.generate_api_key("Batched Key")
+        
+        for i in range(10):
+            assert self.auth_manager.verify_api_key(api_key)[0] is True
+        
+        stats = self.auth_manager.get_auth_cache_stats()['api_key']
+        assert stats['verified'] == 10
+        assert stats['config_writes_deferred'] == 10
+        assert stats['usage_pending'] is True
+        
+        self.auth_manager.flush_api_key_usage()
+        reloaded = AuthManager(config_path=str(self.config_path))
+        assert list(reloaded.api_keys.values())[0]['usage_count'] == 10
+    
+    def test_revoked_api_key_rejected_immediately(self):
+        """Test revocation invalidates a key verified moments before"""
+        api_key = self.auth_manager.generate_api_key("Revoked Key")
+        assert self.auth_manager.verify_api_key(api_key)[0] is True
+        
+        self.auth_manager.revoke_api_key(api_key)
+        
+        is_valid, metadata, error = self.auth_manager.verify_api_key(api_key)
+        assert is_valid is False
+        assert self.auth_manager.get_auth_cache_stats()['api_key']['usage_pending'] is False
+    
     def test_rate_limit_within_limit(self):
         """Test rate limiting within allowed limit"""
         identifier = "test_user_1"
@@ -12,6 +12,7 @@ Requirements: 6.1, 6.4
 
 import pytest
 import pathlib
+import time
 import tempfile
 import shutil
 from datetime import datetime
@@ -19,6 +20,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from auto_export_engine import AutoExportEngine, ExportJob
+from export_queue import ExportQueue
 from export_preset_manager import ExportPresetManager, ExportPreset
 from models.database import Base, Photo, Session as DBSession
 
@@ -102,7 +104,7 @@ class TestAutoExportEngine:
         assert auto_export_engine is not None
         assert auto_export_engine.preset_manager is not None
         assert len(auto_export_engine.export_queue) == 0
-        assert len(auto_export_engine.processing_jobs) == 0
+        assert auto_export_engine.export_queue.count('processing') == 0
     
     def test_trigger_auto_export(self, auto_export_engine, test_photo, db_session):
         """Test triggering auto-export for an approved photo"""
@@ -265,7 +267,7 @@ class TestAutoExportEngine:
         assert error is None
         
         # Job should be in processing
-        assert job.id in auto_export_engine.processing_jobs
+        job = auto_export_engine.get_export_job(job.id)
         assert job.status == 'processing'
         assert job.started_at is not None
         assert job.output_path is not None
@@ -282,11 +284,12 @@ class TestAutoExportEngine:
         
         # Should succeed
         assert result is True
+        job = auto_export_engine.get_export_job(job.id)
         assert job.status == 'completed'
         assert job.completed_at is not None
         
         # Should be removed from processing
-        assert job.id not in auto_export_engine.processing_jobs
+        assert auto_export_engine.export_queue.count('processing') == 0
     
     def test_complete_export_job_with_error(self, auto_export_engine, test_photo, db_session):
         """Test completing an export job with error"""
@@ -301,6 +304,7 @@ class TestAutoExportEngine:
         
         # Should succeed
         assert result is True
+        job = auto_export_engine.get_export_job(job.id)
         assert job.status == 'failed'
         assert job.error_message == error_msg
     
@@ -396,6 +400,150 @@ class TestAutoExportEngine:
         assert 'quality' in config
         assert 'max_dimension' in config
         assert 'color_space' in config
+    
+    def test_claim_export_jobs_grouped_by_preset(self, auto_export_engine, test_photo, db_session, temp_dir):
+        """Test batched claim returns jobs of one preset with distinct paths"""
+        for name in ("SNS", "Print"):
+            auto_export_engine.preset_manager.get_preset(name).destination = str(temp_dir / name)
+        
+        photo_ids = [test_photo.id]
+        for i in range(2):
+            photo = Photo(
+                session_id=test_photo.session_id,
+                file_path=str(temp_dir / f"photo_{i}.cr3"),
+                file_name=f"photo_{i}.cr3",
+                import_time=datetime.now(),
+                capture_time=datetime(2025, 11, 8, 14, 30, 0),
+                status='completed',
+                approved=True
+            )
+            db_session.add(photo)
+            db_session.commit()
+            photo_ids.append(photo.id)
+        
+        for photo_id in photo_ids:
+            auto_export_engine.export_multiple_formats(photo_id, ["SNS", "Print"], db_session)
+        
+        batch = auto_export_engine.claim_export_jobs(10, db_session=db_session)
+        
+        assert batch['preset_name'] == "SNS"
+        assert [job['photo_id'] for job in batch['jobs']] == photo_ids
+        assert len(batch['configs']) == 3
+        assert len({config['export_path'] for config in batch['configs']}) == 3
+        assert batch['failed_job_ids'] == []
+        
+        # Remaining jobs belong to the other preset
+        status = auto_export_engine.get_export_queue_status()
+        assert status['pending_by_preset'] == {"Print": 3}
+        assert status['processing_count'] == 3
+        
+        # Claimed jobs keep their prepared output path
+        job = auto_export_engine.get_export_job(batch['jobs'][0]['id'])
+        assert job.output_path == batch['configs'][0]['export_path']
+    
+    def test_get_export_queue_status_paged(self, auto_export_engine, test_photo, db_session):
+        """Test queue status returns full counts but one page of jobs"""
+        for _ in range(5):
+            auto_export_engine.export_multiple_formats(test_photo.id, ["SNS"], db_session)
+        
+        status = auto_export_engine.get_export_queue_status(limit=2, offset=2)
+        
+        assert status['pending_count'] == 5
+        assert len(status['pending_jobs']) == 2
+        
+        all_jobs = auto_export_engine.get_export_queue_status()['pending_jobs']
+        assert [job['id'] for job in status['pending_jobs']] == [job['id'] for job in all_jobs[2:4]]
+    
+    def test_export_queue_persists_across_restart(self, preset_manager, test_photo, db_session, temp_dir):
+        """Test pending jobs survive recreating the engine"""
+        queue_path = str(temp_dir / "export_queue.db")
+        
+        engine = AutoExportEngine(preset_manager, queue_path=queue_path)
+        jobs = engine.trigger_auto_export(test_photo.id, db_session)
+        engine.export_queue.close()
+        
+        engine = AutoExportEngine(preset_manager, queue_path=queue_path)
+        
+        assert len(engine.export_queue) == len(jobs)
+        assert engine.get_export_job(jobs[0].id).preset_name == jobs[0].preset_name
+        assert engine.get_next_export_job().id == jobs[0].id
+        engine.export_queue.close()
+    
+    def test_stale_processing_jobs_requeued(self, preset_manager, test_photo, db_session, temp_dir):
+        """Test jobs claimed before a crash return to pending after the timeout"""
+        queue_path = str(temp_dir / "export_queue.db")
+        
+        engine = AutoExportEngine(preset_manager, queue_path=queue_path)
+        jobs = engine.trigger_auto_export(test_photo.id, db_session)
+        claimed = engine.claim_export_jobs(count=len(jobs), db_session=db_session)['jobs']
+        assert claimed
+        engine.export_queue.close()
+        
+        # Restart within the timeout: the claim is still considered active
+        engine = AutoExportEngine(preset_manager, queue_path=queue_path, processing_timeout=60)
+        assert engine.export_queue.get_counts()['processing'] == len(claimed)
+        engine.export_queue.close()
+        
+        # Restart after the timeout: the claimed jobs can be claimed again
+        engine = AutoExportEngine(preset_manager, queue_path=queue_path, processing_timeout=0)
+        assert engine.export_queue.get_counts()['processing'] == 0
+        assert engine.get_export_job(claimed[0]['id']).status == 'pending'
+        engine.export_queue.close()
+
+
+class TestExportQueue:
+    """Test suite for the SQLite export queue"""
+    
+    @staticmethod
+    def _job(job_id, preset_name="SNS", priority=2):
+        return {
+            'id': job_id,
+            'photo_id': 1,
+            'preset_name': preset_name,
+            'status': 'pending',
+            'priority': priority,
+            'created_at': datetime.now().isoformat()
+        }
+    
+    def test_claim_order_and_no_double_claim(self):
+        """Test higher priority jobs are claimed first and only once"""
+        queue = ExportQueue()
+        queue.add_jobs([self._job("a"), self._job("b"), self._job("c", priority=3)])
+        
+        first = queue.claim(2)
+        second = queue.claim(2)
+        
+        assert [job['id'] for job in first] == ["c", "a"]
+        assert [job['id'] for job in second] == ["b"]
+        assert queue.claim(2) == []
+        assert queue.get_counts()['processing'] == 3
+    
+    def test_cancel_and_finish(self):
+        """Test only pending jobs can be cancelled and only processing jobs finished"""
+        queue = ExportQueue()
+        queue.add_jobs([self._job("a"), self._job("b")])
+        queue.claim_job("a")
+        
+        assert queue.cancel("a") is False
+        assert queue.cancel("b") is True
+        assert "b" not in queue
+        assert queue.finish("b", 'completed') is None
+        assert queue.finish("a", 'completed')['status'] == 'completed'
+        
+        with pytest.raises(ValueError):
+            queue.finish("a", 'pending')
+    
+    def test_requeue_processing_older_than(self):
+        """Test only jobs claimed before the cutoff are requeued"""
+        queue = ExportQueue()
+        queue.add_jobs([self._job("a"), self._job("b")])
+        queue.claim_job("a")
+        
+        assert queue.requeue_processing(older_than=60) == 0
+        time.sleep(0.01)
+        assert queue.requeue_processing(older_than=0) == 1
+        assert queue.get("a")['status'] == 'pending'
+        assert queue.get("a")['started_at'] is None
 
 
 class TestExportJob:
@@ -18,6 +18,7 @@ from batch_controller import (
     BatchState,
     get_batch_controller
 )
+from state_store import StateStore
 
 
 @pytest.fixture
@@ -273,17 +274,36 @@ class TestBatchController:
         photo_ids = [1, 2, 3]
         batch_id = batch_controller.start_batch(photo_ids=photo_ids)
         
-        # Check that state file was created
-        state_file = temp_state_dir / f"{batch_id}.json"
-        assert state_file.exists()
+        # Check that state was written to the state store
+        assert (temp_state_dir / "state_store.db").exists()
         
-        # Verify state file content
-        with open(state_file, 'r') as f:
-            data = json.load(f)
+        # Verify stored state (new store instance reads from disk)
+        store = StateStore(temp_state_dir / "state_store.db")
+        data = store.get('batch', batch_id)
+        store.close()
         
         assert data['batch_id'] == batch_id
         assert data['total_photos'] == 3
     
+    def test_progress_updates_are_coalesced(self, batch_controller):
+        """Test that per-photo progress updates are flushed together"""
+        photo_ids = list(range(1, 51))
+        batch_id = batch_controller.start_batch(photo_ids=photo_ids)
+        store = batch_controller.state_store
+        flushes_before = store.flush_count
+        
+        for photo_id in photo_ids[:-1]:
+            batch_controller.update_batch_progress(batch_id, photo_id, success=True)
+        store.flush()
+        
+        assert store.flush_count - flushes_before <= 3
+        assert store.get('batch', batch_id)['processed_count'] == 49
+        
+        # Completion is persisted immediately
+        batch_controller.update_batch_progress(batch_id, photo_ids[-1], success=True)
+        assert store.get_statistics()['pending'] == 0
+        assert store.get('batch', batch_id)['status'] == BatchStatus.COMPLETED.value
+    
     def test_state_loading(self, temp_state_dir, mock_job_queue_manager):
         """Test loading persisted states"""
         # Create a persisted state file
@@ -317,6 +337,10 @@ class TestBatchController:
         batch_state = controller.active_batches[batch_id]
         assert batch_state.processed_count == 1
         assert batch_state.status == BatchStatus.PAUSED.value
+        
+        # Legacy state file was migrated into the state store
+        assert not state_file.exists()
+        assert controller.state_store.get('batch', batch_id)['processed_count'] == 1
     
     def test_recover_interrupted_batches(self, temp_state_dir, mock_job_queue_manager):
         """Test recovering interrupted batches"""
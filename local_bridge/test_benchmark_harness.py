@@ -0,0 +1,138 @@
+"""
+Tests for the end-to-end benchmark harness.
+
+Uses a tiny corpus so the real stages run in a few seconds.
+
+Requirements: 12.1, 12.2, 12.3
+"""
+
+import json
+import urllib.request
+
+import pytest
+
+pytest.importorskip("piexif")
+pytest.importorskip("imagehash")
+
+from benchmark_harness import (
+    FakeOllamaServer,
+    compare_results,
+    generate_corpus,
+    latency_summary,
+    main,
+    run_benchmark,
+)
+
+
+@pytest.fixture(scope='module')
+def result():
+    return run_benchmark(count=7, seed=3, megapixels=[0.1, 0.2])
+
+
+class TestCorpus:
+    """Synthetic corpus generation."""
+    
+    def test_corpus_is_deterministic(self, tmp_path):
+        first = generate_corpus(str(tmp_path / 'a'), count=6, seed=7, megapixels=[0.1])
+        second = generate_corpus(str(tmp_path / 'b'), count=6, seed=7, megapixels=[0.1])
+        other = generate_corpus(str(tmp_path / 'c'), count=6, seed=8, megapixels=[0.1])
+        
+        assert first['content_sha256'] == second['content_sha256']
+        assert first['content_sha256'] != other['content_sha256']
+        assert (tmp_path / 'a' / 'manifest.json').exists()
+    
+    def test_burst_distances_grow(self, tmp_path):
+        corpus = generate_corpus(str(tmp_path), count=10, seed=1, megapixels=[0.2], burst_size=5)
+        
+        burst = [p for p in corpus['photos'] if p['burst_id'] == 0]
+        distances = [p['phash_distance_to_first'] for p in burst]
+        assert len(burst) == 5
+        assert distances[0] == 0
+        assert distances == sorted(distances)
+        assert distances[-1] > 0
+    
+    def test_exif_readable(self, tmp_path):
+        from exif_analyzer import EXIFAnalyzer
+        
+        corpus = generate_corpus(str(tmp_path), count=4, seed=2, megapixels=[0.1], tiff_ratio=1.0)
+        analyzer = EXIFAnalyzer(cache_size=0)
+        
+        assert {p['format'] for p in corpus['photos']} == {'tiff'}
+        for photo in corpus['photos']:
+            exif = analyzer.analyze(photo['file_path'])
+            assert exif['camera']['make'] is not None
+            assert exif['settings']['iso'] is not None
+
+
+class TestFakeOllamaServer:
+    """Local fake of the Ollama HTTP API."""
+    
+    def test_generate_with_ollama_client(self):
+        from ollama_client import OllamaClient
+        
+        with FakeOllamaServer() as server:
+            client = OllamaClient(host=server.host)
+            text = client.generate("llama3.1:8b-instruct", "prompt")
+            with urllib.request.urlopen(f"{server.host}/api/tags") as response:
+                tags = json.loads(response.read())
+        
+        assert text.startswith("SCORE:")
+        assert tags['models']
+        assert server.request_count == 1
+
+
+class TestResults:
+    """Benchmark result and baseline comparison."""
+    
+    def test_result_shape(self, result):
+        assert result['corpus']['count'] == 7
+        for stage in ('exif', 'quality', 'context', 'phash', 'llm', 'grouping'):
+            assert result['stages'][stage]['count'] >= 1
+            assert result['stages'][stage]['p50_ms'] <= result['stages'][stage]['p99_ms']
+        
+        pipeline = result['pipeline']
+        assert pipeline['photos'] == 7
+        assert pipeline['photos_per_second'] > 0
+        assert pipeline['peak_rss_mb'] > 0
+        assert pipeline['db_writes']['statements'] >= 7
+        assert result['llm_requests'] > 0
+        json.dumps(result)
+    
+    def test_latency_summary(self):
+        summary = latency_summary([1.0, 2.0, 3.0, 4.0])
+        
+        assert summary['count'] == 4
+        assert summary['p50_ms'] == 2.5
+        assert summary['max_ms'] == 4.0
+        assert latency_summary([]) == {'count': 0}
+    
+    def test_compare_detects_regression(self, result):
+        assert compare_results(result, result)['passed']
+        
+        slower = json.loads(json.dumps(result))
+        slower['pipeline']['photos_per_second'] /= 2
+        slower['stages']['quality']['p50_ms'] *= 3
+        comparison = compare_results(slower, result, tolerance=0.1)
+        
+        assert not comparison['passed']
+        metrics = {r['metric'] for r in comparison['regressions']}
+        assert 'pipeline.photos_per_second' in metrics
+        assert 'stages.quality.p50_ms' in metrics
+        
+        assert compare_results(result, slower)['improvements']
+    
+    def test_cli_baseline_mode(self, result, tmp_path, capsys):
+        baseline = json.loads(json.dumps(result))
+        baseline['pipeline']['photos_per_second'] *= 100
+        baseline_path = tmp_path / 'baseline.json'
+        baseline_path.write_text(json.dumps(baseline))
+        output_path = tmp_path / 'result.json'
+        
+        exit_code = main([
+            '--photos', '3', '--seed', '3', '--megapixels', '0.1',
+            '--skip-stages', '--output', str(output_path), '--baseline', str(baseline_path)
+        ])
+        
+        assert exit_code == 1
+        written = json.loads(output_path.read_text())
+        assert not written['comparison']['passed']
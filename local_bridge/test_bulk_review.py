@@ -0,0 +1,205 @@
+"""
+Tests for bulk approve/reject
+
+Requirements: 5.3, 5.4, 6.1
+"""
+
+import json
+
+import pytest
+from flask import Flask
+
+import approval_queue
+import auto_export_engine
+import desktop_notifier
+import websocket_events
+from approval_queue import ApprovalQueueService
+from auto_export_engine import AutoExportEngine
+from bulk_review import parse_review_decisions, apply_bulk_review, MAX_BULK_REVIEW_SIZE
+from export_preset_manager import ExportPresetManager
+from models.database import init_db, get_session, Session, Photo, LearningData
+
+
+@pytest.fixture
+def db(tmp_path):
+    init_db(f"sqlite:///{tmp_path / 'review.db'}")
+    db_session = get_session()
+    try:
+        session = Session(name="Wedding", import_folder="/photos/wedding")
+        db_session.add(session)
+        db_session.commit()
+        yield db_session, session.id
+    finally:
+        db_session.close()
+
+
+@pytest.fixture
+def published(monkeypatch):
+    """Record queue pushes, WebSocket events and desktop notifications"""
+    events = {'queue': [], 'reviewed': [], 'notifications': []}
+    monkeypatch.setattr(
+        websocket_events, 'broadcast_approval_queue_updated',
+        lambda **kwargs: events['queue'].append(kwargs)
+    )
+    monkeypatch.setattr(
+        websocket_events, 'broadcast_photos_reviewed',
+        lambda **kwargs: events['reviewed'].append(kwargs)
+    )
+    
+    class _Notifier:
+        def send(self, **kwargs):
+            events['notifications'].append(kwargs)
+            return True
+    
+    monkeypatch.setattr(desktop_notifier, 'get_notifier', lambda: _Notifier())
+    monkeypatch.setattr(approval_queue, '_approval_queue_service', ApprovalQueueService())
+    return events
+
+
+@pytest.fixture
+def export_engine(tmp_path, monkeypatch):
+    engine = AutoExportEngine(ExportPresetManager(tmp_path / 'presets.json'))
+    monkeypatch.setattr(auto_export_engine, '_auto_export_engine', engine)
+    return engine
+
+
+def add_photos(db_session, session_id, count):
+    photos = [
+        Photo(
+            session_id=session_id,
+            file_path=f"/photos/img_{i}.jpg",
+            file_name=f"img_{i}.jpg",
+            ai_score=3.0 + i / 10,
+            status='completed',
+            approved=False,
+            selected_preset='WhiteLayer_Transparency_v4'
+        )
+        for i in range(count)
+    ]
+    db_session.add_all(photos)
+    db_session.commit()
+    return [photo.id for photo in photos]
+
+
+class TestParseReviewDecisions:
+    """Request payload parsing"""
+    
+    def test_id_lists_and_decisions_combined(self):
+        decisions = parse_review_decisions({
+            'approve': [1, 2],
+            'reject': [3],
+            'reason': 'Out of focus',
+            'decisions': [{'photo_id': 4, 'decision': 'reject', 'reason': 'Closed eyes'}]
+        })
+        
+        assert sorted(decisions) == [
+            (1, 'approve', None),
+            (2, 'approve', None),
+            (3, 'reject', 'Out of focus'),
+            (4, 'reject', 'Closed eyes')
+        ]
+    
+    def test_last_decision_wins(self):
+        decisions = parse_review_decisions({'approve': [1], 'reject': [1]})
+        
+        assert decisions == [(1, 'reject', 'User rejected')]
+    
+    @pytest.mark.parametrize('payload', [
+        {},
+        {'approve': []},
+        {'approve': 5},
+        {'approve': ['1']},
+        {'decisions': [{'photo_id': 1, 'decision': 'maybe'}]},
+        {'decisions': [1]},
+        {'approve': list(range(MAX_BULK_REVIEW_SIZE + 1))},
+    ])
+    def test_malformed_payload_rejected(self, payload):
+        with pytest.raises(ValueError):
+            parse_review_decisions(payload)
+
+
+class TestApplyBulkReview:
+    """Single-transaction writes and batch side effects"""
+    
+    def test_mixed_decisions_written_once(self, db, published):
+        db_session, session_id = db
+        photo_ids = add_photos(db_session, session_id, 5)
+        approve, reject = photo_ids[:3], photo_ids[3:]
+        
+        result = apply_bulk_review(db_session, parse_review_decisions({
+            'approve': approve, 'reject': reject + [9999], 'reason': 'Blurry'
+        }))
+        
+        assert result['approved'] == approve
+        assert result['rejected'] == reject
+        assert result['not_found'] == [9999]
+        assert result['session_ids'] == [session_id]
+        
+        db_session.expire_all()
+        photos = {p.id: p for p in db_session.query(Photo).all()}
+        assert all(photos[i].approved and photos[i].status == 'completed' for i in approve)
+        assert all(photos[i].approved_at is not None for i in approve)
+        assert all(photos[i].status == 'rejected' and photos[i].rejection_reason == 'Blurry' for i in reject)
+        
+        actions = {row.photo_id: row.action for row in db_session.query(LearningData).all()}
+        assert actions == {**{i: 'approved' for i in approve}, **{i: 'rejected' for i in reject}}
+        
+        assert len(published['queue']) == 1
+        assert sorted(published['queue'][0]['removed']) == sorted(photo_ids)
+        assert published['queue'][0]['queue_count'] == 0
+        assert len(published['reviewed']) == 1
+        assert len(published['notifications']) == 1
+    
+    def test_auto_export_jobs_grouped_by_preset(self, db, published, export_engine):
+        db_session, session_id = db
+        photo_ids = add_photos(db_session, session_id, 3)
+        presets = export_engine.preset_manager.get_enabled_presets()
+        assert presets
+        
+        result = apply_bulk_review(
+            db_session, parse_review_decisions({'approve': photo_ids}), auto_export=True
+        )
+        
+        assert result['export_triggered']
+        assert result['export_job_count'] == len(photo_ids) * len(presets)
+        assert export_engine.export_queue.get_preset_counts() == {
+            preset.name: len(photo_ids) for preset in presets
+        }
+        assert published['reviewed'][0]['export_job_count'] == result['export_job_count']
+    
+    def test_bulk_export_skips_unapproved_photos(self, db, export_engine):
+        db_session, session_id = db
+        photo_ids = add_photos(db_session, session_id, 2)
+        
+        assert export_engine.trigger_auto_export_bulk(photo_ids, db_session) == {}
+        assert export_engine.export_queue.count() == 0
+
+
+def test_api_bulk_review(db, published):
+    from api_extended import api_bp
+    
+    db_session, session_id = db
+    photo_ids = add_photos(db_session, session_id, 3)
+    
+    app = Flask(__name__)
+    app.register_blueprint(api_bp)
+    client = app.test_client()
+    
+    response = client.post('/api/approval/bulk', json={
+        'decisions': [
+            {'photo_id': photo_ids[0], 'decision': 'approve'},
+            {'photo_id': photo_ids[1], 'decision': 'reject', 'reason': 'Duplicate'}
+        ]
+    })
+    data = json.loads(response.data)
+    
+    assert response.status_code == 200
+    assert data['approved'] == [photo_ids[0]]
+    assert data['rejected'] == [photo_ids[1]]
+    assert data['export_triggered'] is False
+    
+    queue = json.loads(client.get('/api/approval/queue').data)
+    assert [p['id'] for p in queue['photos']] == [photo_ids[2]]
+    
+    response = client.post('/api/approval/bulk', json={'approve': 'all'})
+    assert response.status_code == 400
@@ -13,7 +13,10 @@ Requirements: 6.3
 
 import pytest
 import pathlib
+import shutil
 import tempfile
+import threading
+import time
 import json
 import subprocess
 from unittest.mock import Mock, patch, MagicMock
@@ -24,6 +27,8 @@ from cloud_sync_manager import (
     CloudProvider,
     UploadStatus,
     UploadJob,
+    JobIndex,
+    parse_bandwidth,
     get_cloud_sync_manager
 )
 
@@ -515,7 +520,7 @@ class TestRcloneIntegration:
                 assert call_args[1] == 'copy'
                 assert str(tmp_path) in call_args
                 assert 'dropbox:' in call_args[3]
-                assert '--progress' in call_args
+                assert '--use-json-log' in call_args
         finally:
             tmp_path.unlink()
     
@@ -916,6 +921,214 @@ class TestUploadRetryLogic:
             tmp_path.unlink()
 
 
+class FakeRcloneProcess:
+    """Stand-in for an rclone subprocess emitting JSON log lines"""
+    
+    def __init__(self, lines=(), return_code=0, delay=0.0, on_start=None, on_exit=None):
+        self._lines = [json.dumps(line) + '\n' for line in lines]
+        self._return_code = return_code
+        self._delay = delay
+        self._on_start = on_start
+        self._on_exit = on_exit
+        self._started = False
+        self._done = False
+        self.stderr = self
+    
+    def readline(self):
+        if not self._started:
+            self._started = True
+            if self._on_start:
+                self._on_start()
+            time.sleep(self._delay)
+        if self._lines:
+            return self._lines.pop(0)
+        if not self._done:
+            self._done = True
+            if self._on_exit:
+                self._on_exit()
+        return ''
+    
+    def read(self):
+        return ''
+    
+    def poll(self):
+        return self._return_code if self._done else None
+
+
+class TestUploadEngine:
+    """Test worker pool, batching and JSON progress parsing"""
+    
+    @pytest.fixture
+    def photo_dir(self):
+        """Create a folder with small JPEG files"""
+        temp_dir = pathlib.Path(tempfile.mkdtemp())
+        for i in range(5):
+            (temp_dir / f"IMG_{i:04d}.jpg").write_bytes(b'x' * 1000)
+        yield temp_dir
+        shutil.rmtree(temp_dir)
+    
+    def _manager(self, **config):
+        config = {'enabled': True, 'provider': 'dropbox', 'remote_path': '/Photos/Test', **config}
+        with patch.object(CloudSyncManager, '_check_rclone', return_value=True):
+            return CloudSyncManager(config)
+    
+    def test_small_files_batched_with_files_from(self, photo_dir):
+        """Test small files from one folder use one rclone call"""
+        manager = self._manager()
+        manager.upload_batch(sorted(photo_dir.iterdir()))
+        
+        commands = []
+        listed = []
+        
+        def popen(cmd, **kwargs):
+            commands.append(cmd)
+            listed.append(pathlib.Path(cmd[cmd.index('--files-from') + 1]).read_text(encoding='utf-8').split())
+            return FakeRcloneProcess()
+        
+        with patch('subprocess.Popen', side_effect=popen):
+            result = manager.process_upload_queue(max_concurrent=2)
+        
+        assert len(commands) == 1
+        assert commands[0][2] == str(photo_dir)
+        assert commands[0][3] == 'dropbox:/Photos/Test'
+        assert listed[0] == [f"IMG_{i:04d}.jpg" for i in range(5)]
+        assert result['succeeded'] == 5
+        assert len(manager.completed_uploads) == 5
+    
+    def test_large_files_uploaded_concurrently(self, photo_dir):
+        """Test large files run in parallel rclone processes"""
+        manager = self._manager(small_file_threshold=0)
+        manager.upload_batch(sorted(photo_dir.iterdir()))
+        
+        lock = threading.Lock()
+        state = {'running': 0, 'peak': 0}
+        
+        def started():
+            with lock:
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+        
+        def exited():
+            with lock:
+                state['running'] -= 1
+        
+        with patch('subprocess.Popen', side_effect=lambda cmd, **kwargs: FakeRcloneProcess(
+                delay=0.1, on_start=started, on_exit=exited)):
+            result = manager.process_upload_queue(max_concurrent=3)
+        
+        assert result['succeeded'] == 5
+        assert state['peak'] == 3
+    
+    def test_json_progress_parsing(self):
+        """Test progress is read from rclone JSON stats"""
+        manager = self._manager()
+        job = UploadJob(
+            id="test123",
+            local_path="/path/to/file.jpg",
+            remote_path="/Photos/file.jpg",
+            provider="dropbox",
+            status="uploading",
+            created_at=datetime.now().isoformat(),
+            file_size=4000
+        )
+        
+        line = json.dumps({"level": "notice", "msg": "stats", "stats": {"bytes": 1000, "totalBytes": 4000}})
+        manager._parse_rclone_progress(job, line)
+        
+        assert job.bytes_uploaded == 1000
+        assert abs(job.progress_percent - 25.0) < 0.1
+    
+    def test_batch_partial_failure(self, photo_dir):
+        """Test only files confirmed by rclone are completed when the batch fails"""
+        manager = self._manager()
+        manager.upload_batch(sorted(photo_dir.iterdir()))
+        
+        lines = [
+            {"level": "info", "msg": "Copied (new)", "object": "IMG_0000.jpg"},
+            {"level": "notice", "stats": {"transferring": [{"name": "IMG_0001.jpg", "bytes": 500, "size": 1000}]}},
+            {"level": "info", "msg": "Multi-thread Copied (new)", "object": "IMG_0001.jpg"},
+            {"level": "info", "msg": "Unchanged skipping", "object": "IMG_0003.jpg"},
+            {"level": "error", "msg": "Failed to copy: quota exceeded", "object": "IMG_0002.jpg"}
+        ]
+        
+        # rclone aborts after the per-file error; IMG_0004 was never transferred
+        with patch('subprocess.Popen', side_effect=lambda cmd, **kwargs: FakeRcloneProcess(lines, return_code=1)):
+            result = manager.process_upload_queue(wait_for_retries=False)
+        
+        assert result['succeeded'] == 3
+        retried = {pathlib.Path(job.local_path).name: job for job in manager.upload_queue}
+        assert sorted(retried) == ["IMG_0002.jpg", "IMG_0004.jpg"]
+        assert all(job.status == UploadStatus.RETRYING.value for job in retried.values())
+        assert "quota exceeded" in retried["IMG_0002.jpg"].error_message
+        assert "rclone failed with code 1" in retried["IMG_0004.jpg"].error_message
+    
+    def test_retry_backoff_does_not_block(self, photo_dir):
+        """Test failed jobs wait in the queue instead of sleeping a worker"""
+        manager = self._manager()
+        job = manager.upload_file(photo_dir / "IMG_0000.jpg")
+        manager.upload_queue.remove(job)
+        manager.active_uploads[job.id] = job
+        
+        with patch('time.sleep') as mock_sleep:
+            manager._handle_upload_failure(job, "Network error")
+        
+        assert not mock_sleep.called
+        assert job.next_retry_at > time.time()
+        
+        unit, next_retry_at = manager._claim_next_unit()
+        assert unit == []
+        assert next_retry_at == job.next_retry_at
+    
+    def test_bandwidth_budget_split(self):
+        """Test the bandwidth budget is shared by concurrent processes"""
+        manager = self._manager(bandwidth_limit='8M')
+        manager._worker_count = 4
+        
+        cmd = manager._build_rclone_command('/photos/a.jpg', 'dropbox:/Photos')
+        
+        assert cmd[cmd.index('--bwlimit') + 1] == '2048K'
+        assert parse_bandwidth('512K') == 512 * 1024
+        assert parse_bandwidth(None) is None
+    
+    def test_job_index_lookup(self):
+        """Test JobIndex keeps order and supports lookup by ID"""
+        index = JobIndex()
+        jobs = [
+            UploadJob(id=f"job{i}", local_path=f"/p/{i}.jpg", remote_path=f"/r/{i}.jpg",
+                      provider="dropbox", status="pending", created_at="")
+            for i in range(3)
+        ]
+        for job in jobs:
+            index.append(job)
+        
+        index.remove("job1")
+        
+        assert [job.id for job in index] == ["job0", "job2"]
+        assert index[-1].id == "job2"
+        assert index.get("job2") is jobs[2]
+        assert "job1" not in index
+    
+    @pytest.mark.skipif(shutil.which('rclone') is None, reason="rclone not installed")
+    def test_upload_with_rclone_local_backend(self, photo_dir):
+        """Test real uploads to a local folder through rclone"""
+        destination = pathlib.Path(tempfile.mkdtemp())
+        try:
+            manager = CloudSyncManager({
+                'enabled': True,
+                'provider': 'dropbox',
+                'rclone_remote': ':local',
+                'remote_path': str(destination)
+            })
+            manager.upload_batch(sorted(photo_dir.iterdir()))
+            
+            result = manager.process_upload_queue(max_concurrent=2)
+            
+            assert result['succeeded'] == 5
+            assert sorted(p.name for p in destination.iterdir()) == sorted(p.name for p in photo_dir.iterdir())
+        finally:
+            shutil.rmtree(destination)
+
+
 class TestConvenienceFunction:
     """Test convenience function"""
     
@@ -698,5 +698,135 @@ class TestContextEngineIntegration:
         assert result['score'] > 0.5
 
 
+class TestContextEngineBatch:
+    """Tests for compiled rules and NumPy batch scoring."""
+    
+    @pytest.fixture
+    def engine(self):
+        """Create engine with the shipped context rules."""
+        return ContextEngine()
+    
+    @pytest.fixture
+    def photos(self):
+        """Generate varied EXIF data (including missing fields)."""
+        import random
+        rng = random.Random(42)
+        
+        photos = []
+        for i in range(300):
+            settings = {
+                'iso': rng.choice([100, 200, 400, 800, 1600, 3200, 6400, None]),
+                'focal_length': rng.choice([14.0, 24.0, 35.0, 50.0, 85.0, 135.0, 200.0]),
+                'aperture': rng.choice([1.4, 2.8, 5.6, 8.0, 11.0]),
+                'shutter_speed': rng.choice(['1/4000', '1/1000', '1/250', '1/60', '1/8', '2', None]),
+                'exposure_compensation': rng.choice([-1.0, 0.0, 0.7, 1.3])
+            }
+            exif_data = {
+                'settings': {k: v for k, v in settings.items() if v is not None},
+                'location': {
+                    'location_type': rng.choice(['outdoor', 'indoor', 'unknown']),
+                    'has_gps': rng.choice([True, False])
+                },
+                'context_hints': {
+                    'time_of_day': rng.choice([
+                        'morning', 'afternoon', 'evening', 'night', 'golden_hour_evening',
+                        'golden_hour_morning', 'blue_hour_evening'
+                    ]),
+                    'lighting': rng.choice(['bright', 'normal', 'low_light', 'very_low_light']),
+                    'backlight_risk': rng.choice(['low', 'medium', 'high'])
+                }
+            }
+            if i % 25 == 0:
+                del exif_data['context_hints']
+            photos.append((exif_data, None))
+        return photos
+    
+    def test_batch_matches_single_photo_results(self, engine, photos):
+        """Batch scoring returns the same context as determine_context."""
+        table = engine.build_feature_table(photos)
+        results = engine.determine_contexts_batch(table, include_all_scores=True)
+        
+        assert len(results) == len(photos)
+        for (exif_data, ai_eval), batch_result in zip(photos, results):
+            single = engine.determine_context(exif_data, ai_eval)
+            assert batch_result['context'] == single['context']
+            assert batch_result['score'] == pytest.approx(single['score'])
+            assert batch_result['recommended_preset'] == single['recommended_preset']
+            for name, score in single['all_scores'].items():
+                assert batch_result['all_scores'][name] == pytest.approx(score)
+    
+    def test_numeric_columns(self, engine, photos):
+        """NumPy float columns (NaN = missing) score like list columns."""
+        import numpy as np
+        
+        table = engine.build_feature_table(photos)
+        numeric_table = dict(table)
+        for field in ('settings.iso', 'settings.focal_length', 'settings.aperture'):
+            numeric_table[field] = np.array(
+                [np.nan if v is None else v for v in table[field]], dtype=float
+            )
+        
+        names, scores = engine.score_contexts_batch(table)
+        numeric_names, numeric_scores = engine.score_contexts_batch(numeric_table)
+        
+        assert names == numeric_names
+        assert np.allclose(scores, numeric_scores)
+    
+    def test_batch_with_ai_eval_fields(self, tmp_path):
+        """Fields under ai_eval are read from the AI evaluation."""
+        rules = {
+            "contexts": {
+                "default": {"conditions": [], "weights": [],
+                            "recommended_preset": "Default_v1", "preset_blend": 50},
+                "sharp_portrait": {
+                    "conditions": [
+                        {"field": "ai_eval.faces_detected", "operator": ">=", "value": 1},
+                        {"field": "settings.shutter_speed", "operator": "shutter_faster_than",
+                         "value": "1/250"}
+                    ],
+                    "weights": [1, 1],
+                    "recommended_preset": "Portrait_v1",
+                    "preset_blend": 60
+                }
+            }
+        }
+        rules_file = tmp_path / "context_rules.json"
+        rules_file.write_text(json.dumps(rules), encoding='utf-8')
+        engine = ContextEngine(str(rules_file))
+        
+        photos = [
+            ({'settings': {'shutter_speed': '1/1000'}}, {'faces_detected': 2}),
+            ({'settings': {'shutter_speed': '1/30'}}, {'faces_detected': 1}),
+            ({'settings': {'shutter_speed': '1/1000'}}, None)
+        ]
+        results = engine.determine_contexts_batch(engine.build_feature_table(photos))
+        
+        assert [r['context'] for r in results] == ['sharp_portrait', 'sharp_portrait', 'sharp_portrait']
+        assert [r['score'] for r in results] == pytest.approx([1.0, 0.5, 0.5])
+    
+    def test_rules_assignment_recompiles(self, engine):
+        """Assigning rules replaces the compiled rules."""
+        engine.rules = {
+            'default': {'conditions': [], 'weights': [],
+                        'recommended_preset': 'Default_v1', 'preset_blend': 50},
+            'high_iso': {
+                'conditions': [{'field': 'settings.iso', 'operator': '>', 'value': 3200}],
+                'weights': [5.0],
+                'recommended_preset': 'NR_v1',
+                'preset_blend': 80
+            }
+        }
+        
+        assert engine.get_rule_fields() == ['settings.iso']
+        result = engine.determine_context({'settings': {'iso': 6400}})
+        assert result['context'] == 'high_iso'
+        assert result['score'] == pytest.approx(1.0)
+    
+    def test_empty_batch(self, engine):
+        """An empty table returns no results."""
+        table = engine.build_feature_table([])
+        assert engine.determine_contexts_batch(table) == []
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -328,5 +328,117 @@ def test_foreign_key_integrity(source_db, temp_dir):
     conn.close()
 
 
+def test_chunked_migration(source_db, temp_dir):
+    """Test migration in small chunks with checksums and derived tables."""
+    target_db = temp_dir / 'target.db'
+    
+    tool = DataMigrationTool(
+        source_db_path=str(source_db),
+        target_db_path=str(target_db),
+        backup_dir=str(temp_dir / 'backups'),
+        chunk_size=2
+    )
+    
+    assert tool.migrate_data()
+    
+    progress = tool.get_migration_progress()
+    assert progress['photos'] == {'last_id': 5, 'rows_migrated': 5, 'chunks': 3, 'completed': True}
+    assert progress['jobs']['last_id'] == 'test-job-001'
+    
+    conn = sqlite3.connect(target_db)
+    chunk_rows = conn.execute(
+        "SELECT row_count FROM migration_chunks WHERE table_name = 'photos' ORDER BY chunk_index"
+    ).fetchall()
+    tags = conn.execute("SELECT tag FROM preset_context_tags ORDER BY tag").fetchall()
+    adjustments = conn.execute("SELECT param, value FROM learning_adjustments").fetchall()
+    conn.close()
+    
+    assert [row[0] for row in chunk_rows] == [2, 2, 1]
+    assert tags == [('outdoor',), ('portrait',)]
+    assert adjustments == [('exposure', 0.5)]
+    
+    results = tool.verify_migration()
+    assert results['success']
+    assert results['checks']['photos']['chunks_verified'] == 3
+    assert tool.verify_migration(max_chunks_per_table=1)['checks']['photos']['chunks_verified'] == 1
+
+
+def test_resume_after_interruption(source_db, temp_dir, monkeypatch):
+    """Test that an interrupted migration continues from its checkpoint."""
+    target_db = temp_dir / 'target.db'
+    
+    tool = DataMigrationTool(
+        source_db_path=str(source_db),
+        target_db_path=str(target_db),
+        backup_dir=str(temp_dir / 'backups'),
+        chunk_size=2
+    )
+    
+    # Fail while inserting the second chunk of photos
+    original_convert = DataMigrationTool._convert_photo
+    
+    def failing_convert(row):
+        if row.get('id') == 4:
+            raise RuntimeError("simulated crash")
+        return original_convert(row)
+    
+    monkeypatch.setattr(tool, '_convert_photo', failing_convert)
+    assert not tool.migrate_data()
+    
+    progress = tool.get_migration_progress()
+    assert progress['sessions']['completed']
+    assert progress['photos'] == {'last_id': 2, 'rows_migrated': 2, 'chunks': 1, 'completed': False}
+    
+    monkeypatch.setattr(tool, '_convert_photo', original_convert)
+    assert tool.migrate_data()
+    
+    assert tool.get_migration_progress()['photos']['rows_migrated'] == 5
+    results = tool.verify_migration()
+    assert results['success']
+    assert results['checks']['photos']['target_count'] == 5
+
+
+def test_restart_discards_target(source_db, temp_dir):
+    """Test that resume=False migrates from scratch."""
+    target_db = temp_dir / 'target.db'
+    
+    tool = DataMigrationTool(
+        source_db_path=str(source_db),
+        target_db_path=str(target_db),
+        backup_dir=str(temp_dir / 'backups')
+    )
+    
+    assert tool.migrate_data()
+    assert tool.migrate_data()
+    assert tool.migrate_data(resume=False)
+    
+    assert tool.verify_migration()['success']
+
+
+def test_verify_detects_checksum_mismatch(source_db, temp_dir):
+    """Test that chunk checksums catch modified target rows."""
+    target_db = temp_dir / 'target.db'
+    
+    tool = DataMigrationTool(
+        source_db_path=str(source_db),
+        target_db_path=str(target_db),
+        backup_dir=str(temp_dir / 'backups'),
+        chunk_size=2
+    )
+    tool.migrate_data()
+    
+    conn = sqlite3.connect(target_db)
+    conn.execute("UPDATE photos SET iso = 6400 WHERE id = 3")
+    conn.commit()
+    conn.close()
+    
+    results = tool.verify_migration()
+    
+    assert not results['success']
+    assert results['checks']['photos']['match']
+    assert results['checks']['photos']['chunk_mismatches'] == 1
+    assert any('photos chunk 1' in error for error in results['errors'])
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -0,0 +1,174 @@
+"""
+Tests for the fast EXIF tag reader and EXIFAnalyzer caching/batch API.
+
+The fast reader is checked against exifread on generated JPEG and TIFF
+files so that both paths produce identical analysis results.
+
+Requirements: 1.3, 3.1
+"""
+
+import os
+import pytest
+from unittest.mock import patch
+
+piexif = pytest.importorskip("piexif")
+Image = pytest.importorskip("PIL.Image")
+exifread = pytest.importorskip("exifread")
+
+from exif_reader import read_exif_tags
+from exif_analyzer import EXIFAnalyzer
+
+
+def make_exif_bytes():
+    """Build an EXIF block covering every tag EXIFAnalyzer reads."""
+    return piexif.dump({
+        '0th': {
+            piexif.ImageIFD.Make: b'Canon',
+            piexif.ImageIFD.Model: b'Canon EOS R5',
+            piexif.ImageIFD.DateTime: b'2025:11:08 17:30:00',
+        },
+        'Exif': {
+            piexif.ExifIFD.ExposureTime: (1, 250),
+            piexif.ExifIFD.FNumber: (28, 10),
+            piexif.ExifIFD.ISOSpeedRatings: 800,
+            piexif.ExifIFD.DateTimeOriginal: b'2025:11:08 17:30:00',
+            piexif.ExifIFD.ExposureBiasValue: (-2, 3),
+            piexif.ExifIFD.FocalLength: (85, 1),
+            piexif.ExifIFD.MeteringMode: 5,
+            piexif.ExifIFD.WhiteBalance: 0,
+            piexif.ExifIFD.LensModel: b'RF85mm F1.2 L USM',
+            piexif.ExifIFD.LensMake: b'Canon',
+        },
+        'GPS': {
+            piexif.GPSIFD.GPSLatitudeRef: b'N',
+            piexif.GPSIFD.GPSLatitude: ((35, 1), (40, 1), (3432, 100)),
+            piexif.GPSIFD.GPSLongitudeRef: b'E',
+            piexif.GPSIFD.GPSLongitude: ((139, 1), (39, 1), (108, 100)),
+        },
+    })
+
+
+@pytest.fixture
+def jpeg_file(tmp_path):
+    path = tmp_path / 'photo.jpg'
+    Image.new('RGB', (64, 48), (120, 80, 40)).save(path, 'JPEG', exif=make_exif_bytes())
+    return str(path)
+
+
+@pytest.fixture
+def tiff_file(tmp_path):
+    path = tmp_path / 'photo.tif'
+    Image.new('RGB', (64, 48), (120, 80, 40)).save(path, 'TIFF', exif=make_exif_bytes())
+    return str(path)
+
+
+def printable(result):
+    """Compare tag objects from either reader by their printable value."""
+    return {
+        section: {
+            key: value if value is None or isinstance(value, (int, float, str, bool)) else str(value)
+            for key, value in values.items()
+        }
+        for section, values in result.items()
+    }
+
+
+def exifread_analyze(analyzer, file_path):
+    """Analyze a file with the exifread path only."""
+    with patch('exif_analyzer.read_exif_tags', return_value=None):
+        return analyzer.analyze(file_path)
+
+
+class TestReadExifTags:
+    """Fast reader output compared with exifread."""
+    
+    @pytest.mark.parametrize('fixture_name', ['jpeg_file', 'tiff_file'])
+    def test_printable_values_match_exifread(self, request, fixture_name):
+        file_path = request.getfixturevalue(fixture_name)
+        fast = read_exif_tags(file_path)
+        with open(file_path, 'rb') as f:
+            reference = exifread.process_file(f, details=False)
+        
+        assert fast
+        for name, tag in fast.items():
+            assert name in reference, name
+            assert str(tag) == str(reference[name]), name
+    
+    def test_unsupported_format_returns_none(self, tmp_path):
+        path = tmp_path / 'photo.png'
+        Image.new('RGB', (8, 8)).save(path, 'PNG')
+        
+        assert read_exif_tags(str(path)) is None
+    
+    def test_jpeg_without_exif_returns_empty(self, tmp_path):
+        path = tmp_path / 'plain.jpg'
+        Image.new('RGB', (8, 8)).save(path, 'JPEG')
+        
+        assert read_exif_tags(str(path)) == {}
+    
+    def test_reads_only_metadata_region(self, tmp_path):
+        path = tmp_path / 'large.jpg'
+        Image.effect_noise((2000, 2000), 64).convert('RGB').save(
+            path, 'JPEG', exif=make_exif_bytes(), quality=95
+        )
+        assert os.path.getsize(path) > 1024 * 1024
+        
+        tags = read_exif_tags(str(path), max_bytes=128 * 1024)
+        
+        assert str(tags['Image Model']) == 'Canon EOS R5'
+
+
+class TestEXIFAnalyzerFastPath:
+    """EXIFAnalyzer results via the fast reader, cache and batch API."""
+    
+    @pytest.mark.parametrize('fixture_name', ['jpeg_file', 'tiff_file'])
+    def test_analysis_matches_exifread(self, request, fixture_name):
+        file_path = request.getfixturevalue(fixture_name)
+        
+        fast = EXIFAnalyzer(cache_size=0).analyze(file_path)
+        reference = exifread_analyze(EXIFAnalyzer(cache_size=0), file_path)
+        
+        assert printable(fast) == printable(reference)
+        assert str(fast['camera']['lens']) == 'RF85mm F1.2 L USM'
+        assert fast['settings']['shutter_speed'] == '1/250'
+        assert fast['location']['has_gps'] is True
+    
+    def test_results_are_memoized_per_file(self, jpeg_file):
+        analyzer = EXIFAnalyzer()
+        
+        with patch('exif_analyzer.read_exif_tags', wraps=read_exif_tags) as reader:
+            first = analyzer.analyze(jpeg_file)
+            first['camera']['make'] = 'modified'
+            second = analyzer.analyze(jpeg_file)
+        
+        assert reader.call_count == 1
+        assert str(second['camera']['make']) == 'Canon'
+        assert analyzer.get_cache_stats()['hits'] == 1
+    
+    def test_cache_invalidated_when_file_changes(self, jpeg_file):
+        analyzer = EXIFAnalyzer()
+        analyzer.analyze(jpeg_file)
+        
+        Image.new('RGB', (32, 32)).save(jpeg_file, 'JPEG')
+        stat = os.stat(jpeg_file)
+        os.utime(jpeg_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        
+        assert analyzer.analyze(jpeg_file)['camera']['make'] is None
+    
+    def test_clear_cache(self, jpeg_file):
+        analyzer = EXIFAnalyzer()
+        analyzer.analyze(jpeg_file)
+        analyzer.clear_cache()
+        
+        assert analyzer.get_cache_stats() == {'size': 0, 'hits': 0, 'misses': 0}
+    
+    def test_analyze_batch(self, jpeg_file, tiff_file, tmp_path):
+        missing = str(tmp_path / 'missing.jpg')
+        analyzer = EXIFAnalyzer()
+        
+        results = analyzer.analyze_batch([jpeg_file, tiff_file, missing, jpeg_file], max_workers=4)
+        
+        assert list(results) == [jpeg_file, tiff_file, missing]
+        assert str(results[jpeg_file]['camera']['model']) == 'Canon EOS R5'
+        assert results[tiff_file]['settings']['iso'] == 800
+        assert results[missing] == analyzer._empty_result()
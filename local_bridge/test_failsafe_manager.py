@@ -355,6 +355,129 @@ def test_cleanup():
         print(f"  - Backups kept: {len(manager.backups)}/{manager.max_backups}")
 
 
+def test_incremental_backup():
+    """増分バックアップ（変更のないファイルはスキップ）をテスト"""
+    print("\n=== Test: Incremental Backup ===")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = FailsafeManager(
+            checkpoint_dir=os.path.join(temp_dir, 'checkpoints'),
+            backup_dir=os.path.join(temp_dir, 'backups')
+        )
+        
+        # 複数ファイルのディレクトリを作成
+        source_dir = Path(temp_dir) / 'data'
+        (source_dir / 'sub').mkdir(parents=True)
+        (source_dir / 'a.txt').write_text("A" * 1000)
+        (source_dir / 'sub' / 'b.txt').write_text("B" * 2000)
+        
+        first = manager.create_backup(str(source_dir))
+        assert first.storage == 'incremental'
+        assert first.size_bytes == 3000
+        assert first.new_bytes == 3000
+        
+        # 変更なし: 新しいオブジェクトは保存されない
+        second = manager.create_backup(str(source_dir))
+        assert second.new_bytes == 0
+        assert second.checksum == first.checksum
+        
+        # 1ファイルだけ変更: 差分のみ保存される
+        (source_dir / 'a.txt').write_text("C" * 1500)
+        third = manager.create_backup(str(source_dir))
+        assert third.size_bytes == 3500
+        assert third.new_bytes == 1500
+        assert third.checksum != first.checksum
+        
+        # 最初のバックアップを別の場所に復元
+        restore_dir = Path(temp_dir) / 'restored'
+        manager.restore_backup(first.backup_id, str(restore_dir))
+        assert (restore_dir / 'a.txt').read_text() == "A" * 1000
+        assert (restore_dir / 'sub' / 'b.txt').read_text() == "B" * 2000
+        
+        print("✓ Incremental backup working")
+        print(f"  - New bytes: {first.new_bytes}, {second.new_bytes}, {third.new_bytes}")
+
+
+def test_sqlite_backup():
+    """SQLiteオンラインバックアップAPIによるバックアップをテスト"""
+    print("\n=== Test: SQLite Backup ===")
+    
+    import sqlite3
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = FailsafeManager(
+            checkpoint_dir=os.path.join(temp_dir, 'checkpoints'),
+            backup_dir=os.path.join(temp_dir, 'backups')
+        )
+        
+        source_dir = Path(temp_dir) / 'data'
+        source_dir.mkdir()
+        db_path = source_dir / 'junmai.db'
+        
+        # WALモードで書き込み中（チェックポイント前）の接続を保持
+        conn = sqlite3.connect(str(db_path))
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE photos (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.executemany("INSERT INTO photos (name) VALUES (?)", [(f"p{i}",) for i in range(100)])
+        conn.commit()
+        
+        try:
+            backup_info = manager.create_backup(str(source_dir))
+            manifest = manager.backup_store.load_manifest(backup_info.backup_id)
+            
+            # WAL/SHMファイルはデータベースのバックアップに含まれる
+            assert set(manifest['files']) == {'junmai.db'}
+            assert manifest['files']['junmai.db']['sqlite'] is True
+            
+            # WALへの追記だけでも変更として検出される
+            conn.execute("INSERT INTO photos (name) VALUES ('late')")
+            conn.commit()
+            second = manager.create_backup(str(source_dir))
+            assert second.new_bytes > 0
+        finally:
+            conn.close()
+        
+        restore_dir = Path(temp_dir) / 'restored'
+        manager.restore_backup(backup_info.backup_id, str(restore_dir))
+        
+        restored = sqlite3.connect(str(restore_dir / 'junmai.db'))
+        try:
+            count = restored.execute("SELECT COUNT(*) FROM photos").fetchone()[0]
+        finally:
+            restored.close()
+        assert count == 100
+        
+        print("✓ SQLite backup working")
+        print(f"  - Rows restored: {count}")
+
+
+def test_backup_garbage_collection():
+    """古いバックアップ削除時のオブジェクト回収をテスト"""
+    print("\n=== Test: Backup Garbage Collection ===")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = FailsafeManager(
+            checkpoint_dir=os.path.join(temp_dir, 'checkpoints'),
+            backup_dir=os.path.join(temp_dir, 'backups'),
+            max_backups=2
+        )
+        
+        test_file = Path(temp_dir) / 'gc_test.txt'
+        for i in range(4):
+            test_file.write_text(f"version {i}")
+            manager.create_backup(str(test_file))
+        
+        objects = [p for p in manager.backup_store.objects_dir.rglob('*') if p.is_file()]
+        manifests = list(manager.backup_store.manifests_dir.glob('*.json'))
+        
+        assert len(manager.backups) == 2
+        assert len(manifests) == 2
+        assert len(objects) == 2
+        
+        print("✓ Backup garbage collection working")
+        print(f"  - Objects kept: {len(objects)}")
+
+
 def run_all_tests():
     """すべてのテストを実行"""
     print("=" * 60)
@@ -370,7 +493,10 @@ def run_all_tests():
         test_auto_backup,
         test_crash_recovery,
         test_statistics,
-        test_cleanup
+        test_cleanup,
+        test_incremental_backup,
+        test_sqlite_backup,
+        test_backup_garbage_collection
     ]
     
     passed = 0
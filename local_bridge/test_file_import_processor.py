@@ -398,6 +398,40 @@ class TestFileImportProcessor(unittest.TestCase):
         
         # Verify file path is absolute
         self.assertTrue(os.path.isabs(photo.file_path))
+    
+    def test_find_imported_files(self):
+        """Test bulk lookup of already imported files"""
+        processor = FileImportProcessor(
+            import_mode='copy',
+            destination_folder=str(self.dest_dir)
+        )
+        
+        # Copy mode stores the destination path; match by name and size
+        processor.import_file(str(self.test_file1))
+        
+        files = [
+            (str(self.test_file1), self.test_file1.stat().st_size),
+            (str(self.test_file2), self.test_file2.stat().st_size),
+            (str(self.source_dir / "other" / "test_photo1.jpg"), 1),
+        ]
+        imported = processor.find_imported_files(files, chunk_size=1)
+        
+        self.assertEqual(imported, {str(self.test_file1)})
+    
+    def test_file_name_lookup_uses_index(self):
+        """Test lookups by file name do not scan the photos table"""
+        from sqlalchemy import text
+        
+        db_session = get_session()
+        try:
+            plan = db_session.execute(text(
+                "EXPLAIN QUERY PLAN SELECT file_path, file_name, file_size FROM photos "
+                "WHERE file_name IN ('a.jpg', 'b.jpg')"
+            )).fetchall()
+        finally:
+            db_session.close()
+        
+        self.assertIn('idx_photos_file_name', ' '.join(str(row[-1]) for row in plan))
 
 
 def run_tests():
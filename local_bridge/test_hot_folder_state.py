@@ -0,0 +1,119 @@
+"""
+Test suite for Hot Folder Watch State
+
+Tests the persistent watch state including:
+- Journal persistence and replay
+- Reconciliation scan
+- Bulk database diff
+- Rename and removal handling
+"""
+
+import os
+import shutil
+import tempfile
+import pathlib
+import unittest
+from hot_folder_state import WatchState, scan_folder
+from hot_folder_watcher import IMAGE_EXTENSIONS
+
+
+class TestWatchState(unittest.TestCase):
+    """Test cases for WatchState"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.test_dir = tempfile.mkdtemp()
+        self.folder = pathlib.Path(self.test_dir) / "hotfolder"
+        (self.folder / "sub").mkdir(parents=True)
+        self.state_path = str(pathlib.Path(self.test_dir) / "state" / "watch_state.json")
+        
+        for name in ["a.jpg", "b.nef", "sub/c.cr3", "notes.txt"]:
+            (self.folder / name).write_text(f"data {name}")
+    
+    def tearDown(self):
+        """Clean up test fixtures"""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+    
+    def folder_path(self):
+        return os.path.abspath(self.folder)
+    
+    def test_scan_folder(self):
+        """Test recursive scan returns image files only"""
+        names = sorted(os.path.basename(path) for path, _ in scan_folder(str(self.folder), IMAGE_EXTENSIONS))
+        self.assertEqual(names, ["a.jpg", "b.nef", "c.cr3"])
+    
+    def test_reconcile_returns_unhandled_files(self):
+        """Test reconcile only returns files not yet handled"""
+        state = WatchState(self.state_path)
+        
+        candidates = state.reconcile(self.folder_path(), IMAGE_EXTENSIONS)
+        self.assertEqual(len(candidates), 3)
+        
+        for path, signature in candidates[:2]:
+            state.record(self.folder_path(), path, signature)
+        
+        remaining = state.reconcile(self.folder_path(), IMAGE_EXTENSIONS)
+        self.assertEqual([path for path, _ in remaining], [candidates[2][0]])
+    
+    def test_modified_file_is_returned_again(self):
+        """Test a handled file that changed is imported again"""
+        state = WatchState(self.state_path)
+        for path, signature in state.reconcile(self.folder_path(), IMAGE_EXTENSIONS):
+            state.record(self.folder_path(), path, signature)
+        
+        (self.folder / "a.jpg").write_text("rewritten with more data")
+        
+        remaining = state.reconcile(self.folder_path(), IMAGE_EXTENSIONS)
+        self.assertEqual([os.path.basename(path) for path, _ in remaining], ["a.jpg"])
+    
+    def test_state_survives_restart(self):
+        """Test journal is replayed and compacted state is reloaded"""
+        state = WatchState(self.state_path)
+        for path, signature in state.reconcile(self.folder_path(), IMAGE_EXTENSIONS):
+            state.record(self.folder_path(), path, signature)
+        
+        # Journal only (simulated crash without close)
+        reloaded = WatchState(self.state_path)
+        self.assertEqual(reloaded.reconcile(self.folder_path(), IMAGE_EXTENSIONS), [])
+        
+        # Snapshot after close
+        reloaded.close()
+        self.assertFalse(os.path.exists(reloaded.journal_path))
+        again = WatchState(self.state_path)
+        self.assertEqual(again.reconcile(self.folder_path(), IMAGE_EXTENSIONS), [])
+        self.assertEqual(again.get_folder_stats()[self.folder_path()]['files'], 3)
+    
+    def test_bulk_database_diff(self):
+        """Test database lookup is batched and excludes imported files"""
+        state = WatchState(self.state_path)
+        calls = []
+        
+        def known_files(files):
+            calls.append(len(files))
+            return {path for path, _ in files if path.endswith("b.nef")}
+        
+        candidates = state.reconcile(self.folder_path(), IMAGE_EXTENSIONS, known_files, lookup_batch_size=2)
+        
+        self.assertEqual(calls, [2, 1])
+        self.assertEqual(sorted(os.path.basename(path) for path, _ in candidates), ["a.jpg", "c.cr3"])
+        
+        # Files found in the database are recorded and not looked up again
+        calls.clear()
+        state.reconcile(self.folder_path(), IMAGE_EXTENSIONS, known_files)
+        self.assertEqual(calls, [2])
+    
+    def test_renamed_and_removed_files(self):
+        """Test renamed files are carried over and removed files forgotten"""
+        state = WatchState(self.state_path)
+        for path, signature in state.reconcile(self.folder_path(), IMAGE_EXTENSIONS):
+            state.record(self.folder_path(), path, signature)
+        
+        os.rename(self.folder / "a.jpg", self.folder / "renamed.jpg")
+        os.remove(self.folder / "b.nef")
+        
+        self.assertEqual(state.reconcile(self.folder_path(), IMAGE_EXTENSIONS), [])
+        self.assertEqual(state.get_folder_stats()[self.folder_path()]['files'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -12,8 +12,9 @@ import time
 import shutil
 import pathlib
 import logging
+import threading
 import unittest
-from hot_folder_watcher import HotFolderWatcher, create_hot_folder_watcher
+from hot_folder_watcher import HotFolderWatcher, FileReadinessScheduler, create_hot_folder_watcher
 
 
 # Setup logging
@@ -241,6 +242,79 @@ class TestHotFolderWatcher(unittest.TestCase):
         self.assertFalse(watcher.is_running())
         self.assertEqual(len(self.detected_files), 1)
     
+    def test_catch_up_scan_on_start(self):
+        """Test files created while stopped are imported once on start"""
+        state_path = str(self.test_dir2 / "watch_state.json")
+        (self.test_dir / "offline1.jpg").write_text("offline image 1")
+        (self.test_dir / "offline2.nef").write_text("offline image 2")
+        
+        watcher = HotFolderWatcher(
+            folders=[str(self.test_dir)],
+            callback=self.callback,
+            write_complete_delay=0.1,
+            state_path=state_path
+        )
+        
+        # Files must have settled for the fast path
+        time.sleep(0.2)
+        watcher.start()
+        time.sleep(1)
+        watcher.stop()
+        
+        self.assertEqual(sorted(pathlib.Path(p).name for p in self.detected_files),
+                         ["offline1.jpg", "offline2.nef"])
+        self.assertEqual(watcher.get_stats()['catch_up']['files_queued'], 2)
+        
+        # Restart: nothing new to import
+        self.detected_files.clear()
+        watcher = HotFolderWatcher(
+            folders=[str(self.test_dir)],
+            callback=self.callback,
+            write_complete_delay=0.1,
+            state_path=state_path
+        )
+        watcher.start()
+        time.sleep(1)
+        watcher.stop()
+        
+        self.assertEqual(self.detected_files, [])
+    
+    def test_failed_import_retried_by_catch_up(self):
+        """Test files whose import failed are offered again on the next start"""
+        state_path = str(self.test_dir2 / "watch_state.json")
+        (self.test_dir / "failed.jpg").write_text("offline image")
+        
+        def failing_callback(file_path: str):
+            self.detected_files.append(file_path)
+            return False
+        
+        watcher = HotFolderWatcher(
+            folders=[str(self.test_dir)],
+            callback=failing_callback,
+            write_complete_delay=0.1,
+            state_path=state_path
+        )
+        time.sleep(0.2)
+        watcher.start()
+        time.sleep(1)
+        watcher.stop()
+        
+        self.assertEqual([pathlib.Path(p).name for p in self.detected_files], ["failed.jpg"])
+        
+        # Restart: the failed file is picked up again and now imported
+        self.detected_files.clear()
+        watcher = HotFolderWatcher(
+            folders=[str(self.test_dir)],
+            callback=self.callback,
+            write_complete_delay=0.1,
+            state_path=state_path
+        )
+        watcher.start()
+        time.sleep(1)
+        watcher.stop()
+        
+        self.assertEqual([pathlib.Path(p).name for p in self.detected_files], ["failed.jpg"])
+    
     def test_factory_function(self):
         """Test factory function"""
         watcher = create_hot_folder_watcher(
@@ -271,12 +345,101 @@ class TestHotFolderWatcher(unittest.TestCase):
         self.assertFalse(success)
 
 
+class TestFileReadinessScheduler(unittest.TestCase):
+    """Test cases for FileReadinessScheduler"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.test_dir = pathlib.Path("test_readiness_temp")
+        self.test_dir.mkdir(exist_ok=True)
+        self.imported = []
+        self.scheduler = FileReadinessScheduler(
+            self.imported.append,
+            write_complete_delay=0.1,
+            check_interval=0.1
+        )
+        self.scheduler.start()
+    
+    def tearDown(self):
+        """Clean up test fixtures"""
+        self.scheduler.stop()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+    
+    def wait_for(self, condition, timeout=5.0):
+        """Poll until condition is true or timeout expires"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if condition():
+                return True
+            time.sleep(0.05)
+        return False
+    
+    def test_thread_count_is_constant(self):
+        """A large dump does not create a thread per file"""
+        threads_before = threading.active_count()
+        
+        for i in range(300):
+            path = self.test_dir / f"IMG_{i:04d}.jpg"
+            path.write_text("image data")
+            self.scheduler.schedule(str(path))
+        
+        self.assertLessEqual(threading.active_count(), threads_before)
+        self.assertTrue(self.wait_for(lambda: len(self.imported) == 300))
+        self.assertEqual(self.scheduler.get_stats()['pending'], 0)
+    
+    def test_duplicate_schedule_ignored(self):
+        """A pending file is only tracked once"""
+        path = self.test_dir / "image.jpg"
+        path.write_text("image data")
+        
+        self.assertTrue(self.scheduler.schedule(str(path)))
+        self.assertFalse(self.scheduler.schedule(str(path)))
+        self.assertTrue(self.scheduler.is_pending(str(path)))
+        
+        self.assertTrue(self.wait_for(lambda: len(self.imported) == 1))
+        self.assertFalse(self.scheduler.is_pending(str(path)))
+    
+    def test_growing_file_waits_until_stable(self):
+        """A file still being written is not imported"""
+        path = self.test_dir / "growing.nef"
+        path.write_text("x")
+        self.scheduler.schedule(str(path))
+        
+        for _ in range(5):
+            time.sleep(0.1)
+            with open(path, 'a') as f:
+                f.write("more data")
+            self.assertEqual(self.imported, [])
+        
+        self.assertTrue(self.wait_for(lambda: len(self.imported) == 1))
+    
+    def test_unchanged_file_not_imported_twice(self):
+        """Re-detecting an already imported, unchanged file is a no-op"""
+        path = self.test_dir / "image.jpg"
+        path.write_text("image data")
+        
+        self.scheduler.schedule(str(path))
+        self.assertTrue(self.wait_for(lambda: len(self.imported) == 1))
+        
+        self.scheduler.schedule(str(path))
+        self.assertTrue(self.wait_for(lambda: self.scheduler.get_stats()['duplicates'] == 1))
+        self.assertEqual(len(self.imported), 1)
+    
+    def test_missing_file_is_dropped(self):
+        """A file that disappears before the first check is not imported"""
+        self.scheduler.schedule(str(self.test_dir / "missing.jpg"))
+        
+        self.assertTrue(self.wait_for(lambda: self.scheduler.get_stats()['failed'] == 1))
+        self.assertEqual(self.imported, [])
+
+
 def run_tests():
     """Run all tests"""
     print("=== Running Hot Folder Watcher Tests ===\n")
     
     # Create test suite
     suite = unittest.TestLoader().loadTestsFromTestCase(TestHotFolderWatcher)
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestFileReadinessScheduler))
     
     # Run tests
     runner = unittest.TextTestRunner(verbosity=2)
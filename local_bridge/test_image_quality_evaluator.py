@@ -11,6 +11,7 @@ import numpy as np
 import tempfile
 import os
 from pathlib import Path
+from typing import Tuple
 from image_quality_evaluator import ImageQualityEvaluator
 
 
@@ -121,6 +122,58 @@ class TestImageQualityEvaluator(unittest.TestCase):
         self.assertLess(score, 3.0)
         self.assertIn(metrics['sharpness_category'], ['very_blurry', 'blurry', 'acceptable'])
     
+    def _create_bokeh_image(self, width: int = 2400, height: int = 1600) -> Tuple[np.ndarray, Tuple[int, int, int, int]]:
+        """Create a textured image whose background is blurred except for a central subject."""
+        rng = np.random.default_rng(0)
+        sharp = cv2.resize(
+            rng.integers(0, 255, (height // 4, width // 4, 3), dtype=np.uint8),
+            (width, height),
+            interpolation=cv2.INTER_CUBIC
+        )
+        img = cv2.GaussianBlur(sharp, (0, 0), 12)
+        
+        x, y, w, h = width * 3 // 8, height * 3 // 8, width // 4, height // 4
+        img[y:y+h, x:x+w] = sharp[y:y+h, x:x+w]
+        return img, (x, y, w, h)
+    
+    def test_focus_sharpness_map(self):
+        """Test the sharpness map and the downscaled pyramid level."""
+        img, _ = self._create_bokeh_image()
+        
+        score, metrics = self.evaluator._calculate_focus(img)
+        
+        self.assertGreater(metrics['pyramid_level'], 0)
+        sharpness_map = np.array(metrics['sharpness_map'])
+        self.assertEqual(sharpness_map.shape, (8, 8))
+        self.assertEqual(sharpness_map.max(), 1.0)
+        # The sharpest tiles are those of the central subject
+        self.assertEqual(sorted(metrics['focus_tiles']), [[3, 3], [3, 4], [4, 3], [4, 4]])
+        self.assertLess(sharpness_map[0, 0], 0.1)
+    
+    def test_focus_bokeh_not_rated_blurry(self):
+        """Test that a sharp subject on a blurred background is not rated blurry."""
+        img, _ = self._create_bokeh_image()
+        frame_variance = cv2.Laplacian(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY), cv2.CV_64F).var()
+        
+        score, metrics = self.evaluator._calculate_focus(img)
+        
+        self.assertLess(frame_variance, 100)
+        self.assertGreater(score, 2.5)
+        self.assertFalse(metrics['subject_weighted'])
+    
+    def test_focus_weighted_by_faces(self):
+        """Test that the focus score follows the detected faces."""
+        img, subject = self._create_bokeh_image()
+        background_face = (0, 0, img.shape[1] // 8, img.shape[0] // 8)
+        
+        subject_score, subject_metrics = self.evaluator._calculate_focus(img, [subject])
+        missed_score, missed_metrics = self.evaluator._calculate_focus(img, [background_face])
+        
+        self.assertTrue(subject_metrics['subject_weighted'])
+        self.assertGreater(subject_score, 2.5)
+        self.assertEqual(missed_metrics['focus_tiles'], [[0, 0]])
+        self.assertLess(missed_score, 1.0)
+    
     def test_exposure_evaluation_well_exposed(self):
         """Test exposure evaluation on well-exposed image."""
         # Create image with good brightness distribution
@@ -16,6 +16,7 @@ import json
 from unittest.mock import Mock, patch, MagicMock
 from celery_config import app, get_priority_for_photo, PRIORITY_HIGH, PRIORITY_MEDIUM, PRIORITY_LOW
 from job_queue_manager import JobQueueManager, get_job_queue_manager
+from job_scheduler import JobScheduler
 from celery_tasks import (
     process_photo_task,
     analyze_exif_task,
@@ -66,8 +67,10 @@ def sample_photo(test_db):
 
 @pytest.fixture
 def job_manager():
-    """Get job queue manager instance"""
-    return get_job_queue_manager()
+    """Get job queue manager instance with a fresh scheduler"""
+    manager = get_job_queue_manager()
+    manager.scheduler = JobScheduler()
+    return manager
 
 
 class TestPriorityCalculation:
@@ -113,9 +116,9 @@ class TestJobSubmission:
         # Submit job
         task_id = job_manager.submit_photo_processing(sample_photo)
         
-        # Verify task was submitted
-        assert task_id == 'test-task-id-123'
+        # Verify task was dispatched under the job ID
         mock_apply_async.assert_called_once()
+        assert mock_apply_async.call_args[1]['task_id'] == task_id
         
         # Verify job was created in database
         db_session = get_session()
@@ -144,16 +147,18 @@ class TestJobSubmission:
         call_kwargs = mock_apply_async.call_args[1]
         assert call_kwargs['priority'] == PRIORITY_HIGH
     
-    @patch('celery_tasks.process_batch_photos')
-    def test_submit_batch_processing(self, mock_batch, job_manager, sample_photo):
+    @patch('celery_tasks.process_photo_task.apply_async')
+    def test_submit_batch_processing(self, mock_apply_async, job_manager, sample_photo):
         """Test batch processing submission"""
-        mock_batch.return_value = ['task-1', 'task-2', 'task-3']
-        
         photo_ids = [sample_photo, sample_photo + 1, sample_photo + 2]
         task_ids = job_manager.submit_batch_processing(photo_ids)
         
         assert len(task_ids) == 3
-        mock_batch.assert_called_once_with(photo_ids, PRIORITY_MEDIUM)
+        assert mock_apply_async.call_count == 3
+        dispatched = [call[1]['task_id'] for call in mock_apply_async.call_args_list]
+        assert dispatched == task_ids
+        assert all(call[1]['priority'] == PRIORITY_MEDIUM
+                   for call in mock_apply_async.call_args_list)
 
 
 class TestJobStatus:
@@ -329,6 +334,55 @@ class TestRetryLogic:
         assert all(job['error_message'] for job in failed_jobs)
 
 
+class TestRestart:
+    """Test recovery of held jobs after a bridge restart"""
+    
+    @patch('celery_tasks.process_photo_task.apply_async')
+    def test_dispatch_records_started_at(self, mock_apply_async, job_manager, sample_photo):
+        """Test that dispatched jobs are marked in the database"""
+        task_id = job_manager.submit_photo_processing(sample_photo)
+        
+        db_session = get_session()
+        try:
+            job = db_session.query(Job).filter(Job.id == task_id).first()
+            assert job.status == 'pending'
+            assert job.started_at is not None
+        finally:
+            db_session.close()
+    
+    def test_restore_pending_jobs(self, job_manager, sample_photo):
+        """Test that only jobs never dispatched are resubmitted"""
+        from datetime import datetime
+        
+        db_session = get_session()
+        try:
+            db_session.add_all([
+                Job(id='held-1', photo_id=sample_photo, priority=3,
+                    config_json=json.dumps({'preset': 'a'}), status='pending'),
+                Job(id='dispatched-1', photo_id=sample_photo, priority=2,
+                    config_json='{}', status='pending', started_at=datetime.utcnow()),
+                Job(id='failed-1', photo_id=sample_photo, priority=2,
+                    config_json='{}', status='failed')
+            ])
+            db_session.commit()
+        finally:
+            db_session.close()
+        
+        dispatched = []
+        job_manager.scheduler = JobScheduler(dispatch_fn=dispatched.append)
+        
+        try:
+            assert job_manager.restore_pending_jobs() == 1
+            assert [job.job_id for job in dispatched] == ['held-1']
+            assert dispatched[0].config == {'preset': 'a'}
+            # Jobs already handed over by this process are not resubmitted
+            assert job_manager.restore_pending_jobs() == 0
+        finally:
+            job_manager.shutdown()
+        
+        assert not job_manager.scheduler.is_running
+
+
 class TestWorkerStats:
     """Test worker statistics"""
     
@@ -0,0 +1,219 @@
+"""
+Tests for Job Scheduler
+
+Tests cover:
+- Priority ordering and in-flight window
+- Aging of waiting jobs
+- Priority changes and cancellation of held jobs
+- Per-session fair share
+
+Requirements: 4.1, 4.4
+"""
+
+import pytest
+from unittest.mock import Mock, patch
+from job_scheduler import JobScheduler
+
+
+class FakeResult:
+    """AsyncResult stand-in whose readiness is controlled by the test"""
+
+    def __init__(self):
+        self.done = False
+
+    def ready(self):
+        return self.done
+
+
+@pytest.fixture
+def dispatched():
+    """List of dispatched jobs in dispatch order"""
+    return []
+
+
+@pytest.fixture
+def results():
+    """Fake results keyed by job ID"""
+    return {}
+
+
+@pytest.fixture
+def scheduler(dispatched, results):
+    """Scheduler with a recording dispatch function"""
+    def dispatch(job):
+        dispatched.append(job.job_id)
+        results[job.job_id] = FakeResult()
+        return results[job.job_id]
+
+    return JobScheduler(dispatch_fn=dispatch, max_in_flight=1)
+
+
+def finish(scheduler, results, job_id):
+    """Complete a dispatched job and let the scheduler refill the window"""
+    results[job_id].done = True
+    scheduler.reap()
+    scheduler.pump()
+
+
+class TestDispatchOrder:
+    """Test ordering and window handling"""
+
+    def test_first_job_dispatched_immediately(self, scheduler, dispatched):
+        """A job submitted to an idle scheduler goes straight to the broker"""
+        assert scheduler.submit('job-1', photo_id=1, priority=5) is True
+        assert dispatched == ['job-1']
+
+    def test_window_is_bounded(self, scheduler, dispatched):
+        """Jobs beyond max_in_flight are held"""
+        scheduler.submit('job-1', photo_id=1, priority=5)
+        assert scheduler.submit('job-2', photo_id=2, priority=5) is False
+
+        stats = scheduler.get_stats()
+        assert stats['in_flight'] == 1
+        assert stats['queued'] == 1
+        assert dispatched == ['job-1']
+
+    def test_higher_priority_dispatched_first(self, scheduler, dispatched, results):
+        """Held jobs are released highest priority first"""
+        scheduler.submit('blocker', photo_id=0, priority=5)
+        scheduler.submit('low', photo_id=1, priority=1)
+        scheduler.submit('high', photo_id=2, priority=9)
+        scheduler.submit('medium', photo_id=3, priority=5)
+
+        finish(scheduler, results, 'blocker')
+        finish(scheduler, results, 'high')
+        finish(scheduler, results, 'medium')
+
+        assert dispatched == ['blocker', 'high', 'medium', 'low']
+
+    def test_equal_priority_is_fifo(self, scheduler, dispatched, results):
+        """Jobs with equal priority keep submission order"""
+        for i in range(4):
+            scheduler.submit(f'job-{i}', photo_id=i, priority=5)
+        for i in range(3):
+            finish(scheduler, results, f'job-{i}')
+
+        assert dispatched == ['job-0', 'job-1', 'job-2', 'job-3']
+
+    def test_dispatch_error_requeues_job(self, results):
+        """A failed dispatch keeps the job held for the next attempt"""
+        dispatch = Mock(side_effect=[ConnectionError('broker down'), FakeResult()])
+        scheduler = JobScheduler(dispatch_fn=dispatch, max_in_flight=1)
+
+        assert scheduler.submit('job-1', photo_id=1, priority=5) is False
+        assert scheduler.is_queued('job-1')
+        assert scheduler.get_stats()['dispatch_errors'] == 1
+
+        assert scheduler.pump() == 1
+        assert not scheduler.is_queued('job-1')
+
+    def test_pause_holds_jobs(self, scheduler, dispatched):
+        """Paused scheduler keeps jobs until resumed"""
+        scheduler.pause()
+        scheduler.submit('job-1', photo_id=1, priority=5)
+        assert dispatched == []
+
+        scheduler.resume()
+        scheduler.pump()
+        assert dispatched == ['job-1']
+
+
+class TestAging:
+    """Test starvation prevention"""
+
+    def test_waiting_job_overtakes_newer_higher_priority(self, scheduler, dispatched, results):
+        """Aging lets an old low-priority job beat a fresh higher-priority one"""
+        scheduler.config['aging_per_minute'] = 1.0
+
+        with patch('job_scheduler.time.monotonic', return_value=0.0):
+            scheduler.submit('blocker', photo_id=0, priority=5)
+            scheduler.submit('old-low', photo_id=1, priority=3)
+
+        # Ten minutes later: old job has gained ten points
+        with patch('job_scheduler.time.monotonic', return_value=600.0):
+            scheduler.submit('new-high', photo_id=2, priority=9)
+            assert scheduler.effective_priority('old-low') == pytest.approx(13.0)
+            finish(scheduler, results, 'blocker')
+
+        assert dispatched == ['blocker', 'old-low']
+
+
+class TestPriorityChanges:
+    """Test reordering of held jobs"""
+
+    def test_update_priority_reorders(self, scheduler, dispatched, results):
+        """Raising a held job's priority moves it to the front"""
+        scheduler.submit('blocker', photo_id=0, priority=5)
+        scheduler.submit('a', photo_id=1, priority=5)
+        scheduler.submit('b', photo_id=2, priority=5)
+
+        assert scheduler.update_priority('b', 10) is True
+        finish(scheduler, results, 'blocker')
+
+        assert dispatched == ['blocker', 'b']
+
+    def test_update_priority_of_dispatched_job(self, scheduler):
+        """Jobs already handed to the broker cannot be reordered"""
+        scheduler.submit('job-1', photo_id=1, priority=5)
+        assert scheduler.update_priority('job-1', 9) is False
+
+    def test_boost_session(self, scheduler, dispatched, results):
+        """Session boost raises every held job of that session"""
+        scheduler.submit('blocker', photo_id=0, priority=5, session_id=1)
+        scheduler.submit('s1', photo_id=1, priority=6, session_id=1)
+        scheduler.submit('s2', photo_id=2, priority=5, session_id=2)
+
+        assert scheduler.boost_session(2, 3) == 1
+        finish(scheduler, results, 'blocker')
+
+        assert dispatched == ['blocker', 's2']
+
+    def test_cancel_held_job(self, scheduler, dispatched, results):
+        """Cancelled held jobs are never dispatched"""
+        scheduler.submit('blocker', photo_id=0, priority=5)
+        scheduler.submit('job-1', photo_id=1, priority=5)
+
+        assert scheduler.cancel('job-1') is True
+        assert scheduler.cancel('job-1') is False
+        finish(scheduler, results, 'blocker')
+
+        assert dispatched == ['blocker']
+        assert scheduler.get_stats()['queued'] == 0
+
+
+class TestFairShare:
+    """Test per-session fair share"""
+
+    def test_small_session_not_starved_by_large_session(self, dispatched, results):
+        """A small rush session interleaves with a large session"""
+        def dispatch(job):
+            dispatched.append(job.job_id)
+            results[job.job_id] = FakeResult()
+            return results[job.job_id]
+
+        scheduler = JobScheduler(dispatch_fn=dispatch, max_in_flight=1)
+
+        for i in range(50):
+            scheduler.submit(f'wedding-{i}', photo_id=i, priority=5, session_id=1)
+        for i in range(3):
+            scheduler.submit(f'rush-{i}', photo_id=100 + i, priority=5, session_id=2)
+
+        while len(dispatched) < 10:
+            finish(scheduler, results, dispatched[-1])
+
+        # All rush jobs are served within the first few dispatches
+        rush_positions = [dispatched.index(f'rush-{i}') for i in range(3)]
+        assert max(rush_positions) < 8
+
+    def test_get_queued_jobs(self, scheduler):
+        """Held jobs are listed by aged priority"""
+        scheduler.submit('blocker', photo_id=0, priority=5)
+        scheduler.submit('low', photo_id=1, priority=2)
+        scheduler.submit('high', photo_id=2, priority=8)
+
+        queued = scheduler.get_queued_jobs()
+        assert [job['job_id'] for job in queued] == ['high', 'low']
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
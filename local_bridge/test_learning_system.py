@@ -6,12 +6,13 @@ Tests user feedback recording, parameter pattern analysis, and customized preset
 import pytest
 import json
 import os
+import statistics
 from datetime import datetime, timedelta
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
-from models.database import Base, Photo, Preset, LearningData, Session as DBSession
+from models.database import Base, Photo, Preset, LearningData, LearningAdjustment, Session as DBSession
 from learning_system import LearningSystem
 
 
@@ -544,5 +545,84 @@ class TestLearningSummary:
         assert sample_preset.name in summary['preset_usage']
 
 
+
+class TestLearningAnalytics:
+    """Test SQL/NumPy aggregation over normalized adjustments"""
+    
+    def test_adjustment_statistics_match_statistics_module(self, learning_system, sample_photos, sample_preset):
+        """Aggregates match a per-row statistics computation"""
+        recorded = {'Exposure2012': [], 'Highlights2012': []}
+        for i in range(24):
+            adjustments = {
+                'Exposure2012': 0.1 * (i % 7) - 0.2,
+                'Highlights2012': -5 - (i % 4),
+                'Note': 'manual'
+            }
+            learning_system.record_modification(
+                photo_id=sample_photos[i].id,
+                original_preset=sample_preset.name,
+                final_preset=sample_preset.name,
+                parameter_adjustments=adjustments
+            )
+            recorded['Exposure2012'].append(adjustments['Exposure2012'])
+            recorded['Highlights2012'].append(adjustments['Highlights2012'])
+        
+        analysis = learning_system.analyze_parameter_patterns(preset_name=sample_preset.name)
+        
+        assert analysis['status'] == 'success'
+        assert analysis['modification_count'] == 24
+        assert set(analysis['avg_adjustments']) == set(recorded)
+        for param, values in recorded.items():
+            stats = analysis['avg_adjustments'][param]
+            assert stats['mean'] == pytest.approx(statistics.mean(values))
+            assert stats['median'] == pytest.approx(statistics.median(values))
+            assert stats['stdev'] == pytest.approx(statistics.stdev(values))
+            assert stats['min'] == pytest.approx(min(values))
+            assert stats['max'] == pytest.approx(max(values))
+            assert stats['count'] == len(values)
+    
+    def test_analysis_does_not_write(self, learning_system, db_session, sample_photos, sample_preset):
+        """Rows without numeric adjustments are not re-processed by each analysis"""
+        for i in range(20):
+            learning_system.record_modification(
+                photo_id=sample_photos[i].id,
+                original_preset=sample_preset.name,
+                final_preset=sample_preset.name,
+                parameter_adjustments={} if i % 2 else {'Note': 'manual'}
+            )
+        
+        commits = []
+        
+        def on_commit(session):
+            commits.append(session)
+        
+        event.listen(learning_system.db, 'before_commit', on_commit)
+        try:
+            for _ in range(2):
+                analysis = learning_system.analyze_parameter_patterns(preset_name=sample_preset.name)
+        finally:
+            event.remove(learning_system.db, 'before_commit', on_commit)
+        
+        assert analysis['modification_count'] == 20
+        assert analysis['avg_adjustments'] == {}
+        assert commits == []
+        assert db_session.query(LearningAdjustment).count() == 0
+    
+    def test_effectiveness_aggregates(self, learning_system, sample_photos, sample_preset):
+        """AI score average and context usage are aggregated in SQL"""
+        for i in range(10, 20):
+            learning_system.record_approval(
+                photo_id=sample_photos[i].id,
+                original_preset=sample_preset.name
+            )
+        
+        result = learning_system.evaluate_preset_effectiveness(preset_name=sample_preset.name)
+        
+        assert result['context_usage'] == {'backlit_portrait': 5, 'landscape_sky': 5}
+        assert result['avg_ai_score'] == pytest.approx(
+            statistics.mean(photo.ai_score for photo in sample_photos[10:20])
+        )
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -0,0 +1,152 @@
+"""
+Test suite for the indexed log reader
+
+Tests reverse reading, index maintenance on write and rotation, and
+time-range/level queries across rotated files.
+"""
+
+import json
+import logging
+import pytest
+from datetime import datetime
+from log_index import (
+    IndexedRotatingFileHandler,
+    LogIndex,
+    LogQueryEngine,
+    read_lines_reverse
+)
+from logging_system import StructuredFormatter
+
+
+@pytest.fixture
+def handler(tmp_path):
+    """Indexed handler with small files and frequent checkpoints"""
+    handler = IndexedRotatingFileHandler(
+        tmp_path / "main.log",
+        maxBytes=4096,
+        backupCount=3,
+        encoding='utf-8',
+        checkpoint_every=4
+    )
+    handler.setFormatter(StructuredFormatter())
+    yield handler
+    handler.close()
+
+
+def write(handler, message, level=logging.INFO, created=None):
+    """Emit one record through the handler"""
+    record = logging.LogRecord("junmai.main", level, __file__, 1, message, None, None)
+    if created is not None:
+        record.created = created
+    handler.handle(record)
+
+
+def test_read_lines_reverse_across_blocks(tmp_path):
+    """Test lines spanning block boundaries are reassembled"""
+    path = tmp_path / "lines.log"
+    lines = [f"line {i} " + "x" * (i % 13) for i in range(200)]
+    path.write_text("\n".join(lines) + "\n", encoding='utf-8')
+    
+    result = [line.decode() for line in read_lines_reverse(path, block_size=7)]
+    
+    assert result == list(reversed(lines))
+
+
+def test_index_tracks_writes(handler):
+    """Test line and level counts are maintained on write"""
+    write(handler, "first")
+    write(handler, "warn", level=logging.WARNING)
+    write(handler, "second")
+    
+    entry = handler.index.files[0]
+    assert entry['lines'] == 3
+    assert entry['levels'] == {'INFO': 2, 'WARNING': 1}
+    assert entry['bytes'] == (handler.index.log_path).stat().st_size
+
+
+def test_tail_continues_into_rotated_files(handler):
+    """Test tail queries read rotated backups when needed"""
+    for i in range(100):
+        write(handler, f"message {i:03d} " + "y" * 40)
+    
+    assert handler.index.file_path(1).exists()
+    
+    entries = LogQueryEngine(handler.index).query(lines=60)
+    
+    assert len(entries) == 60
+    assert [e['message'][:11] for e in entries] == [f"message {i:03d}" for i in range(40, 100)]
+
+
+def test_level_filter_skips_files_without_level(handler):
+    """Test level-filtered queries return the most recent matches"""
+    write(handler, "old error", level=logging.ERROR)
+    for i in range(100):
+        write(handler, f"filler {i} " + "z" * 40)
+    write(handler, "new error", level=logging.ERROR)
+    
+    entries = LogQueryEngine(handler.index).query(lines=10, level="error")
+    
+    messages = [e['message'] for e in entries]
+    assert messages[-1] == "new error"
+    assert all(e['level'] == 'ERROR' for e in entries)
+
+
+def test_time_range_query(handler):
+    """Test time-range queries spanning a rotation boundary"""
+    base = datetime(2025, 1, 1, 12, 0, 0).timestamp()
+    for i in range(100):
+        write(handler, f"t{i:03d} " + "w" * 40, created=base + i)
+    
+    since = datetime.fromtimestamp(base + 60).isoformat()
+    until = datetime.fromtimestamp(base + 69).isoformat()
+    entries = LogQueryEngine(handler.index).query(lines=100, since=since, until=until)
+    
+    assert [e['message'][:4] for e in entries] == [f"t{i:03d}" for i in range(60, 70)]
+
+
+def test_seek_range_uses_checkpoints():
+    """Test checkpoints narrow the byte range to read"""
+    entry = {
+        'bytes': 1000,
+        'checkpoints': [[10.0, 0], [20.0, 300], [30.0, 600], [40.0, 900]]
+    }
+    
+    assert LogIndex.seek_range(entry, 25.0, 35.0) == (300, 900)
+    assert LogIndex.seek_range(entry, None, None) == (0, 1000)
+
+
+def test_external_appends_are_indexed(handler):
+    """Test lines written by another process are picked up on query"""
+    write(handler, "ours")
+    
+    with open(handler.index.log_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({"timestamp": datetime.now().isoformat(), "level": "ERROR",
+                            "message": "from worker"}) + "\n")
+    
+    engine = LogQueryEngine(handler.index)
+    assert engine.stats()['levels'] == {'INFO': 1, 'ERROR': 1}
+    
+    write(handler, "ours again")
+    assert [e['message'] for e in engine.query(lines=10)] == ["ours", "from worker", "ours again"]
+
+
+def test_index_persisted_and_validated(handler, tmp_path):
+    """Test sidecar index is reloaded and rebuilt for replaced files"""
+    for i in range(5):
+        write(handler, f"message {i}")
+    handler.index.save(force=True)
+    
+    reloaded = LogIndex(tmp_path / "main.log", backup_count=3)
+    reloaded.refresh()
+    assert reloaded.files[0]['lines'] == 5
+    
+    # Replace the file: index must be rebuilt from disk
+    handler.close()
+    (tmp_path / "main.log").unlink()
+    (tmp_path / "main.log").write_text(
+        json.dumps({"timestamp": datetime.now().isoformat(), "level": "INFO", "message": "new"}) + "\n",
+        encoding='utf-8'
+    )
+    reloaded.refresh()
+    assert reloaded.files[0]['lines'] == 1
+    assert LogQueryEngine(reloaded).query(lines=10)[0]['message'] == "new"
@@ -12,6 +12,7 @@ import shutil
 from logging_system import (
     LoggingSystem,
     PerformanceTimer,
+    LazyField,
     get_logging_system,
     log,
     log_performance,
@@ -225,6 +226,104 @@ class TestLoggingSystem:
         assert main_log.stat().st_size <= logging_system.max_bytes * 2  # Allow some buffer
 
 
+class TestAsyncLogging:
+    """Test cases for asynchronous logging mode"""
+    
+    @pytest.fixture
+    def logging_system(self, tmp_path):
+        """Create LoggingSystem instance in async mode"""
+        log_sys = LoggingSystem(
+            log_dir=tmp_path,
+            max_bytes=1024,
+            backup_count=3,
+            log_level="INFO"
+        )
+        log_sys.enable_async(queue_size=1000)
+        yield log_sys
+        log_sys.disable_async()
+    
+    def test_records_written_by_listener(self, logging_system, tmp_path):
+        """Test queued records reach the log files"""
+        logging_system.log("INFO", "Async message", job_id="job-1")
+        logging_system.log_performance("async_op", 12.5, photos=3)
+        
+        assert logging_system.is_async()
+        assert logging_system.flush()
+        
+        entries = logging_system.read_logs("main")
+        assert entries[-1]['message'] == 'Async message'
+        assert entries[-1]['job_id'] == 'job-1'
+        assert (tmp_path / "performance.log").exists()
+    
+    def test_filtered_debug_is_not_evaluated(self, logging_system):
+        """Test lazy fields of filtered records are never computed"""
+        calls = []
+        
+        def snapshot():
+            calls.append(1)
+            return {"depth": 3}
+        
+        logging_system.log("DEBUG", "Filtered", state=LazyField(snapshot))
+        logging_system.log("INFO", "Kept", state=LazyField(snapshot))
+        logging_system.flush()
+        
+        assert len(calls) == 1
+        assert logging_system.read_logs("main")[-1]['state'] == {"depth": 3}
+    
+    def test_non_serializable_fields(self, logging_system):
+        """Test values without a JSON representation are logged as strings"""
+        logging_system.log("INFO", "Path field", path=pathlib.Path("a") / "b.jpg")
+        logging_system.flush()
+        
+        assert logging_system.read_logs("main")[-1]['path'] == str(pathlib.Path("a") / "b.jpg")
+    
+    def test_overload_policy(self, tmp_path):
+        """Test DEBUG is sampled and INFO dropped when the queue is full"""
+        log_sys = LoggingSystem(log_dir=tmp_path / "overload", log_level="DEBUG")
+        log_sys.enable_async(queue_size=10, debug_sample_rate=5)
+        try:
+            # Hold the listener so the queue fills up
+            log_sys._listener.stop()
+            
+            for i in range(100):
+                log_sys.log("DEBUG", f"debug {i}")
+            for i in range(20):
+                log_sys.log("INFO", f"info {i}")
+            
+            stats = log_sys.get_queue_stats()
+            assert stats['sampled_out'] > 0
+            assert stats['dropped'] > 0
+            assert stats['queue_size'] <= 10
+            
+            log_sys._listener.start()
+        finally:
+            log_sys.disable_async()
+    
+    def test_disable_async_flushes(self, logging_system, tmp_path):
+        """Test switching back to sync mode writes pending records"""
+        for i in range(5):
+            logging_system.log("INFO", f"Message {i}")
+        
+        logging_system.disable_async()
+        assert not logging_system.is_async()
+        
+        with open(tmp_path / "main.log", 'r', encoding='utf-8') as f:
+            assert len(f.readlines()) == 5
+        
+        # Sync mode writes immediately again
+        logging_system.log("INFO", "Sync message")
+        with open(tmp_path / "main.log", 'r', encoding='utf-8') as f:
+            assert json.loads(f.readlines()[-1])['message'] == 'Sync message'
+    
+    def test_rotation_on_listener(self, logging_system, tmp_path):
+        """Test rotation happens in async mode"""
+        for i in range(100):
+            logging_system.log("INFO", f"Long message {i}" * 10, index=i)
+        logging_system.flush()
+        
+        assert (tmp_path / "main.log.1").exists()
+
+
 class TestConvenienceFunctions:
     """Test convenience functions"""
     
@@ -0,0 +1,328 @@
+"""
+Tests for the notification outbox
+
+Uses a local SMTP stub and a local HTTP stub for LINE Notify, so real
+connections are made without leaving the machine.
+
+Requirements: 8.1, 8.2
+"""
+
+import email
+import json
+import socket
+import socketserver
+import threading
+import time
+from email.header import decode_header, make_header
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import datetime, timedelta
+
+import pytest
+
+from email_notifier import EmailNotifier, EmailNotificationType
+from line_notifier import LineNotifier, LineNotificationType
+from notification_outbox import NotificationOutbox
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP dialogue recording delivered messages"""
+    
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        time.sleep(server.delay)
+        self.wfile.write(b"220 stub ESMTP\r\n")
+        
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                break
+            command = line.decode('ascii', 'replace').strip().upper()
+            
+            if command.startswith('DATA'):
+                self.wfile.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                lines = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if data_line in (b".\r\n", b""):
+                        break
+                    lines.append(data_line)
+                server.messages.append(email.message_from_bytes(b"".join(lines)))
+                self.wfile.write(b"250 OK\r\n")
+            elif command.startswith('QUIT'):
+                self.wfile.write(b"221 Bye\r\n")
+                break
+            else:
+                self.wfile.write(b"250 OK\r\n")
+
+
+class SMTPStub(socketserver.ThreadingTCPServer):
+    """Local SMTP server counting connections and messages"""
+    
+    daemon_threads = True
+    allow_reuse_address = True
+    
+    def __init__(self, delay: float = 0.0):
+        super().__init__(('127.0.0.1', 0), _SMTPHandler)
+        self.delay = delay
+        self.connections = 0
+        self.messages = []
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+    
+    def __enter__(self):
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+    
+    @property
+    def port(self):
+        return self.server_address[1]
+    
+    def subjects(self):
+        return [str(make_header(decode_header(m['Subject']))) for m in self.messages]
+
+
+class _LineHandler(BaseHTTPRequestHandler):
+    """LINE Notify stub answering with queued responses (default 200)"""
+    
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.server.requests.append(self.rfile.read(length))
+        
+        status, headers = self.server.responses.pop(0) if self.server.responses else (200, {})
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(json.dumps({'status': status}).encode())
+    
+    def log_message(self, *args):
+        pass
+
+
+class LineStub(ThreadingHTTPServer):
+    """Local HTTP server standing in for the LINE Notify API"""
+    
+    daemon_threads = True
+    
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _LineHandler)
+        self.requests = []
+        self.responses = []
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+    
+    def __enter__(self):
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+    
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/api/notify"
+
+
+@pytest.fixture(autouse=True)
+def no_proxy(monkeypatch):
+    monkeypatch.setenv('NO_PROXY', '127.0.0.1,localhost')
+
+
+@pytest.fixture
+def smtp_stub():
+    with SMTPStub() as stub:
+        yield stub
+
+
+@pytest.fixture
+def line_stub():
+    with LineStub() as stub:
+        yield stub
+
+
+def make_email_notifier(tmp_path, port):
+    notifier = EmailNotifier(tmp_path / 'email_config.json')
+    notifier.config.update({
+        'enabled': True,
+        'smtp_server': '127.0.0.1',
+        'smtp_port': port,
+        'use_tls': False,
+        'from_address': 'autodev@example.com',
+        'to_addresses': ['photographer@example.com']
+    })
+    return notifier
+
+
+def make_line_notifier(tmp_path, url=None, rate_limit=None):
+    config_file = tmp_path / 'line_config.json'
+    config = {
+        'enabled': True,
+        'token': 'test-token',
+        'notification_types': {'approval_required': True, 'error': True, 'processing_complete': True},
+        'rate_limit': rate_limit or {'max_per_hour': 50, 'current_count': 0, 'reset_time': None}
+    }
+    config_file.write_text(json.dumps(config))
+    notifier = LineNotifier(config_file)
+    if url:
+        notifier.LINE_NOTIFY_API = url
+    return notifier
+
+
+def make_outbox(tmp_path, email_notifier, line_notifier, **kwargs):
+    kwargs.setdefault('coalesce_window', 0)
+    return NotificationOutbox(
+        db_path=str(tmp_path / 'outbox.db'),
+        email_notifier=email_notifier,
+        line_notifier=line_notifier,
+        **kwargs
+    )
+
+
+def closed_port():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+class TestEmailDelivery:
+    """Email delivery through the outbox"""
+    
+    def test_send_does_not_wait_for_slow_smtp(self, tmp_path):
+        with SMTPStub(delay=1.0) as stub:
+            notifier = make_email_notifier(tmp_path, stub.port)
+            outbox = make_outbox(tmp_path, notifier, make_line_notifier(tmp_path), poll_interval=0.05)
+            outbox.start()
+            try:
+                start = time.perf_counter()
+                assert notifier.send_error('DB', 'connection lost')
+                assert time.perf_counter() - start < 0.5
+                
+                deadline = time.time() + 10
+                while not stub.messages and time.time() < deadline:
+                    time.sleep(0.05)
+            finally:
+                outbox.stop()
+        
+        assert len(stub.messages) == 1
+        assert notifier.outbox is None
+    
+    def test_burst_reuses_one_connection(self, tmp_path, smtp_stub):
+        notifier = make_email_notifier(tmp_path, smtp_stub.port)
+        outbox = make_outbox(tmp_path, notifier, make_line_notifier(tmp_path))
+        notifier.outbox = outbox
+        
+        for i in range(5):
+            assert notifier.send_processing_complete(f'session-{i}', 10, 100.0, '1分')
+        assert smtp_stub.messages == []
+        
+        stats = outbox.process_due()
+        
+        assert stats['sent'] == 5
+        assert len(smtp_stub.messages) == 5
+        assert smtp_stub.connections == 1
+    
+    def test_same_type_coalesced_into_digest(self, tmp_path, smtp_stub):
+        notifier = make_email_notifier(tmp_path, smtp_stub.port)
+        outbox = make_outbox(tmp_path, notifier, make_line_notifier(tmp_path), coalesce_window=30)
+        notifier.outbox = outbox
+        
+        for count in (3, 5, 8):
+            notifier.send_approval_required(count, [{'name': 'wedding', 'count': count}])
+        notifier.send_error('Export', 'disk full')
+        
+        now = time.time()
+        outbox.process_due(now)
+        assert len(smtp_stub.messages) == 1  # the error is not held back
+        
+        stats = outbox.process_due(now + 31)
+        
+        assert stats['sent'] == 3
+        assert len(smtp_stub.messages) == 2
+        assert smtp_stub.subjects()[1] == 'バッチ通知 - 3件'
+    
+    def test_failed_delivery_retried_then_given_up(self, tmp_path):
+        notifier = make_email_notifier(tmp_path, closed_port())
+        outbox = make_outbox(tmp_path, notifier, make_line_notifier(tmp_path), max_attempts=2)
+        outbox.enqueue_email(EmailNotificationType.ERROR, {
+            'error_type': 'DB', 'error_message': 'x', 'error_details': '', 'timestamp': 'now'
+        })
+        
+        now = time.time()
+        assert outbox.process_due(now)['retried'] == 1
+        assert outbox.process_due(now + 1)['retried'] == 0
+        assert outbox.process_due(now + 3600)['failed'] == 1
+        assert outbox.get_stats()['counts']['email'] == {'failed': 1}
+
+
+class TestLineDelivery:
+    """LINE delivery through the outbox"""
+    
+    def test_api_429_reschedules_instead_of_dropping(self, tmp_path, line_stub):
+        line_stub.responses.append((429, {'Retry-After': '120'}))
+        notifier = make_line_notifier(tmp_path, line_stub.url)
+        outbox = make_outbox(tmp_path, make_email_notifier(tmp_path, closed_port()), notifier)
+        notifier.outbox = outbox
+        
+        assert notifier.send_approval_required(3)
+        assert notifier.send_error('DB', 'connection lost')
+        
+        now = time.time()
+        stats = outbox.process_due(now)
+        assert stats['rescheduled'] == 2
+        assert len(line_stub.requests) == 1
+        
+        assert outbox.process_due(now + 60)['sent'] == 0
+        assert outbox.process_due(now + 130)['sent'] == 2
+        assert len(line_stub.requests) == 3
+    
+    def test_hourly_limit_schedules_for_reset(self, tmp_path, line_stub):
+        reset_time = (datetime.now() + timedelta(minutes=30)).replace(microsecond=0)
+        notifier = make_line_notifier(tmp_path, line_stub.url, rate_limit={
+            'max_per_hour': 2, 'current_count': 2, 'reset_time': reset_time.isoformat()
+        })
+        
+        result = notifier.deliver('hello', LineNotificationType.ERROR)
+        
+        assert result == {'status': 'rate_limited', 'retry_at': reset_time.timestamp()}
+        assert line_stub.requests == []
+    
+    def test_same_type_coalesced_into_digest(self, tmp_path, line_stub):
+        notifier = make_line_notifier(tmp_path, line_stub.url)
+        outbox = make_outbox(tmp_path, make_email_notifier(tmp_path, closed_port()), notifier,
+                             coalesce_window=30)
+        
+        for count in (1, 2, 3):
+            outbox.enqueue_line(LineNotificationType.APPROVAL_REQUIRED, {'pending_count': count})
+        
+        assert outbox.process_due(time.time() + 31)['sent'] == 3
+        assert len(line_stub.requests) == 1
+        assert notifier.token_manager.get('rate_limit')['current_count'] == 1
+
+
+class TestPersistence:
+    """Queue persistence"""
+    
+    def test_interrupted_delivery_recovered_after_restart(self, tmp_path, smtp_stub):
+        notifier = make_email_notifier(tmp_path, smtp_stub.port)
+        outbox = make_outbox(tmp_path, notifier, make_line_notifier(tmp_path))
+        outbox.enqueue_email(EmailNotificationType.PROCESSING_COMPLETE, {
+            'session_name': 's', 'photo_count': 1, 'success_rate': 100.0, 'processing_time': '1分'
+        })
+        outbox.enqueue_email(EmailNotificationType.PROCESSING_COMPLETE, {
+            'session_name': 't', 'photo_count': 1, 'success_rate': 100.0, 'processing_time': '1分'
+        })
+        
+        # Crash after claiming: rows are left in 'sending'
+        outbox._claim_due(time.time())
+        
+        restarted = make_outbox(tmp_path, notifier, make_line_notifier(tmp_path))
+        
+        assert restarted.process_due()['sent'] == 2
+        assert len(smtp_stub.messages) == 2
@@ -15,10 +15,10 @@ import tempfile
 import shutil
 from pathlib import Path
 from datetime import datetime
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
-from models.database import Base, Preset, Photo, Session as DBSession, LearningData
+from models.database import Base, Preset, PresetContextTag, Photo, Session as DBSession, LearningData
 from preset_manager import PresetManager
 
 
@@ -277,6 +277,106 @@ class TestContextMapping:
         assert "Preset2" in mapping["low_light_indoor"]
 
 
+class TestContextTagIndex:
+    """Test indexed context lookup and the selection cache."""
+    
+    def test_tag_rows_follow_preset_changes(self, preset_manager, sample_config, db_session):
+        """Test that tag rows are maintained by create/update/delete."""
+        preset = preset_manager.create_preset(
+            "Preset1", "v1", sample_config,
+            context_tags=["outdoor", "portrait", "outdoor"]
+        )
+        
+        def tags():
+            return sorted(t for (t,) in db_session.query(PresetContextTag.tag))
+        
+        assert tags() == ["outdoor", "portrait"]
+        
+        preset_manager.update_preset(preset.id, context_tags=["portrait", "night"])
+        assert tags() == ["night", "portrait"]
+        assert [p.name for p in preset_manager.list_presets(context_tag="night")] == ["Preset1"]
+        
+        preset_manager.delete_preset(preset.id)
+        assert tags() == []
+    
+    def test_selection_served_from_cache(self, preset_manager, sample_config, db_session):
+        """Test that repeated selection does not query the tag table."""
+        preset_manager.create_preset(
+            "Preset1", "v1", sample_config,
+            context_tags=["backlit_portrait"]
+        )
+        preset_manager.select_preset_for_context("backlit_portrait")
+        
+        statements = []
+        engine = db_session.get_bind()
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            for _ in range(5):
+                selected = preset_manager.select_preset_for_context("backlit_portrait")
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        
+        assert selected.name == "Preset1"
+        assert not any("preset_context_tags" in s for s in statements)
+    
+    def test_record_usage_invalidates_cache(self, preset_manager, sample_config):
+        """Test that usage updates change the cached ranking."""
+        preset1 = preset_manager.create_preset(
+            "Preset1", "v1", sample_config,
+            context_tags=["backlit_portrait"]
+        )
+        preset2 = preset_manager.create_preset(
+            "Preset2", "v1", sample_config,
+            context_tags=["backlit_portrait"]
+        )
+        preset_manager.record_preset_usage(preset1.id, photo_id=1, approved=True)
+        preset_manager.record_preset_usage(preset2.id, photo_id=2, approved=False)
+        assert preset_manager.select_preset_for_context("backlit_portrait").name == "Preset1"
+        
+        for photo_id in range(3, 40):
+            preset_manager.record_preset_usage(preset1.id, photo_id, approved=False)
+            preset_manager.record_preset_usage(preset2.id, photo_id, approved=True)
+        
+        assert preset_manager.select_preset_for_context("backlit_portrait").name == "Preset2"
+    
+    def test_new_preset_visible_to_other_managers(self, db_session, sample_config, temp_presets_dir):
+        """Test that the cache is shared and invalidated across instances."""
+        manager1 = PresetManager(db_session, temp_presets_dir)
+        manager2 = PresetManager(db_session, temp_presets_dir)
+        manager1.create_preset("default", "v1", sample_config)
+        
+        assert manager2.select_preset_for_context("night").name == "default"
+        
+        manager1.create_preset("NightPreset", "v1", sample_config, context_tags=["night"])
+        
+        assert manager2.select_preset_for_context("night").name == "NightPreset"
+    
+    def test_selection_does_not_write(self, preset_manager, sample_config, db_session):
+        """Test selection only reads, even with tags stored as JSON text only."""
+        preset_manager.create_preset("default", "v1", sample_config)
+        preset = Preset(name="Legacy", version="v1", context_tags="null")
+        preset.set_config_template(sample_config)
+        db_session.add(preset)
+        db_session.commit()
+        
+        commits = []
+        
+        def on_commit(session):
+            commits.append(session)
+        
+        event.listen(db_session, "before_commit", on_commit)
+        try:
+            selected = preset_manager.select_preset_for_context("golden_hour")
+            mapping = preset_manager.map_contexts_to_presets()
+        finally:
+            event.remove(db_session, "before_commit", on_commit)
+        
+        assert selected.name == "default"
+        assert "golden_hour" not in mapping
+        assert commits == []
+
+
 class TestVersionManagement:
     """Test preset version management."""
     
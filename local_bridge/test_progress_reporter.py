@@ -6,7 +6,10 @@
 
 import pytest
 import time
-from progress_reporter import ProgressReporter, ProcessingStage, init_progress_reporter, get_progress_reporter
+from progress_reporter import (
+    ProgressReporter, ProgressCoalescer, ProcessingStage,
+    init_progress_reporter, get_progress_reporter
+)
 
 
 class MockWebSocketServer:
@@ -24,6 +27,21 @@ class MockWebSocketServer:
         })
 
 
+class MockFrameServer(MockWebSocketServer):
+    """Mock server supporting coalesced progress frames"""
+    
+    def __init__(self):
+        super().__init__()
+        self.frames = []
+    
+    def broadcast_frame(self, updates, channel=None):
+        """Record progress frames"""
+        self.frames.append({
+            'updates': updates,
+            'channel': channel
+        })
+
+
 def test_progress_reporter_initialization():
     """Test progress reporter initialization"""
     mock_ws = MockWebSocketServer()
@@ -369,5 +387,86 @@ def test_progress_sequence():
     assert job_info['progress'] == 100
 
 
+def test_coalesced_progress_keeps_latest_per_job():
+    """Updates within a frame are merged to the latest per job"""
+    mock_ws = MockFrameServer()
+    reporter = ProgressReporter(mock_ws, frame_interval=60)
+    
+    reporter.start_job("job_a", 1, {'file_name': 'a.jpg', 'session_id': 7})
+    reporter.start_job("job_b", 2, {'file_name': 'b.jpg'})
+    mock_ws.broadcasts.clear()
+    
+    for progress in (10, 20, 30):
+        reporter.update_progress("job_a", ProcessingStage.AI_EVALUATION, progress)
+    reporter.update_progress("job_b", ProcessingStage.EXIF_ANALYSIS, 50)
+    
+    # Nothing is sent until the frame is flushed
+    assert mock_ws.broadcasts == []
+    assert mock_ws.frames == []
+    
+    reporter.flush()
+    
+    assert len(mock_ws.frames) == 1
+    frame = mock_ws.frames[0]
+    assert frame['channel'] == 'jobs'
+    by_job = {u['job_id']: u for u in frame['updates']}
+    assert by_job['job_a']['progress'] == 30
+    assert by_job['job_a']['session_id'] == 7
+    assert by_job['job_b']['progress'] == 50
+    
+    reporter.shutdown()
+
+
+def test_coalesced_progress_falls_back_to_broadcast():
+    """Servers without broadcast_frame get the merged updates individually"""
+    mock_ws = MockWebSocketServer()
+    reporter = ProgressReporter(mock_ws, frame_interval=60)
+    reporter.start_job("job_c", 3, {'file_name': 'c.jpg'})
+    mock_ws.broadcasts.clear()
+    
+    reporter.update_progress("job_c", ProcessingStage.EXIF_ANALYSIS, 10)
+    reporter.update_progress("job_c", ProcessingStage.AI_EVALUATION, 40)
+    reporter.flush()
+    
+    assert len(mock_ws.broadcasts) == 1
+    assert mock_ws.broadcasts[0]['message']['progress'] == 40
+    
+    reporter.shutdown()
+
+
+def test_completion_discards_pending_progress():
+    """A completed job does not emit stale progress afterwards"""
+    mock_ws = MockFrameServer()
+    reporter = ProgressReporter(mock_ws, frame_interval=60)
+    reporter.start_job("job_d", 4, {'file_name': 'd.jpg'})
+    
+    reporter.update_progress("job_d", ProcessingStage.EXPORTING, 90)
+    reporter.complete_job("job_d", True)
+    reporter.flush()
+    
+    assert mock_ws.frames == []
+    assert mock_ws.broadcasts[-1]['message']['type'] == 'job_completed'
+    
+    reporter.shutdown()
+
+
+def test_coalescer_frame_thread():
+    """The frame thread flushes pending updates on its own"""
+    frames = []
+    coalescer = ProgressCoalescer(frames.append, interval=0.01)
+    
+    coalescer.add("job_e", {'job_id': "job_e", 'progress': 1})
+    coalescer.add("job_e", {'job_id': "job_e", 'progress': 2})
+    
+    deadline = time.time() + 2
+    while not frames and time.time() < deadline:
+        time.sleep(0.01)
+    coalescer.stop()
+    
+    assert frames == [[{'job_id': "job_e", 'progress': 2}]]
+    assert coalescer.stats['received'] == 2
+    assert coalescer.stats['flushed'] == 1
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
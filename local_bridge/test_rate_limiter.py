@@ -0,0 +1,175 @@
+"""
+Unit Tests for Rate Limiter
+レート制限エンジンのテスト
+
+Tests for:
+- Sliding window counter
+- LRU/TTL eviction
+- Shared SQLite backend
+- Local fast path and backend fallback
+
+Requirements: 9.5
+"""
+
+import pytest
+import tempfile
+import pathlib
+from rate_limiter import (
+    RateLimiter,
+    MemoryRateLimitBackend,
+    SQLiteRateLimitBackend,
+    create_rate_limit_backend,
+    sliding_window_hit,
+)
+
+
+class TestSlidingWindow:
+    """Test sliding window counter"""
+    
+    def test_limit_within_window(self):
+        """Test limit is enforced within one window"""
+        limiter = RateLimiter(backend='memory')
+        
+        results = [limiter.check('k', 3, 60, now=120.0 + i)[0] for i in range(4)]
+        
+        assert results == [True, True, True, False]
+    
+    def test_previous_window_weight(self):
+        """Test previous window count decays over the next window"""
+        state = None
+        for _ in range(10):
+            _, state = sliding_window_hit(state, 10, 60, 30.0)
+        
+        # 15s into the next window: 10 * 0.75 = 7.5 requests still count
+        allowed, state = sliding_window_hit(state, 10, 60, 75.0)
+        assert allowed
+        assert state == (1, 10, 1)
+        
+        allowed, _ = sliding_window_hit(state, 10, 60, 75.0)
+        assert allowed
+        allowed, _ = sliding_window_hit((1, 10, 2), 10, 60, 75.0)
+        assert not allowed
+        
+        # Two windows later the state is gone
+        assert sliding_window_hit(state, 10, 60, 190.0) == (True, (3, 0, 1))
+    
+    def test_limit_info(self):
+        """Test remaining and retry_after"""
+        limiter = RateLimiter(backend='memory')
+        
+        allowed, info = limiter.check('k', 2, 60, now=0.0)
+        assert allowed and info['remaining'] == 1 and info['reset_in'] == 60
+        limiter.check('k', 2, 60, now=10.0)
+        
+        allowed, info = limiter.check('k', 2, 60, now=20.0)
+        assert not allowed
+        assert info['remaining'] == 0
+        # Both requests leave the estimate 30s into the next window
+        assert info['retry_after'] == 70
+        
+        assert not limiter.check('k', 2, 60, now=89.0)[0]
+        assert limiter.check('k', 2, 60, now=90.0)[0]
+    
+    def test_keys_are_independent(self):
+        """Test limits are per key"""
+        limiter = RateLimiter(backend='memory')
+        
+        assert limiter.check('a', 1, 60, now=0.0)[0]
+        assert not limiter.check('a', 1, 60, now=1.0)[0]
+        assert limiter.check('b', 1, 60, now=1.0)[0]
+
+
+class TestEviction:
+    """Test bounded memory"""
+    
+    def test_lru_cap(self):
+        """Test least recently used identifiers are evicted"""
+        backend = MemoryRateLimitBackend(max_entries=3)
+        
+        for i in range(10):
+            backend.hit(f'ip-{i}', 5, 60, 0.0)
+        
+        assert len(backend) == 3
+    
+    def test_idle_identifiers_expire(self):
+        """Test identifiers idle for two windows are dropped"""
+        backend = MemoryRateLimitBackend()
+        
+        for i in range(100):
+            backend.hit(f'ip-{i}', 5, 60, 0.0)
+        backend.hit('active', 5, 60, 125.0)
+        
+        assert len(backend) == 1
+
+
+class TestSharedBackend:
+    """Test SQLite backend shared between limiters"""
+    
+    def setup_method(self):
+        """Setup test environment"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = pathlib.Path(self.temp_dir) / "rate_limits.db"
+    
+    def test_limit_shared_between_workers(self):
+        """Test two limiters (workers) share one limit"""
+        worker_a = RateLimiter(backend=f'sqlite:///{self.db_path}')
+        worker_b = RateLimiter(backend=f'sqlite:///{self.db_path}')
+        
+        assert isinstance(worker_a.backend, SQLiteRateLimitBackend)
+        assert worker_a.check('k', 3, 60, now=0.0)[0]
+        assert worker_b.check('k', 3, 60, now=1.0)[0]
+        assert worker_a.check('k', 3, 60, now=2.0)[0]
+        assert not worker_b.check('k', 3, 60, now=3.0)[0]
+        
+        worker_a.reset()
+        assert len(worker_b.backend) == 0
+    
+    def test_unavailable_backend_falls_back_to_memory(self):
+        """Test unreachable Redis falls back to the in-memory backend"""
+        backend = create_rate_limit_backend('redis://127.0.0.1:1/0')
+        
+        assert isinstance(backend, MemoryRateLimitBackend)
+
+
+class CountingBackend(MemoryRateLimitBackend):
+    """Memory backend counting backend calls"""
+    
+    def __init__(self, fail=False):
+        super().__init__()
+        self.calls = 0
+        self.fail = fail
+    
+    def hit(self, key, limit, window, now):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("backend down")
+        return super().hit(key, limit, window, now)
+
+
+class TestFastPath:
+    """Test local fast path and fallback"""
+    
+    def test_blocked_identifier_skips_backend(self):
+        """Test requests from a blocked identifier do not reach the backend"""
+        backend = CountingBackend()
+        limiter = RateLimiter(backend=backend)
+        
+        limiter.check('k', 1, 60, now=0.0)
+        limiter.check('k', 1, 60, now=1.0)
+        for i in range(50):
+            allowed, info = limiter.check('k', 1, 60, now=2.0 + i * 0.1)
+            assert not allowed
+            assert info['retry_after'] >= 1
+        
+        assert backend.calls == 2
+    
+    def test_backend_failure_uses_local_limits(self):
+        """Test limits still apply when the shared backend fails"""
+        limiter = RateLimiter(backend=CountingBackend(fail=True))
+        
+        assert limiter.check('k', 1, 60, now=0.0)[0]
+        assert not limiter.check('k', 1, 60, now=1.0)[0]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
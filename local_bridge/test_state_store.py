@@ -0,0 +1,111 @@
+"""
+Tests for Coalescing State Store
+
+Requirements: 14.3
+"""
+
+import time
+import pathlib
+import tempfile
+import shutil
+
+import pytest
+
+from state_store import StateStore, get_state_store
+
+
+@pytest.fixture
+def temp_dir():
+    """Create temporary directory"""
+    path = tempfile.mkdtemp()
+    yield pathlib.Path(path)
+    shutil.rmtree(path)
+
+
+class TestStateStore:
+    """Test StateStore"""
+    
+    def test_put_and_get(self):
+        """Test reading back stored values"""
+        store = StateStore()
+        store.put('batch', 'b1', {'count': 1})
+        
+        # Pending writes are visible before flushing
+        assert store.get('batch', 'b1') == {'count': 1}
+        
+        store.flush()
+        assert store.get('batch', 'b1') == {'count': 1}
+        assert store.get('batch', 'missing') is None
+        assert store.get('checkpoint', 'b1') is None
+    
+    def test_writes_are_coalesced(self):
+        """Test that repeated writes to a key produce one database write"""
+        store = StateStore(flush_interval_ms=10000)
+        for i in range(1000):
+            store.put('batch', 'b1', {'count': i})
+        
+        assert store.flush() == 1
+        stats = store.get_statistics()
+        assert stats['writes_requested'] == 1000
+        assert stats['writes_flushed'] == 1
+        assert stats['flush_count'] == 1
+        assert store.get('batch', 'b1') == {'count': 999}
+    
+    def test_timed_flush(self, temp_dir):
+        """Test that coalesced writes are flushed within the interval"""
+        store = StateStore(temp_dir / 'state.db', flush_interval_ms=50)
+        store.put('batch', 'b1', {'count': 1})
+        
+        deadline = time.time() + 5
+        while store.get_statistics()['pending'] and time.time() < deadline:
+            time.sleep(0.01)
+        
+        reader = StateStore(temp_dir / 'state.db')
+        assert reader.get('batch', 'b1') == {'count': 1}
+        reader.close()
+        store.close()
+    
+    def test_durable_put(self, temp_dir):
+        """Test that durable writes are on disk when put() returns"""
+        store = StateStore(temp_dir / 'state.db', flush_interval_ms=10000)
+        store.put('batch', 'b1', {'status': 'paused'}, durable=True)
+        
+        reader = StateStore(temp_dir / 'state.db')
+        assert reader.get('batch', 'b1') == {'status': 'paused'}
+        reader.close()
+        store.close()
+    
+    def test_delete(self):
+        """Test deleting keys"""
+        store = StateStore()
+        store.put('batch', 'b1', {'count': 1}, durable=True)
+        store.delete('batch', 'b1')
+        
+        assert store.get('batch', 'b1') is None
+        assert store.load_namespace('batch') == {}
+        
+        store.flush()
+        assert store.get('batch', 'b1') is None
+    
+    def test_load_namespace_merges_pending(self):
+        """Test loading a namespace with pending and flushed values"""
+        store = StateStore(flush_interval_ms=10000)
+        store.put_many('batch', {'b1': {'n': 1}, 'b2': {'n': 2}})
+        store.put('batch', 'b2', {'n': 20})
+        store.put('batch', 'b3', {'n': 3})
+        store.delete('batch', 'b1')
+        store.put('checkpoint', 'c1', {'n': 0})
+        
+        assert store.load_namespace('batch') == {'b2': {'n': 20}, 'b3': {'n': 3}}
+        assert store.load_namespace('checkpoint') == {'c1': {'n': 0}}
+    
+    def test_shared_instance_per_path(self, temp_dir):
+        """Test that callers using the same file share one store"""
+        store1 = get_state_store(temp_dir / 'state.db')
+        store2 = get_state_store(str(temp_dir / 'state.db'))
+        
+        assert store1 is store2
+        
+        store1.close()
+        assert get_state_store(temp_dir / 'state.db') is not store1
+        get_state_store(temp_dir / 'state.db').close()
@@ -5,6 +5,7 @@
 import pytest
 import json
 import time
+import threading
 from flask import Flask
 from websocket_fallback import init_websocket_fallback, get_websocket_fallback
 
@@ -345,5 +346,252 @@ def test_message_queue_limit(websocket_fallback):
     assert websocket_fallback.message_queues[client_id][-1]['index'] == 149
 
 
+def _fallback_client(websocket_fallback, client_id, capabilities=None, sessions=None):
+    """Register a fallback client directly on the server"""
+    from collections import deque
+    websocket_fallback.clients[client_id] = {
+        'id': client_id,
+        'client_type': 'test',
+        'protocol_version': '1.0',
+        'connected_at': time.time(),
+        'last_poll': time.time(),
+        'subscriptions': {'jobs'}
+    }
+    websocket_fallback.message_queues[client_id] = deque(maxlen=100)
+    websocket_fallback._handle_client_message(client_id, {
+        'type': 'register', 'capabilities': capabilities or {}
+    })
+    if sessions is not None:
+        websocket_fallback._handle_client_message(client_id, {
+            'type': 'subscribe', 'channels': ['jobs'], 'sessions': sessions
+        })
+
+
+def _progress(job_id, progress, session_id=None):
+    return {'type': 'job_progress', 'job_id': job_id, 'photo_id': 1,
+            'session_id': session_id, 'stage': 'ai_evaluation',
+            'progress': progress, 'message': '', 'details': {}}
+
+
+def test_fallback_register_negotiates_json_only(websocket_fallback):
+    """Polling clients cannot negotiate binary encodings"""
+    _fallback_client(websocket_fallback, 'c1', {'progress_batch': True, 'encoding': 'msgpack'})
+    
+    info = websocket_fallback.clients['c1']
+    assert info['progress_batch'] is True
+    assert info['encoding'] == 'json'
+
+
+def test_fallback_progress_frame_batches_and_merges(websocket_fallback):
+    """Batch clients keep one pending batch with the latest state per job"""
+    _fallback_client(websocket_fallback, 'batch', {'progress_batch': True})
+    _fallback_client(websocket_fallback, 'legacy')
+    websocket_fallback.message_queues['batch'].clear()
+    websocket_fallback.message_queues['legacy'].clear()
+    
+    websocket_fallback.broadcast_frame([_progress('j1', 10), _progress('j2', 20)])
+    websocket_fallback.broadcast_frame([_progress('j1', 50)])
+    
+    batch_queue = list(websocket_fallback.message_queues['batch'])
+    assert len(batch_queue) == 1
+    batch = batch_queue[0]
+    assert batch['type'] == 'job_progress_batch'
+    rows = {row[0]: dict(zip(batch['fields'], row)) for row in batch['updates']}
+    assert rows['j1']['progress'] == 50
+    assert rows['j2']['progress'] == 20
+    
+    legacy_queue = list(websocket_fallback.message_queues['legacy'])
+    assert [m['type'] for m in legacy_queue] == ['job_progress'] * 3
+
+
+def test_fallback_session_filter(websocket_fallback):
+    """Clients subscribed to a session only see that session's progress"""
+    _fallback_client(websocket_fallback, 'filtered', sessions=[5])
+    websocket_fallback.message_queues['filtered'].clear()
+    
+    websocket_fallback.broadcast_frame([_progress('j1', 10, session_id=5),
+                                        _progress('j2', 10, session_id=6)])
+    websocket_fallback.broadcast({'type': 'session_updated', 'session_id': 6}, channel='jobs')
+    
+    messages = list(websocket_fallback.message_queues['filtered'])
+    assert [m['job_id'] for m in messages] == ['j1']
+
+
+class FakeWebSocket:
+    """Records payloads sent by the WebSocket server"""
+    
+    def __init__(self):
+        self.sent = []
+    
+    def send(self, payload):
+        self.sent.append(payload)
+
+
+class BlockedWebSocket(FakeWebSocket):
+    """WebSocket whose send() blocks until released"""
+    
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+        self.closed = False
+    
+    def send(self, payload):
+        self.release.wait(5)
+        super().send(payload)
+    
+    def close(self):
+        self.closed = True
+        self.release.set()
+
+
+def _flush(server):
+    """Wait until every client send queue has been written"""
+    for send_queue in list(server.send_queues.values()):
+        assert send_queue.flush(timeout=5)
+
+
+def test_websocket_server_progress_frame(app):
+    """Native WebSocket clients get frames in their negotiated format"""
+    from datetime import datetime
+    from websocket_server import WebSocketServer
+    from progress_protocol import MSGPACK_AVAILABLE
+    
+    server = WebSocketServer(app)
+    batch_ws, legacy_ws, other_session_ws = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    for ws in (batch_ws, legacy_ws, other_session_ws):
+        server.clients.add(ws)
+        server.client_info[ws] = {'id': id(ws), 'connected_at': datetime.now(),
+                                  'last_ping': datetime.now(), 'client_type': 'gui'}
+        server._handle_subscribe(ws, {'channels': ['jobs']})
+    
+    encoding = 'msgpack' if MSGPACK_AVAILABLE else 'json'
+    server._handle_register(batch_ws, {'capabilities': {'progress_batch': True, 'encoding': encoding}})
+    server._handle_subscribe(other_session_ws, {'channels': ['jobs'], 'sessions': [99]})
+    _flush(server)
+    for ws in (batch_ws, legacy_ws, other_session_ws):
+        ws.sent.clear()
+    
+    server.broadcast_frame([_progress('j1', 10, session_id=1), _progress('j2', 30, session_id=1)])
+    _flush(server)
+    
+    assert len(batch_ws.sent) == 1
+    if MSGPACK_AVAILABLE:
+        import msgpack
+        batch = msgpack.unpackb(batch_ws.sent[0], raw=False)
+    else:
+        batch = json.loads(batch_ws.sent[0])
+    assert batch['type'] == 'job_progress_batch'
+    assert len(batch['updates']) == 2
+    
+    assert [json.loads(p)['job_id'] for p in legacy_ws.sent] == ['j1', 'j2']
+    assert other_session_ws.sent == []
+
+
+def _add_client(server, ws):
+    """Register a fake client subscribed to the jobs channel"""
+    from datetime import datetime
+    server.clients.add(ws)
+    server.client_info[ws] = {'id': id(ws), 'connected_at': datetime.now(),
+                              'last_ping': datetime.now(), 'client_type': 'gui',
+                              'subscriptions': {'jobs'}}
+
+
+def test_send_queue_does_not_block_producer(app):
+    """A stalled client neither blocks broadcast nor delays other clients"""
+    from websocket_server import WebSocketServer
+    
+    server = WebSocketServer(app)
+    slow_ws, fast_ws = BlockedWebSocket(), FakeWebSocket()
+    _add_client(server, slow_ws)
+    _add_client(server, fast_ws)
+    
+    start = time.time()
+    for i in range(20):
+        server.broadcast({'type': 'job_completed', 'job_id': f'job-{i}'})
+    assert time.time() - start < 1.0
+    
+    assert server.send_queues[fast_ws].flush(timeout=5)
+    assert len(fast_ws.sent) == 20
+    
+    slow_ws.release.set()
+    _flush(server)
+    assert len(slow_ws.sent) == 20
+    
+    metrics = server.get_send_queue_metrics()['clients'][id(slow_ws)]
+    assert metrics['sent'] == 20
+    assert metrics['depth'] == 0
+    assert metrics['max_latency_ms'] > 0
+
+
+def test_send_queue_merges_progress(app):
+    """Queued progress of the same job is replaced by the latest update"""
+    from websocket_server import WebSocketServer
+    
+    server = WebSocketServer(app)
+    ws = BlockedWebSocket()
+    _add_client(server, ws)
+    
+    # First message occupies the writer; the rest wait in the queue
+    server.broadcast({'type': 'job_started', 'job_id': 'job-1'})
+    time.sleep(0.05)
+    for progress in (10, 20, 30):
+        server.broadcast({'type': 'job_progress', 'job_id': 'job-1', 'progress': progress})
+    server.broadcast({'type': 'job_progress', 'job_id': 'job-2', 'progress': 50})
+    
+    ws.release.set()
+    _flush(server)
+    
+    messages = [json.loads(p) for p in ws.sent]
+    assert [(m['type'], m.get('progress')) for m in messages] == [
+        ('job_started', None), ('job_progress', 30), ('job_progress', 50)
+    ]
+    assert server.send_queues[ws].get_metrics()['merged'] == 2
+
+
+def test_send_queue_drops_progress_before_events(app):
+    """A full queue drops progress messages before job events"""
+    from websocket_server import WebSocketServer
+    
+    server = WebSocketServer(app, max_queue_size=3)
+    ws = BlockedWebSocket()
+    _add_client(server, ws)
+    
+    server.broadcast({'type': 'job_started', 'job_id': 'job-0'})
+    time.sleep(0.05)
+    server.broadcast({'type': 'job_progress', 'job_id': 'job-1', 'progress': 10})
+    server.broadcast({'type': 'job_completed', 'job_id': 'job-2'})
+    server.broadcast({'type': 'job_completed', 'job_id': 'job-3'})
+    server.broadcast({'type': 'job_completed', 'job_id': 'job-4'})
+    
+    ws.release.set()
+    _flush(server)
+    
+    assert [json.loads(p)['job_id'] for p in ws.sent] == ['job-0', 'job-2', 'job-3', 'job-4']
+    assert server.send_queues[ws].get_metrics()['dropped'] == 1
+
+
+def test_slow_consumer_is_evicted(app):
+    """A client that keeps its queue overflowing is disconnected"""
+    from websocket_server import WebSocketServer
+    
+    server = WebSocketServer(app, max_queue_size=2, slow_consumer_timeout=0.05)
+    ws = BlockedWebSocket()
+    _add_client(server, ws)
+    
+    for i in range(5):
+        server.broadcast({'type': 'job_completed', 'job_id': f'job-{i}'})
+    time.sleep(0.1)
+    server.broadcast({'type': 'job_completed', 'job_id': 'job-last'})
+    
+    assert ws not in server.clients
+    assert ws not in server.send_queues
+    assert server.get_send_queue_metrics()['evicted_clients'] == 1
+    
+    deadline = time.time() + 2
+    while not ws.closed and time.time() < deadline:
+        time.sleep(0.01)
+    assert ws.closed
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
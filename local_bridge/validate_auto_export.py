@@ -125,7 +125,7 @@ def validate_api_endpoints():
         return False
     
     # Check if auto_export_engine is initialized
-    if 'auto_export_engine = AutoExportEngine' in content:
+    if 'auto_export_engine = get_auto_export_engine' in content:
         print("   ✓ AutoExportEngine initialized in app.py")
     else:
         print("   ✗ AutoExportEngine not initialized in app.py")
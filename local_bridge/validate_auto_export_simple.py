@@ -106,7 +106,7 @@ def validate_api_endpoints():
         return False
     
     # Check initialization
-    if 'auto_export_engine = AutoExportEngine' in content:
+    if 'auto_export_engine = get_auto_export_engine' in content:
         print("   ✓ AutoExportEngine initialized")
     else:
         print("   ✗ AutoExportEngine not initialized")
@@ -232,7 +232,7 @@ def validate_feature_implementation():
         ],
         'Export queue management': [
             'export_queue',
-            'processing_jobs',
+            'claim_export_jobs',
             'get_export_queue_status'
         ]
     }
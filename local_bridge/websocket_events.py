@@ -10,7 +10,7 @@ Requirements: 4.5, 7.2
 """
 
 from datetime import datetime
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any
 from websocket_server import get_websocket_server, EventType
 from logging_system import get_logging_system
 
@@ -213,6 +213,29 @@ def broadcast_photo_rejected(photo_id: int, session_id: int, reason: str):
     }, channel='photos')
 
 
+def broadcast_photos_reviewed(
+    approved_ids: List[int],
+    rejected_ids: List[int],
+    session_ids: List[int],
+    export_job_count: int = 0
+):
+    """
+    Broadcast one event for a bulk review (instead of one event per photo)
+    
+    Args:
+        approved_ids: IDs of approved photos
+        rejected_ids: IDs of rejected photos
+        session_ids: Sessions the reviewed photos belong to
+        export_job_count: Number of export jobs created for approved photos
+    """
+    broadcast_event(EventType.PHOTOS_REVIEWED, {
+        'approved_ids': approved_ids,
+        'rejected_ids': rejected_ids,
+        'session_ids': session_ids,
+        'export_job_count': export_job_count
+    }, channel='photos')
+
+
 # ============================================================================
 # SESSION EVENTS
 # ============================================================================
@@ -380,13 +403,21 @@ def broadcast_priority_changed(job_id: str, old_priority: int, new_priority: int
 # APPROVAL QUEUE EVENTS
 # ============================================================================
 
-def broadcast_approval_queue_updated(queue_count: int, session_id: Optional[int] = None):
+def broadcast_approval_queue_updated(
+    queue_count: int,
+    session_id: Optional[int] = None,
+    added: Optional[List[Dict[str, Any]]] = None,
+    removed: Optional[List[int]] = None
+):
     """
     Broadcast approval queue updated event
     
     Args:
         queue_count: Number of photos in approval queue
         session_id: Optional session ID if update is session-specific
+        added: Optional photos that entered the queue (photo_id, session_id,
+            ai_score, position)
+        removed: Optional IDs of photos that left the queue
     """
     data = {
         'queue_count': queue_count
@@ -394,6 +425,10 @@ def broadcast_approval_queue_updated(queue_count: int, session_id: Optional[int]
     
     if session_id:
         data['session_id'] = session_id
+    if added:
+        data['added'] = added
+    if removed:
+        data['removed'] = removed
     
     broadcast_event('approval_queue_updated', data, channel='approval')
 
@@ -9,8 +9,12 @@ import logging
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 from collections import deque
-from threading import Lock
+from threading import RLock
 from flask import Flask, request, jsonify
+from progress_protocol import (
+    negotiate_capabilities, filter_by_sessions, is_session_visible,
+    build_progress_batch, merge_progress_batches, PROGRESS_BATCH_TYPE
+)
 
 logger = logging.getLogger('junmai_autodev.websocket_fallback')
 
@@ -37,7 +41,8 @@ class WebSocketFallbackServer:
         self.max_queue_size = max_message_queue_size
         self.clients: Dict[str, Dict] = {}
         self.message_queues: Dict[str, deque] = {}
-        self.lock = Lock()
+        # Re-entrant: broadcast helpers queue messages while holding the lock
+        self.lock = RLock()
         
         # Register routes
         self._register_routes()
@@ -211,7 +216,9 @@ class WebSocketFallbackServer:
                         'client_type': info['client_type'],
                         'connected_at': info['connected_at'].isoformat(),
                         'last_poll': info['last_poll'].isoformat(),
-                        'subscriptions': list(info['subscriptions'])
+                        'subscriptions': list(info['subscriptions']),
+                        'sessions': list(info.get('sessions', set())),
+                        'progress_batch': info.get('progress_batch', False)
                     }
                     for info in self.clients.values()
                 ]
@@ -245,27 +252,37 @@ class WebSocketFallbackServer:
             return {'type': 'pong', 'timestamp': datetime.now().isoformat()}
         
         elif msg_type == 'register':
+            # Polling responses are JSON, so binary encodings are not offered
+            capabilities = negotiate_capabilities(message.get('capabilities'), allow_binary=False)
             with self.lock:
                 if client_id in self.clients:
                     self.clients[client_id]['client_type'] = message.get('client_type', 'unknown')
                     self.clients[client_id]['client_name'] = message.get('client_name', 'unnamed')
+                    self.clients[client_id].update(capabilities)
             
             return {
                 'type': 'registration_confirmed',
                 'client_type': message.get('client_type'),
-                'client_name': message.get('client_name')
+                'client_name': message.get('client_name'),
+                'capabilities': capabilities
             }
         
         elif msg_type == 'subscribe':
             channels = message.get('channels', [])
+            sessions = message.get('sessions')
             with self.lock:
                 if client_id in self.clients:
                     self.clients[client_id]['subscriptions'].update(channels)
+                    if sessions is not None:
+                        self.clients[client_id]['sessions'] = set(sessions)
             
-            return {
+            response = {
                 'type': 'subscription_confirmed',
                 'channels': channels
             }
+            if sessions is not None:
+                response['sessions'] = sessions
+            return response
         
         elif msg_type == 'unsubscribe':
             channels = message.get('channels', [])
@@ -309,10 +326,64 @@ class WebSocketFallbackServer:
                 if channel and channel not in client_info['subscriptions']:
                     continue
                 
+                if not is_session_visible(message, client_info.get('sessions')):
+                    continue
+                
                 self._queue_message(client_id, message)
         
         logger.debug(f"Broadcast message: {message.get('type')} (channel: {channel})")
     
+    def broadcast_frame(self, updates: List[Dict], channel: Optional[str] = 'jobs'):
+        """
+        Queue one frame of coalesced progress updates
+        
+        A client that has not polled since the previous frame keeps a single
+        pending batch holding the latest state of each job, so slow pollers
+        receive current progress instead of a backlog.
+        
+        Args:
+            updates: Latest progress message of each job
+            channel: Channel the updates belong to
+        """
+        if not updates:
+            return
+        
+        with self.lock:
+            for client_id, client_info in self.clients.items():
+                if channel and channel not in client_info['subscriptions']:
+                    continue
+                
+                visible = filter_by_sessions(updates, client_info.get('sessions'))
+                if not visible:
+                    continue
+                
+                if client_info.get('progress_batch'):
+                    self._queue_progress_batch(client_id, build_progress_batch(visible))
+                else:
+                    for update in visible:
+                        self._queue_message(client_id, update)
+    
+    def _queue_progress_batch(self, client_id: str, batch: Dict):
+        """
+        Queue a progress batch, merging it into a batch that is still pending
+        
+        Args:
+            client_id: Client identifier
+            batch: Progress batch message
+        """
+        with self.lock:
+            queue = self.message_queues.get(client_id)
+            if queue is None:
+                return
+            
+            for index, pending in enumerate(queue):
+                if pending.get('type') == PROGRESS_BATCH_TYPE:
+                    del queue[index]
+                    batch = merge_progress_batches(pending, batch)
+                    break
+            
+            queue.append(batch)
+    
     def send_to_client(self, client_id: str, message: Dict):
         """
         Send message to specific client
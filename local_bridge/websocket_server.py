@@ -4,17 +4,322 @@
 # between the Python bridge and Lightroom plugin
 
 import json
+import time
 import logging
 import threading
-from typing import Dict, Set, Optional, Callable
+from collections import deque
+from typing import Any, Dict, List, Set, Optional, Callable
 from datetime import datetime
 from flask import Flask
 from flask_sock import Sock
 from simple_websocket import Server, ConnectionClosed
+from progress_protocol import (
+    negotiate_capabilities, filter_by_sessions, is_session_visible,
+    build_progress_batch, merge_progress_batches, encode_message,
+    ENCODING_JSON, PROGRESS_BATCH_TYPE
+)
 
 logger = logging.getLogger('junmai_autodev.websocket')
 
 
+# Messages that only carry the latest state of something: a newer message
+# with the same key replaces the queued one (or is merged into it, see
+# MERGE_FUNCTIONS)
+MERGE_KEYS: Dict[str, Callable[[Dict], Any]] = {
+    'job_progress': lambda m: m.get('job_id'),
+    PROGRESS_BATCH_TYPE: lambda m: None,
+    'queue_status': lambda m: None,
+    'system_status': lambda m: None,
+    'approval_queue_updated': lambda m: None,
+    'session_updated': lambda m: m.get('session_id'),
+}
+
+
+def merge_approval_queue_deltas(older: Dict, newer: Dict) -> Dict:
+    """
+    Merge two queued 'approval_queue_updated' deltas into one
+    
+    The result is equivalent to applying older then newer: a photo removed
+    by newer is dropped from older's added list, a photo added again by
+    newer is dropped from older's removed list.
+    
+    Args:
+        older: Delta still waiting for delivery
+        newer: Latest delta
+        
+    Returns:
+        Merged delta message
+    """
+    newer_added = newer.get('added') or []
+    newer_removed = newer.get('removed') or []
+    readded = {item['photo_id'] for item in newer_added}
+    
+    added = {item['photo_id']: item for item in older.get('added') or []
+             if item['photo_id'] not in newer_removed}
+    for item in newer_added:
+        added.pop(item['photo_id'], None)
+        added[item['photo_id']] = item
+    
+    removed = [photo_id for photo_id in older.get('removed') or [] if photo_id not in readded]
+    removed.extend(photo_id for photo_id in newer_removed if photo_id not in removed)
+    
+    merged = dict(newer)
+    merged.pop('session_id', None)
+    if older.get('session_id') == newer.get('session_id') and newer.get('session_id'):
+        merged['session_id'] = newer['session_id']
+    merged.pop('added', None)
+    merged.pop('removed', None)
+    if added:
+        merged['added'] = list(added.values())
+    if removed:
+        merged['removed'] = removed
+    return merged
+
+
+# Merge functions for MERGE_KEYS types whose messages accumulate instead of
+# replacing each other
+MERGE_FUNCTIONS: Dict[str, Callable[[Dict, Dict], Dict]] = {
+    PROGRESS_BATCH_TYPE: merge_progress_batches,
+    'approval_queue_updated': merge_approval_queue_deltas,
+}
+
+# Messages that may be dropped first when a client's queue is full
+DROPPABLE_TYPES = {
+    'job_progress', PROGRESS_BATCH_TYPE, 'queue_status', 'system_status',
+    'resource_warning', 'photo_info', 'pong'
+}
+
+
+class _Outbound:
+    """Queued outbound message (identity-compared)"""
+    __slots__ = ('msg_type', 'message', 'encoding', 'payload', 'enqueued_at')
+    
+    def __init__(self, message: Dict, encoding: str, payload=None):
+        self.msg_type = message.get('type')
+        self.message = message
+        self.encoding = encoding
+        self.payload = payload
+        self.enqueued_at = time.monotonic()
+
+
+class ClientSendQueue:
+    """
+    Bounded outbound queue for one WebSocket connection
+    
+    Producers only append to the queue; a dedicated writer thread performs
+    the network I/O. When the queue is full, state-style messages are
+    merged or dropped oldest-first. A client that keeps the queue
+    overflowing for longer than slow_consumer_timeout is reported through
+    on_slow_consumer so the server can evict it.
+    """
+    
+    def __init__(
+        self,
+        ws: Server,
+        max_size: int = 256,
+        slow_consumer_timeout: float = 30.0,
+        on_slow_consumer: Optional[Callable[[Server, str], None]] = None
+    ):
+        """
+        Initialize send queue and start its writer thread
+        
+        Args:
+            ws: WebSocket connection
+            max_size: Maximum number of queued messages
+            slow_consumer_timeout: Seconds of continuous overflow before eviction
+            on_slow_consumer: Callback invoked once with (ws, reason) on eviction
+        """
+        self.ws = ws
+        self.max_size = max_size
+        self.slow_consumer_timeout = slow_consumer_timeout
+        self.on_slow_consumer = on_slow_consumer
+        
+        self.entries: deque = deque()
+        self.merge_index: Dict[tuple, _Outbound] = {}
+        self.cond = threading.Condition()
+        self.closed = False
+        self.sending = False
+        self.evicted = False
+        self.overflow_since: Optional[float] = None
+        
+        self.metrics = {
+            'enqueued': 0,
+            'sent': 0,
+            'merged': 0,
+            'dropped': 0,
+            'send_errors': 0,
+            'max_depth': 0,
+            'total_latency_ms': 0.0,
+            'max_latency_ms': 0.0,
+            'last_send_ms': 0.0,
+        }
+        
+        self.thread = threading.Thread(target=self._drain, daemon=True)
+        self.thread.start()
+    
+    def put(self, message: Dict, encoding: str, payload=None) -> bool:
+        """
+        Queue a message without blocking on network I/O
+        
+        Args:
+            message: Message dictionary
+            encoding: Wire encoding for this client
+            payload: Pre-encoded payload shared across clients (optional)
+            
+        Returns:
+            False if the queue is closed
+        """
+        evict_reason = None
+        
+        with self.cond:
+            if self.closed:
+                return False
+            
+            self.metrics['enqueued'] += 1
+            msg_type = message.get('type')
+            
+            # Merge into a queued message carrying older state
+            if msg_type in MERGE_KEYS:
+                key = (msg_type, MERGE_KEYS[msg_type](message))
+                queued = self.merge_index.get(key)
+                if queued is not None:
+                    if msg_type in MERGE_FUNCTIONS:
+                        queued.message = MERGE_FUNCTIONS[msg_type](queued.message, message)
+                        queued.payload = None
+                    else:
+                        queued.message = message
+                        queued.payload = payload
+                    self.metrics['merged'] += 1
+                    return True
+            
+            if len(self.entries) >= self.max_size:
+                self._drop_one()
+                if self.overflow_since is None:
+                    self.overflow_since = time.monotonic()
+            
+            # Overflow lasts until the writer drains the queue to half size
+            if self.overflow_since is not None and not self.evicted:
+                overflow_for = time.monotonic() - self.overflow_since
+                if overflow_for > self.slow_consumer_timeout:
+                    self.evicted = True
+                    evict_reason = f"send queue overflowing for {overflow_for:.1f}s"
+            
+            entry = _Outbound(message, encoding, payload)
+            self.entries.append(entry)
+            if msg_type in MERGE_KEYS:
+                self.merge_index[(msg_type, MERGE_KEYS[msg_type](message))] = entry
+            self.metrics['max_depth'] = max(self.metrics['max_depth'], len(self.entries))
+            self.cond.notify()
+        
+        if evict_reason and self.on_slow_consumer:
+            self.on_slow_consumer(self.ws, evict_reason)
+        
+        return True
+    
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Wait until all queued messages have been written
+        
+        Args:
+            timeout: Maximum seconds to wait
+            
+        Returns:
+            True if the queue drained in time
+        """
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            while (self.entries or self.sending) and not self.closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.cond.wait(remaining)
+            return not self.entries
+    
+    def close(self):
+        """Stop the writer thread, discarding unsent messages"""
+        with self.cond:
+            self.closed = True
+            self.entries.clear()
+            self.merge_index.clear()
+            self.cond.notify_all()
+    
+    def depth(self) -> int:
+        """Get number of queued messages"""
+        with self.cond:
+            return len(self.entries)
+    
+    def get_metrics(self) -> Dict:
+        """
+        Get queue depth and send latency metrics
+        
+        Returns:
+            Metrics dictionary
+        """
+        with self.cond:
+            metrics = dict(self.metrics)
+            metrics['depth'] = len(self.entries)
+            metrics['max_size'] = self.max_size
+            metrics['avg_latency_ms'] = (
+                metrics['total_latency_ms'] / metrics['sent'] if metrics['sent'] else 0.0
+            )
+            metrics['overflowing'] = self.overflow_since is not None
+        return metrics
+    
+    def _drop_one(self):
+        """Drop the oldest droppable message, or the oldest message (lock held)"""
+        victim = next((e for e in self.entries if e.msg_type in DROPPABLE_TYPES), None)
+        if victim is None:
+            victim = self.entries[0]
+        self.entries.remove(victim)
+        self._unindex(victim)
+        self.metrics['dropped'] += 1
+    
+    def _unindex(self, entry: _Outbound):
+        """Remove an entry from the merge index (lock held)"""
+        if entry.msg_type in MERGE_KEYS:
+            key = (entry.msg_type, MERGE_KEYS[entry.msg_type](entry.message))
+            if self.merge_index.get(key) is entry:
+                del self.merge_index[key]
+    
+    def _drain(self):
+        """Writer loop (runs in separate thread)"""
+        while True:
+            with self.cond:
+                while not self.entries and not self.closed:
+                    self.cond.wait()
+                if self.closed:
+                    return
+                entry = self.entries.popleft()
+                self._unindex(entry)
+                self.sending = True
+            
+            started = time.monotonic()
+            try:
+                payload = entry.payload
+                if payload is None:
+                    payload = encode_message(entry.message, entry.encoding)
+                self.ws.send(payload)
+                failed = False
+            except Exception as e:
+                failed = True
+                logger.error(f"Failed to send message to client: {e}")
+            finished = time.monotonic()
+            
+            with self.cond:
+                self.sending = False
+                if failed:
+                    self.metrics['send_errors'] += 1
+                else:
+                    latency_ms = (finished - entry.enqueued_at) * 1000
+                    self.metrics['sent'] += 1
+                    self.metrics['total_latency_ms'] += latency_ms
+                    self.metrics['max_latency_ms'] = max(self.metrics['max_latency_ms'], latency_ms)
+                    self.metrics['last_send_ms'] = (finished - started) * 1000
+                if len(self.entries) <= self.max_size // 2:
+                    self.overflow_since = None
+                self.cond.notify_all()
+
+
 class WebSocketServer:
     """
     WebSocket server for real-time communication with Lightroom plugin
@@ -28,17 +333,24 @@ class WebSocketServer:
     Requirements: 4.5
     """
     
-    def __init__(self, app: Flask):
+    def __init__(self, app: Flask, max_queue_size: int = 256, slow_consumer_timeout: float = 30.0):
         """
         Initialize WebSocket server
         
         Args:
             app: Flask application instance
+            max_queue_size: Maximum outbound messages queued per client
+            slow_consumer_timeout: Seconds a client may keep its queue
+                overflowing before it is disconnected
         """
         self.app = app
         self.sock = Sock(app)
         self.clients: Set[Server] = set()
         self.client_info: Dict[Server, Dict] = {}
+        self.send_queues: Dict[Server, ClientSendQueue] = {}
+        self.max_queue_size = max_queue_size
+        self.slow_consumer_timeout = slow_consumer_timeout
+        self.evicted_count = 0
         self.lock = threading.Lock()
         self.message_handlers: Dict[str, Callable] = {}
         
@@ -102,6 +414,9 @@ class WebSocketServer:
             with self.lock:
                 self.clients.discard(ws)
                 self.client_info.pop(ws, None)
+                send_queue = self.send_queues.pop(ws, None)
+            if send_queue:
+                send_queue.close()
             
             logger.info(f"Client {client_id} disconnected. Active clients: {len(self.clients)}")
     
@@ -158,39 +473,50 @@ class WebSocketServer:
         })
     
     def _handle_register(self, ws: Server, message: Dict):
-        """Handle client registration"""
+        """Handle client registration and capability negotiation"""
         client_type = message.get('client_type', 'unknown')
         client_name = message.get('client_name', 'unnamed')
+        capabilities = negotiate_capabilities(message.get('capabilities'))
+        
+        # Confirmation is always JSON so the client can read the outcome
+        self._send_to_client(ws, {
+            'type': 'registration_confirmed',
+            'client_type': client_type,
+            'client_name': client_name,
+            'capabilities': capabilities
+        }, encoding=ENCODING_JSON)
         
         with self.lock:
             if ws in self.client_info:
                 self.client_info[ws]['client_type'] = client_type
                 self.client_info[ws]['client_name'] = client_name
+                self.client_info[ws].update(capabilities)
         
-        logger.info(f"Client registered: {client_name} ({client_type})")
-        
-        self._send_to_client(ws, {
-            'type': 'registration_confirmed',
-            'client_type': client_type,
-            'client_name': client_name
-        })
+        logger.info(f"Client registered: {client_name} ({client_type}), capabilities: {capabilities}")
     
     def _handle_subscribe(self, ws: Server, message: Dict):
         """Handle subscription to event channels"""
         channels = message.get('channels', [])
+        sessions = message.get('sessions')
         
         with self.lock:
             if ws in self.client_info:
                 if 'subscriptions' not in self.client_info[ws]:
                     self.client_info[ws]['subscriptions'] = set()
                 self.client_info[ws]['subscriptions'].update(channels)
+                if sessions is not None:
+                    # Empty list clears the session filter
+                    self.client_info[ws]['sessions'] = set(sessions)
         
-        logger.info(f"Client subscribed to channels: {channels}")
+        logger.info(f"Client subscribed to channels: {channels}, sessions: {sessions}")
         
-        self._send_to_client(ws, {
+        response = {
             'type': 'subscription_confirmed',
             'channels': channels
-        })
+        }
+        if sessions is not None:
+            response['sessions'] = sessions
+        self._send_to_client(ws, response)
     
     def _handle_unsubscribe(self, ws: Server, message: Dict):
         """Handle unsubscription from event channels"""
@@ -207,18 +533,88 @@ class WebSocketServer:
             'channels': channels
         })
     
-    def _send_to_client(self, ws: Server, message: Dict):
+    def _send_to_client(self, ws: Server, message: Dict, encoding: Optional[str] = None):
         """
         Send message to specific client
         
         Args:
             ws: WebSocket connection
             message: Message dictionary to send
+            encoding: Override of the client's negotiated encoding
+        """
+        if encoding is None:
+            encoding = self.client_info.get(ws, {}).get('encoding', ENCODING_JSON)
+        self._enqueue(ws, message, encoding)
+    
+    def _get_send_queue(self, ws: Server) -> Optional[ClientSendQueue]:
+        """
+        Get (or create) the outbound queue of a connected client
+        
+        Args:
+            ws: WebSocket connection
+            
+        Returns:
+            ClientSendQueue or None if the client is not connected
+        """
+        with self.lock:
+            send_queue = self.send_queues.get(ws)
+            if send_queue is None and ws in self.clients:
+                send_queue = ClientSendQueue(
+                    ws,
+                    max_size=self.max_queue_size,
+                    slow_consumer_timeout=self.slow_consumer_timeout,
+                    on_slow_consumer=self._evict_slow_consumer
+                )
+                self.send_queues[ws] = send_queue
+            return send_queue
+    
+    def _enqueue(self, ws: Server, message: Dict, encoding: str, payload=None):
+        """
+        Queue a message for a client; never blocks on network I/O
+        
+        Args:
+            ws: WebSocket connection
+            message: Message dictionary
+            encoding: Wire encoding
+            payload: Pre-encoded payload (optional)
+        """
+        send_queue = self._get_send_queue(ws)
+        if send_queue is None:
+            logger.debug(f"Dropping message for disconnected client: {message.get('type')}")
+            return
+        send_queue.put(message, encoding, payload)
+    
+    def _evict_slow_consumer(self, ws: Server, reason: str):
         """
+        Disconnect a client that cannot keep up with its send queue
+        
+        Args:
+            ws: WebSocket connection
+            reason: Eviction reason
+        """
+        with self.lock:
+            info = self.client_info.get(ws, {})
+            self.clients.discard(ws)
+            self.client_info.pop(ws, None)
+            send_queue = self.send_queues.pop(ws, None)
+            self.evicted_count += 1
+        
+        logger.warning(f"Evicting slow WebSocket client {info.get('id')} "
+                       f"({info.get('client_type', 'unknown')}): {reason}")
+        
+        if send_queue:
+            send_queue.close()
+        
+        # Close from a separate thread: the socket may be stuck in send()
+        threading.Thread(target=self._close_quietly, args=(ws,), daemon=True).start()
+    
+    @staticmethod
+    def _close_quietly(ws: Server):
+        """Close a connection ignoring errors"""
         try:
-            ws.send(json.dumps(message))
-        except Exception as e:
-            logger.error(f"Failed to send message to client: {e}")
+            ws.close()
+        except Exception:
+            pass
     
     def _send_error(self, ws: Server, error_message: str):
         """
@@ -246,21 +642,72 @@ class WebSocketServer:
             clients_to_send = []
             
             for ws in self.clients:
+                info = self.client_info.get(ws, {})
+                
                 # If channel specified, only send to subscribed clients
                 if channel:
-                    subscriptions = self.client_info.get(ws, {}).get('subscriptions', set())
+                    subscriptions = info.get('subscriptions', set())
                     if channel not in subscriptions:
                         continue
                 
-                clients_to_send.append(ws)
+                if not is_session_visible(message, info.get('sessions')):
+                    continue
+                
+                clients_to_send.append((ws, info.get('encoding', ENCODING_JSON)))
         
-        # Send outside of lock to avoid blocking
-        for ws in clients_to_send:
+        # Encode once per encoding; writers do the I/O
+        payloads = {}
+        for ws, encoding in clients_to_send:
             try:
-                ws.send(json.dumps(message))
+                if encoding not in payloads:
+                    payloads[encoding] = encode_message(message, encoding)
+                self._enqueue(ws, message, encoding, payloads[encoding])
             except Exception as e:
                 logger.error(f"Failed to broadcast to client: {e}")
     
+    def broadcast_frame(self, updates: List[Dict], channel: Optional[str] = 'jobs'):
+        """
+        Broadcast one frame of coalesced progress updates
+        
+        Clients that negotiated progress_batch receive a single compact
+        'job_progress_batch' message; others receive each update as-is.
+        Channel and session filters are applied per client.
+        
+        Args:
+            updates: Latest progress message of each job
+            channel: Channel the updates belong to
+        """
+        if not updates:
+            return
+        
+        with self.lock:
+            targets = []
+            for ws in self.clients:
+                info = self.client_info.get(ws, {})
+                if channel and channel not in info.get('subscriptions', set()):
+                    continue
+                sessions = info.get('sessions')
+                targets.append((
+                    ws,
+                    frozenset(sessions) if sessions else None,
+                    info.get('progress_batch', False),
+                    info.get('encoding', ENCODING_JSON)
+                ))
+        
+        # Clients with identical filters and capabilities share one payload
+        payloads = {}
+        for ws, sessions, batched, encoding in targets:
+            key = (sessions, batched, encoding)
+            try:
+                if key not in payloads:
+                    visible = filter_by_sessions(updates, sessions)
+                    messages = [build_progress_batch(visible)] if batched and visible else visible
+                    payloads[key] = [(m, encode_message(m, encoding)) for m in messages]
+                for message, payload in payloads[key]:
+                    self._enqueue(ws, message, encoding, payload)
+            except Exception as e:
+                logger.error(f"Failed to broadcast progress frame to client: {e}")
+    
     def send_to_client_type(self, client_type: str, message: Dict):
         """
         Send message to all clients of specific type
@@ -277,7 +724,7 @@ class WebSocketServer:
         
         for ws in clients_to_send:
             try:
-                ws.send(json.dumps(message))
+                self._send_to_client(ws, message)
             except Exception as e:
                 logger.error(f"Failed to send to client type {client_type}: {e}")
     
@@ -307,10 +754,40 @@ class WebSocketServer:
                     'client_name': info.get('client_name', 'unnamed'),
                     'connected_at': info['connected_at'].isoformat(),
                     'last_ping': info['last_ping'].isoformat(),
-                    'subscriptions': list(info.get('subscriptions', set()))
+                    'subscriptions': list(info.get('subscriptions', set())),
+                    'sessions': list(info.get('sessions', set())),
+                    'encoding': info.get('encoding', ENCODING_JSON),
+                    'progress_batch': info.get('progress_batch', False),
+                    'send_queue': (
+                        self.send_queues[ws].get_metrics() if ws in self.send_queues else None
+                    )
                 }
-                for info in self.client_info.values()
+                for ws, info in self.client_info.items()
+            ]
+    
+    def get_send_queue_metrics(self) -> Dict:
+        """
+        Get per-client send queue metrics
+        
+        Returns:
+            Dictionary with per-client queue depth/latency and totals
+        """
+        with self.lock:
+            queues = [
+                (self.client_info.get(ws, {}).get('id'), send_queue)
+                for ws, send_queue in self.send_queues.items()
             ]
+            evicted = self.evicted_count
+        
+        clients = {client_id: send_queue.get_metrics() for client_id, send_queue in queues}
+        return {
+            'clients': clients,
+            'total_depth': sum(m['depth'] for m in clients.values()),
+            'total_dropped': sum(m['dropped'] for m in clients.values()),
+            'evicted_clients': evicted,
+            'max_queue_size': self.max_queue_size,
+            'slow_consumer_timeout': self.slow_consumer_timeout
+        }
     
     def get_client_count(self) -> int:
         """Get number of connected clients"""
@@ -352,6 +829,7 @@ class EventType:
     PHOTO_SELECTED = 'photo_selected'
     PHOTO_APPROVED = 'photo_approved'
     PHOTO_REJECTED = 'photo_rejected'
+    PHOTOS_REVIEWED = 'photos_reviewed'
     
     # Session events
     SESSION_CREATED = 'session_created'